@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Database Maintenance Benchmark Script
+
+Builds a large synthetic sales history on a throwaway cache database,
+churns it the way background sync does (rewrites and deletes), then times
+a few typical screen queries before and after DatabaseMaintenance runs
+its checkpoint, planner statistics and space reclaim tasks.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data_access.db_maintenance import DatabaseMaintenance  # noqa: E402
+from src.data_access.sqlite_cache import SQLiteCacheManager  # noqa: E402
+
+STATUSES = ['delivered'] * 17 + ['invoiced'] * 2 + ['reserved']
+
+
+def build_dataset(cache, rows, customers):
+    """Insert customers and a few years of sales spread across them."""
+    rng = random.Random(42)
+    start = date(2022, 1, 1)
+
+    cache.upsert_many('customers', [
+        {'customer_id': f'C{i:05d}', 'customer_name': f'Customer {i}', 'is_active': 1}
+        for i in range(customers)
+    ])
+
+    batch = []
+    for i in range(rows):
+        day = start + timedelta(days=rng.randrange(4 * 365))
+        quantity = rng.randint(1, 10)
+        batch.append({
+            'sale_id': f'S{i:07d}',
+            'sale_date': day.isoformat(),
+            'delivery_date': (day + timedelta(days=rng.randrange(7))).isoformat(),
+            'customer_id': f'C{rng.randrange(customers):05d}',
+            'beer_name': rng.choice(['Best Bitter', 'IPA', 'Stout', 'Porter', 'Mild']),
+            'container_type': 'Firkin',
+            'container_size': 40.9,
+            'quantity': quantity,
+            'total_litres': quantity * 40.9,
+            'unit_price': 95.0,
+            'line_total': quantity * 95.0,
+            'status': rng.choice(STATUSES),
+            'notes': 'x' * rng.randrange(50, 400),
+        })
+        if len(batch) == 20000:
+            cache.upsert_many('sales', batch)
+            batch = []
+    if batch:
+        cache.upsert_many('sales', batch)
+
+
+def churn(cache, rows):
+    """Rewrite and delete a share of the rows, leaving free pages and a big WAL."""
+    with cache.writer() as conn:
+        conn.execute("UPDATE sales SET notes = notes || 'y' WHERE rowid % 3 = 0")
+        conn.execute("DELETE FROM sales WHERE rowid % 4 = 0")
+        conn.execute("DELETE FROM sync_queue")
+
+
+def time_queries(cache, customers, repeats):
+    """Run the screen queries and return {label: median ms}."""
+    rng = random.Random(7)
+    queries = {
+        'customer delivered history': lambda: cache.find(
+            'sales',
+            where={'customer_id': f'C{rng.randrange(customers):05d}', 'status': 'delivered'},
+            order_by='delivery_date DESC'
+        ),
+        'reserved in date range': lambda: cache.find(
+            'sales',
+            where={'status': 'reserved', 'sale_date >=': '2024-03-01', 'sale_date <': '2024-03-08'}
+        ),
+        'month total by customer': lambda: cache.find(
+            'sales',
+            where={'sale_date >=': '2025-06-01', 'sale_date <': '2025-07-01',
+                   'customer_id': f'C{rng.randrange(customers):05d}'}
+        ),
+    }
+
+    cache.connect()
+    results = {}
+    for label, query in queries.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = statistics.median(timings)
+    cache.close()
+    return results
+
+
+def describe(stats):
+    return (f"db {stats['db_bytes'] / 1048576:7.1f} MB   wal {stats['wal_bytes'] / 1048576:7.1f} MB   "
+            f"free {stats['fragmentation']:6.1%}")
+
+
+def main():
+    """Populate a temp cache and time queries around a maintenance run."""
+    parser = argparse.ArgumentParser(description="Benchmark query latency before/after database maintenance")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=200000,
+        help="Number of sales rows to create"
+    )
+    parser.add_argument(
+        "--customers",
+        type=int,
+        default=400,
+        help="Number of customers the sales are spread across"
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=200,
+        help="Runs per query (median is reported)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SQLiteCacheManager(Path(tmp) / "benchmark.db")
+        cache.connect()
+        cache.initialize_database()
+        cache.close()
+        maintenance = DatabaseMaintenance(cache)
+
+        print(f"Building {args.rows:,} sales rows...")
+        build_dataset(cache, args.rows, args.customers)
+        churn(cache, args.rows)
+
+        print(f"Before: {describe(maintenance.database_stats())}")
+        before = time_queries(cache, args.customers, args.repeats)
+
+        start = time.perf_counter()
+        maintenance.run_due_tasks(force=True)
+        elapsed = time.perf_counter() - start
+
+        print(f"After:  {describe(maintenance.database_stats())}   (maintenance took {elapsed:.2f} s)\n")
+        after = time_queries(cache, args.customers, args.repeats)
+        cache.close_all()
+
+    print(f"{'Query':<30} {'before':>10} {'after':>10} {'speed-up':>9}")
+    for label in before:
+        print(f"{label:<30} {before[label]:8.3f}ms {after[label]:8.3f}ms {before[label] / after[label]:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Query Benchmark Script
+
+Compares repeated single-record lookups written as interpolated WHERE
+strings (get_all_records) against parameterised find() calls, on a
+throwaway cache database.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data_access.sqlite_cache import SQLiteCacheManager  # noqa: E402
+
+
+def time_lookups(label, lookup, ids):
+    """Run lookup(id) for every id and print the timing."""
+    start = time.perf_counter()
+    for record_id in ids:
+        lookup(record_id)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  ({elapsed / len(ids) * 1e6:7.1f} us/lookup)")
+    return elapsed
+
+
+def main():
+    """Populate a temp cache and time both lookup styles."""
+    parser = argparse.ArgumentParser(description="Benchmark interpolated vs parameterised lookups")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=5000,
+        help="Number of recipes to create"
+    )
+    parser.add_argument(
+        "--lookups",
+        type=int,
+        default=20000,
+        help="Number of lookups per style"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SQLiteCacheManager(Path(tmp) / "benchmark.db")
+        cache.connect()
+        cache.initialize_database()
+        cache.close()
+        cache.upsert_many('recipes', [
+            {'recipe_id': f'R{i:06d}', 'recipe_name': f'Recipe {i}', 'is_active': 1}
+            for i in range(args.rows)
+        ])
+
+        ids = [f'R{i % args.rows:06d}' for i in range(0, args.lookups * 7, 7)]
+
+        cache.connect()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            interpolated = time_lookups(
+                "get_all_records(f-string)",
+                lambda rid: cache.get_all_records('recipes', f"recipe_id = '{rid}'"),
+                ids
+            )
+        parameterised = time_lookups(
+            "find(where={...})",
+            lambda rid: cache.find('recipes', where={'recipe_id': rid}),
+            ids
+        )
+        cache.close()
+        cache.close_all()
+
+    print(f"\nSpeed-up: {interpolated / parameterised:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
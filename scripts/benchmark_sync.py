@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Sync Benchmark Script
+
+Runs the real GoogleSheetsClient and SyncManager against the in-process
+fake Sheets backend (src/data_access/fake_sheets.py) and reports, per
+phase, the API calls, bytes on the wire, wall time and the time the same
+run would take against the real per-minute quota.
+
+Two terminals share one spreadsheet:
+    bootstrap   terminal A uploads its whole table to a new spreadsheet
+    pull/scan   terminal B's first sync (no change-log offset yet)
+    push        A pushes 1% updates, 0.5% inserts and 0.1% deletes
+    pull/delta  B's next sync picks those changes up
+
+Time against the quota is simulated on a virtual clock, so a 100k-row
+run finishes in seconds of wall time.
+"""
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data_access.fake_sheets import FakeSheetsBackend, VirtualClock, make_client  # noqa: E402
+from src.data_access.rate_limiter import RateLimiter  # noqa: E402
+from src.data_access.sqlite_cache import SQLiteCacheManager  # noqa: E402
+from src.data_access.sync_manager import SyncManager  # noqa: E402
+
+PHASES = ('bootstrap', 'pull/scan', 'push', 'pull/delta')
+
+
+def make_terminal(path, backend, limiter):
+    cache = SQLiteCacheManager(path)
+    cache.connect()
+    cache.initialize_database()
+    cache.close()
+    manager = SyncManager(make_client(backend, limiter), cache)
+    manager.check_connection = lambda: True
+    return manager
+
+
+def fake_record(table_schema, index, rng, stamp):
+    """A row with every sheet column filled according to its declared type."""
+    record = {}
+    for column in table_schema.sheet_columns:
+        declared = table_schema.types.get(column, '').upper()
+        if 'INT' in declared:
+            record[column] = rng.randrange(1000)
+        elif 'REAL' in declared or 'NUM' in declared:
+            record[column] = round(rng.uniform(0, 500), 2)
+        else:
+            record[column] = f"{column[:6]}-{rng.randrange(10 ** 6):06d}"
+    record[table_schema.primary_key] = f"ID{index:07d}"
+    if table_schema.has_last_modified:
+        record['last_modified'] = stamp
+    return record
+
+
+def edit_locally(cache, table_schema, rows, rng):
+    """Apply the push workload: 1% updates, 0.5% inserts, 0.1% deletes."""
+    pk = table_schema.primary_key
+    editable = [c for c in table_schema.sheet_columns if c not in (pk, 'last_modified')]
+    stamp = '2026-06-01 09:00:00'
+
+    cache.connect()
+    try:
+        for index in rng.sample(range(rows), max(1, rows // 100)):
+            changes = {rng.choice(editable): f"edited-{index}"}
+            if table_schema.has_last_modified:
+                changes['last_modified'] = stamp
+            cache.update_record(table_schema.name, f"ID{index:07d}", changes, pk)
+        cache.upsert_many(table_schema.name, [
+            fake_record(table_schema, rows + i, rng, stamp) for i in range(max(1, rows // 200))
+        ])
+        for index in rng.sample(range(rows), max(1, rows // 1000)):
+            cache.delete_record(table_schema.name, f"ID{index:07d}", pk)
+    finally:
+        cache.close()
+
+
+def measure(backend, clock, action):
+    """Run action() and return its API cost, wall time and quota time."""
+    backend.reset_stats()
+    simulated_start = clock.now
+    start = time.perf_counter()
+    action()
+    return {
+        'reads': backend.stats['reads'],
+        'writes': backend.stats['writes'],
+        'bytes': backend.stats['bytes_sent'] + backend.stats['bytes_received'],
+        'wall': time.perf_counter() - start,
+        'simulated': clock.now - simulated_start,
+        'throttled': backend.stats['errors'][429],
+    }
+
+
+def run(rows, table, latency, tmp):
+    """Benchmark one data size; returns {phase: measurements}."""
+    clock = VirtualClock()
+    backend = FakeSheetsBackend(latency=latency, quota_per_minute=60, clock=clock, sleep=clock.sleep)
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    first = make_terminal(str(Path(tmp) / f"a_{rows}.db"), backend, limiter)
+    second = make_terminal(str(Path(tmp) / f"b_{rows}.db"), backend, limiter)
+    table_schema = first.cache.schema.get(table)
+    rng = random.Random(rows)
+
+    first.cache.upsert_many(table, [
+        fake_record(table_schema, index, rng, '2026-05-01 12:00:00') for index in range(rows)
+    ])
+    spreadsheet_id = first.sheets_client.create_spreadsheet(headers=first.cache.schema.sheet_headers())
+    second.sheets_client.spreadsheet_id = spreadsheet_id
+
+    results = {}
+    results['bootstrap'] = measure(backend, clock, first.bootstrap_sync)
+    results['pull/scan'] = measure(backend, clock, second.incremental_sync)
+    edit_locally(first.cache, table_schema, rows, rng)
+    results['push'] = measure(backend, clock, first.sync_local_changes_to_sheets)
+    results['pull/delta'] = measure(backend, clock, second.incremental_sync)
+
+    first.cache.close_all()
+    second.cache.close_all()
+    return results
+
+
+def format_duration(seconds):
+    if seconds < 120:
+        return f"{seconds:.1f} s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def main():
+    """Run the sync phases at each requested size and print a table."""
+    parser = argparse.ArgumentParser(description="Benchmark SyncManager against a fake Google Sheets backend")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="Table sizes to benchmark"
+    )
+    parser.add_argument(
+        "--table",
+        default="recipes",
+        help="Local table to fill (needs last_modified for the scan pull to see it)"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.2,
+        help="Simulated seconds per API request"
+    )
+    args = parser.parse_args()
+    # Keep retry warnings out of the table; the 429s column counts them
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{'rows':>8} {'phase':<11} {'reads':>6} {'writes':>7} {'bytes':>12} "
+          f"{'wall':>9} {'at quota':>10} {'429s':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            results = run(rows, args.table, args.latency, tmp)
+            for phase in PHASES:
+                r = results[phase]
+                print(f"{rows:>8,} {phase:<11} {r['reads']:>6} {r['writes']:>7} {r['bytes']:>12,} "
+                      f"{r['wall']:>8.2f}s {format_duration(r['simulated']):>10} {r['throttled']:>5}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
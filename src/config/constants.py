@@ -150,6 +150,21 @@ TABLES = {
     "spoilt_beer": "Spoilt_Beer",
 }
 
+# Tables that only ever grow are kept in one sheet per year (e.g. Sales_2026),
+# chosen by this date column, so no single sheet reaches the cell limit.
+# audit_log grows too, but it is local only: it is not in TABLES, has no
+# sync_status and is never written to Sheets, so there is no Audit_Log
+# sheet to shard
+SHARDED_TABLES = {
+    "sales": "sale_date",
+    "inventory_transactions": "transaction_date",
+    "product_sales": "date_sold",
+}
+
+# Years whose shards stay open for edits (this year and last); older shards
+# are closed: read once, never written again
+SHARD_OPEN_YEARS = 2
+
 # User Roles
 USER_ROLES = {
     "admin": "Administrator",
@@ -214,8 +229,9 @@ DISPLAY_DATETIME_FORMAT = "%d/%m/%Y %H:%M"
 # Gyle Number Format
 GYLE_NUMBER_FORMAT = "GYLE-{year}-{number:03d}"
 
-# Invoice Number Format
-INVOICE_NUMBER_FORMAT = "INV-{year}-{number:04d}"
+# Invoice Number Format. Terminals number invoices without talking to
+# each other, so each number carries the issuing terminal's code
+INVOICE_NUMBER_FORMAT = "INV-{year}-{terminal}-{number:04d}"
 
 # Production Year (Feb 1 - Jan 31)
 PRODUCTION_YEAR_START_MONTH = 2
@@ -235,6 +251,9 @@ PAYMENT_TERMS = {
 BATCH_STATUSES = ["brewing", "fermenting", "conditioning", "ready", "packaged"]
 SALE_STATUSES = ["reserved", "delivered"]
 INVOICE_STATUSES = ["unpaid", "partially_paid", "paid"]
+# sales.invoice_id values meaning "not invoiced" (blank cells come back from
+# Sheets as '' and older rows hold the text 'None'/'NULL')
+UNINVOICED_IDS = (None, '', 'None', 'NULL')
 STOCK_STATUSES = ["in_stock", "reserved", "sold"]
 
 # Default Prices (can be overridden in system)
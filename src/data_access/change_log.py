@@ -0,0 +1,178 @@
+"""
+Change Log for Brewery Management System
+Append-only `_Changes` sheet that every terminal writes its pushes to, so a
+pull reads only the events since its last visit instead of every row of
+every sheet.
+"""
+
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ..config.constants import DATETIME_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Hidden sheet holding the log (leading underscore keeps it apart from tables)
+CHANGE_LOG_SHEET = '_Changes'
+
+# Shown to anyone who edits the log by hand
+CHANGE_LOG_NOTE = "Sync change log: written by every terminal, do not edit"
+
+CHANGE_LOG_HEADERS = [
+    'change_id', 'terminal_id', 'table_name', 'record_id', 'operation', 'changed_at', 'payload'
+]
+
+# Last column of the log, for A1 ranges (one letter: fewer than 27 columns)
+_LAST_COLUMN = chr(ord('A') + len(CHANGE_LOG_HEADERS) - 1)
+
+
+def change_row(terminal_id: str, table_schema, record_id, record: Optional[Dict] = None) -> List:
+    """
+    Build a change-log row for one pushed record.
+
+    Args:
+        terminal_id: ID of the terminal making the change
+        table_schema: TableSchema of the record's table
+        record_id: Primary key value
+        record: Current record, or None if it was deleted
+
+    Returns:
+        Row in CHANGE_LOG_HEADERS order. The payload carries the record's
+        sheet columns as a JSON object keyed by column name, so readers
+        need nothing but the log, whatever their column order.
+    """
+    if record is None:
+        operation = 'delete'
+        payload = {table_schema.primary_key: record_id}
+    else:
+        operation = 'upsert'
+        payload = {column: '' if record.get(column) is None else record.get(column)
+                   for column in table_schema.sheet_columns}
+    return [
+        uuid.uuid4().hex,
+        terminal_id,
+        table_schema.name,
+        str(record_id),
+        operation,
+        datetime.now().strftime(DATETIME_FORMAT),
+        json.dumps(payload, default=str),
+    ]
+
+
+class ChangeLog:
+    """
+    Reads and writes the shared `_Changes` sheet.
+
+    Rows are only ever appended, so a row number is a stable position in
+    the log: each terminal remembers how many rows it has consumed and a
+    pull reads the range below that, whose size depends on the number of
+    changes since the last sync rather than on the size of the tables.
+    """
+
+    def __init__(self, sheets_client):
+        """
+        Args:
+            sheets_client: GoogleSheetsClient instance
+        """
+        self.sheets_client = sheets_client
+
+    def length(self) -> int:
+        """
+        Number of rows in the log (header included).
+
+        Creates the header row if the log is new, so the result is at least 1.
+
+        Raises:
+            RuntimeError: If the log could not be read (nothing is written,
+                as an unreadable log is not a missing one)
+        """
+        rows = self.sheets_client.read_column(CHANGE_LOG_SHEET, 0)
+        if rows is None:
+            raise RuntimeError(f"Could not read {CHANGE_LOG_SHEET} sheet")
+        if rows:
+            return len(rows)
+        if not self.sheets_client.append_rows(CHANGE_LOG_SHEET, [CHANGE_LOG_HEADERS]):
+            raise RuntimeError(f"Could not initialise {CHANGE_LOG_SHEET} sheet")
+        return 1
+
+    def conceal(self, sheet_info: Dict) -> bool:
+        """
+        Hide the log's sheet and protect it.
+
+        The protection only warns, as every terminal's account appends to
+        the log; it is there to stop edits by hand, which would shift the
+        row offsets terminals keep.
+
+        Args:
+            sheet_info: The log's entry from list_sheets(), updated in place
+
+        Returns:
+            True if the sheet is now hidden and protected
+        """
+        sheet_id = sheet_info.get('sheet_id')
+        if sheet_id is None:
+            return False
+        if not sheet_info.get('hidden') and self.sheets_client.hide_sheet(sheet_id):
+            sheet_info['hidden'] = True
+        if not sheet_info.get('protected') and self.sheets_client.protect_sheet(
+                sheet_id, CHANGE_LOG_NOTE, True):
+            sheet_info['protected'] = True
+        return bool(sheet_info.get('hidden') and sheet_info.get('protected'))
+
+    def append(self, rows: List[List]):
+        """
+        Append change rows in one call.
+
+        Returns:
+            Row number the first one landed on, True if unknown, False on failure
+        """
+        return self.sheets_client.append_rows(CHANGE_LOG_SHEET, rows)
+
+    def read_since(self, offset: int, limit: Optional[int] = None) -> List[List]:
+        """
+        Rows after the first `offset` rows of the log.
+
+        Args:
+            offset: Number of rows already consumed (header included)
+            limit: Read at most this many rows (default: to the end)
+        """
+        last_row = offset + limit if limit else ''
+        return self.sheets_client.read_sheet(CHANGE_LOG_SHEET, f"A{offset + 1}:{_LAST_COLUMN}{last_row}")
+
+    @staticmethod
+    def parse(rows: List[List], skip_terminal: Optional[str] = None) -> List[Dict]:
+        """
+        Decode log rows into change events, in log order.
+
+        Header rows, malformed rows and (optionally) a terminal's own
+        changes are skipped.
+
+        Returns:
+            List of dictionaries with table_name, record_id, operation and
+            record (the payload)
+        """
+        events = []
+        for row in rows:
+            entry = dict(zip(CHANGE_LOG_HEADERS, row))
+            if entry.get('change_id') in (None, '', 'change_id'):
+                continue
+            if skip_terminal and entry.get('terminal_id') == skip_terminal:
+                continue
+            try:
+                record = json.loads(entry.get('payload') or '{}')
+            except ValueError:
+                logger.warning(f"Skipping unreadable change {entry.get('change_id')}")
+                continue
+            if entry.get('operation') not in ('upsert', 'delete') or not isinstance(record, dict):
+                logger.warning(f"Skipping malformed change {entry.get('change_id')}")
+                continue
+            events.append({
+                'table_name': entry.get('table_name'),
+                'record_id': entry.get('record_id'),
+                'operation': entry['operation'],
+                'record': record,
+            })
+        return events
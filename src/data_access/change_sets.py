@@ -0,0 +1,262 @@
+"""
+Change Sets for Brewery Management System
+Local-network sync transport: terminals exchange numbered change-set files
+through a shared folder, without going through Google Sheets.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config.constants import DATETIME_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# <sequence>.json, zero-padded so a directory listing sorts in order
+_FILE_PATTERN = re.compile(r'^(\d+)\.json$')
+# Per-terminal record of what it has applied and pruned
+_PROGRESS_FILE = 'progress.json'
+
+
+class ChangeSetFolder:
+    """
+    A shared folder of change-set files, one subfolder per terminal.
+
+    Each terminal only ever writes to its own subfolder, numbering its
+    files 1, 2, 3... A change set holds rows in the change-log format
+    (see change_log.change_row), so ChangeLog.parse() decodes both. Files
+    are written under a temporary name and renamed into place, so readers
+    never see half a file; a reader that finds a gap in a terminal's
+    numbers stops there until the missing file appears, so every
+    terminal's changes are applied in the order they were made.
+
+    Each terminal also keeps a progress file in its subfolder saying how
+    far it has applied every other terminal's change sets, and deletes its
+    own files once every peer has applied them, or once they are older
+    than RETENTION_SECONDS so a terminal that stopped syncing does not
+    keep them forever. A reader that was too slow skips the deleted
+    files; their changes still reach it through Google Sheets, as the
+    terminal that made them pushes them there too.
+    """
+
+    # Change sets older than this are deleted even if a peer has not applied them
+    RETENTION_SECONDS = 7 * 24 * 60 * 60
+
+    def __init__(self, root, terminal_id: str):
+        """
+        Args:
+            root: Path of the shared folder
+            terminal_id: This terminal's ID (its subfolder name)
+        """
+        self.root = Path(root)
+        self.terminal_id = terminal_id
+
+    @property
+    def own_folder(self) -> Path:
+        return self.root / self.terminal_id
+
+    def last_sequence(self, terminal_id: Optional[str] = None) -> int:
+        """Highest sequence number a terminal has published (0 if none)."""
+        terminal_id = terminal_id or self.terminal_id
+        return max(self._sequences(terminal_id), default=self._pruned_through(terminal_id))
+
+    def publish(self, rows: List[List], sequence: int) -> Path:
+        """
+        Write a change set.
+
+        Args:
+            rows: Change-log rows
+            sequence: This terminal's next sequence number
+
+        Returns:
+            Path of the new file
+        """
+        self.own_folder.mkdir(parents=True, exist_ok=True)
+        path = self.own_folder / f"{sequence:010d}.json"
+        temp_path = self.own_folder / f".{sequence:010d}.json.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'terminal_id': self.terminal_id,
+                'sequence': sequence,
+                'created_at': datetime.now().strftime(DATETIME_FORMAT),
+                'rows': rows,
+            }, handle, separators=(',', ':'), default=str)
+        os.replace(temp_path, path)
+        return path
+
+    def share_progress(self, applied: Dict[str, int]):
+        """
+        Tell the other terminals how far this one has applied their change sets.
+
+        Also registers this terminal as a peer, so others keep their files
+        until it has applied them.
+
+        Args:
+            applied: Dictionary of terminal ID -> last sequence applied
+        """
+        progress = self._progress(self.terminal_id)
+        progress['applied'] = dict(applied)
+        self._write_progress(progress)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Delete this terminal's change sets that are no longer needed.
+
+        A file goes once every peer has applied it or once it is older
+        than RETENTION_SECONDS. Files are deleted oldest first and the
+        highest deleted number is recorded, so readers can tell a pruned
+        gap from a file not written yet.
+
+        Args:
+            now: Current time.time() (injectable for tests)
+
+        Returns:
+            Number of files deleted
+        """
+        now = time.time() if now is None else now
+        peers = [entry.name for entry in self._peer_folders()]
+        # Nobody known to read them: keep files until they expire
+        floor = min((self._progress(peer).get('applied', {}).get(self.terminal_id, 0)
+                     for peer in peers), default=0)
+
+        progress = self._progress(self.terminal_id)
+        pruned_through = progress.get('pruned_through', 0)
+        for sequence in sorted(self._sequences(self.terminal_id)):
+            path = self.own_folder / f"{sequence:010d}.json"
+            try:
+                if sequence > floor and now - path.stat().st_mtime < self.RETENTION_SECONDS:
+                    break
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"Cannot prune change set {path.name}: {e}")
+                break
+            pruned_through = sequence
+
+        deleted = pruned_through - progress.get('pruned_through', 0)
+        if deleted:
+            progress['pruned_through'] = pruned_through
+            self._write_progress(progress)
+            logger.info(f"Pruned change sets up to {pruned_through}")
+        return deleted
+
+    def pending(self, applied: Dict[str, int]) -> List[Tuple[str, int, List[List]]]:
+        """
+        Change sets from other terminals that have not been applied yet.
+
+        Args:
+            applied: Dictionary of terminal ID -> last sequence applied
+
+        Returns:
+            List of (terminal ID, sequence, rows), in sequence order per
+            terminal, stopping at the first missing or unreadable file
+        """
+        found = []
+        for entry in self._peer_folders():
+            terminal_id = entry.name
+            expected = applied.get(terminal_id, 0) + 1
+            sequences = sorted(s for s in self._sequences(terminal_id) if s >= expected)
+            if sequences and sequences[0] != expected:
+                # Files the sender pruned before they were applied here
+                pruned_through = self._pruned_through(terminal_id)
+                if pruned_through >= expected:
+                    logger.warning(f"Change sets {expected}-{pruned_through} from {terminal_id} were "
+                                   f"pruned before being applied; they arrive through Google Sheets")
+                    expected = pruned_through + 1
+            for sequence in sequences:
+                if sequence != expected:
+                    break
+                try:
+                    with open(entry / f"{sequence:010d}.json", encoding='utf-8') as handle:
+                        rows = json.load(handle).get('rows') or []
+                except (OSError, ValueError, AttributeError) as e:
+                    logger.warning(f"Cannot read change set {terminal_id}/{sequence}: {e}")
+                    break
+                found.append((terminal_id, sequence, rows))
+                expected += 1
+        return found
+
+    def _peer_folders(self) -> List[Path]:
+        """Subfolders of the other terminals, in name order."""
+        if not self.root.is_dir():
+            return []
+        return [entry for entry in sorted(self.root.iterdir())
+                if entry.name != self.terminal_id and entry.is_dir()]
+
+    def _progress(self, terminal_id: str) -> Dict:
+        """A terminal's progress file ({} if it has none or it is unreadable)."""
+        try:
+            with open(self.root / terminal_id / _PROGRESS_FILE, encoding='utf-8') as handle:
+                progress = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        return progress if isinstance(progress, dict) else {}
+
+    def _pruned_through(self, terminal_id: str) -> int:
+        """Highest sequence a terminal has pruned (0 if none)."""
+        return self._progress(terminal_id).get('pruned_through', 0)
+
+    def _write_progress(self, progress: Dict):
+        self.own_folder.mkdir(parents=True, exist_ok=True)
+        temp_path = self.own_folder / f".{_PROGRESS_FILE}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(progress, handle, separators=(',', ':'))
+        os.replace(temp_path, self.own_folder / _PROGRESS_FILE)
+
+    def _sequences(self, terminal_id: str) -> List[int]:
+        try:
+            names = os.listdir(self.root / terminal_id)
+        except OSError:
+            return []
+        return [int(match.group(1)) for match in map(_FILE_PATTERN.match, names) if match]
+
+
+class ChangeSetPoller:
+    """
+    One background thread that calls SyncManager.lan_sync() every
+    `interval` seconds, so changes reach the other terminals in well under
+    a second. Each poll is a queue query and a directory listing; nothing
+    touches Google.
+    """
+
+    # Seconds between polls of the queue and the shared folder
+    INTERVAL = 0.5
+
+    def __init__(self, poll: Callable[[], Dict], interval: Optional[float] = None):
+        """
+        Args:
+            poll: Function doing one exchange, normally SyncManager.lan_sync
+            interval: Seconds between polls (default INTERVAL)
+        """
+        self.poll = poll
+        self.interval = self.INTERVAL if interval is None else interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start polling (does nothing if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='change-set-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop polling after the current exchange."""
+        self._stopping.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Local network sync failed: {e}")
+            self._stopping.wait(max(0.0, self.interval - (time.monotonic() - started)))
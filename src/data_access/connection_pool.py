@@ -0,0 +1,117 @@
+# SQLite Connection Pool
+# Hands out reusable SQLite connections so the UI thread and sync threads
+# never share (or close) each other's connection
+
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    A small pool of SQLite connections for one database file.
+
+    Connections are opened with check_same_thread=False so that an idle
+    connection released by one thread can be handed to the next thread that
+    asks for one. A connection is only ever used by one thread at a time;
+    SQLiteCacheManager guarantees that by binding each checked-out connection
+    to the calling thread.
+    """
+
+    def __init__(self, db_path, max_idle=4, timeout=30.0):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            max_idle: Maximum number of idle connections kept open for reuse
+            timeout: Seconds a connection waits on a locked database
+        """
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    def _open(self):
+        """Open and configure a brand new connection."""
+        connection = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False
+        )
+        connection.row_factory = sqlite3.Row  # Access columns by name
+
+        # New files are created in incremental auto-vacuum mode so that
+        # DatabaseMaintenance can hand free pages back without a full VACUUM.
+        # Setting it on an existing file would need the write lock, so skip it.
+        if connection.execute("PRAGMA page_count;").fetchone()[0] == 0:
+            connection.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+
+        # Enable WAL mode for better concurrency (UI reads + Background writes)
+        connection.execute("PRAGMA journal_mode=WAL;")
+        # Shrink the -wal file back to this size after each checkpoint
+        connection.execute("PRAGMA journal_size_limit=4194304;")
+
+        self._opened += 1
+        logger.info(f"Opened pooled SQLite connection #{self._opened} to {self.db_path}")
+        return connection
+
+    def acquire(self):
+        """
+        Take a connection from the pool, opening a new one if none are idle.
+
+        Returns:
+            sqlite3.Connection
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._open()
+
+    def release(self, connection):
+        """
+        Return a connection to the pool.
+
+        Any transaction left open by the caller is rolled back, matching the
+        old behaviour of closing a connection without committing.
+        """
+        if connection is None:
+            return
+
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding broken pooled connection: {e}")
+            self._discard(connection)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                return
+        self._discard(connection)
+
+    def _discard(self, connection):
+        """Close a connection that will not be reused."""
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+    @property
+    def idle_count(self):
+        """Number of idle connections currently held by the pool."""
+        with self._lock:
+            return len(self._idle)
+
+    def close_all(self):
+        """Close every idle connection (called on application shutdown)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+        if idle:
+            logger.info(f"Closed {len(idle)} pooled SQLite connection(s)")
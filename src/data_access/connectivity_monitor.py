@@ -0,0 +1,167 @@
+"""
+Connectivity Monitor for Brewery Management System
+One background thread that tracks whether the app is online, probing
+rarely while things work and backing off while they do not.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectivityMonitor:
+    """
+    Tracks online/offline state and tells listeners when it changes.
+
+    Any successful Google Sheets call is proof of connectivity: report it
+    with report_success() and no probe is needed for another
+    ONLINE_INTERVAL. Otherwise the probe (normally
+    SyncManager.check_connection) runs every ONLINE_INTERVAL seconds while
+    online, and while offline after OFFLINE_INITIAL_INTERVAL seconds,
+    doubling up to OFFLINE_MAX_INTERVAL. Only one probe ever runs at a
+    time, so slow offline probes cannot pile up.
+
+    Listeners are called with (is_online, was_online) on the monitor's
+    thread (or the thread that reported a success) whenever the state
+    changes. was_online is None for the first result, so the initial
+    check is not mistaken for a reconnection.
+    """
+
+    # Seconds between probes while online (skipped after a recent success)
+    ONLINE_INTERVAL = 30.0
+
+    # Offline backoff: first retry delay and its upper bound
+    OFFLINE_INITIAL_INTERVAL = 3.0
+    OFFLINE_MAX_INTERVAL = 120.0
+
+    def __init__(self, probe: Callable[[], bool], online_interval: Optional[float] = None,
+                 offline_initial: Optional[float] = None, offline_max: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            probe: Blocking function returning True if online
+            online_interval: Seconds between probes while online (default ONLINE_INTERVAL)
+            offline_initial: First offline retry delay (default OFFLINE_INITIAL_INTERVAL)
+            offline_max: Longest offline retry delay (default OFFLINE_MAX_INTERVAL)
+            clock: Monotonic time source
+        """
+        self.probe = probe
+        self.online_interval = self.ONLINE_INTERVAL if online_interval is None else online_interval
+        self.offline_initial = self.OFFLINE_INITIAL_INTERVAL if offline_initial is None else offline_initial
+        self.offline_max = self.OFFLINE_MAX_INTERVAL if offline_max is None else offline_max
+        self.clock = clock
+        self.is_online = None
+        self.probes = 0
+        self.last_success = None
+        self._delay = self.offline_initial
+        self._listeners = []
+        self._wake = False
+        self._stopping = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def start(self):
+        """Start the monitor thread; the first probe runs straight away."""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='connectivity-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the monitor (waits for a probe in progress up to timeout)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def add_listener(self, listener: Callable[[bool, Optional[bool]], None]):
+        """Register a function called with (is_online, was_online) on every change."""
+        self._listeners.append(listener)
+
+    def report_success(self):
+        """Note a successful network call; counts as being online."""
+        with self._cond:
+            self.last_success = self.clock()
+        self._set_state(True)
+
+    def wait_for_state(self, timeout: Optional[float] = None) -> Optional[bool]:
+        """
+        Block until the first probe (or reported success) has a result.
+
+        Returns:
+            is_online, or None if it is still unknown after timeout seconds
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.is_online is not None or self._stopping, timeout)
+            return self.is_online
+
+    def check_now(self):
+        """Probe as soon as possible, e.g. after a network error."""
+        with self._cond:
+            self._wake = True
+            self._cond.notify_all()
+
+    def next_delay(self) -> float:
+        """Seconds until the next probe, given the current state."""
+        if self.is_online:
+            return self.online_interval
+        return self._delay
+
+    def _run(self):
+        next_probe = self.clock()
+        while True:
+            with self._cond:
+                while not self._stopping and not self._wake:
+                    wait = next_probe - self.clock()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._stopping:
+                    return
+                self._wake = False
+                recent = (self.is_online and self.last_success is not None
+                          and self.clock() - self.last_success < self.online_interval)
+
+            if recent:
+                # A Sheets call just succeeded; no need to probe
+                next_probe = self.last_success + self.online_interval
+                continue
+
+            try:
+                online = bool(self.probe())
+            except Exception as e:
+                logger.warning(f"Connectivity probe failed: {e}")
+                online = False
+            self.probes += 1
+
+            if online:
+                self._delay = self.offline_initial
+            elif self.is_online is False:
+                # Still offline: back off
+                self._delay = min(self._delay * 2, self.offline_max)
+            self._set_state(online)
+            next_probe = self.clock() + self.next_delay()
+
+    def _set_state(self, online: bool):
+        with self._cond:
+            was_online = self.is_online
+            if was_online == online:
+                return
+            self.is_online = online
+            if online:
+                self._delay = self.offline_initial
+            self._cond.notify_all()
+
+        logger.info(f"Connectivity: {'online' if online else 'offline'}")
+        for listener in list(self._listeners):
+            try:
+                listener(online, was_online)
+            except Exception as e:
+                logger.error(f"Connectivity listener failed: {e}")
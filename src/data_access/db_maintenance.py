@@ -0,0 +1,221 @@
+"""
+Database Maintenance for Brewery Management System
+Keeps the local SQLite cache healthy under constant background-sync writes:
+WAL checkpoints, planner statistics and reclaiming free pages.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseMaintenance:
+    """
+    Periodic housekeeping for the SQLite cache.
+
+    The class only decides what is due and runs it; the caller decides
+    when the app is idle enough to call run_due_tasks() (the main window
+    drives it from the Tk after() loop and runs it off the UI thread).
+    """
+
+    # Task methods, in the order they run. The checkpoint goes last so the
+    # pages written by the other two are folded back into the main file
+    TASKS = ('reclaim_space', 'optimize', 'checkpoint')
+
+    # Seconds between runs of each task
+    CHECKPOINT_INTERVAL = 5 * 60
+    OPTIMIZE_INTERVAL = 6 * 60 * 60
+    VACUUM_INTERVAL = 24 * 60 * 60
+
+    # Checkpoint early once the WAL grows past this many bytes
+    WAL_CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+    # Only reclaim space once this fraction of the file is free pages
+    VACUUM_FREE_FRACTION = 0.10
+    # Pages released per incremental_vacuum call, so no single run holds
+    # the write lock for long
+    VACUUM_PAGES_PER_RUN = 2000
+
+    def __init__(self, cache_manager, clock=time.monotonic):
+        """
+        Args:
+            cache_manager: SQLiteCacheManager instance
+            clock: Function returning seconds (monotonic); injectable for tests
+        """
+        self.cache = cache_manager
+        self.clock = clock
+        self.last_run = {}
+        self.last_results = {}
+        self._running = threading.Lock()
+
+    def database_stats(self) -> Dict:
+        """
+        Size and fragmentation figures for display in Settings.
+
+        Returns:
+            Dictionary with db_bytes, wal_bytes, page_size, page_count,
+            free_pages, fragmentation (0-1) and auto_vacuum mode
+        """
+        db_path = str(self.cache.db_path)
+        with self.cache.reader() as connection:
+            page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+            page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+            auto_vacuum = connection.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+        return {
+            'db_bytes': _file_size(db_path),
+            'wal_bytes': _file_size(db_path + '-wal'),
+            'page_size': page_size,
+            'page_count': page_count,
+            'free_pages': free_pages,
+            'fragmentation': free_pages / page_count if page_count else 0.0,
+            'auto_vacuum': {0: 'none', 1: 'full', 2: 'incremental'}.get(auto_vacuum, str(auto_vacuum)),
+        }
+
+    def checkpoint(self, mode: str = 'TRUNCATE') -> Dict:
+        """
+        Copy the WAL back into the database file.
+
+        TRUNCATE also resets the -wal file to zero bytes, which is what keeps
+        it from growing without bound while connections stay open.
+
+        Returns:
+            Dictionary with busy, wal_frames and checkpointed_frames
+        """
+        mode = mode.upper()
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+
+        with self.cache.reader() as connection:
+            busy, wal_frames, checkpointed = connection.execute(
+                f"PRAGMA wal_checkpoint({mode})"
+            ).fetchone()
+        result = {'busy': bool(busy), 'wal_frames': wal_frames, 'checkpointed_frames': checkpointed}
+        logger.info(f"WAL checkpoint ({mode}): {result}")
+        return result
+
+    def optimize(self) -> Dict:
+        """
+        Refresh query planner statistics.
+
+        The first run does a full ANALYZE; afterwards PRAGMA optimize only
+        re-analyzes tables whose statistics look stale.
+        """
+        with self.cache.writer() as connection:
+            analyzed = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone() is not None
+            if not analyzed:
+                connection.execute("ANALYZE")
+            connection.execute("PRAGMA optimize")
+        result = {'full_analyze': not analyzed}
+        logger.info(f"Planner statistics refreshed: {result}")
+        return result
+
+    def reclaim_space(self, max_pages: Optional[int] = None, full: bool = False) -> Dict:
+        """
+        Hand free pages back to the file system.
+
+        Uses incremental_vacuum when the database was created in
+        incremental auto-vacuum mode. Older databases need a one-off VACUUM
+        to convert them, which rewrites the whole file while holding the
+        write lock; it only runs when asked for with `full` (the Settings
+        button), never from the idle scheduler.
+
+        Args:
+            max_pages: Pages to free at most (default VACUUM_PAGES_PER_RUN)
+            full: Convert an older database with a full VACUUM
+
+        Returns:
+            Dictionary with method ('incremental', 'vacuum' or 'skipped')
+            and freed_pages
+        """
+        max_pages = max_pages or self.VACUUM_PAGES_PER_RUN
+        before = self.database_stats()
+        if before['auto_vacuum'] != 'incremental' and not full:
+            logger.info("Database needs a full VACUUM to reclaim space; run maintenance from Settings")
+            return {'method': 'skipped', 'freed_pages': 0}
+
+        with self.cache.exclusive() as connection:
+            if before['auto_vacuum'] == 'incremental':
+                # executescript steps the pragma to completion; execute()
+                # would stop after freeing a single page
+                connection.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+                method = 'incremental'
+            else:
+                connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                connection.execute("VACUUM")
+                method = 'vacuum'
+
+        freed = before['free_pages'] - self.database_stats()['free_pages']
+        result = {'method': method, 'freed_pages': max(freed, 0)}
+        logger.info(f"Reclaimed space: {result}")
+        return result
+
+    def due_tasks(self, stats: Optional[Dict] = None) -> List[str]:
+        """
+        Names of the tasks that should run now, in the order to run them.
+
+        Args:
+            stats: Optional database_stats() result to avoid reading it twice
+        """
+        stats = stats or self.database_stats()
+        now = self.clock()
+        due = []
+
+        if (self._is_due('reclaim_space', self.VACUUM_INTERVAL, now)
+                and stats['fragmentation'] >= self.VACUUM_FREE_FRACTION):
+            due.append('reclaim_space')
+        if self._is_due('optimize', self.OPTIMIZE_INTERVAL, now):
+            due.append('optimize')
+        if (self._is_due('checkpoint', self.CHECKPOINT_INTERVAL, now)
+                or stats['wal_bytes'] > self.WAL_CHECKPOINT_BYTES):
+            due.append('checkpoint')
+        return due
+
+    def run_due_tasks(self, force: bool = False) -> Dict[str, Dict]:
+        """
+        Run whatever maintenance is due. Safe to call from a worker thread;
+        overlapping calls return immediately.
+
+        Args:
+            force: Run every task regardless of schedule, including a full
+                VACUUM of an older database (Settings button)
+
+        Returns:
+            Dictionary of task name -> result (empty if nothing ran)
+        """
+        if not self._running.acquire(blocking=False):
+            return {}
+        try:
+            results = {}
+            for task in (self.TASKS if force else self.due_tasks()):
+                try:
+                    if task == 'reclaim_space':
+                        results[task] = self.reclaim_space(full=force)
+                    else:
+                        results[task] = getattr(self, task)()
+                except Exception as e:
+                    logger.error(f"Database maintenance task {task} failed: {e}")
+                    results[task] = {'error': str(e)}
+                self.last_run[task] = self.clock()
+            self.last_results.update(results)
+            return results
+        finally:
+            self._running.release()
+
+    def _is_due(self, task, interval, now):
+        last = self.last_run.get(task)
+        return last is None or now - last >= interval
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,599 @@
+"""
+Fake Google Sheets Backend for Brewery Management System
+In-process stand-in for the subset of the Sheets v4 API that
+GoogleSheetsClient uses, for load tests and sync benchmarks.
+
+Usage:
+    backend = FakeSheetsBackend(latency=0.05, quota_per_minute=60)
+    client.service = backend.service()
+
+Spreadsheets live in memory. Every request is counted with its
+approximate wire size, can be delayed, is subject to per-minute read and
+write quotas (429 when exceeded) and can be made to fail on demand.
+"""
+
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+try:
+    from googleapiclient.errors import HttpError
+except ImportError:  # Google client not installed (e.g. CI): same shape, own class
+    HttpError = None
+
+
+class FakeResponse(dict):
+    """Mimics httplib2.Response: a dict of headers with status and reason."""
+
+    def __init__(self, status: int, reason: str = '', headers: Optional[Dict] = None):
+        super().__init__(headers or {})
+        self.status = status
+        self.reason = reason
+
+
+class FakeHttpError(Exception):
+    """Used in place of googleapiclient's HttpError when it is unavailable."""
+
+    def __init__(self, resp, content, uri=None):
+        self.resp = resp
+        self.content = content
+        self.uri = uri
+        message = json.loads(content.decode('utf-8'))['error']['message']
+        super().__init__(f'<HttpError {resp.status} when requesting {uri} returned "{message}">')
+
+
+def http_error(status: int, message: str, retry_after: Optional[float] = None):
+    """Build the error the real client would raise for an API failure."""
+    headers = {'retry-after': str(retry_after)} if retry_after is not None else {}
+    resp = FakeResponse(status, message, headers)
+    content = json.dumps({'error': {'code': status, 'message': message}}).encode('utf-8')
+    error_class = HttpError or FakeHttpError
+    return error_class(resp, content)
+
+
+_CELL = re.compile(r'^([A-Z]*)(\d*)$')
+
+
+def _column_index(letters: str) -> int:
+    """1-based column number of A1 column letters (A -> 1, AA -> 27)."""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index
+
+
+def _column_letters(index: int) -> str:
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def parse_range(a1: str):
+    """
+    Split an A1 range into its sheet and bounds.
+
+    Returns:
+        Tuple (sheet, first_row, first_col, last_row, last_col), 1-based and
+        inclusive; last_row/last_col are None when the range is open-ended
+        ('Sales', 'Sales!A5:G', 'Sales!5:5', 'Sales!A:A', 'Sales!A1')
+
+    Raises:
+        ValueError if the cell part cannot be parsed
+    """
+    sheet, _, cells = a1.partition('!')
+    sheet = sheet.strip("'")
+    if not cells:
+        return sheet, 1, 1, None, None
+
+    start, sep, end = cells.partition(':')
+    start_match, end_match = _CELL.match(start), _CELL.match(end if sep else start)
+    if not start_match or not end_match:
+        raise ValueError(a1)
+
+    first_row = int(start_match.group(2)) if start_match.group(2) else 1
+    first_col = _column_index(start_match.group(1)) if start_match.group(1) else 1
+    last_row = int(end_match.group(2)) if end_match.group(2) else None
+    last_col = _column_index(end_match.group(1)) if end_match.group(1) else None
+    return sheet, first_row, first_col, last_row, last_col
+
+
+_ENTERED_NUMBER = re.compile(r'^-?(\d+\.?\d*|\.\d+)$')
+_ENTERED_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}(:\d{2})?)?$')
+# Day 0 of Sheets' date serial numbers
+_SERIAL_EPOCH = datetime(1899, 12, 30)
+
+
+class DateCell(str):
+    """A cell USER_ENTERED parsed as a date: its text as shown, plus its serial number."""
+
+    @property
+    def serial(self) -> float:
+        return (datetime.fromisoformat(self) - _SERIAL_EPOCH).total_seconds() / 86400
+
+
+def enter(value):
+    """Store a value the way valueInputOption=USER_ENTERED parses it."""
+    if not isinstance(value, str):
+        return value
+    if _ENTERED_NUMBER.match(value):
+        return float(value) if '.' in value else int(value)
+    if _ENTERED_DATE.match(value):
+        try:
+            datetime.fromisoformat(value)
+        except ValueError:
+            return value
+        return DateCell(value)
+    return value
+
+
+def render(value, number_format: Optional[str] = None,
+           value_render: str = 'FORMATTED_VALUE', date_render: str = 'SERIAL_NUMBER'):
+    """
+    Show a stored value the way values.get returns it.
+
+    Args:
+        value: Stored cell value
+        number_format: Format string applied to a number shown formatted
+            (e.g. '£{:,.2f}'); dates keep the form they were entered in
+        value_render: valueRenderOption of the request
+        date_render: dateTimeRenderOption, used with UNFORMATTED_VALUE
+    """
+    if value is None:
+        return ''
+    unformatted = value_render == 'UNFORMATTED_VALUE'
+    if isinstance(value, DateCell):
+        return value.serial if unformatted and date_render == 'SERIAL_NUMBER' else str(value)
+    if isinstance(value, bool):
+        if unformatted:
+            return value
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        if unformatted:
+            return value
+        if number_format:
+            return number_format.format(value)
+    return str(value)
+
+
+def _entered(row: List, value_input: str) -> List:
+    """A row's values as stored under the given valueInputOption."""
+    return [enter(value) for value in row] if value_input == 'USER_ENTERED' else list(row)
+
+
+def _trim(rows: List[List]) -> List[List]:
+    """Drop trailing blank cells and rows, as the API does."""
+    trimmed = []
+    for row in rows:
+        row = list(row)
+        while row and row[-1] == '':
+            row.pop()
+        trimmed.append(row)
+    while trimmed and not trimmed[-1]:
+        trimmed.pop()
+    return trimmed
+
+
+class VirtualClock:
+    """Monotonic clock whose sleep() advances time instantly."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self.slept = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+        self.slept += seconds
+
+
+class FakeSheetsBackend:
+    """
+    In-memory Sheets server with call accounting, latency, quotas and faults.
+
+    clock and sleep are injectable: with a virtual clock, latency and quota
+    waits cost no real time, and the virtual time elapsed tells how long a
+    run would take against the real service.
+    """
+
+    # Methods counted against the read quota; everything else is a write
+    READ_METHODS = ('values.get', 'values.batchGet', 'spreadsheets.get')
+
+    def __init__(self, latency: float = 0.0, quota_per_minute: Optional[int] = None,
+                 error_rate: float = 0.0, retry_after: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 seed: int = 0):
+        """
+        Args:
+            latency: Seconds added to every request
+            quota_per_minute: Read and write requests allowed per rolling
+                minute (None = unlimited); excess requests get a 429
+            error_rate: Fraction of requests failing with a random 429/503
+            retry_after: Retry-After seconds sent with injected/quota 429s
+            clock: Time source for quotas
+            sleep: Function used to apply latency
+            seed: Seed for error_rate
+        """
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = random.Random(seed)
+        self.spreadsheets: Dict[str, Dict[str, List[List]]] = {}
+        self.titles: Dict[str, str] = {}
+        # spreadsheet ID -> sheet title -> (sheetId, hidden, protected range
+        # descriptions, number formats by 0-based column)
+        self.sheet_meta: Dict[str, Dict[str, Dict]] = {}
+        self._recent = {'read': deque(), 'write': deque()}
+        self._faults = deque()
+        self.reset_stats()
+
+    # ---- instrumentation -------------------------------------------------
+
+    def reset_stats(self):
+        """Zero the counters in `stats`."""
+        self.stats = {
+            'calls': Counter(),
+            'reads': 0,
+            'writes': 0,
+            'bytes_sent': 0,
+            'bytes_received': 0,
+            'errors': Counter(),
+        }
+
+    @property
+    def api_calls(self) -> int:
+        return self.stats['reads'] + self.stats['writes']
+
+    def fail_next(self, status: int = 429, count: int = 1, retry_after: Optional[float] = None):
+        """Make the next `count` requests fail with the given HTTP status."""
+        for _ in range(count):
+            self._faults.append((status, retry_after))
+
+    def service(self) -> 'FakeService':
+        """Object to assign to GoogleSheetsClient.service."""
+        return FakeService(self)
+
+    def sheet(self, spreadsheet_id: str, title: str) -> List[List]:
+        """Direct access to a sheet's stored rows (for tests)."""
+        return self.spreadsheets[spreadsheet_id][title]
+
+    def format_column(self, spreadsheet_id: str, title: str, column: int, number_format: str):
+        """
+        Give a column a number format, as a user might in the Sheets UI (for tests).
+
+        Args:
+            spreadsheet_id: Spreadsheet holding the sheet
+            title: Sheet title
+            column: 0-based column index
+            number_format: Format string for its numbers, e.g. '£{:,.2f}'
+        """
+        self.sheet_meta[spreadsheet_id][title]['formats'][column] = number_format
+
+    # ---- request dispatch ------------------------------------------------
+
+    def execute(self, method: str, handler: Callable, body=None):
+        kind = 'read' if method in self.READ_METHODS else 'write'
+        self.stats['calls'][method] += 1
+        self.stats[kind + 's'] += 1
+        self.stats['bytes_sent'] += len(json.dumps(body or {}, default=str))
+
+        if self.latency:
+            self.sleep(self.latency)
+
+        if self._faults:
+            status, retry_after = self._faults.popleft()
+            raise self._error(status, 'Injected failure', retry_after)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise self._error(self.rng.choice((429, 503)), 'Injected failure', self.retry_after)
+        if self.quota_per_minute is not None and not self._within_quota(kind):
+            raise self._error(429, f"Quota exceeded for quota metric '{kind.title()} requests'",
+                              self.retry_after)
+
+        response = handler()
+        self.stats['bytes_received'] += len(json.dumps(response, default=str))
+        return response
+
+    def _error(self, status, message, retry_after=None):
+        self.stats['errors'][status] += 1
+        return http_error(status, message, retry_after)
+
+    def _within_quota(self, kind: str) -> bool:
+        recent = self._recent[kind]
+        now = self.clock()
+        while recent and recent[0] <= now - 60:
+            recent.popleft()
+        if len(recent) >= self.quota_per_minute:
+            return False
+        recent.append(now)
+        return True
+
+    def _sheets(self, spreadsheet_id: str) -> Dict[str, List[List]]:
+        if spreadsheet_id not in self.spreadsheets:
+            raise http_error(404, 'Requested entity was not found.')
+        return self.spreadsheets[spreadsheet_id]
+
+    def _locate(self, spreadsheet_id: str, a1: str):
+        sheets = self._sheets(spreadsheet_id)
+        try:
+            sheet, first_row, first_col, last_row, last_col = parse_range(a1)
+        except ValueError:
+            raise http_error(400, f'Unable to parse range: {a1}')
+        if sheet not in sheets:
+            raise http_error(400, f'Unable to parse range: {a1}')
+        return sheets[sheet], first_row, first_col, last_row, last_col
+
+    # ---- spreadsheets ----------------------------------------------------
+
+    def create(self, body: Dict) -> Dict:
+        spreadsheet_id = uuid.uuid4().hex
+        self.spreadsheets[spreadsheet_id] = {}
+        self.sheet_meta[spreadsheet_id] = {}
+        for sheet in body.get('sheets', []):
+            self._add_sheet(spreadsheet_id, sheet['properties']['title'])
+        self.titles[spreadsheet_id] = body.get('properties', {}).get('title', '')
+        return {'spreadsheetId': spreadsheet_id}
+
+    def _add_sheet(self, spreadsheet_id: str, title: str) -> int:
+        meta = self.sheet_meta.setdefault(spreadsheet_id, {})
+        sheet_id = max((m['sheetId'] for m in meta.values()), default=-1) + 1
+        self.spreadsheets[spreadsheet_id][title] = []
+        meta[title] = {'sheetId': sheet_id, 'hidden': False, 'protected': [], 'formats': {}}
+        return sheet_id
+
+    def _title_of(self, spreadsheet_id: str, sheet_id) -> str:
+        for title, meta in self.sheet_meta.get(spreadsheet_id, {}).items():
+            if meta['sheetId'] == sheet_id:
+                return title
+        raise http_error(400, f'No grid with id: {sheet_id}')
+
+    def get_metadata(self, spreadsheet_id: str) -> Dict:
+        sheets = self._sheets(spreadsheet_id)
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'properties': {'title': self.titles.get(spreadsheet_id, '')},
+            'sheets': [
+                {
+                    'properties': {
+                        'title': title,
+                        'sheetId': self.sheet_meta[spreadsheet_id][title]['sheetId'],
+                        'hidden': self.sheet_meta[spreadsheet_id][title]['hidden'],
+                    },
+                    'protectedRanges': [
+                        {'protectedRangeId': index, 'description': description}
+                        for index, description in enumerate(self.sheet_meta[spreadsheet_id][title]['protected'])
+                    ],
+                }
+                for title in sheets
+            ],
+        }
+
+    def structural_update(self, spreadsheet_id: str, body: Dict) -> Dict:
+        sheets = self._sheets(spreadsheet_id)
+        replies = []
+        for request in body.get('requests', []):
+            if 'addSheet' in request:
+                title = request['addSheet']['properties']['title']
+                if title in sheets:
+                    raise http_error(400, f'A sheet with the name "{title}" already exists.')
+                sheet_id = self._add_sheet(spreadsheet_id, title)
+                replies.append({'addSheet': {'properties': {'title': title, 'sheetId': sheet_id}}})
+            elif 'addProtectedRange' in request:
+                protected = request['addProtectedRange']['protectedRange']
+                title = self._title_of(spreadsheet_id, protected['range']['sheetId'])
+                self.sheet_meta[spreadsheet_id][title]['protected'].append(protected.get('description', ''))
+                replies.append({'addProtectedRange': {'protectedRange': protected}})
+            elif 'updateSheetProperties' in request:
+                update = request['updateSheetProperties']
+                title = self._title_of(spreadsheet_id, update['properties']['sheetId'])
+                for field in update['fields'].split(','):
+                    if field != 'hidden':
+                        raise http_error(400, f'Unsupported field: {field}')
+                    self.sheet_meta[spreadsheet_id][title]['hidden'] = bool(update['properties'].get('hidden'))
+                replies.append({})
+            elif 'deleteSheet' in request:
+                title = self._title_of(spreadsheet_id, request['deleteSheet']['sheetId'])
+                del sheets[title]
+                del self.sheet_meta[spreadsheet_id][title]
+                replies.append({})
+            else:
+                raise http_error(400, f'Unsupported request: {list(request)}')
+        return {'spreadsheetId': spreadsheet_id, 'replies': replies}
+
+    # ---- values ----------------------------------------------------------
+
+    def get_values(self, spreadsheet_id: str, a1: str, value_render: str = 'FORMATTED_VALUE',
+                   date_render: str = 'SERIAL_NUMBER') -> Dict:
+        rows, first_row, first_col, last_row, last_col = self._locate(spreadsheet_id, a1)
+        formats = self.sheet_meta[spreadsheet_id][parse_range(a1)[0]]['formats']
+        end_row = len(rows) if last_row is None else min(last_row, len(rows))
+        values = [
+            [render(value, formats.get(column), value_render, date_render)
+             for column, value in enumerate(rows[index][first_col - 1:last_col], start=first_col - 1)]
+            for index in range(first_row - 1, end_row)
+        ]
+        result = {'range': a1, 'majorDimension': 'ROWS'}
+        values = _trim(values)
+        if values:
+            result['values'] = values
+        return result
+
+    def batch_get(self, spreadsheet_id: str, ranges: List[str], value_render: str = 'FORMATTED_VALUE',
+                  date_render: str = 'SERIAL_NUMBER') -> Dict:
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'valueRanges': [self.get_values(spreadsheet_id, a1, value_render, date_render)
+                            for a1 in ranges],
+        }
+
+    def write(self, spreadsheet_id: str, a1: str, values: List[List], value_input: str = 'RAW') -> Dict:
+        rows, first_row, first_col, _, _ = self._locate(spreadsheet_id, a1)
+        for offset, new_row in enumerate(values):
+            index = first_row - 1 + offset
+            while len(rows) <= index:
+                rows.append([])
+            row = rows[index]
+            while len(row) < first_col - 1 + len(new_row):
+                row.append('')
+            row[first_col - 1:first_col - 1 + len(new_row)] = _entered(new_row, value_input)
+        return {
+            'updatedRange': a1,
+            'updatedRows': len(values),
+            'updatedCells': sum(len(row) for row in values),
+        }
+
+    def batch_write(self, spreadsheet_id: str, body: Dict) -> Dict:
+        responses = [self.write(spreadsheet_id, item['range'], item['values'],
+                                body.get('valueInputOption', 'RAW'))
+                     for item in body.get('data', [])]
+        return {'spreadsheetId': spreadsheet_id, 'responses': responses}
+
+    def append(self, spreadsheet_id: str, a1: str, values: List[List], value_input: str = 'RAW') -> Dict:
+        rows, _, _, _, _ = self._locate(spreadsheet_id, a1)
+        sheet = parse_range(a1)[0]
+        # New rows go after the last row holding anything
+        last = len(rows)
+        while last and not any(cell not in ('', None) for cell in rows[last - 1]):
+            last -= 1
+        del rows[last:]
+        rows.extend(_entered(row, value_input) for row in values)
+        width = max((len(row) for row in values), default=1)
+        updated = f"{sheet}!A{last + 1}:{_column_letters(max(width, 1))}{last + len(values)}"
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'updates': {'updatedRange': updated, 'updatedRows': len(values)},
+        }
+
+    def clear(self, spreadsheet_id: str, a1: str) -> Dict:
+        rows, first_row, first_col, last_row, last_col = self._locate(spreadsheet_id, a1)
+        end_row = len(rows) if last_row is None else min(last_row, len(rows))
+        for index in range(first_row - 1, end_row):
+            row = rows[index]
+            stop = len(row) if last_col is None else min(last_col, len(row))
+            for col in range(first_col - 1, stop):
+                row[col] = ''
+        return {'spreadsheetId': spreadsheet_id, 'clearedRange': a1}
+
+    def batch_clear(self, spreadsheet_id: str, ranges: List[str]) -> Dict:
+        for a1 in ranges:
+            self.clear(spreadsheet_id, a1)
+        return {'spreadsheetId': spreadsheet_id, 'clearedRanges': list(ranges)}
+
+
+class _Request:
+    """Deferred call, executed like googleapiclient's HttpRequest."""
+
+    def __init__(self, backend: FakeSheetsBackend, method: str, handler: Callable, body=None):
+        self.backend = backend
+        self.method = method
+        self.handler = handler
+        self.body = body
+
+    def execute(self):
+        return self.backend.execute(self.method, self.handler, self.body)
+
+
+class _Values:
+    def __init__(self, backend: FakeSheetsBackend):
+        self.backend = backend
+
+    def get(self, spreadsheetId, range, valueRenderOption='FORMATTED_VALUE',
+            dateTimeRenderOption='SERIAL_NUMBER', **kwargs):
+        return _Request(self.backend, 'values.get',
+                        lambda: self.backend.get_values(spreadsheetId, range, valueRenderOption,
+                                                        dateTimeRenderOption))
+
+    def batchGet(self, spreadsheetId, ranges, valueRenderOption='FORMATTED_VALUE',
+                 dateTimeRenderOption='SERIAL_NUMBER', **kwargs):
+        ranges = [ranges] if isinstance(ranges, str) else list(ranges)
+        return _Request(self.backend, 'values.batchGet',
+                        lambda: self.backend.batch_get(spreadsheetId, ranges, valueRenderOption,
+                                                       dateTimeRenderOption), {'ranges': ranges})
+
+    def update(self, spreadsheetId, range, body, valueInputOption='RAW', **kwargs):
+        return _Request(self.backend, 'values.update',
+                        lambda: self.backend.write(spreadsheetId, range, body.get('values', []),
+                                                   valueInputOption), body)
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        return _Request(self.backend, 'values.batchUpdate',
+                        lambda: self.backend.batch_write(spreadsheetId, body), body)
+
+    def append(self, spreadsheetId, range, body, valueInputOption='RAW', insertDataOption=None, **kwargs):
+        return _Request(self.backend, 'values.append',
+                        lambda: self.backend.append(spreadsheetId, range, body.get('values', []),
+                                                    valueInputOption), body)
+
+    def clear(self, spreadsheetId, range, body=None, **kwargs):
+        return _Request(self.backend, 'values.clear',
+                        lambda: self.backend.clear(spreadsheetId, range), body)
+
+    def batchClear(self, spreadsheetId, body, **kwargs):
+        return _Request(self.backend, 'values.batchClear',
+                        lambda: self.backend.batch_clear(spreadsheetId, body.get('ranges', [])), body)
+
+
+class _Spreadsheets:
+    def __init__(self, backend: FakeSheetsBackend):
+        self.backend = backend
+
+    def values(self):
+        return _Values(self.backend)
+
+    def create(self, body, fields=None, **kwargs):
+        return _Request(self.backend, 'spreadsheets.create', lambda: self.backend.create(body), body)
+
+    def get(self, spreadsheetId, **kwargs):
+        return _Request(self.backend, 'spreadsheets.get',
+                        lambda: self.backend.get_metadata(spreadsheetId))
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        return _Request(self.backend, 'spreadsheets.batchUpdate',
+                        lambda: self.backend.structural_update(spreadsheetId, body), body)
+
+
+class FakeService:
+    """Drop-in for the object returned by build('sheets', 'v4', ...)."""
+
+    def __init__(self, backend: FakeSheetsBackend):
+        self.backend = backend
+
+    def spreadsheets(self):
+        return _Spreadsheets(self.backend)
+
+
+def make_client(backend: FakeSheetsBackend, rate_limiter=None):
+    """
+    GoogleSheetsClient wired to a fake backend.
+
+    The client is built without running its constructor, so no stored
+    token is read and nothing touches the network.
+
+    Args:
+        backend: FakeSheetsBackend to talk to
+        rate_limiter: Optional RateLimiter (e.g. on a VirtualClock) to use
+            instead of the process-wide one
+    """
+    from .google_sheets_client import GoogleSheetsClient
+
+    client = GoogleSheetsClient.__new__(GoogleSheetsClient)
+    client.creds = None
+    client.service = backend.service()
+    client.spreadsheet_id = None
+    client.is_authenticated = True
+    if rate_limiter is not None:
+        client.rate_limiter = rate_limiter
+    return client
@@ -1,8 +1,11 @@
 # Google Sheets API Client
 # Handles all interactions with Google Sheets as the cloud database
 
+import json
 import os
 import pickle
+import re
+from collections import Counter
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -10,6 +13,8 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import logging
 
+from .rate_limiter import RateLimiter
+from .sheet_shards import ShardPolicy
 from ..config.constants import (
     GOOGLE_SHEETS_SCOPES,
     SPREADSHEET_NAME,
@@ -22,11 +27,52 @@ import socket
 logger = logging.getLogger(__name__)
 
 
+def column_letter(index):
+    """Convert a 0-based column index to A1 notation (0 -> A, 26 -> AA)."""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _first_row(a1_range):
+    """First row number of an A1 range such as 'Sales!A12:P31' (None if absent)."""
+    match = re.search(r'![A-Z]*(\d+)', a1_range or '')
+    return int(match.group(1)) if match else None
+
+
 class GoogleSheetsClient:
     """
     Manages connection to Google Sheets API and provides methods
     for reading/writing data to the brewery management spreadsheet.
     """
+
+    # Sheets fetched per values.batchGet request by read_sheets()
+    BATCH_GET_CHUNK = 20
+
+    # How reads render cells. Values are written USER_ENTERED, so Sheets
+    # stores numbers as numbers; read back formatted, a currency column
+    # would turn 12.5 into "£12.50" and no pulled row would hash like the
+    # row that was pushed. Dates come back as text rather than serials.
+    VALUE_RENDER_OPTION = 'UNFORMATTED_VALUE'
+    DATE_TIME_RENDER_OPTION = 'FORMATTED_STRING'
+
+    # One limiter for every client instance: the quota is per user, not per
+    # object, and Settings may create a second client
+    rate_limiter = RateLimiter()
+    
+    # Optional function called after every successful API request; the
+    # connectivity monitor uses it as proof that the network is up
+    liveness_callback = None
+    
+    # Running totals of requests ('read'/'write') and bytes_sent/received,
+    # created on first use; sync telemetry reads the difference per run
+    stats = None
+    
+    # Routing of the append-only tables to per-year sheets (Sales_2026, ...)
+    shards = ShardPolicy()
     
     def __init__(self):
         self.creds = None
@@ -160,10 +206,55 @@ class GoogleSheetsClient:
             self.is_authenticated = False
             return False
     
-    def create_spreadsheet(self):
+    def _execute(self, request, kind='read', retry=True):
+        """
+        Execute a Sheets API request within the shared rate limit.
+        
+        Throttled (429) and transient (5xx, dropped connection) failures
+        are retried with backoff; the error is raised once retries run out,
+        so callers keep their existing HttpError handling.
+        
+        Args:
+            request: googleapiclient request object
+            kind: 'read' or 'write' quota bucket
+            retry: Set False for probes that should fail fast
+        
+        Returns:
+            The API response
+        """
+        if not retry:
+            self.rate_limiter.acquire(kind)
+            response = request.execute()
+        else:
+            response = self.rate_limiter.call(request.execute, kind=kind)
+        self._count_request(kind, request, response)
+        if self.liveness_callback:
+            self.liveness_callback()
+        return response
+
+    def _count_request(self, kind, request, response):
+        """Add a completed request to stats (payload sizes as JSON text)."""
+        if self.stats is None:
+            self.stats = Counter()
+        self.stats[kind] += 1
+        body = getattr(request, 'body', None)
+        if body:
+            self.stats['bytes_sent'] += len(body) if isinstance(body, (str, bytes)) else len(json.dumps(body, default=str))
+        if response:
+            self.stats['bytes_received'] += len(json.dumps(response, separators=(',', ':'), default=str))
+
+    def create_spreadsheet(self, title=None, headers=None):
         """
         Create a new spreadsheet with all required sheets and headers.
         This is called once during initial setup.
+        
+        Sharded tables get this year's shard (e.g. Sales_2026) instead of a
+        single sheet; older shards are added as data for them is written.
+        
+        Args:
+            title: Spreadsheet title (defaults to SPREADSHEET_NAME)
+            headers: Dictionary of sheet name -> header row, normally
+                SchemaRegistry.sheet_headers() from the local cache
         """
         try:
             if not self.is_authenticated:
@@ -172,29 +263,35 @@ class GoogleSheetsClient:
             # Create the spreadsheet
             spreadsheet = {
                 'properties': {
-                    'title': SPREADSHEET_NAME
+                    'title': title or SPREADSHEET_NAME
                 },
                 'sheets': []
             }
             
             # Add all required sheets
-            for table_name in TABLES.values():
+            headers = dict(headers or {})
+            for table_key, table_name in TABLES.items():
+                sheet_title = table_name
+                if self.shards.is_sharded(table_key):
+                    sheet_title = self.shards.sheet(table_key, self.shards.current_year())
+                    if table_name in headers:
+                        headers[sheet_title] = headers.pop(table_name)
                 spreadsheet['sheets'].append({
                     'properties': {
-                        'title': table_name
+                        'title': sheet_title
                     }
                 })
             
-            spreadsheet = self.service.spreadsheets().create(
+            spreadsheet = self._execute(self.service.spreadsheets().create(
                 body=spreadsheet,
                 fields='spreadsheetId'
-            ).execute()
+            ), 'write')
             
             self.spreadsheet_id = spreadsheet.get('spreadsheetId')
             logger.info(f"Created spreadsheet: {self.spreadsheet_id}")
             
             # Initialize each sheet with headers
-            self._initialize_sheet_headers()
+            self._initialize_sheet_headers(headers)
             
             return self.spreadsheet_id
             
@@ -226,10 +323,10 @@ class GoogleSheetsClient:
                 }]
             }
 
-            self.service.spreadsheets().batchUpdate(
+            self._execute(self.service.spreadsheets().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
                 body=body
-            ).execute()
+            ), 'write')
             
             logger.info(f"Created new sheet: {sheet_title}")
             return True
@@ -238,6 +335,139 @@ class GoogleSheetsClient:
             logger.error(f"Error creating sheet {sheet_title}: {error}")
             return False
     
+    def list_sheets(self):
+        """
+        Sheets (tabs) of the spreadsheet, in one metadata request.
+        
+        Returns:
+            Dictionary of sheet title -> {'sheet_id': int, 'protected': bool,
+            'hidden': bool}, or None on failure
+        """
+        try:
+            if not self.is_authenticated or not self.spreadsheet_id:
+                return None
+            
+            response = self._execute(self.service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id,
+                fields='sheets(properties(sheetId,title,hidden),protectedRanges(protectedRangeId))'
+            ), 'read')
+            
+            return {
+                sheet['properties']['title']: {
+                    'sheet_id': sheet['properties'].get('sheetId'),
+                    'protected': bool(sheet.get('protectedRanges')),
+                    'hidden': bool(sheet['properties'].get('hidden')),
+                }
+                for sheet in response.get('sheets', [])
+            }
+            
+        except HttpError as error:
+            logger.error(f"Error listing sheets: {error}")
+            return None
+    
+    def ensure_sheet(self, sheet_title, headers):
+        """
+        Create a sheet with a header row (used for new shards).
+        
+        Args:
+            sheet_title: Name of the new sheet
+            headers: Column names for row 1
+            
+        Returns:
+            True if the sheet exists with its header row, False otherwise
+        """
+        if not self.create_sheet(sheet_title):
+            return False
+        return self.batch_update([{'range': f"{sheet_title}!A1", 'values': [list(headers)]}])
+    
+    def protect_sheet(self, sheet_id, description, warning_only=False):
+        """
+        Protect a whole sheet against edits (closed shards).
+        
+        Args:
+            sheet_id: Numeric sheetId from list_sheets()
+            description: Shown to anyone who tries to edit it
+            warning_only: Only warn before a manual edit instead of blocking
+                it, for sheets other accounts must still write to
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not self.is_authenticated or not self.spreadsheet_id:
+                return False
+            
+            self._execute(self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'requests': [{
+                    'addProtectedRange': {
+                        'protectedRange': {
+                            'range': {'sheetId': sheet_id},
+                            'description': description,
+                            'warningOnly': warning_only,
+                        }
+                    }
+                }]}
+            ), 'write')
+            return True
+            
+        except HttpError as error:
+            logger.error(f"Error protecting sheet {sheet_id}: {error}")
+            return False
+    
+    def hide_sheet(self, sheet_id):
+        """
+        Hide a sheet (tab) from the spreadsheet's tab bar.
+        
+        Args:
+            sheet_id: Numeric sheetId from list_sheets()
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not self.is_authenticated or not self.spreadsheet_id:
+                return False
+            
+            self._execute(self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'requests': [{
+                    'updateSheetProperties': {
+                        'properties': {'sheetId': sheet_id, 'hidden': True},
+                        'fields': 'hidden',
+                    }
+                }]}
+            ), 'write')
+            return True
+            
+        except HttpError as error:
+            logger.error(f"Error hiding sheet {sheet_id}: {error}")
+            return False
+    
+    def delete_sheet(self, sheet_id):
+        """
+        Delete a sheet (tab) from the spreadsheet.
+        
+        Args:
+            sheet_id: Numeric sheetId from list_sheets()
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not self.is_authenticated or not self.spreadsheet_id:
+                return False
+            
+            self._execute(self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'requests': [{'deleteSheet': {'sheetId': sheet_id}}]}
+            ), 'write')
+            return True
+            
+        except HttpError as error:
+            logger.error(f"Error deleting sheet {sheet_id}: {error}")
+            return False
+    
     def find_spreadsheet(self):
         """
         Find existing brewery spreadsheet by name.
@@ -260,7 +490,9 @@ class GoogleSheetsClient:
             range_notation: Optional range (e.g., "A1:Z100"). If None, reads all data.
         
         Returns:
-            List of rows, where each row is a list of values
+            List of rows, where each row is a list of values ([] for a
+            sheet that was missing and has just been created), or None if
+            the sheet could not be read
         """
         try:
             if not self.is_authenticated:
@@ -275,10 +507,12 @@ class GoogleSheetsClient:
             else:
                 range_str = sheet_name
             
-            result = self.service.spreadsheets().values().get(
+            result = self._execute(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
-                range=range_str
-            ).execute()
+                range=range_str,
+                valueRenderOption=self.VALUE_RENDER_OPTION,
+                dateTimeRenderOption=self.DATE_TIME_RENDER_OPTION
+            ), 'read')
             
             values = result.get('values', [])
             return values
@@ -293,7 +527,77 @@ class GoogleSheetsClient:
                     return []
             
             logger.error(f"Error reading sheet {sheet_name}: {error}")
-            return []
+            return None
+
+    def read_sheets(self, sheet_names, chunk_size=None):
+        """
+        Read several whole sheets with values.batchGet.
+        
+        Sheets are requested chunk_size at a time, so a full pull costs a
+        couple of round trips instead of one per sheet. If a chunk is
+        rejected (e.g. a sheet is missing), its sheets are read one by one
+        with read_sheet(), which also creates missing sheets.
+        
+        Args:
+            sheet_names: Names of the sheets to read
+            chunk_size: Sheets per batchGet request (default BATCH_GET_CHUNK)
+        
+        Returns:
+            Dictionary of sheet name -> list of rows, or None for a sheet
+            that could not be read
+        """
+        chunk_size = chunk_size or self.BATCH_GET_CHUNK
+        sheet_names = list(sheet_names)
+        results = {}
+        
+        for start in range(0, len(sheet_names), chunk_size):
+            chunk = sheet_names[start:start + chunk_size]
+            try:
+                if not self.is_authenticated:
+                    raise Exception("Not authenticated")
+                
+                if not self.spreadsheet_id:
+                    raise Exception("No spreadsheet ID set")
+                
+                response = self._execute(self.service.spreadsheets().values().batchGet(
+                    spreadsheetId=self.spreadsheet_id,
+                    ranges=chunk,
+                    valueRenderOption=self.VALUE_RENDER_OPTION,
+                    dateTimeRenderOption=self.DATE_TIME_RENDER_OPTION
+                ), 'read')
+                
+                # valueRanges come back in request order
+                for sheet_name, value_range in zip(chunk, response.get('valueRanges', [])):
+                    results[sheet_name] = value_range.get('values', [])
+                    
+            except HttpError as error:
+                if "429" in str(error):
+                    raise
+                logger.warning(f"batchGet failed ({error}); reading {len(chunk)} sheets one by one")
+                for sheet_name in chunk:
+                    results[sheet_name] = self.read_sheet(sheet_name)
+        
+        return results
+
+    def read_column(self, sheet_name, column_index=0):
+        """
+        Read a single column of a sheet, e.g. the ID column.
+        
+        Much cheaper than read_sheet() when only row positions are needed.
+        
+        Args:
+            sheet_name: Name of the sheet
+            column_index: 0-based column index (default 0 for column A)
+        
+        Returns:
+            List of cell values, one per row (header included); blank rows
+            are empty strings. None if the column could not be read.
+        """
+        letter = column_letter(column_index)
+        rows = self.read_sheet(sheet_name, f"{letter}:{letter}")
+        if rows is None:
+            return None
+        return [row[0] if row else '' for row in rows]
 
     def find_row_index(self, sheet_name, record_id, id_column_index=0):
         """
@@ -313,7 +617,7 @@ class GoogleSheetsClient:
             # But for now, reading the whole sheet is safer to ensure we have context if needed
             # and sheets likely won't be massive for this use case
             
-            rows = self.read_sheet(sheet_name)
+            rows = self.read_sheet(sheet_name) or []
             
             # Iterate through rows to find the ID
             # Start from index 1 (skip header) if using read_sheet
@@ -341,22 +645,37 @@ class GoogleSheetsClient:
         Returns:
             True if successful, False otherwise
         """
+        return bool(self.append_rows(sheet_name, [row_data]))
+
+    def append_rows(self, sheet_name, rows):
+        """
+        Append several rows to the end of a sheet in a single API call.
+        
+        Args:
+            sheet_name: Name of the sheet
+            rows: List of rows, each a list of values
+        
+        Returns:
+            Row number (1-based) the first appended row landed on, True if
+            the response did not say, or False on failure
+        """
         try:
             if not self.is_authenticated:
                 raise Exception("Not authenticated")
             
             body = {
-                'values': [row_data]
+                'values': rows
             }
             
-            result = self.service.spreadsheets().values().append(
+            result = self._execute(self.service.spreadsheets().values().append(
                 spreadsheetId=self.spreadsheet_id,
                 range=sheet_name,
                 valueInputOption='USER_ENTERED',
+                insertDataOption='INSERT_ROWS',
                 body=body
-            ).execute()
+            ), 'write')
             
-            return True
+            return _first_row(result.get('updates', {}).get('updatedRange')) or True
             
         except HttpError as error:
             # Check if error is due to missing sheet (400 or Unable to parse range)
@@ -366,19 +685,20 @@ class GoogleSheetsClient:
                 if self.create_sheet(sheet_name):
                     # Retry append
                     try:
-                        self.service.spreadsheets().values().append(
+                        result = self._execute(self.service.spreadsheets().values().append(
                             spreadsheetId=self.spreadsheet_id,
                             range=sheet_name,
                             valueInputOption='USER_ENTERED',
+                            insertDataOption='INSERT_ROWS',
                             body=body
-                        ).execute()
+                        ), 'write')
                         logger.info(f"Retry append to {sheet_name} successful")
-                        return True
+                        return _first_row(result.get('updates', {}).get('updatedRange')) or True
                     except Exception as retry_error:
                          logger.error(f"Retry append failed: {retry_error}")
                          return False
 
-            logger.error(f"Error appending row to {sheet_name}: {error}")
+            logger.error(f"Error appending rows to {sheet_name}: {error}")
             return False
     
     def update_row(self, sheet_name, row_index, row_data):
@@ -403,12 +723,12 @@ class GoogleSheetsClient:
                 'values': [row_data]
             }
             
-            result = self.service.spreadsheets().values().update(
+            result = self._execute(self.service.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
                 range=range_str,
                 valueInputOption='USER_ENTERED',
                 body=body
-            ).execute()
+            ), 'write')
             
             return True
             
@@ -420,12 +740,12 @@ class GoogleSheetsClient:
                 if self.create_sheet(sheet_name):
                      # Retry update
                     try:
-                        self.service.spreadsheets().values().update(
+                        self._execute(self.service.spreadsheets().values().update(
                             spreadsheetId=self.spreadsheet_id,
                             range=range_str,
                             valueInputOption='USER_ENTERED',
                             body=body
-                        ).execute()
+                        ), 'write')
                         logger.info(f"Retry update to {sheet_name} successful")
                         return True
                     except Exception as retry_error:
@@ -434,7 +754,63 @@ class GoogleSheetsClient:
 
             logger.error(f"Error updating row in {sheet_name}: {error}")
             return False
-    
+
+    def clear_row(self, sheet_name, row_index):
+        """
+        Blank out a row whose record was deleted locally.
+
+        The row is cleared rather than removed so the rows below keep
+        their positions.
+
+        Args:
+            sheet_name: Name of the sheet
+            row_index: Row number (1-indexed)
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not self.is_authenticated:
+                raise Exception("Not authenticated")
+
+            self._execute(self.service.spreadsheets().values().clear(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"{sheet_name}!{row_index}:{row_index}",
+                body={}
+            ), 'write')
+
+            return True
+
+        except HttpError as error:
+            logger.error(f"Error clearing row in {sheet_name}: {error}")
+            return False
+
+    def clear_rows(self, sheet_name, row_indexes):
+        """
+        Blank out several rows in a single API call (see clear_row).
+
+        Args:
+            sheet_name: Name of the sheet
+            row_indexes: Row numbers (1-indexed)
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            if not self.is_authenticated:
+                raise Exception("Not authenticated")
+
+            self._execute(self.service.spreadsheets().values().batchClear(
+                spreadsheetId=self.spreadsheet_id,
+                body={'ranges': [f"{sheet_name}!{r}:{r}" for r in row_indexes]}
+            ), 'write')
+
+            return True
+
+        except HttpError as error:
+            logger.error(f"Error clearing rows in {sheet_name}: {error}")
+            return False
+
     def batch_update(self, updates):
         """
         Perform multiple updates in a single API call.
@@ -454,10 +830,10 @@ class GoogleSheetsClient:
                 'data': updates
             }
             
-            result = self.service.spreadsheets().values().batchUpdate(
+            result = self._execute(self.service.spreadsheets().values().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
                 body=body
-            ).execute()
+            ), 'write')
             
             return True
             
@@ -465,32 +841,15 @@ class GoogleSheetsClient:
             logger.error(f"Error in batch update: {error}")
             return False
     
-    def _initialize_sheet_headers(self):
+    def _initialize_sheet_headers(self, headers_map):
         """
         Initialize all sheets with their column headers.
         This is called after creating a new spreadsheet.
-        """
-        # Define headers for each sheet
-        # This is a large dictionary mapping sheet names to their headers
-        # For now, we'll create placeholder headers
-        
-        headers_map = {
-            "Batches": [
-                "batch_id", "gyle_number", "recipe_id", "brew_date",
-                "brewer_name", "actual_batch_size", "measured_abv",
-                "pure_alcohol_litres", "status", "fermenting_start",
-                "conditioning_start", "ready_date", "packaged_date",
-                "spr_rate_applied", "duty_rate_applied", "is_draught",
-                "brewing_notes", "created_by"
-            ],
-            "Recipes": [
-                "recipe_id", "recipe_name", "style", "version", "target_abv",
-                "target_batch_size_litres", "created_date", "created_by",
-                "last_modified", "is_active", "brewing_notes"
-            ],
-            # Add more headers for other sheets...
-        }
         
+        Args:
+            headers_map: Dictionary of sheet name -> list of column names,
+                in the same order rows are written by SyncManager
+        """
         # Update each sheet with headers
         updates = []
         for sheet_name, headers in headers_map.items():
@@ -513,9 +872,9 @@ class GoogleSheetsClient:
             
             # Try to get spreadsheet metadata
             if self.spreadsheet_id:
-                self.service.spreadsheets().get(
+                self._execute(self.service.spreadsheets().get(
                     spreadsheetId=self.spreadsheet_id
-                ).execute()
+                ), 'read', retry=False)
                 return True
             return False
             
@@ -0,0 +1,1217 @@
+"""
+Schema Migrations for Brewery Management System
+Ordered, numbered changes to the local SQLite cache schema.
+
+The version a database has reached is stored in PRAGMA user_version, so a
+database that is already current is recognised with a single integer read
+and no other schema work happens on startup. To change the schema, append
+a new migration to MIGRATIONS with the next version number; never edit or
+renumber a migration that has shipped.
+"""
+
+import logging
+import uuid
+from datetime import datetime
+
+from ..config.constants import TABLES
+from ..utilities.date_utils import get_today_db
+
+logger = logging.getLogger(__name__)
+
+
+def get_schema_version(connection):
+    """Read the migration version recorded in the database header."""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def set_schema_version(connection, version):
+    """Record the migration version (PRAGMA cannot take a bound parameter)."""
+    connection.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def add_missing_columns(cursor, table_name, columns):
+    """
+    Add columns to an existing table if they are not already there.
+
+    Args:
+        cursor: sqlite3.Cursor
+        table_name: Table to alter (ignored if it does not exist)
+        columns: List of (column name, column definition) tuples
+
+    Returns:
+        List of column names that were added
+    """
+    cursor.execute(f"PRAGMA table_info({table_name})")
+    existing = {row[1] for row in cursor.fetchall()}
+    if not existing:
+        return []
+
+    added = []
+    for column, definition in columns:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} {definition}")
+            added.append(column)
+    if added:
+        logger.info(f"Added columns to {table_name}: {', '.join(added)}")
+    return added
+
+
+def _create_baseline_tables(cursor):
+    """Create every cache table in its current shape."""
+    # spoilt_beer tables from before the duty month rework cannot be
+    # altered into shape; they were always empty, so rebuild them
+    cursor.execute("PRAGMA table_info(spoilt_beer)")
+    spoilt_columns = {row[1] for row in cursor.fetchall()}
+    if spoilt_columns and 'duty_month' not in spoilt_columns:
+        logger.info("Rebuilding legacy spoilt_beer table")
+        cursor.execute("DROP TABLE spoilt_beer")
+
+    # Delivery Runs table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS delivery_runs (
+            run_id TEXT PRIMARY KEY,
+            run_name TEXT NOT NULL,
+            day_of_week TEXT,
+            area_id TEXT,
+            description TEXT,
+            driver_name TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Batches table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS batches (
+            batch_id TEXT PRIMARY KEY,
+            gyle_number TEXT UNIQUE NOT NULL,
+            recipe_id TEXT,
+            brew_date TEXT,
+            brewer_name TEXT,
+            actual_batch_size REAL,
+            measured_abv REAL,
+            pure_alcohol_litres REAL,
+            status TEXT,
+            fermenting_start TEXT,
+            conditioning_start TEXT,
+            ready_date TEXT,
+            packaged_date TEXT,
+            fermented_volume REAL,
+            packaged_volume REAL,
+            waste_volume REAL,
+            original_gravity REAL,
+            final_gravity REAL,
+            actual_abv REAL,
+            duty_abv REAL,
+            waste_percentage REAL,
+            spr_rate_applied REAL,
+            duty_rate_applied REAL,
+            is_draught INTEGER,
+            brewing_notes TEXT,
+            created_by TEXT,
+            last_modified TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            ingredient_source_batches TEXT
+        )
+    ''')
+
+    # Recipes table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS recipes (
+            recipe_id TEXT PRIMARY KEY,
+            recipe_name TEXT NOT NULL,
+            style TEXT,
+            version INTEGER,
+            target_abv REAL,
+            target_batch_size_litres REAL,
+            created_date TEXT,
+            created_by TEXT,
+            last_modified TEXT,
+            is_active INTEGER DEFAULT 1,
+            brewing_notes TEXT,
+            allergens TEXT,
+            labor_cost REAL DEFAULT 0.0,
+            energy_cost REAL DEFAULT 0.0,
+            misc_cost REAL DEFAULT 0.0,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Recipe Ingredients table (Legacy/Unified for GUI)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS recipe_ingredients (
+            ingredient_id TEXT PRIMARY KEY,
+            recipe_id TEXT,
+            ingredient_name TEXT,
+            ingredient_type TEXT,
+            quantity REAL,
+            unit TEXT,
+            timing TEXT,
+            notes TEXT,
+            inventory_item_id TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id)
+        )
+    ''')
+
+    # Recipe Grains table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS recipe_grains (
+            grain_id TEXT PRIMARY KEY,
+            recipe_id TEXT,
+            material_id TEXT,
+            quantity REAL,
+            unit TEXT,
+            mash_notes TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id),
+            FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
+        )
+    ''')
+
+    # Recipe Hops table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS recipe_hops (
+            hop_id TEXT PRIMARY KEY,
+            recipe_id TEXT,
+            material_id TEXT,
+            quantity REAL,
+            unit TEXT,
+            boil_time_minutes REAL,
+            alpha_acid_percent REAL,
+            addition_type TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id),
+            FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
+        )
+    ''')
+
+    # Recipe Yeast table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS recipe_yeast (
+            yeast_id TEXT PRIMARY KEY,
+            recipe_id TEXT,
+            material_id TEXT,
+            quantity REAL,
+            unit TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id),
+            FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
+        )
+    ''')
+
+    # Recipe Adjuncts table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS recipe_adjuncts (
+            adjunct_id TEXT PRIMARY KEY,
+            recipe_id TEXT,
+            material_id TEXT,
+            quantity REAL,
+            unit TEXT,
+            timing TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id),
+            FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
+        )
+    ''')
+
+    # Inventory Materials table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inventory_materials (
+            material_id TEXT PRIMARY KEY,
+            material_type TEXT,
+            material_name TEXT UNIQUE NOT NULL,
+            current_stock REAL DEFAULT 0,
+            unit TEXT,
+            reorder_level REAL,
+            last_updated TEXT,
+            supplier TEXT,
+            cost_per_unit REAL,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Inventory Batches table (New - FIFO Tracking)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inventory_batches (
+            batch_id TEXT PRIMARY KEY,
+            material_id TEXT,
+            batch_number TEXT,
+            expiry_date TEXT,
+            quantity_initial REAL,
+            quantity_remaining REAL,
+            received_date TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
+        )
+    ''')
+
+    # Inventory Transactions table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inventory_transactions (
+            transaction_id TEXT PRIMARY KEY,
+            transaction_date TEXT,
+            transaction_type TEXT,
+            material_id TEXT,
+            quantity_change REAL,
+            new_balance REAL,
+            reference TEXT,
+            username TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
+        )
+    ''')
+
+    # Customers table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customers (
+            customer_id TEXT PRIMARY KEY,
+            customer_name TEXT NOT NULL,
+            contact_person TEXT,
+            phone TEXT,
+            email TEXT,
+            delivery_address TEXT,
+            delivery_area TEXT,
+            billing_address TEXT,
+            customer_type TEXT,
+            payment_terms TEXT,
+            credit_limit REAL,
+            preferred_delivery_day TEXT,
+            preferred_delivery_time TEXT,
+            likes TEXT,
+            dislikes TEXT,
+            notes TEXT,
+            is_active INTEGER DEFAULT 1,
+            created_date TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Sales table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales (
+            sale_id TEXT PRIMARY KEY,
+            sale_date TEXT,
+            customer_id TEXT,
+            batch_id TEXT,
+            gyle_number TEXT,
+            beer_name TEXT,
+            container_type TEXT,
+            container_size REAL,
+            quantity INTEGER,
+            total_litres REAL,
+            unit_price REAL,
+            line_total REAL,
+            status TEXT DEFAULT 'reserved',
+            reserved_date TEXT,
+            delivery_date TEXT,
+            invoice_id TEXT,
+            recorded_by TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
+            FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
+        )
+    ''')
+
+    # Invoices table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoices (
+            invoice_id TEXT PRIMARY KEY,
+            invoice_number TEXT UNIQUE NOT NULL,
+            invoice_date TEXT,
+            customer_id TEXT,
+            subtotal REAL,
+            vat_rate REAL,
+            vat_amount REAL,
+            total REAL,
+            payment_status TEXT DEFAULT 'unpaid',
+            amount_paid REAL DEFAULT 0,
+            amount_outstanding REAL,
+            due_date TEXT,
+            created_by TEXT,
+            created_date TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+        )
+    ''')
+
+    # Invoice Lines table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_lines (
+            line_id TEXT PRIMARY KEY,
+            invoice_id TEXT,
+            sale_id TEXT,
+            description TEXT,
+            quantity REAL,
+            unit_price REAL,
+            line_total REAL,
+            gyle_number TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (invoice_id) REFERENCES invoices(invoice_id)
+        )
+    ''')
+
+    # Payments table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS payments (
+            payment_id TEXT PRIMARY KEY,
+            invoice_id TEXT,
+            payment_date TEXT,
+            payment_amount REAL,
+            payment_method TEXT,
+            payment_reference TEXT,
+            recorded_by TEXT,
+            recorded_date TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (invoice_id) REFERENCES invoices(invoice_id)
+        )
+    ''')
+
+    # Users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT,
+            role TEXT,
+            is_active INTEGER DEFAULT 1,
+            created_date TEXT,
+            last_login TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Settings table (for duty rates and configuration)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            annual_production_hl_pa REAL DEFAULT 0,
+            production_year_start TEXT,
+            production_year_end TEXT,
+            spr_draught_low REAL DEFAULT 0,
+            spr_draught_standard REAL DEFAULT 0,
+            spr_non_draught_standard REAL DEFAULT 0,
+            rate_full_8_5_to_22 REAL DEFAULT 0,
+            rates_effective_from TEXT,
+            vat_rate REAL DEFAULT 0.20,
+            updated_at TEXT,
+            updated_by TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # System Settings table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS system_settings (
+            setting_key TEXT PRIMARY KEY,
+            setting_value TEXT,
+            setting_type TEXT,
+            description TEXT,
+            last_updated TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Casks Empty table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS casks_empty (
+            cask_id TEXT PRIMARY KEY,
+            cask_size TEXT,
+            cask_size_litres REAL,
+            quantity_in_stock INTEGER DEFAULT 0,
+            condition TEXT,
+            last_updated TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Bottles Empty table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bottles_empty (
+            bottle_id TEXT PRIMARY KEY,
+            bottle_size_ml INTEGER,
+            quantity_in_stock INTEGER DEFAULT 0,
+            condition TEXT,
+            last_updated TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Cans Empty table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cans_empty (
+            can_id TEXT PRIMARY KEY,
+            can_size_ml INTEGER,
+            quantity_in_stock INTEGER DEFAULT 0,
+            condition TEXT,
+            last_updated TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Settings Containers table (for duty calculations)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings_containers (
+            container_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            actual_capacity REAL NOT NULL,
+            duty_paid_volume REAL NOT NULL,
+            is_draught_eligible INTEGER DEFAULT 0,
+            default_price REAL DEFAULT 0,
+            active INTEGER DEFAULT 1,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Container Types table (unified container management)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS container_types (
+            container_type_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            size_litres REAL NOT NULL,
+            category TEXT,
+            quantity_available INTEGER DEFAULT 0,
+            active INTEGER DEFAULT 1,
+            created_date TEXT,
+            last_modified TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Products table (finished goods tracking)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS products (
+            product_id TEXT PRIMARY KEY,
+            gyle_number TEXT NOT NULL,
+            batch_id TEXT,
+            recipe_id TEXT,
+            product_name TEXT,
+            style TEXT,
+            container_type TEXT,
+            container_size_l REAL,
+            quantity_total INTEGER,
+            quantity_in_stock INTEGER,
+            quantity_sold INTEGER DEFAULT 0,
+            abv REAL,
+            date_packaged TEXT,
+            date_in_stock TEXT,
+            status TEXT,
+            is_name_locked INTEGER DEFAULT 0,
+            retail_price REAL DEFAULT 0.0,
+            cost_price REAL DEFAULT 0.0,
+            created_date TEXT,
+            created_by TEXT,
+            last_modified TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (batch_id) REFERENCES batches(batch_id),
+            FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id)
+        )
+    ''')
+
+    # Product Sales table (for recall tracking)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_sales (
+            product_sale_id TEXT PRIMARY KEY,
+            product_id TEXT NOT NULL,
+            gyle_number TEXT NOT NULL,
+            sale_id TEXT,
+            customer_id TEXT,
+            invoice_id TEXT,
+            quantity_sold INTEGER,
+            date_sold TEXT,
+            date_delivered TEXT,
+            delivery_address TEXT,
+            container_type TEXT,
+            created_date TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (product_id) REFERENCES products(product_id),
+            FOREIGN KEY (sale_id) REFERENCES sales(sale_id),
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
+            FOREIGN KEY (invoice_id) REFERENCES invoices(invoice_id)
+        )
+    ''')
+
+    # Batch Packaging Lines (for duty calculations)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS batch_packaging_lines (
+            line_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            batch_id TEXT,
+            gyle_number TEXT,
+            packaging_date TEXT,
+            container_type TEXT,
+            quantity INTEGER,
+            container_actual_size REAL,
+            container_duty_volume REAL,
+            total_duty_volume REAL,
+            batch_abv REAL,
+            pure_alcohol_litres REAL,
+            spr_category TEXT,
+            spr_rate_applied REAL,
+            full_duty_rate REAL,
+            effective_duty_rate REAL,
+            duty_payable REAL,
+            is_draught_eligible INTEGER,
+            fill_number INTEGER,
+            created_by TEXT,
+            created_at TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
+        )
+    ''')
+
+    # Spoilt Beer (for duty reclaim)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS spoilt_beer (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date_discovered TEXT,
+            duty_month TEXT,
+            batch_id TEXT,
+            container_type TEXT,
+            quantity INTEGER,
+            duty_paid_volume REAL,
+            pure_alcohol_litres REAL,
+            original_duty_rate REAL,
+            duty_to_reclaim REAL,
+            reason_category TEXT,
+            status TEXT,
+            notes TEXT,
+            recorded_by TEXT,
+            created_at TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
+        )
+    ''')
+
+    # Fermentation Logs table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fermentation_logs (
+            log_id TEXT PRIMARY KEY,
+            batch_id TEXT,
+            gyle_number TEXT,
+            log_date TEXT,
+            temperature REAL,
+            gravity REAL,
+            ph REAL,
+            notes TEXT,
+            recorded_by TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
+        )
+    ''')
+
+    # Casks Full table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS casks_full (
+            cask_record_id TEXT PRIMARY KEY,
+            batch_id TEXT,
+            gyle_number TEXT,
+            beer_name TEXT,
+            abv REAL,
+            packaged_date TEXT,
+            cask_type TEXT,
+            cask_size_litres REAL,
+            quantity INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'in_stock',
+            reserved_for_customer TEXT,
+            location TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
+        )
+    ''')
+
+    # Bottles Stock table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bottles_stock (
+            bottle_record_id TEXT PRIMARY KEY,
+            batch_id TEXT,
+            gyle_number TEXT,
+            beer_name TEXT,
+            abv REAL,
+            packaged_date TEXT,
+            bottle_size_ml INTEGER,
+            quantity INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'in_stock',
+            reserved_for_customer TEXT,
+            location TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
+        )
+    ''')
+
+    # Sales Calendar table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales_calendar (
+            event_id TEXT PRIMARY KEY,
+            event_date TEXT,
+            event_time TEXT,
+            event_type TEXT,
+            customer_id TEXT,
+            customer_name TEXT,
+            subject TEXT,
+            description TEXT,
+            location TEXT,
+            reminder_time TEXT,
+            completed INTEGER DEFAULT 0,
+            created_by TEXT,
+            created_date TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+        )
+    ''')
+
+    # Call Log table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS call_log (
+            call_id TEXT PRIMARY KEY,
+            call_date TEXT,
+            call_time TEXT,
+            customer_id TEXT,
+            customer_name TEXT,
+            call_type TEXT,
+            duration_minutes INTEGER,
+            outcome TEXT,
+            notes TEXT,
+            follow_up_required INTEGER DEFAULT 0,
+            follow_up_date TEXT,
+            recorded_by TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+        )
+    ''')
+
+    # Tasks table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id TEXT PRIMARY KEY,
+            task_title TEXT NOT NULL,
+            task_description TEXT,
+            customer_id TEXT,
+            customer_name TEXT,
+            priority TEXT,
+            due_date TEXT,
+            assigned_to TEXT,
+            status TEXT DEFAULT 'pending',
+            completed_date TEXT,
+            created_by TEXT,
+            created_date TEXT,
+            notes TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+        )
+    ''')
+
+    # Sales Pipeline table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales_pipeline (
+            opportunity_id TEXT PRIMARY KEY,
+            customer_id TEXT,
+            customer_name TEXT,
+            opportunity_name TEXT,
+            stage TEXT,
+            estimated_value REAL,
+            probability INTEGER,
+            expected_close_date TEXT,
+            notes TEXT,
+            created_by TEXT,
+            created_date TEXT,
+            last_updated TEXT,
+            status TEXT DEFAULT 'active',
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+        )
+    ''')
+
+    # Duty Returns table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS duty_returns (
+            return_id TEXT PRIMARY KEY,
+            duty_month TEXT,
+            return_period_start TEXT,
+            return_period_end TEXT,
+            total_duty_payable REAL,
+            submitted_date TEXT,
+            submitted_by TEXT,
+            payment_date TEXT,
+            payment_reference TEXT,
+            status TEXT DEFAULT 'draft',
+            notes TEXT,
+
+            draught_low_litres REAL DEFAULT 0,
+            draught_low_lpa REAL DEFAULT 0,
+            draught_low_duty REAL DEFAULT 0,
+
+            draught_std_litres REAL DEFAULT 0,
+            draught_std_lpa REAL DEFAULT 0,
+            draught_std_duty REAL DEFAULT 0,
+
+            non_draught_litres REAL DEFAULT 0,
+            non_draught_lpa REAL DEFAULT 0,
+            non_draught_duty REAL DEFAULT 0,
+
+            high_abv_litres REAL DEFAULT 0,
+            high_abv_lpa REAL DEFAULT 0,
+            high_abv_duty REAL DEFAULT 0,
+
+            production_duty_total REAL DEFAULT 0,
+            spoilt_duty_reclaim REAL DEFAULT 0,
+            under_declarations REAL DEFAULT 0,
+            over_declarations REAL DEFAULT 0,
+            net_duty_payable REAL DEFAULT 0,
+
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Duty Return Lines table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS duty_return_lines (
+            line_id TEXT PRIMARY KEY,
+            return_id TEXT,
+            batch_id TEXT,
+            gyle_number TEXT,
+            beer_name TEXT,
+            abv REAL,
+            volume_litres REAL,
+            pure_alcohol_litres REAL,
+            is_draught INTEGER,
+            duty_rate_applied REAL,
+            spr_rate_applied REAL,
+            duty_amount REAL,
+            packaged_date TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (return_id) REFERENCES duty_returns(return_id),
+            FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
+        )
+    ''')
+
+    # Pricing table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pricing (
+            price_id TEXT PRIMARY KEY,
+            container_type TEXT UNIQUE NOT NULL,
+            container_size_litres REAL,
+            base_price REAL,
+            effective_date TEXT,
+            last_updated TEXT,
+            sync_status TEXT DEFAULT 'synced'
+        )
+    ''')
+
+    # Customer Pricing Overrides table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customer_pricing_overrides (
+            override_id TEXT PRIMARY KEY,
+            customer_id TEXT,
+            container_type TEXT,
+            custom_price REAL,
+            effective_date TEXT,
+            expiry_date TEXT,
+            notes TEXT,
+            last_updated TEXT,
+            sync_status TEXT DEFAULT 'synced',
+            FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+        )
+    ''')
+
+    # Audit Log table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS audit_log (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            username TEXT,
+            action TEXT,
+            table_name TEXT,
+            record_id TEXT,
+            old_value TEXT,
+            new_value TEXT,
+            ip_address TEXT
+        )
+    ''')
+
+    # Sync Queue table (for tracking pending syncs)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_queue (
+            queue_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT,
+            record_id TEXT,
+            operation TEXT,
+            data TEXT,
+            timestamp TEXT,
+            attempts INTEGER DEFAULT 0,
+            last_attempt TEXT
+        )
+    ''')
+
+
+# Columns added after a table first shipped. Databases created before
+# migrations were versioned may have any subset of these.
+_LATE_COLUMNS = {
+    'batches': [
+        ('fermented_volume', 'REAL'),
+        ('packaged_volume', 'REAL'),
+        ('waste_volume', 'REAL'),
+        ('original_gravity', 'REAL'),
+        ('final_gravity', 'REAL'),
+        ('actual_abv', 'REAL'),
+        ('duty_abv', 'REAL'),
+        ('measured_abv', 'REAL'),
+        ('waste_percentage', 'REAL'),
+        ('ingredient_source_batches', 'TEXT'),
+    ],
+    'recipes': [
+        ('allergens', 'TEXT'),
+        ('labor_cost', 'REAL DEFAULT 0.0'),
+        ('energy_cost', 'REAL DEFAULT 0.0'),
+        ('misc_cost', 'REAL DEFAULT 0.0'),
+    ],
+    'recipe_ingredients': [
+        ('inventory_item_id', 'TEXT'),
+    ],
+    'customers': [
+        ('delivery_area', 'TEXT'),
+    ],
+    'products': [
+        ('retail_price', 'REAL DEFAULT 0.0'),
+        ('cost_price', 'REAL DEFAULT 0.0'),
+    ],
+    'settings': [
+        ('vat_rate', 'REAL DEFAULT 0.20'),
+    ],
+    'batch_packaging_lines': [
+        ('container_actual_size', 'REAL'),
+        ('container_duty_volume', 'REAL'),
+        ('spr_rate_applied', 'REAL'),
+        ('full_duty_rate', 'REAL'),
+        ('is_draught_eligible', 'INTEGER'),
+        ('fill_number', 'INTEGER'),
+    ],
+    'duty_returns': [
+        (column, 'REAL') for column in (
+            'duty_month', 'net_duty_payable', 'production_duty_total', 'spoilt_duty_reclaim',
+            'under_declarations', 'over_declarations',
+            'draught_low_litres', 'draught_low_lpa', 'draught_low_duty',
+            'draught_std_litres', 'draught_std_lpa', 'draught_std_duty',
+            'non_draught_litres', 'non_draught_lpa', 'non_draught_duty',
+            'high_abv_litres', 'high_abv_lpa', 'high_abv_duty'
+        )
+    ],
+}
+
+
+def _add_late_columns(cursor):
+    """Bring tables from unversioned databases up to the baseline columns."""
+    for table_name, columns in _LATE_COLUMNS.items():
+        add_missing_columns(cursor, table_name, columns)
+
+
+def _backfill_legacy_inventory_batches(cursor):
+    """Give stock recorded before FIFO tracking a single LEGACY-STOCK batch."""
+    if cursor.execute("SELECT COUNT(*) FROM inventory_batches").fetchone()[0]:
+        return
+
+    cursor.execute(
+        "SELECT material_id, current_stock, last_updated FROM inventory_materials WHERE current_stock > 0"
+    )
+    items = cursor.fetchall()
+    if items:
+        logger.info(f"Migrating {len(items)} inventory items to legacy batches...")
+    cursor.executemany('''
+        INSERT INTO inventory_batches (batch_id, material_id, batch_number, quantity_initial, quantity_remaining, received_date, sync_status)
+        VALUES (?, ?, 'LEGACY-STOCK', ?, ?, ?, 'pending')
+    ''', [
+        (str(uuid.uuid4()), item[0], item[1], item[1], item[2] or get_today_db())
+        for item in items
+    ])
+
+
+def _seed_defaults(cursor):
+    """Insert default duty settings and containers if the tables are empty"""
+    count = cursor.execute("SELECT COUNT(*) FROM settings").fetchone()[0]
+    if count == 0:
+        cursor.execute("""
+            INSERT INTO settings (
+                annual_production_hl_pa, production_year_start, production_year_end,
+                spr_draught_low, spr_draught_standard, spr_non_draught_standard,
+                rate_full_8_5_to_22, rates_effective_from, vat_rate, updated_at, updated_by
+            ) VALUES (
+                0, '2025-02-01', '2026-01-31',
+                10.01, 19.08, 21.01, 25.80, '2025-02-01', 0.20, ?, 'System'
+            )
+        """, (datetime.now().isoformat(),))
+        logger.info("Seeded default settings")
+
+    count = cursor.execute("SELECT COUNT(*) FROM settings_containers").fetchone()[0]
+    if count == 0:
+        containers = [
+            ('Cask 9G (Firkin)', 40.91, 39.50, 1, 120.00),
+            ('Cask 18G (Kilderkin)', 81.82, 79.00, 1, 230.00),
+            ('Keg 30L', 30.00, 30.00, 1, 110.00),
+            ('Keg 50L', 50.00, 50.00, 1, 175.00),
+            ('Can 440ml', 0.44, 0.44, 0, 3.50),
+            ('Bottle 500ml', 0.50, 0.50, 0, 3.80)
+        ]
+        cursor.executemany("""
+            INSERT INTO settings_containers (name, actual_capacity, duty_paid_volume, is_draught_eligible, default_price)
+            VALUES (?, ?, ?, ?, ?)
+        """, containers)
+        logger.info("Seeded default containers")
+
+
+# sync_queue.operation values written by the change capture triggers
+CAPTURED_OPERATIONS = ('insert', 'update', 'delete')
+
+_QUEUE_INSERT = (
+    "INSERT INTO sync_queue (table_name, record_id, operation, timestamp) "
+    "VALUES ('{table}', {ref}.{pk}, '{operation}', datetime('now', 'localtime'));"
+)
+
+
+def _capture_trigger_sql(table_name, pk):
+    """CREATE TRIGGER statements that log every write to table_name in sync_queue."""
+    capturing = "(SELECT suspended FROM sync_capture) = 0"
+    insert = _QUEUE_INSERT.format(table=table_name, ref='NEW', pk=pk, operation='insert')
+    update = _QUEUE_INSERT.format(table=table_name, ref='NEW', pk=pk, operation='update')
+    delete = _QUEUE_INSERT.format(table=table_name, ref='OLD', pk=pk, operation='delete')
+    # A changed primary key leaves the old sheet row behind, so queue its delete too
+    renamed = (
+        f"INSERT INTO sync_queue (table_name, record_id, operation, timestamp) "
+        f"SELECT '{table_name}', OLD.{pk}, 'delete', datetime('now', 'localtime') "
+        f"WHERE OLD.{pk} IS NOT NEW.{pk};"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_capture_insert AFTER INSERT ON {table_name} "
+        f"WHEN {capturing} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_capture_update AFTER UPDATE ON {table_name} "
+        f"WHEN {capturing} BEGIN {renamed} {update} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name}_capture_delete AFTER DELETE ON {table_name} "
+        f"WHEN {capturing} BEGIN {delete} END",
+    ]
+
+
+def _create_change_capture(cursor):
+    """
+    Log inserts, updates and deletes on every synced table to sync_queue.
+
+    Writes that come from Sheets (pulls, marking rows synced) run with
+    sync_capture.suspended = 1 inside their transaction so they are not
+    echoed back. Rows already pending are queued so nothing is lost.
+    """
+    cursor.execute("CREATE TABLE IF NOT EXISTS sync_capture (suspended INTEGER NOT NULL DEFAULT 0)")
+    if cursor.execute("SELECT COUNT(*) FROM sync_capture").fetchone()[0] == 0:
+        cursor.execute("INSERT INTO sync_capture (suspended) VALUES (0)")
+
+    for table_name in TABLES:
+        info = cursor.execute(f"PRAGMA table_info({table_name})").fetchall()
+        columns = {row[1] for row in info}
+        pk = next((row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]), None)
+        if 'sync_status' not in columns or pk is None:
+            continue
+
+        for statement in _capture_trigger_sql(table_name, pk):
+            cursor.execute(statement)
+
+        cursor.execute(f"""
+            INSERT INTO sync_queue (table_name, record_id, operation, timestamp)
+            SELECT '{table_name}', {pk}, 'update', datetime('now', 'localtime')
+            FROM {table_name} WHERE sync_status = 'pending'
+        """)
+
+
+def _create_sheet_row_index(cursor):
+    """
+    Remember which sheet row each pushed record lives on.
+
+    sheet_row_index holds one row per record (with a hash of the values
+    last written or read); sheet_row_index_state holds the sheet's known
+    row count, which is also where the next append should land.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sheet_row_index (
+            table_name TEXT NOT NULL,
+            record_id TEXT NOT NULL,
+            row_number INTEGER NOT NULL,
+            content_hash TEXT,
+            PRIMARY KEY (table_name, record_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sheet_row_index_state (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL,
+            verified_at TEXT
+        )
+    """)
+
+
+def _create_sync_runs(cursor):
+    """
+    Keep a record of every sync run for diagnosing slow syncs.
+
+    One row per run with its totals; table_timings holds a JSON object of
+    table name -> seconds spent on it.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            duration REAL NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            api_reads INTEGER DEFAULT 0,
+            api_writes INTEGER DEFAULT 0,
+            bytes_sent INTEGER DEFAULT 0,
+            bytes_received INTEGER DEFAULT 0,
+            rows_pulled INTEGER DEFAULT 0,
+            rows_pushed INTEGER DEFAULT 0,
+            conflicts INTEGER DEFAULT 0,
+            retries INTEGER DEFAULT 0,
+            throttled INTEGER DEFAULT 0,
+            table_timings TEXT
+        )
+    """)
+
+
+def _create_list_views(cursor):
+    """
+    Views joining list screens' rows to the names they display, so each
+    list is one query instead of one lookup per row.
+
+    Tables are joined by full name (no aliases) so EXPLAIN QUERY PLAN on
+    a view still names the tables it scans.
+    """
+    cursor.execute("DROP VIEW IF EXISTS v_batch_overview")
+    cursor.execute("""
+        CREATE VIEW v_batch_overview AS
+        SELECT batches.*,
+               recipes.recipe_name AS recipe_name,
+               recipes.target_abv AS expected_abv,
+               recipes.target_batch_size_litres AS recipe_batch_size
+        FROM batches
+        LEFT JOIN recipes ON recipes.recipe_id = batches.recipe_id
+    """)
+    cursor.execute("DROP VIEW IF EXISTS v_invoice_overview")
+    cursor.execute("""
+        CREATE VIEW v_invoice_overview AS
+        SELECT invoices.*, customers.customer_name AS customer_name
+        FROM invoices
+        LEFT JOIN customers ON customers.customer_id = invoices.customer_id
+    """)
+    cursor.execute("DROP VIEW IF EXISTS v_product_sales_overview")
+    cursor.execute("""
+        CREATE VIEW v_product_sales_overview AS
+        SELECT product_sales.*, customers.customer_name AS customer_name
+        FROM product_sales
+        LEFT JOIN customers ON customers.customer_id = product_sales.customer_id
+    """)
+
+
+def _retire_duplicate_indexes(cursor):
+    """
+    Drop indexes the old migration scripts made that duplicate one in
+    sqlite_cache.INDEXES. Their other indexes were adopted into INDEXES.
+    """
+    cursor.execute("DROP INDEX IF EXISTS idx_packaging_lines_batch")
+
+
+def _fold_batch_statuses(cursor):
+    """
+    Fold the retired brewing/conditioning/ready batch statuses into
+    fermenting, as migrate_batches_schema.py used to do by hand.
+
+    The rows are marked pending (and queued by the capture triggers), so
+    the sheet gets the new status too.
+    """
+    cursor.execute("""
+        UPDATE batches SET status = 'fermenting', sync_status = 'pending'
+        WHERE status IN ('brewing', 'conditioning', 'ready')
+    """)
+    if cursor.rowcount:
+        logger.info(f"Moved {cursor.rowcount} batches to fermenting")
+
+
+def _copy_empties_to_container_types(cursor):
+    """
+    Copy the casks_empty, bottles_empty and cans_empty stock into
+    container_types, as migrate_products_module.py used to do by hand.
+
+    Rows already copied (same ID) are left as they are.
+    """
+    copies = [
+        ('casks_empty', 'cask_id', 'cask_size', 'cask_size_litres', 'Cask'),
+        ('bottles_empty', 'bottle_id', "bottle_size_ml || 'ml Bottle'",
+         'CAST(bottle_size_ml AS REAL) / 1000.0', 'Bottle'),
+        ('cans_empty', 'can_id', "can_size_ml || 'ml Can'",
+         'CAST(can_size_ml AS REAL) / 1000.0', 'Can'),
+    ]
+    for table, id_column, name, size_litres, category in copies:
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO container_types
+                (container_type_id, name, size_litres, category, quantity_available,
+                 created_date, last_modified, sync_status)
+            SELECT {id_column}, {name}, {size_litres}, '{category}', quantity_in_stock,
+                   last_updated, last_updated, 'pending'
+            FROM {table}
+            WHERE {id_column} IS NOT NULL AND {size_litres} IS NOT NULL
+        """)
+        if cursor.rowcount:
+            logger.info(f"Copied {cursor.rowcount} rows of {table} into container_types")
+
+
+def _create_sync_quarantine(cursor):
+    """
+    Keep the changes sync had to set aside instead of applying.
+
+    A change-log or change-set event that cannot be applied (it breaks a
+    UNIQUE constraint, say) is stored here with its payload and error, so
+    it neither blocks the events after it nor gets lost. So is a local
+    change the sheet must not receive, such as an edit to a closed year.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_quarantine (
+            quarantine_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            record_id TEXT NOT NULL,
+            operation TEXT NOT NULL,
+            payload TEXT,
+            error TEXT,
+            quarantined_at TEXT NOT NULL
+        )
+    """)
+
+
+# (version, description, function(cursor)) in the order they are applied.
+# Each migration runs in its own transaction together with the
+# user_version bump, so a failure leaves the database at the last good step.
+MIGRATIONS = [
+    (1, "Create baseline tables", _create_baseline_tables),
+    (2, "Add columns missing from unversioned databases", _add_late_columns),
+    (3, "Backfill legacy inventory batches", _backfill_legacy_inventory_batches),
+    (4, "Seed default settings and containers", _seed_defaults),
+    (5, "Capture changes to synced tables in sync_queue", _create_change_capture),
+    (6, "Add the local sheet row index", _create_sheet_row_index),
+    (7, "Add the sync_runs telemetry table", _create_sync_runs),
+    (8, "Add joined views for the batch, invoice and sales lists", _create_list_views),
+    (9, "Retire duplicate indexes from the old migration scripts", _retire_duplicate_indexes),
+    (10, "Fold retired batch statuses into fermenting", _fold_batch_statuses),
+    (11, "Copy empty container stock into container_types", _copy_empties_to_container_types),
+    (12, "Add the sync_quarantine table for changes sync set aside", _create_sync_quarantine),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def pending_migrations(current_version):
+    """Migrations newer than current_version, in order."""
+    return [m for m in MIGRATIONS if m[0] > current_version]
@@ -0,0 +1,236 @@
+"""
+Rate Limiter for Brewery Management System
+Token buckets sized to the Google Sheets per-minute quotas, with retry,
+exponential backoff, jitter and Retry-After handling for throttled calls.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens, refilled
+    continuously at `rate` tokens per second. Not thread-safe on its own;
+    RateLimiter serialises access.
+    """
+
+    def __init__(self, capacity: float, rate: float, clock: Callable[[], float]):
+        self.capacity = capacity
+        self.rate = rate
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        # No tokens are handed out before this time (set after a 429)
+        self.blocked_until = 0.0
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def remaining(self) -> float:
+        """Tokens available right now."""
+        self._refill()
+        return self.tokens
+
+    def wait_time(self, cost: float = 1) -> float:
+        """Seconds until `cost` tokens can be taken (0 if they can be now)."""
+        self._refill()
+        wait = max(0.0, self.blocked_until - self.clock())
+        if self.tokens < cost:
+            wait = max(wait, (cost - self.tokens) / self.rate)
+        return wait
+
+    def take(self, cost: float = 1):
+        self._refill()
+        self.tokens -= cost
+
+    def drain(self, until: float):
+        """Empty the bucket and refuse tokens until the given time."""
+        self._refill()
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, until)
+
+
+class RateLimiter:
+    """
+    Shared limiter for Google Sheets API calls.
+
+    Reads and writes have separate per-minute quotas, so each gets its own
+    bucket. A bucket allows a short burst and refills at the rest of the
+    quota, so no rolling minute ever exceeds it. call() waits for a token, runs the request and retries
+    throttled or transiently failing requests with exponential backoff and
+    full jitter, or for as long as the server's Retry-After asks.
+
+    clock, sleep and rand are injectable so behaviour can be tested without
+    real waiting.
+    """
+
+    # Google Sheets: 60 read and 60 write requests per minute per user.
+    # Stay a little under so other tools sharing the account have headroom.
+    REQUESTS_PER_MINUTE = {'read': 55, 'write': 55}
+
+    # Below this share of the budget, is_budget_low() asks sync to back off
+    LOW_BUDGET_FRACTION = 0.2
+
+    # Shortest wait for a token, in seconds
+    MIN_WAIT = 0.001
+
+    # Requests that may go out back to back before pacing starts
+    BURST = 10
+
+    def __init__(self, requests_per_minute: Optional[Dict[str, int]] = None,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 64.0,
+                 burst: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rand: Callable[[], float] = random.random):
+        """
+        Args:
+            requests_per_minute: Quota per kind, e.g. {'read': 55, 'write': 55}
+            max_retries: Retries after the first attempt before giving up
+            base_delay: First backoff delay in seconds (doubles per attempt)
+            max_delay: Upper bound for a single backoff delay
+            burst: Bucket capacity (default BURST, at most a sixth of the quota)
+            clock: Monotonic time source
+            sleep: Function used to wait
+            rand: Source of jitter in [0, 1)
+        """
+        quotas = requests_per_minute or self.REQUESTS_PER_MINUTE
+        self.clock = clock
+        self.sleep = sleep
+        self.rand = rand
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        burst = burst or self.BURST
+        self.buckets = {}
+        for kind, per_minute in quotas.items():
+            # burst + a minute of refill == per_minute, whatever the window
+            capacity = max(1, min(burst, per_minute // 6))
+            self.buckets[kind] = TokenBucket(
+                capacity=capacity, rate=(per_minute - capacity) / 60.0, clock=clock
+            )
+        self.throttled_count = 0
+        self.retry_count = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, kind: str = 'read', cost: float = 1):
+        """Block until `cost` tokens of the given kind are available, then take them."""
+        bucket = self.buckets[kind]
+        while True:
+            with self._lock:
+                wait = bucket.wait_time(cost)
+                if wait <= 0:
+                    bucket.take(cost)
+                    return
+            logger.debug(f"Rate limiter: waiting {wait:.2f}s for {kind} quota")
+            # Never spin on a rounding-error wait
+            self.sleep(max(wait, self.MIN_WAIT))
+
+    def remaining(self, kind: str = 'read') -> float:
+        """Requests of this kind that can be made right now without waiting."""
+        with self._lock:
+            return self.buckets[kind].remaining()
+
+    def budget_fraction(self) -> float:
+        """Smallest remaining share of any bucket (0 = exhausted, 1 = full)."""
+        with self._lock:
+            return min(
+                max(0.0, bucket.remaining()) / bucket.capacity
+                if bucket.blocked_until <= self.clock() else 0.0
+                for bucket in self.buckets.values()
+            )
+
+    def is_budget_low(self) -> bool:
+        """True when optional work (background syncs) should wait a while."""
+        return self.budget_fraction() < self.LOW_BUDGET_FRACTION
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before retry number `attempt` (0-based).
+
+        Uses Retry-After when the server sent one, otherwise full jitter:
+        a random delay up to base_delay * 2**attempt (capped at max_delay).
+        """
+        if retry_after is not None:
+            return retry_after
+        return self.rand() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def call(self, func: Callable, *args, kind: str = 'read', cost: float = 1, **kwargs):
+        """
+        Run func(*args, **kwargs) within the quota, retrying transient failures.
+
+        Raises:
+            The last error once max_retries is exhausted, or immediately for
+            errors that are not worth retrying
+        """
+        attempt = 0
+        while True:
+            self.acquire(kind, cost)
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                retryable, retry_after = classify_error(error)
+                delay = self.backoff_delay(attempt, retry_after)
+                if retry_after is not None or error_status(error) == 429:
+                    # Throttled: nobody else should spend quota meanwhile,
+                    # even if this call is about to give up
+                    with self._lock:
+                        self.throttled_count += 1
+                        for bucket in self.buckets.values():
+                            bucket.drain(self.clock() + delay)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+
+                logger.warning(
+                    f"Sheets request failed ({error_status(error) or type(error).__name__}); "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                with self._lock:
+                    self.retry_count += 1
+                self.sleep(delay)
+                attempt += 1
+
+
+def error_status(error) -> Optional[int]:
+    """HTTP status of a googleapiclient HttpError (or anything with .resp.status)."""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error):
+    """
+    Decide whether a failed request should be retried.
+
+    Returns:
+        Tuple of (retryable, retry_after seconds or None)
+    """
+    status = error_status(error)
+    if status is None:
+        # Dropped connections and timeouts are transient; anything else is a bug
+        return isinstance(error, (ConnectionError, TimeoutError)), None
+    if status not in RETRYABLE_STATUSES:
+        return False, None
+
+    retry_after = None
+    headers = getattr(error, 'resp', None)
+    value = headers.get('retry-after') if hasattr(headers, 'get') else None
+    if value is not None:
+        try:
+            retry_after = max(0.0, float(value))
+        except (TypeError, ValueError):
+            retry_after = None
+    return True, retry_after
@@ -0,0 +1,131 @@
+"""
+Schema Registry for Brewery Management System
+Single in-memory description of the local SQLite schema: columns, primary
+keys, declared types and which tables are mirrored to Google Sheets.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from ..config.constants import TABLES
+
+logger = logging.getLogger(__name__)
+
+# Columns that only make sense locally and are never written to Sheets
+LOCAL_ONLY_COLUMNS = ('sync_status',)
+
+
+class TableSchema:
+    """Describes one table of the local cache"""
+
+    def __init__(self, name: str, columns: List[str], types: Dict[str, str],
+                 primary_keys: Tuple[str, ...], sheet_name: Optional[str] = None):
+        self.name = name
+        self.columns = columns
+        self.types = types
+        self.primary_keys = primary_keys
+        self.sheet_name = sheet_name
+
+    @property
+    def primary_key(self) -> str:
+        """The (first) primary key column, or 'rowid' if none is declared"""
+        return self.primary_keys[0] if self.primary_keys else 'rowid'
+
+    @property
+    def is_synced(self) -> bool:
+        """True if the table is mirrored to Sheets and tracks sync_status"""
+        return self.sheet_name is not None and 'sync_status' in self.columns
+
+    @property
+    def has_last_modified(self) -> bool:
+        """True if rows carry a last_modified timestamp"""
+        return 'last_modified' in self.columns
+
+    @property
+    def sheet_columns(self) -> List[str]:
+        """Columns in the order they are laid out on the sheet"""
+        return [c for c in self.columns if c not in LOCAL_ONLY_COLUMNS]
+
+    def has_column(self, column: str) -> bool:
+        return column in self.types
+
+    def to_sheet_row(self, record: Dict, headers: Optional[List[str]] = None) -> List:
+        """
+        Convert a record to a sheet row in column order.
+
+        Missing values become empty strings so cells line up with the header.
+
+        Args:
+            record: Column -> value
+            headers: The sheet's header row to lay the values out by
+                (default sheet_columns). Local column order is not the
+                sheet's on every terminal: an upgraded database has its
+                late columns at the end, a fresh one in place.
+        """
+        columns = self.sheet_columns if headers is None else headers
+        return ['' if record.get(c) is None else record.get(c) for c in columns]
+
+
+class SchemaRegistry:
+    """
+    Per-table schema facts loaded once from SQLite.
+
+    Replaces guessing primary keys from table names and probing
+    PRAGMA table_info on every write. Views are included too, so find()
+    can query them like tables.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, TableSchema]] = None):
+        self.tables = tables or {}
+
+    @classmethod
+    def load(cls, connection) -> 'SchemaRegistry':
+        """
+        Build a registry from a live SQLite connection.
+
+        Args:
+            connection: sqlite3.Connection
+
+        Returns:
+            SchemaRegistry
+        """
+        tables = {}
+        names = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()]
+
+        for name in names:
+            info = connection.execute(f"PRAGMA table_info({name})").fetchall()
+            columns = [col[1] for col in info]
+            types = {col[1]: (col[2] or '').upper() for col in info}
+            primary_keys = tuple(col[1] for col in sorted(info, key=lambda c: c[5]) if col[5])
+            tables[name] = TableSchema(name, columns, types, primary_keys, TABLES.get(name))
+
+        logger.info(f"Loaded schema registry for {len(tables)} tables")
+        return cls(tables)
+
+    def get(self, table_name: str) -> Optional[TableSchema]:
+        return self.tables.get(table_name)
+
+    def __contains__(self, table_name: str) -> bool:
+        return table_name in self.tables
+
+    def primary_key(self, table_name: str, default: str = 'id') -> str:
+        """Primary key column for a table, or default if the table is unknown"""
+        table = self.tables.get(table_name)
+        return table.primary_key if table else default
+
+    def columns(self, table_name: str) -> List[str]:
+        table = self.tables.get(table_name)
+        return list(table.columns) if table else []
+
+    def synced_tables(self) -> List[TableSchema]:
+        """Tables mirrored to Sheets, in TABLES order"""
+        return [self.tables[name] for name in TABLES if name in self.tables and self.tables[name].is_synced]
+
+    def sheet_headers(self) -> Dict[str, List[str]]:
+        """Header row for every mirrored sheet, keyed by sheet name"""
+        return {
+            table.sheet_name: table.sheet_columns
+            for table in (self.tables[name] for name in TABLES if name in self.tables)
+        }
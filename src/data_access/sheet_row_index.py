@@ -0,0 +1,236 @@
+"""
+Sheet Row Index for Brewery Management System
+Local map of record ID -> Google Sheets row number, so pushes can address
+rows directly instead of re-reading ID columns on every sync.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..config.constants import DATETIME_FORMAT
+
+logger = logging.getLogger(__name__)
+
+
+def row_hash(values: Iterable) -> str:
+    """
+    Hash a sheet row's values.
+
+    Values are compared the way Sheets hands them back (unformatted, see
+    GoogleSheetsClient.VALUE_RENDER_OPTION): as text, with whole floats
+    written as integers and trailing blank cells dropped, so a row hashed
+    before pushing matches the same row read back later.
+    """
+    cells = []
+    for value in values:
+        if value is None:
+            value = ''
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        cells.append(str(value))
+    while cells and cells[-1] == '':
+        cells.pop()
+    return hashlib.sha1(json.dumps(cells).encode('utf-8')).hexdigest()
+
+
+class SheetRowIndex:
+    """
+    Persistent (table, record ID) -> sheet row number map with content hashes.
+
+    Kept up to date by every push (appends report the rows they landed on)
+    and verified for free whenever a pull has the sheet's rows in hand. A
+    table with no index yet, or one found to be inconsistent, is rebuilt
+    from its ID column.
+    """
+
+    # Index entries compared against the sheet on each verification
+    SPOT_CHECK_SIZE = 5
+
+    def __init__(self, cache_manager):
+        """
+        Args:
+            cache_manager: SQLiteCacheManager instance
+        """
+        self.cache = cache_manager
+
+    def row_count(self, table_name: str) -> Optional[int]:
+        """
+        Number of rows (header included) the sheet is known to have.
+
+        Returns:
+            Row count, or None if the table has no usable index
+        """
+        with self.cache.reader() as connection:
+            row = connection.execute(
+                "SELECT row_count FROM sheet_row_index_state WHERE table_name = ?", (table_name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, table_name: str, record_ids: List) -> Dict[str, Tuple[int, Optional[str]]]:
+        """
+        Row numbers and content hashes for the given records.
+
+        Returns:
+            Dictionary of str(record_id) -> (row number, content hash);
+            records not on the sheet are absent
+        """
+        found = {}
+        ids = [str(record_id) for record_id in record_ids]
+        chunk = self.cache.MAX_BOUND_PARAMETERS - 1
+        with self.cache.reader() as connection:
+            for start in range(0, len(ids), chunk):
+                batch = ids[start:start + chunk]
+                rows = connection.execute(
+                    f"SELECT record_id, row_number, content_hash FROM sheet_row_index "
+                    f"WHERE table_name = ? AND record_id IN ({', '.join(['?'] * len(batch))})",
+                    [table_name] + batch
+                ).fetchall()
+                for record_id, row_number, content_hash in rows:
+                    found[record_id] = (row_number, content_hash)
+        return found
+
+    def hashes(self, table_name: str) -> Dict[str, str]:
+        """
+        Content hash of every indexed row of a table, in one query.
+
+        Returns:
+            Dictionary of record ID -> hash of the row as last seen on the
+            sheet; rows indexed without a hash are absent
+        """
+        with self.cache.reader() as connection:
+            rows = connection.execute(
+                "SELECT record_id, content_hash FROM sheet_row_index "
+                "WHERE table_name = ? AND content_hash IS NOT NULL",
+                (table_name,)
+            ).fetchall()
+        return dict(rows)
+
+    def record(self, table_name: str, rows: Dict[str, Tuple[int, Optional[str]]],
+               row_count: Optional[int] = None):
+        """
+        Store the row number and hash of records just written.
+
+        Args:
+            table_name: Local table name
+            rows: Dictionary of record ID -> (row number, content hash)
+            row_count: New sheet row count, if it changed (after an append)
+        """
+        with self.cache.writer() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO sheet_row_index (table_name, record_id, row_number, content_hash) "
+                "VALUES (?, ?, ?, ?)",
+                [(table_name, str(record_id), row_number, content_hash)
+                 for record_id, (row_number, content_hash) in rows.items()]
+            )
+            if row_count is not None:
+                connection.execute(
+                    "UPDATE sheet_row_index_state SET row_count = ? WHERE table_name = ?",
+                    (row_count, table_name)
+                )
+
+    def update_hashes(self, table_name: str, hashes: Dict[str, Optional[str]]):
+        """
+        Replace the content hash of indexed records whose sheet rows another
+        terminal rewrote; their row numbers are unchanged.
+        """
+        with self.cache.writer() as connection:
+            connection.executemany(
+                "UPDATE sheet_row_index SET content_hash = ? WHERE table_name = ? AND record_id = ?",
+                [(content_hash, table_name, str(record_id)) for record_id, content_hash in hashes.items()]
+            )
+
+    def forget(self, table_name: str, record_ids: List):
+        """Drop records whose sheet rows were cleared (the rows themselves stay)."""
+        with self.cache.writer() as connection:
+            connection.executemany(
+                "DELETE FROM sheet_row_index WHERE table_name = ? AND record_id = ?",
+                [(table_name, str(record_id)) for record_id in record_ids]
+            )
+
+    def invalidate(self, table_name: str):
+        """Discard a table's index; the next push rebuilds it from the sheet."""
+        with self.cache.writer() as connection:
+            connection.execute("DELETE FROM sheet_row_index WHERE table_name = ?", (table_name,))
+            connection.execute("DELETE FROM sheet_row_index_state WHERE table_name = ?", (table_name,))
+        logger.info(f"Sheet row index for {table_name} invalidated")
+
+    def rebuild(self, table_name: str, id_values: List, rows: Optional[List[List]] = None,
+                first_row: int = 1):
+        """
+        Replace a table's index from the sheet's ID column.
+
+        Args:
+            table_name: Local table name
+            id_values: ID cell of every sheet row, header first (blank rows '')
+            rows: Optional full sheet rows (same order) to hash
+            first_row: Only (re)index rows from this row number on; earlier
+                entries are kept. Used to add rows appended by others.
+        """
+        entries = []
+        seen = set()
+        for row_number, value in enumerate(id_values[first_row - 1:], start=first_row):
+            if row_number == 1 or value in ('', None) or str(value) in seen:
+                # Header, blank row, or a duplicate ID (the first row wins,
+                # as it did for find_row_index)
+                continue
+            seen.add(str(value))
+            content_hash = row_hash(rows[row_number - 1]) if rows is not None else None
+            entries.append((table_name, str(value), row_number, content_hash))
+
+        with self.cache.writer() as connection:
+            if first_row <= 1:
+                connection.execute("DELETE FROM sheet_row_index WHERE table_name = ?", (table_name,))
+            connection.executemany(
+                "INSERT OR IGNORE INTO sheet_row_index (table_name, record_id, row_number, content_hash) "
+                "VALUES (?, ?, ?, ?)",
+                entries
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO sheet_row_index_state (table_name, row_count, verified_at) "
+                "VALUES (?, ?, ?)",
+                (table_name, len(id_values), datetime.now().strftime(DATETIME_FORMAT))
+            )
+
+    def verify(self, table_name: str, id_values: List, rows: Optional[List[List]] = None) -> bool:
+        """
+        Cheap integrity check against sheet data already downloaded.
+
+        Spot-checks a few indexed IDs against the rows they should be on. If
+        they match and the sheet has only grown (other terminals appending),
+        just the new rows are indexed; otherwise the sheet was edited by
+        hand and the whole table is re-indexed. When full rows are given the
+        content hashes are refreshed too, so they never describe an old
+        version of a row someone else has since changed.
+
+        Args:
+            table_name: Local table name
+            id_values: ID cell of every sheet row, header first
+            rows: Optional full sheet rows (same order) to hash
+
+        Returns:
+            True if the index was found consistent, False if it was rebuilt
+        """
+        known_rows = self.row_count(table_name)
+        consistent = False
+        if known_rows is not None and len(id_values) >= known_rows:
+            with self.cache.reader() as connection:
+                sample = connection.execute(
+                    "SELECT record_id, row_number FROM sheet_row_index WHERE table_name = ? "
+                    "ORDER BY RANDOM() LIMIT ?",
+                    (table_name, self.SPOT_CHECK_SIZE)
+                ).fetchall()
+            consistent = all(
+                str(id_values[row_number - 1]) == record_id for record_id, row_number in sample
+            )
+
+        if known_rows is not None and not consistent:
+            logger.warning(f"Sheet row index for {table_name} is stale (sheet edited by hand?); rebuilding")
+
+        if rows is not None or not consistent:
+            self.rebuild(table_name, id_values, rows)
+        elif len(id_values) > known_rows:
+            self.rebuild(table_name, id_values, first_row=known_rows + 1)
+        return consistent
@@ -0,0 +1,76 @@
+"""
+Sheet Shards for Brewery Management System
+Routes the append-only tables to one sheet per year (Sales_2026, ...) and
+decides which of those sheets are still open for edits.
+"""
+
+import re
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..config.constants import TABLES, SHARDED_TABLES, SHARD_OPEN_YEARS
+
+
+class ShardPolicy:
+    """
+    Which tables are sharded, which shard a record belongs to, and which
+    shards are open.
+
+    A record's shard is the year of its date column; records without a
+    usable date go to the current year's shard. The current year and the
+    SHARD_OPEN_YEARS - 1 before it are open; older shards are closed and
+    treated as immutable.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, str]] = None, open_years: int = SHARD_OPEN_YEARS,
+                 today: Callable[[], date] = date.today):
+        """
+        Args:
+            tables: Dictionary of table key -> date column (default SHARDED_TABLES)
+            open_years: Number of most recent years whose shards are open
+            today: Date source, for tests
+        """
+        self.tables = SHARDED_TABLES if tables is None else tables
+        self.open_year_count = max(1, open_years)
+        self.today = today
+
+    def is_sharded(self, table_key: str) -> bool:
+        return table_key in self.tables
+
+    def current_year(self) -> int:
+        return self.today().year
+
+    def first_open_year(self) -> int:
+        return self.current_year() - self.open_year_count + 1
+
+    def open_years(self) -> List[int]:
+        """Years of the open shards, oldest first."""
+        return list(range(self.first_open_year(), self.current_year() + 1))
+
+    def is_closed(self, year: int) -> bool:
+        return year < self.first_open_year()
+
+    def year_of(self, table_key: str, record: Dict) -> int:
+        """Shard year of a record (stored YYYY-MM-DD, or DD/MM/YYYY as Sheets may show it)."""
+        value = str(record.get(self.tables[table_key]) or '').strip()
+        match = re.match(r'(\d{4})-', value) or re.match(r'\d{1,2}/\d{1,2}/(\d{4})\b', value)
+        return int(match.group(1)) if match else self.current_year()
+
+    def sheet(self, table_key: str, year: int) -> str:
+        """Sheet title of a shard, e.g. Sales_2026."""
+        return f"{TABLES[table_key]}_{year}"
+
+    def shards_in(self, table_key: str, sheet_titles: Iterable[str]) -> Dict[int, str]:
+        """
+        The shards of a table among a spreadsheet's sheet titles.
+
+        Returns:
+            Dictionary of year -> sheet title
+        """
+        pattern = re.compile(rf'^{re.escape(TABLES[table_key])}_(\d{{4}})$')
+        found = {}
+        for title in sheet_titles:
+            match = pattern.match(title)
+            if match:
+                found[int(match.group(1))] = title
+        return found
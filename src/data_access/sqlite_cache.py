@@ -4,1073 +4,419 @@
 import sqlite3
 import logging
 import json
+import re
+import threading
+import uuid
+import warnings
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
 
 from ..config.constants import CACHE_DB_PATH, TABLES, DATE_FORMAT, DATETIME_FORMAT
+from .connection_pool import ConnectionPool
+from .migrations import SCHEMA_VERSION, get_schema_version, set_schema_version, pending_migrations
+from .schema_registry import SchemaRegistry
 
 logger = logging.getLogger(__name__)
 
+# Secondary indexes for the hot GUI filters: (index name, table, columns).
+# Whenever migrations run, initialize_database() creates anything missing and
+# recreates any index whose definition here has changed. Indexes not listed
+# are left alone, so to retire one, drop it in a new migration. Ship any
+# change to this list together with a new migration.
+INDEXES = [
+    ('idx_sales_sale_date', 'sales', 'sale_date'),
+    ('idx_sales_status', 'sales', 'status, delivery_date'),
+    ('idx_sales_customer', 'sales', 'customer_id, delivery_date'),
+    ('idx_sales_invoice', 'sales', 'invoice_id'),
+    ('idx_inventory_batches_material', 'inventory_batches', 'material_id, received_date'),
+    ('idx_inventory_transactions_material', 'inventory_transactions', 'material_id, transaction_date'),
+    ('idx_product_sales_sale', 'product_sales', 'sale_id'),
+    ('idx_product_sales_gyle', 'product_sales', 'gyle_number, date_sold'),
+    ('idx_product_sales_customer', 'product_sales', 'customer_id'),
+    ('idx_products_gyle', 'products', 'gyle_number'),
+    ('idx_products_batch', 'products', 'batch_id'),
+    ('idx_products_status', 'products', 'status'),
+    ('idx_invoices_customer', 'invoices', 'customer_id'),
+    ('idx_invoices_payment_status', 'invoices', 'payment_status, invoice_date'),
+    ('idx_invoice_lines_invoice', 'invoice_lines', 'invoice_id'),
+    ('idx_payments_invoice', 'payments', 'invoice_id'),
+    ('idx_batches_status', 'batches', 'status, brew_date'),
+    ('idx_batches_brew_date', 'batches', 'brew_date'),
+    ('idx_batches_recipe', 'batches', 'recipe_id, brew_date'),
+    ('idx_recipe_ingredients_recipe', 'recipe_ingredients', 'recipe_id'),
+    ('idx_fermentation_logs_batch', 'fermentation_logs', 'batch_id'),
+    ('idx_batch_packaging_lines_batch', 'batch_packaging_lines', 'batch_id'),
+    ('idx_packaging_lines_date', 'batch_packaging_lines', 'packaging_date'),
+    ('idx_spoilt_beer_month', 'spoilt_beer', 'duty_month'),
+    ('idx_spoilt_beer_batch', 'spoilt_beer', 'batch_id'),
+    ('idx_duty_returns_month', 'duty_returns', 'duty_month'),
+    ('idx_sync_queue_record', 'sync_queue', 'table_name, record_id'),
+    ('idx_sync_runs_kind', 'sync_runs', 'kind, run_id'),
+]
+
+# Every synced table also gets a partial index on its pending rows, so
+# get_pending_syncs() only touches rows that actually need pushing.
+PENDING_INDEX_TEMPLATE = "idx_{table}_pending"
+
+
+def _index_signature(statement):
+    """CREATE INDEX text reduced for comparison with sqlite_master.sql."""
+    statement = re.sub(r'\bIF\s+NOT\s+EXISTS\b', '', statement, flags=re.IGNORECASE)
+    return re.sub(r'\s+', '', statement).lower()
+
+
+@lru_cache(maxsize=256)
+def record_type(columns):
+    """
+    Compact row class for a tuple of column names, as yielded by iter_records().
+
+    Rows are plain tuples underneath (no per-row __dict__), read by
+    attribute (sale.customer_id) or, like the dicts get_all_records()
+    returns, by key (sale['customer_id'], sale.get('notes', '')).
+    dict(row) gives a regular dictionary when one is needed.
+    """
+    index = {column: position for position, column in enumerate(columns)}
+    base = namedtuple('Record', columns, rename=True)
+
+    class Record(base):
+        __slots__ = ()
+
+        def __getitem__(self, key):
+            if isinstance(key, str):
+                try:
+                    key = index[key]
+                except KeyError:
+                    raise KeyError(key) from None
+            return tuple.__getitem__(self, key)
+
+        def get(self, key, default=None):
+            position = index.get(key)
+            return default if position is None else tuple.__getitem__(self, position)
+
+        def keys(self):
+            return columns
+
+    return Record
+
 
 class SQLiteCacheManager:
     """
     Manages local SQLite database that serves as a cache for Google Sheets.
     Enables offline functionality by storing all data locally.
+
+    The manager is shared by the Tk thread and the background sync threads.
+    Each thread gets its own pooled connection, so connect()/close() only
+    check a connection out of (and back into) the pool for the calling
+    thread and can never close a connection another thread is using.
     """
     
-    def __init__(self):
-        self.db_path = CACHE_DB_PATH
-        self.connection = None
-        self.cursor = None
+    # SQLite's default limit on ? parameters in one statement
+    MAX_BOUND_PARAMETERS = 999
+
+    # Operators accepted in find() where keys, e.g. {'quantity_remaining >': 0}
+    FIND_OPERATORS = ('=', '!=', '<', '<=', '>', '>=', 'LIKE', 'IN', 'NOT IN')
+
+    # system_settings key holding this installation's ID
+    TERMINAL_ID_KEY = 'terminal_id'
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path) if db_path else CACHE_DB_PATH
+        self._pool = ConnectionPool(self.db_path)
+        self._local = threading.local()
+        # SQLite allows a single writer; serialise scoped writers in-process
+        # rather than letting them spin on SQLITE_BUSY.
+        self._write_lock = threading.RLock()
+        self._schema = None
+
+    @property
+    def connection(self):
+        """The connection checked out by the calling thread (or None)."""
+        return getattr(self._local, 'connection', None)
+
+    @property
+    def cursor(self):
+        """The cursor belonging to the calling thread's connection (or None)."""
+        return getattr(self._local, 'cursor', None)
         
     def connect(self):
         """
         Connect to the SQLite database.
         Creates the database file if it doesn't exist.
+
+        Calls nest: only the outermost connect() checks a connection out of
+        the pool, and only the matching close() hands it back.
         """
         try:
-            # Ensure directory exists
-            self.db_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Connect to database
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row  # Access columns by name
-            self.cursor = self.connection.cursor()
-            
-            logger.info(f"Connected to SQLite database at {self.db_path}")
-            
-            # Enable WAL mode for better concurrency (UI reads + Background writes)
-            self.connection.execute("PRAGMA journal_mode=WAL;")
+            depth = getattr(self._local, 'depth', 0)
+            if depth == 0:
+                # Ensure directory exists
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                
+                connection = self._pool.acquire()
+                self._local.connection = connection
+                self._local.cursor = connection.cursor()
+
+                if self._schema is None:
+                    self._schema = SchemaRegistry.load(connection)
             
+            self._local.depth = depth + 1
             return True
             
         except Exception as e:
             logger.error(f"Failed to connect to SQLite database: {str(e)}")
             return False
     
+    @property
+    def schema(self):
+        """SchemaRegistry describing the cache's tables (loaded on first connect)."""
+        if self._schema is None:
+            with self.reader() as connection:
+                self._schema = SchemaRegistry.load(connection)
+        return self._schema
+
+    def _table_schema(self, table_name):
+        """
+        Registry entry for a table, reloading the registry once if the table
+        was created after it was loaded.
+        """
+        table = self.schema.get(table_name)
+        if table is None:
+            self._schema = SchemaRegistry.load(self.connection)
+            table = self._schema.get(table_name)
+        if table is None:
+            raise sqlite3.OperationalError(f"no such table: {table_name}")
+        return table
+
     def close(self):
-        """Close the database connection."""
-        if self.connection:
-            self.connection.close()
-            logger.info("Closed SQLite database connection")
-    
-    def initialize_database(self):
+        """Release the calling thread's connection back to the pool."""
+        depth = getattr(self._local, 'depth', 0)
+        if depth > 1:
+            self._local.depth = depth - 1
+            return
+        
+        connection = self.connection
+        self._local.depth = 0
+        self._local.connection = None
+        self._local.cursor = None
+        if connection:
+            self._pool.release(connection)
+
+    def close_all(self):
+        """Close every pooled connection. Call once on application exit."""
+        self.close()
+        self._pool.close_all()
+
+    @contextmanager
+    def reader(self):
         """
-        Create all required tables in the database.
-        This is called once during initial setup.
+        Check out a connection for reading.
+
+        Readers never take the write lock, so under WAL the UI can keep
+        querying while a background sync is writing.
+
+        Usage:
+            with cache.reader() as conn:
+                rows = conn.execute("SELECT ...").fetchall()
         """
+        if not self.connect():
+            raise sqlite3.OperationalError(f"Could not open {self.db_path}")
         try:
-            # Batches table
-            # Check for missing columns (Schema Migration - Batches)
-            try:
-                self.cursor.execute("SELECT fermented_volume FROM batches LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    logger.info("Migrating batches table...")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN fermented_volume REAL")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN packaged_volume REAL")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN waste_volume REAL")
-                except Exception as e:
-                    logger.error(f"Migration error (batches): {e}")
-
-            # Check for original_gravity (Schema Migration - Batches Update)
-            try:
-                self.cursor.execute("SELECT original_gravity FROM batches LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    logger.info("Migrating batches table (adding original_gravity)...")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN original_gravity REAL")
-                except Exception as e:
-                    logger.error(f"Migration error (batches OG): {e}")
+            yield self.connection
+        finally:
+            self.close()
 
-            # Check for final_gravity and ABVs (Schema Migration - Batches Packaging)
-            try:
-                self.cursor.execute("SELECT final_gravity FROM batches LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    logger.info("Migrating batches table (adding packaging columns)...")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN final_gravity REAL")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN actual_abv REAL")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN measured_abv REAL")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN waste_percentage REAL")
-                except Exception as e:
-                    logger.error(f"Migration error (batches packaging): {e}")
-
-            # Check for waste_percentage (Schema Migration - Batches Waste)
-            try:
-                self.cursor.execute("SELECT waste_percentage FROM batches LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    logger.info("Migrating batches table (adding waste_percentage)...")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN waste_percentage REAL")
-                except Exception as e:
-                    logger.error(f"Migration error (batches waste_percentage): {e}")
+    @contextmanager
+    def writer(self):
+        """
+        Check out a connection for writing.
 
-            # Check for missing columns (Schema Migration - Recipes)
-            try:
-                self.cursor.execute("SELECT allergens FROM recipes LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    logger.info("Migrating recipes table...")
-                    self.cursor.execute("ALTER TABLE recipes ADD COLUMN allergens TEXT")
-                except Exception as e:
-                    logger.error(f"Migration error (recipes): {e}")
+        Writers are serialised by an in-process lock. The block is committed
+        when it exits normally and rolled back if it raises. Inside an open
+        transaction() the block becomes a nested savepoint instead.
 
-            # Check for ingredient_source_batches (Schema Migration - Batches Warning System)
-            try:
-                self.cursor.execute("SELECT ingredient_source_batches FROM batches LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    logger.info("Migrating batches table (adding ingredient_source_batches)...")
-                    self.cursor.execute("ALTER TABLE batches ADD COLUMN ingredient_source_batches TEXT")
-                except Exception as e:
-                    logger.error(f"Migration error (batches ingredient_source_batches): {e}")
+        Usage:
+            with cache.writer() as conn:
+                conn.execute("UPDATE ...")
+        """
+        with self.transaction():
+            yield self.connection
 
-            # Check for delivery_area (Schema Migration - Customers)
-            try:
-                self.cursor.execute("SELECT delivery_area FROM customers LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    logger.info("Migrating customers table (adding delivery_area)...")
-                    self.cursor.execute("ALTER TABLE customers ADD COLUMN delivery_area TEXT")
-                except Exception as e:
-                    logger.error(f"Migration error (customers delivery_area): {e}")
+    @contextmanager
+    def exclusive(self):
+        """
+        Check out a connection for statements that cannot run in a transaction.
 
-            # Check for costing columns (Schema Migration - Recipes Costing)
-            try:
-                self.cursor.execute("SELECT labor_cost FROM recipes LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    logger.info("Migrating recipes table (adding costing columns)...")
-                    self.cursor.execute("ALTER TABLE recipes ADD COLUMN labor_cost REAL DEFAULT 0.0")
-                    self.cursor.execute("ALTER TABLE recipes ADD COLUMN energy_cost REAL DEFAULT 0.0")
-                    self.cursor.execute("ALTER TABLE recipes ADD COLUMN misc_cost REAL DEFAULT 0.0")
-                except Exception as e:
-                    logger.error(f"Migration error (recipes costing): {e}")
-
-            # Check for pricing columns (Schema Migration - Products Pricing)
-            try:
-                self.cursor.execute("SELECT retail_price FROM products LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    logger.info("Migrating products table (adding pricing columns)...")
-                    self.cursor.execute("ALTER TABLE products ADD COLUMN retail_price REAL DEFAULT 0.0")
-                    self.cursor.execute("ALTER TABLE products ADD COLUMN cost_price REAL DEFAULT 0.0")
-                except Exception as e:
-                    logger.error(f"Migration error (products pricing): {e}")
-
-            # Delivery Runs table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS delivery_runs (
-                    run_id TEXT PRIMARY KEY,
-                    run_name TEXT NOT NULL,
-                    day_of_week TEXT,
-                    area_id TEXT,
-                    description TEXT,
-                    driver_name TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS batches (
-                    batch_id TEXT PRIMARY KEY,
-                    gyle_number TEXT UNIQUE NOT NULL,
-                    recipe_id TEXT,
-                    brew_date TEXT,
-                    brewer_name TEXT,
-                    actual_batch_size REAL,
-                    measured_abv REAL,
-                    pure_alcohol_litres REAL,
-                    status TEXT,
-                    fermenting_start TEXT,
-                    conditioning_start TEXT,
-                    ready_date TEXT,
-                    packaged_date TEXT,
-                    fermented_volume REAL,
-                    packaged_volume REAL,
-                    waste_volume REAL,
-                    original_gravity REAL,
-                    final_gravity REAL,
-                    actual_abv REAL,
-                    measured_abv REAL,
-                    waste_percentage REAL,
-                    spr_rate_applied REAL,
-                    duty_rate_applied REAL,
-                    is_draught INTEGER,
-                    brewing_notes TEXT,
-                    created_by TEXT,
-                    last_modified TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    ingredient_source_batches TEXT
-                )
-            ''')
-            
-            # Recipes table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS recipes (
-                    recipe_id TEXT PRIMARY KEY,
-                    recipe_name TEXT NOT NULL,
-                    style TEXT,
-                    version INTEGER,
-                    target_abv REAL,
-                    target_batch_size_litres REAL,
-                    created_date TEXT,
-                    created_by TEXT,
-                    last_modified TEXT,
-                    is_active INTEGER DEFAULT 1,
-                    brewing_notes TEXT,
-                    allergens TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-            
-            # Recipe Ingredients table (Legacy/Unified for GUI)
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS recipe_ingredients (
-                    ingredient_id TEXT PRIMARY KEY,
-                    recipe_id TEXT,
-                    ingredient_name TEXT,
-                    ingredient_type TEXT,
-                    quantity REAL,
-                    unit TEXT,
-                    timing TEXT,
-                    notes TEXT,
-                    inventory_item_id TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id)
-                )
-            ''')
-            
-            # Recipe Grains table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS recipe_grains (
-                    grain_id TEXT PRIMARY KEY,
-                    recipe_id TEXT,
-                    material_id TEXT,
-                    quantity REAL,
-                    unit TEXT,
-                    mash_notes TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id),
-                    FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
-                )
-            ''')
-
-            # Recipe Hops table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS recipe_hops (
-                    hop_id TEXT PRIMARY KEY,
-                    recipe_id TEXT,
-                    material_id TEXT,
-                    quantity REAL,
-                    unit TEXT,
-                    boil_time_minutes REAL,
-                    alpha_acid_percent REAL,
-                    addition_type TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id),
-                    FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
-                )
-            ''')
-
-            # Recipe Yeast table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS recipe_yeast (
-                    yeast_id TEXT PRIMARY KEY,
-                    recipe_id TEXT,
-                    material_id TEXT,
-                    quantity REAL,
-                    unit TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id),
-                    FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
-                )
-            ''')
-
-            # Recipe Adjuncts table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS recipe_adjuncts (
-                    adjunct_id TEXT PRIMARY KEY,
-                    recipe_id TEXT,
-                    material_id TEXT,
-                    quantity REAL,
-                    unit TEXT,
-                    timing TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id),
-                    FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
-                )
-            ''')
-            
-            # Inventory Materials table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS inventory_materials (
-                    material_id TEXT PRIMARY KEY,
-                    material_type TEXT,
-                    material_name TEXT UNIQUE NOT NULL,
-                    current_stock REAL DEFAULT 0,
-                    unit TEXT,
-                    reorder_level REAL,
-                    last_updated TEXT,
-                    supplier TEXT,
-                    cost_per_unit REAL,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-            
-            # Inventory Batches table (New - FIFO Tracking)
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS inventory_batches (
-                    batch_id TEXT PRIMARY KEY,
-                    material_id TEXT,
-                    batch_number TEXT,
-                    expiry_date TEXT,
-                    quantity_initial REAL,
-                    quantity_remaining REAL,
-                    received_date TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
-                )
-            ''')
+        Holds the write lock, so no other thread of this process writes
+        meanwhile, but opens no transaction: for VACUUM and
+        incremental_vacuum, which SQLite refuses inside one.
 
-            # Migration: Create Legacy Batches for existing stock
-            try:
-                # Check if inventory_batches is empty
-                self.cursor.execute("SELECT COUNT(*) FROM inventory_batches")
-                count = self.cursor.fetchone()[0]
-                if count == 0:
-                    logger.info("Migrating existing inventory to legacy batches...")
-                    # Get all materials with stock > 0
-                    self.cursor.execute("SELECT material_id, current_stock, last_updated FROM inventory_materials WHERE current_stock > 0")
-                    items = self.cursor.fetchall()
-                    
-                    for item in items:
-                        import uuid
-                        batch_id = str(uuid.uuid4())
-                        # Create a "Legacy" batch for the current stock
-                        self.cursor.execute('''
-                            INSERT INTO inventory_batches (batch_id, material_id, batch_number, quantity_initial, quantity_remaining, received_date, sync_status)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (batch_id, item['material_id'], 'LEGACY-STOCK', item['current_stock'], item['current_stock'], item['last_updated'] or get_today_db(), 'pending'))
-                    
-                    self.cursor.connection.commit()
-            except Exception as e:
-                logger.error(f"Migration error (legacy inventory batches): {e}")
-            
-            # Inventory Transactions table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS inventory_transactions (
-                    transaction_id TEXT PRIMARY KEY,
-                    transaction_date TEXT,
-                    transaction_type TEXT,
-                    material_id TEXT,
-                    quantity_change REAL,
-                    new_balance REAL,
-                    reference TEXT,
-                    username TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (material_id) REFERENCES inventory_materials(material_id)
-                )
-            ''')
-            
-            # Customers table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS customers (
-                    customer_id TEXT PRIMARY KEY,
-                    customer_name TEXT NOT NULL,
-                    contact_person TEXT,
-                    phone TEXT,
-                    email TEXT,
-                    delivery_address TEXT,
-                    billing_address TEXT,
-                    customer_type TEXT,
-                    payment_terms TEXT,
-                    credit_limit REAL,
-                    preferred_delivery_day TEXT,
-                    preferred_delivery_time TEXT,
-                    likes TEXT,
-                    dislikes TEXT,
-                    notes TEXT,
-                    is_active INTEGER DEFAULT 1,
-                    created_date TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-            
-            # Sales table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sales (
-                    sale_id TEXT PRIMARY KEY,
-                    sale_date TEXT,
-                    customer_id TEXT,
-                    batch_id TEXT,
-                    gyle_number TEXT,
-                    beer_name TEXT,
-                    container_type TEXT,
-                    container_size REAL,
-                    quantity INTEGER,
-                    total_litres REAL,
-                    unit_price REAL,
-                    line_total REAL,
-                    status TEXT DEFAULT 'reserved',
-                    reserved_date TEXT,
-                    delivery_date TEXT,
-                    invoice_id TEXT,
-                    recorded_by TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
-                    FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
-                )
-            ''')
-            
-            # Invoices table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS invoices (
-                    invoice_id TEXT PRIMARY KEY,
-                    invoice_number TEXT UNIQUE NOT NULL,
-                    invoice_date TEXT,
-                    customer_id TEXT,
-                    subtotal REAL,
-                    vat_rate REAL,
-                    vat_amount REAL,
-                    total REAL,
-                    payment_status TEXT DEFAULT 'unpaid',
-                    amount_paid REAL DEFAULT 0,
-                    amount_outstanding REAL,
-                    due_date TEXT,
-                    created_by TEXT,
-                    created_date TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-                )
-            ''')
-            
-            # Invoice Lines table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS invoice_lines (
-                    line_id TEXT PRIMARY KEY,
-                    invoice_id TEXT,
-                    sale_id TEXT,
-                    description TEXT,
-                    quantity REAL,
-                    unit_price REAL,
-                    line_total REAL,
-                    gyle_number TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (invoice_id) REFERENCES invoices(invoice_id)
-                )
-            ''')
-            
-            # Payments table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS payments (
-                    payment_id TEXT PRIMARY KEY,
-                    invoice_id TEXT,
-                    payment_date TEXT,
-                    payment_amount REAL,
-                    payment_method TEXT,
-                    payment_reference TEXT,
-                    recorded_by TEXT,
-                    recorded_date TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (invoice_id) REFERENCES invoices(invoice_id)
-                )
-            ''')
-            
-            # Users table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id TEXT PRIMARY KEY,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    full_name TEXT,
-                    role TEXT,
-                    is_active INTEGER DEFAULT 1,
-                    created_date TEXT,
-                    last_login TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-            
-            # Settings table (for duty rates and configuration)
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS settings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    annual_production_hl_pa REAL DEFAULT 0,
-                    production_year_start TEXT,
-                    production_year_end TEXT,
-                    spr_draught_low REAL DEFAULT 0,
-                    spr_draught_standard REAL DEFAULT 0,
-                    spr_non_draught_standard REAL DEFAULT 0,
-                    rate_full_8_5_to_22 REAL DEFAULT 0,
-                    rates_effective_from TEXT,
-                    vat_rate REAL DEFAULT 0.20,
-                    updated_at TEXT,
-                    updated_by TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-
-            # System Settings table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS system_settings (
-                    setting_key TEXT PRIMARY KEY,
-                    setting_value TEXT,
-                    setting_type TEXT,
-                    description TEXT,
-                    last_updated TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-            
-            # Casks Empty table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS casks_empty (
-                    cask_id TEXT PRIMARY KEY,
-                    cask_size TEXT,
-                    cask_size_litres REAL,
-                    quantity_in_stock INTEGER DEFAULT 0,
-                    condition TEXT,
-                    last_updated TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-
-            # Bottles Empty table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bottles_empty (
-                    bottle_id TEXT PRIMARY KEY,
-                    bottle_size_ml INTEGER,
-                    quantity_in_stock INTEGER DEFAULT 0,
-                    condition TEXT,
-                    last_updated TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-
-            # Cans Empty table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS cans_empty (
-                    can_id TEXT PRIMARY KEY,
-                    can_size_ml INTEGER,
-                    quantity_in_stock INTEGER DEFAULT 0,
-                    condition TEXT,
-                    last_updated TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-
-            # Settings Containers table (for duty calculations)
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS settings_containers (
-                    container_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    actual_capacity REAL NOT NULL,
-                    duty_paid_volume REAL NOT NULL,
-                    is_draught_eligible INTEGER DEFAULT 0,
-                    default_price REAL DEFAULT 0,
-                    active INTEGER DEFAULT 1,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-
-            # Container Types table (unified container management)
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS container_types (
-                    container_type_id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    size_litres REAL NOT NULL,
-                    category TEXT,
-                    quantity_available INTEGER DEFAULT 0,
-                    active INTEGER DEFAULT 1,
-                    created_date TEXT,
-                    last_modified TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-
-            # Products table (finished goods tracking)
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS products (
-                    product_id TEXT PRIMARY KEY,
-                    gyle_number TEXT NOT NULL,
-                    batch_id TEXT,
-                    recipe_id TEXT,
-                    product_name TEXT,
-                    style TEXT,
-                    container_type TEXT,
-                    container_size_l REAL,
-                    quantity_total INTEGER,
-                    quantity_in_stock INTEGER,
-                    quantity_sold INTEGER DEFAULT 0,
-                    abv REAL,
-                    date_packaged TEXT,
-                    date_in_stock TEXT,
-                    status TEXT,
-                    is_name_locked INTEGER DEFAULT 0,
-                    created_date TEXT,
-                    created_by TEXT,
-                    last_modified TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (batch_id) REFERENCES batches(batch_id),
-                    FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id)
-                )
-            ''')
-
-            # Product Sales table (for recall tracking)
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS product_sales (
-                    product_sale_id TEXT PRIMARY KEY,
-                    product_id TEXT NOT NULL,
-                    gyle_number TEXT NOT NULL,
-                    sale_id TEXT,
-                    customer_id TEXT,
-                    invoice_id TEXT,
-                    quantity_sold INTEGER,
-                    date_sold TEXT,
-                    date_delivered TEXT,
-                    delivery_address TEXT,
-                    container_type TEXT,
-                    created_date TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (product_id) REFERENCES products(product_id),
-                    FOREIGN KEY (sale_id) REFERENCES sales(sale_id),
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
-                    FOREIGN KEY (invoice_id) REFERENCES invoices(invoice_id)
-                )
-            ''')
+        Usage:
+            with cache.exclusive() as conn:
+                conn.execute("VACUUM")
 
-            # Batch Packaging Lines (for duty calculations)
-            # Check for missing columns (Schema Migration - Packaging Lines)
+        Raises:
+            sqlite3.OperationalError: If called inside a transaction() block
+        """
+        with self._write_lock:
+            if self.in_transaction:
+                raise sqlite3.OperationalError("exclusive() cannot be used inside a transaction")
+            if not self.connect():
+                raise sqlite3.OperationalError(f"Could not open {self.db_path}")
             try:
-                self.cursor.execute("SELECT container_actual_size FROM batch_packaging_lines LIMIT 1")
-            except sqlite3.OperationalError:
-                try:
-                    # Check if table exists first before trying to alter
-                    self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='batch_packaging_lines'")
-                    if self.cursor.fetchone():
-                        logger.info("Migrating batch_packaging_lines table...")
-                        try:
-                            self.cursor.execute("ALTER TABLE batch_packaging_lines ADD COLUMN container_actual_size REAL")
-                        except: pass
-                        try:
-                            self.cursor.execute("ALTER TABLE batch_packaging_lines ADD COLUMN container_duty_volume REAL")
-                        except: pass
-                        try:
-                            self.cursor.execute("ALTER TABLE batch_packaging_lines ADD COLUMN spr_rate_applied REAL")
-                        except: pass
-                        try:
-                            self.cursor.execute("ALTER TABLE batch_packaging_lines ADD COLUMN full_duty_rate REAL")
-                        except: pass
-                        try:
-                            self.cursor.execute("ALTER TABLE batch_packaging_lines ADD COLUMN is_draught_eligible INTEGER")
-                        except: pass
-                except Exception as e:
-                    logger.error(f"Migration error (batch_packaging_lines): {e}")
-
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS batch_packaging_lines (
-                    line_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    batch_id TEXT,
-                    gyle_number TEXT,
-                    packaging_date TEXT,
-                    container_type TEXT,
-                    quantity INTEGER,
-                    container_actual_size REAL,
-                    container_duty_volume REAL,
-                    total_duty_volume REAL,
-                    batch_abv REAL,
-                    pure_alcohol_litres REAL,
-                    spr_category TEXT,
-                    spr_rate_applied REAL,
-                    full_duty_rate REAL,
-                    effective_duty_rate REAL,
-                    duty_payable REAL,
-                    is_draught_eligible INTEGER,
-                    created_by TEXT,
-                    created_at TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
-                )
-            ''')
+                if self.connection.in_transaction:
+                    # Flush implicit work left by raw cursor writes
+                    self.connection.commit()
+                yield self.connection
+            finally:
+                self.close()
 
-            # Spoilt Beer (for duty reclaim)
-            # Check if table exists but might be missing columns (migration fix)
-            try:
-                self.cursor.execute("SELECT duty_month FROM spoilt_beer LIMIT 1")
-            except sqlite3.OperationalError:
-                # Column missing or table doesn't exist. safe to drop and recreate for this fix as table is likely empty/broken
-                self.cursor.execute("DROP TABLE IF EXISTS spoilt_beer")
-            
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS spoilt_beer (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date_discovered TEXT,
-                    duty_month TEXT,
-                    batch_id TEXT,
-                    container_type TEXT,
-                    quantity INTEGER,
-                    duty_paid_volume REAL,
-                    pure_alcohol_litres REAL,
-                    original_duty_rate REAL,
-                    duty_to_reclaim REAL,
-                    reason_category TEXT,
-                    status TEXT,
-                    notes TEXT,
-                    recorded_by TEXT,
-                    created_at TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
-                )
-            ''')
-
-            # Fermentation Logs table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS fermentation_logs (
-                    log_id TEXT PRIMARY KEY,
-                    batch_id TEXT,
-                    gyle_number TEXT,
-                    log_date TEXT,
-                    temperature REAL,
-                    gravity REAL,
-                    ph REAL,
-                    notes TEXT,
-                    recorded_by TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
-                )
-            ''')
-            
-            # Casks Full table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS casks_full (
-                    cask_record_id TEXT PRIMARY KEY,
-                    batch_id TEXT,
-                    gyle_number TEXT,
-                    beer_name TEXT,
-                    abv REAL,
-                    packaged_date TEXT,
-                    cask_type TEXT,
-                    cask_size_litres REAL,
-                    quantity INTEGER DEFAULT 0,
-                    status TEXT DEFAULT 'in_stock',
-                    reserved_for_customer TEXT,
-                    location TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
-                )
-            ''')
-            
-            # Bottles Stock table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bottles_stock (
-                    bottle_record_id TEXT PRIMARY KEY,
-                    batch_id TEXT,
-                    gyle_number TEXT,
-                    beer_name TEXT,
-                    abv REAL,
-                    packaged_date TEXT,
-                    bottle_size_ml INTEGER,
-                    quantity INTEGER DEFAULT 0,
-                    status TEXT DEFAULT 'in_stock',
-                    reserved_for_customer TEXT,
-                    location TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
-                )
-            ''')
-            
-            # Sales Calendar table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sales_calendar (
-                    event_id TEXT PRIMARY KEY,
-                    event_date TEXT,
-                    event_time TEXT,
-                    event_type TEXT,
-                    customer_id TEXT,
-                    customer_name TEXT,
-                    subject TEXT,
-                    description TEXT,
-                    location TEXT,
-                    reminder_time TEXT,
-                    completed INTEGER DEFAULT 0,
-                    created_by TEXT,
-                    created_date TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-                )
-            ''')
-            
-            # Call Log table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS call_log (
-                    call_id TEXT PRIMARY KEY,
-                    call_date TEXT,
-                    call_time TEXT,
-                    customer_id TEXT,
-                    customer_name TEXT,
-                    call_type TEXT,
-                    duration_minutes INTEGER,
-                    outcome TEXT,
-                    notes TEXT,
-                    follow_up_required INTEGER DEFAULT 0,
-                    follow_up_date TEXT,
-                    recorded_by TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-                )
-            ''')
-            
-            # Tasks table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    task_id TEXT PRIMARY KEY,
-                    task_title TEXT NOT NULL,
-                    task_description TEXT,
-                    customer_id TEXT,
-                    customer_name TEXT,
-                    priority TEXT,
-                    due_date TEXT,
-                    assigned_to TEXT,
-                    status TEXT DEFAULT 'pending',
-                    completed_date TEXT,
-                    created_by TEXT,
-                    created_date TEXT,
-                    notes TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-                )
-            ''')
-            
-            # Sales Pipeline table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sales_pipeline (
-                    opportunity_id TEXT PRIMARY KEY,
-                    customer_id TEXT,
-                    customer_name TEXT,
-                    opportunity_name TEXT,
-                    stage TEXT,
-                    estimated_value REAL,
-                    probability INTEGER,
-                    expected_close_date TEXT,
-                    notes TEXT,
-                    created_by TEXT,
-                    created_date TEXT,
-                    last_updated TEXT,
-                    status TEXT DEFAULT 'active',
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-                )
-            ''')
-            
-            # Duty Returns table
-            # Duty Returns table
-            # Check for missing columns (Schema Migration)
-            missing_cols = [
-                'duty_month', 'net_duty_payable', 'production_duty_total', 'spoilt_duty_reclaim',
-                'under_declarations', 'over_declarations',
-                'draught_low_litres', 'draught_low_lpa', 'draught_low_duty',
-                'draught_std_litres', 'draught_std_lpa', 'draught_std_duty',
-                'non_draught_litres', 'non_draught_lpa', 'non_draught_duty',
-                'high_abv_litres', 'high_abv_lpa', 'high_abv_duty'
-            ]
-            
+    @property
+    def in_transaction(self):
+        """True while the calling thread is inside a transaction() block."""
+        return getattr(self._local, 'tx_depth', 0) > 0
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several writes into one atomic unit of work.
+
+        insert_record/update_record/delete_record called inside the block do
+        not commit; the outermost block commits once on exit, so a whole user
+        action costs a single fsync. Nested blocks become savepoints, so an
+        inner failure can be caught and rolled back on its own. If the block
+        raises, everything written since it was entered is rolled back and
+        the exception propagates.
+
+        Usage:
+            with cache.transaction():
+                cache.insert_record('invoices', invoice)
+                for line in lines:
+                    cache.insert_record('invoice_lines', line)
+        """
+        with self._write_lock:
+            if not self.connect():
+                raise sqlite3.OperationalError(f"Could not open {self.db_path}")
+
+            connection = self.connection
+            depth = getattr(self._local, 'tx_depth', 0)
+            savepoint = f"sp_{depth}"
             try:
-                # Check what we have
-                self.cursor.execute("SELECT * FROM duty_returns LIMIT 1")
-                existing_cols = [description[0] for description in self.cursor.description]
-                
-                for col in missing_cols:
-                    if col not in existing_cols:
-                        try:
-                            logger.info(f"Adding missing column to duty_returns: {col}")
-                            self.cursor.execute(f"ALTER TABLE duty_returns ADD COLUMN {col} REAL")
-                        except Exception as e:
-                            logger.error(f"Migration error (duty_returns {col}): {e}")
-            except sqlite3.OperationalError:
-                # Table might not exist yet, CREATE will handle it
-                pass
-
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS duty_returns (
-                    return_id TEXT PRIMARY KEY,
-                    duty_month TEXT,
-                    return_period_start TEXT,
-                    return_period_end TEXT,
-                    total_duty_payable REAL,
-                    submitted_date TEXT,
-                    submitted_by TEXT,
-                    payment_date TEXT,
-                    payment_reference TEXT,
-                    status TEXT DEFAULT 'draft',
-                    notes TEXT,
-                    
-                    draught_low_litres REAL DEFAULT 0,
-                    draught_low_lpa REAL DEFAULT 0,
-                    draught_low_duty REAL DEFAULT 0,
-                    
-                    draught_std_litres REAL DEFAULT 0,
-                    draught_std_lpa REAL DEFAULT 0,
-                    draught_std_duty REAL DEFAULT 0,
-                    
-                    non_draught_litres REAL DEFAULT 0,
-                    non_draught_lpa REAL DEFAULT 0,
-                    non_draught_duty REAL DEFAULT 0,
-                    
-                    high_abv_litres REAL DEFAULT 0,
-                    high_abv_lpa REAL DEFAULT 0,
-                    high_abv_duty REAL DEFAULT 0,
-                    
-                    production_duty_total REAL DEFAULT 0,
-                    spoilt_duty_reclaim REAL DEFAULT 0,
-                    under_declarations REAL DEFAULT 0,
-                    over_declarations REAL DEFAULT 0,
-                    net_duty_payable REAL DEFAULT 0,
-                    
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-            
-            # Duty Return Lines table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS duty_return_lines (
-                    line_id TEXT PRIMARY KEY,
-                    return_id TEXT,
-                    batch_id TEXT,
-                    gyle_number TEXT,
-                    beer_name TEXT,
-                    abv REAL,
-                    volume_litres REAL,
-                    pure_alcohol_litres REAL,
-                    is_draught INTEGER,
-                    duty_rate_applied REAL,
-                    spr_rate_applied REAL,
-                    duty_amount REAL,
-                    packaged_date TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (return_id) REFERENCES duty_returns(return_id),
-                    FOREIGN KEY (batch_id) REFERENCES batches(batch_id)
-                )
-            ''')
-            
-            # Pricing table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS pricing (
-                    price_id TEXT PRIMARY KEY,
-                    container_type TEXT UNIQUE NOT NULL,
-                    container_size_litres REAL,
-                    base_price REAL,
-                    effective_date TEXT,
-                    last_updated TEXT,
-                    sync_status TEXT DEFAULT 'synced'
-                )
-            ''')
-            
-            # Customer Pricing Overrides table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS customer_pricing_overrides (
-                    override_id TEXT PRIMARY KEY,
-                    customer_id TEXT,
-                    container_type TEXT,
-                    custom_price REAL,
-                    effective_date TEXT,
-                    expiry_date TEXT,
-                    notes TEXT,
-                    last_updated TEXT,
-                    sync_status TEXT DEFAULT 'synced',
-                    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-                )
-            ''')
-            
-            # Audit Log table
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS audit_log (
-                    log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
-                    username TEXT,
-                    action TEXT,
-                    table_name TEXT,
-                    record_id TEXT,
-                    old_value TEXT,
-                    new_value TEXT,
-                    ip_address TEXT
-                )
-            ''')
-            
-            # Sync Queue table (for tracking pending syncs)
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sync_queue (
-                    queue_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    table_name TEXT,
-                    record_id TEXT,
-                    operation TEXT,
-                    data TEXT,
-                    timestamp TEXT,
-                    attempts INTEGER DEFAULT 0,
-                    last_attempt TEXT
-                )
-            ''')
+                if depth == 0:
+                    if connection.in_transaction:
+                        # Flush implicit work left by raw cursor writes
+                        connection.commit()
+                    connection.execute("BEGIN IMMEDIATE")
+                else:
+                    connection.execute(f"SAVEPOINT {savepoint}")
+                self._local.tx_depth = depth + 1
 
-            # Seed default data
-            self._seed_defaults()
-            
+                try:
+                    yield self
+                except BaseException:
+                    if depth == 0:
+                        connection.rollback()
+                    else:
+                        connection.execute(f"ROLLBACK TO {savepoint}")
+                        connection.execute(f"RELEASE {savepoint}")
+                    raise
+                else:
+                    if depth == 0:
+                        connection.commit()
+                    else:
+                        connection.execute(f"RELEASE {savepoint}")
+            finally:
+                self._local.tx_depth = depth
+                self.close()
+
+    def _commit(self):
+        """Commit now unless a transaction() block will commit later."""
+        if not self.in_transaction:
             self.connection.commit()
-            logger.info("Database tables initialized successfully")
+    
+    def initialize_database(self):
+        """
+        Bring the database schema up to date.
+
+        Applies any migrations newer than the version recorded in
+        PRAGMA user_version, each in its own transaction. A database that
+        is already current costs a single PRAGMA read.
+
+        Returns:
+            True if the schema is current, False if a migration failed
+        """
+        try:
+            current = get_schema_version(self.connection)
+            if current >= SCHEMA_VERSION:
+                logger.debug(f"Database schema is current (version {current})")
+                return True
+
+            for version, description, migrate in pending_migrations(current):
+                logger.info(f"Applying migration {version}: {description}")
+                with self.transaction():
+                    migrate(self.cursor)
+                    set_schema_version(self.connection, version)
+
+            # The index catalogue is reconciled whenever the schema changes
+            with self.transaction():
+                self._apply_indexes()
+
+            self._schema = SchemaRegistry.load(self.connection)
+            logger.info(f"Database schema migrated from version {current} to {SCHEMA_VERSION}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Failed to initialize database: {str(e)}")
             return False
 
-    def _seed_defaults(self):
-        """Insert default data if tables are empty"""
-        try:
-            # Seed Settings
-            count = self.cursor.execute("SELECT COUNT(*) FROM settings").fetchone()[0]
-            if count == 0:
-                self.cursor.execute("""
-                    INSERT INTO settings (
-                        annual_production_hl_pa, production_year_start, production_year_end,
-                        spr_draught_low, spr_draught_standard, spr_non_draught_standard,
-                        rate_full_8_5_to_22, rates_effective_from, vat_rate, updated_at, updated_by
-                    ) VALUES (
-                        0, '2025-02-01', '2026-01-31',
-                        10.01, 19.08, 21.01, 25.80, '2025-02-01', 0.20, ?, 'System'
-                    )
-                """, (datetime.now().isoformat(),))
-                logger.info("Seeded default settings")
-
-            # Seed Settings Containers
-            count = self.cursor.execute("SELECT COUNT(*) FROM settings_containers").fetchone()[0]
-            if count == 0:
-                containers = [
-                    ('Cask 9G (Firkin)', 40.91, 39.50, 1, 120.00),
-                    ('Cask 18G (Kilderkin)', 81.82, 79.00, 1, 230.00),
-                    ('Keg 30L', 30.00, 30.00, 1, 110.00),
-                    ('Keg 50L', 50.00, 50.00, 1, 175.00),
-                    ('Can 440ml', 0.44, 0.44, 0, 3.50),
-                    ('Bottle 500ml', 0.50, 0.50, 0, 3.80)
-                ]
-                self.cursor.executemany("""
-                    INSERT INTO settings_containers (name, actual_capacity, duty_paid_volume, is_draught_eligible, default_price)
-                    VALUES (?, ?, ?, ?, ?)
-                """, containers)
-                logger.info("Seeded default containers")
-                
-        except Exception as e:
-            logger.error(f"Failed to seed defaults: {e}")
-    
+    def _declared_indexes(self):
+        """
+        Build the full index catalogue for the current schema.
+
+        Returns:
+            Dictionary of index name -> CREATE INDEX statement
+        """
+        declared = {}
+        for name, table, columns in INDEXES:
+            declared[name] = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+
+        for table in TABLES.keys():
+            self.cursor.execute(f"PRAGMA table_info({table})")
+            if 'sync_status' in [info[1] for info in self.cursor.fetchall()]:
+                name = PENDING_INDEX_TEMPLATE.format(table=table)
+                declared[name] = (
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {table} (sync_status) "
+                    f"WHERE sync_status = 'pending'"
+                )
+        return declared
+
+    def _apply_indexes(self):
+        """
+        Create declared indexes, recreating any whose definition changed.
+
+        Indexes the catalogue does not declare are never dropped here;
+        they may come from older versions of the app (retire those with a
+        migration).
+        """
+        declared = self._declared_indexes()
+
+        self.cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")
+        existing = {row[0]: row[1] for row in self.cursor.fetchall()}
+
+        for name, statement in declared.items():
+            current = existing.get(name)
+            if current is not None and _index_signature(current) == _index_signature(statement):
+                continue
+            try:
+                if current is not None:
+                    logger.info(f"Recreating index {name} with its new definition")
+                    self.cursor.execute(f"DROP INDEX {name}")
+                self.cursor.execute(statement)
+            except sqlite3.OperationalError as e:
+                logger.error(f"Failed to create index {name}: {e}")
+
     def insert_record(self, table_name, data):
         """
         Insert a new record into a table.
@@ -1080,19 +426,23 @@ class SQLiteCacheManager:
             data: Dictionary of column:value pairs
         
         Returns:
-            True if successful, False otherwise
+            True if successful, False otherwise. Inside transaction()
+            errors are raised instead so the whole block rolls back.
         """
         try:
             columns = ', '.join(data.keys())
             placeholders = ', '.join(['?' for _ in data])
             query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
             
-            self.cursor.execute(query, list(data.values()))
-            self.connection.commit()
+            with self._write_lock:
+                self.cursor.execute(query, list(data.values()))
+                self._commit()
             return True
             
         except Exception as e:
             logger.error(f"Failed to insert record into {table_name}: {str(e)}")
+            if self.in_transaction:
+                raise
             return False
     
     def update_record(self, table_name, record_id, data, id_column='id'):
@@ -1106,19 +456,23 @@ class SQLiteCacheManager:
             id_column: Name of the ID column (default: 'id')
         
         Returns:
-            True if successful, False otherwise
+            True if successful, False otherwise. Inside transaction()
+            errors are raised instead so the whole block rolls back.
         """
         try:
             set_clause = ', '.join([f"{k} = ?" for k in data.keys()])
             query = f"UPDATE {table_name} SET {set_clause} WHERE {id_column} = ?"
             
             values = list(data.values()) + [record_id]
-            self.cursor.execute(query, values)
-            self.connection.commit()
+            with self._write_lock:
+                self.cursor.execute(query, values)
+                self._commit()
             return True
             
         except Exception as e:
             logger.error(f"Failed to update record in {table_name}: {str(e)}")
+            if self.in_transaction:
+                raise
             return False
 
     def update_record_by_id_column(self, table_name, record_id, data):
@@ -1127,22 +481,7 @@ class SQLiteCacheManager:
         Useful for generic sync updating.
         """
         try:
-            # 1. Try common pattern: table_name (singular) + "_id"
-            # simple singular conversion
-            singular = table_name[:-1] if table_name.endswith('s') else table_name
-            candidate_id = f"{singular}_id"
-            
-            # Verify if this column exists
-            self.cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = [info[1] for info in self.cursor.fetchall()]
-            
-            id_col = 'id' # Default
-            if candidate_id in columns:
-                id_col = candidate_id
-            elif columns:
-                # Fallback: assume first column is PK
-                id_col = columns[0]
-                
+            id_col = self._table_schema(table_name).primary_key
             return self.update_record(table_name, record_id, data, id_column=id_col)
             
         except Exception as e:
@@ -1174,18 +513,305 @@ class SQLiteCacheManager:
             logger.error(f"Failed to get record from {table_name}: {str(e)}")
             return None
     
+    def get_records_by_ids(self, table_name, record_ids, id_column='id'):
+        """
+        Get many records by ID with as few queries as possible.
+        
+        Args:
+            table_name: Name of the table
+            record_ids: Iterable of IDs to look up
+            id_column: Name of the ID column
+        
+        Returns:
+            Dictionary of ID -> record dictionary for the IDs that exist
+        """
+        record_ids = list(dict.fromkeys(record_ids))
+        found = {}
+        try:
+            for start in range(0, len(record_ids), self.MAX_BOUND_PARAMETERS):
+                chunk = record_ids[start:start + self.MAX_BOUND_PARAMETERS]
+                placeholders = ', '.join(['?'] * len(chunk))
+                query = f"SELECT * FROM {table_name} WHERE {id_column} IN ({placeholders})"
+                self.cursor.execute(query, chunk)
+                for row in self.cursor.fetchall():
+                    found[row[id_column]] = dict(row)
+            return found
+            
+        except Exception as e:
+            logger.error(f"Failed to get records from {table_name}: {str(e)}")
+            return {}
+
+    def upsert_many(self, table_name, rows, key=None):
+        """
+        Insert or update many records in one transaction.
+        
+        Rows are written with executemany() using
+        INSERT ... ON CONFLICT(key) DO UPDATE, and a row whose values already
+        match the stored record is left untouched. Columns that do not exist
+        in the local table (e.g. extra columns on a sheet) are ignored.
+        
+        Args:
+            table_name: Name of the table
+            rows: Iterable of dictionaries of column:value pairs
+            key: Conflict column (or tuple of columns). Defaults to the
+                table's primary key.
+        
+        Returns:
+            Dictionary with 'inserted', 'updated' and 'unchanged' counts
+        
+        Raises:
+            sqlite3.Error if the batch cannot be written; nothing is applied.
+        """
+        rows = list(rows)
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if not rows:
+            return counts
+
+        with self.transaction():
+            table = self._table_schema(table_name)
+            table_columns = table.types
+            if key is None:
+                key = table.primary_keys or ('rowid',)
+            elif isinstance(key, str):
+                key = (key,)
+
+            # Group rows by their column set so each group is one statement
+            groups = {}
+            for row in rows:
+                columns = tuple(c for c in row.keys() if c in table_columns)
+                groups.setdefault(columns, []).append([row[c] for c in columns])
+
+            before = self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            changed = 0
+
+            for columns, values in groups.items():
+                missing = [k for k in key if k not in columns]
+                if missing:
+                    raise ValueError(f"upsert_many({table_name}): rows missing key column(s) {missing}")
+
+                placeholders = ', '.join(['?'] * len(columns))
+                query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders}) ON CONFLICT ({', '.join(key)}) "
+
+                update_columns = [c for c in columns if c not in key]
+                if update_columns:
+                    query += "DO UPDATE SET " + ', '.join(f"{c} = excluded.{c}" for c in update_columns)
+                    query += " WHERE " + ' OR '.join(f"{table_name}.{c} IS NOT excluded.{c}" for c in update_columns)
+                else:
+                    query += "DO NOTHING"
+
+                self.cursor.executemany(query, values)
+                changed += max(self.cursor.rowcount, 0)
+
+            after = self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+        counts['inserted'] = after - before
+        counts['updated'] = changed - counts['inserted']
+        counts['unchanged'] = len(rows) - counts['inserted'] - counts['updated']
+        return counts
+
+    def _build_where(self, table, where):
+        """
+        Turn a find() where mapping into SQL with bound parameters.
+        
+        Keys are a column name, optionally followed by an operator
+        ('quantity_remaining >'). A None value matches NULL, and a list,
+        tuple or set value becomes an IN (...) test; None among its values
+        adds an IS NULL alternative, e.g. {'invoice_id': [None, '']}
+        gives (invoice_id IS NULL OR invoice_id IN (?)).
+        
+        Returns:
+            (sql fragment without "WHERE", list of parameters)
+        """
+        clauses = []
+        params = []
+        for key, value in where.items():
+            column, _, operator = key.strip().partition(' ')
+            operator = operator.strip().upper() or '='
+            if not table.has_column(column):
+                raise ValueError(f"find({table.name}): unknown column {column!r}")
+            if operator not in self.FIND_OPERATORS:
+                raise ValueError(f"find({table.name}): unsupported operator {operator!r}")
+
+            if isinstance(value, (list, tuple, set)):
+                value = list(value)
+                if operator == '=':
+                    operator = 'IN'
+                elif operator == '!=':
+                    operator = 'NOT IN'
+                # NULL never matches IN (...), so None becomes its own test
+                null_test = None
+                if None in value and operator in ('IN', 'NOT IN'):
+                    value = [v for v in value if v is not None]
+                    null_test = f"{column} IS NULL" if operator == 'IN' else f"{column} IS NOT NULL"
+                if not value:
+                    # IN () matches nothing; NOT IN () matches everything
+                    clauses.append(null_test or ('0' if operator == 'IN' else '1'))
+                    continue
+                clause = f"{column} {operator} ({', '.join(['?'] * len(value))})"
+                if null_test:
+                    joiner = 'OR' if operator == 'IN' else 'AND'
+                    clause = f"({null_test} {joiner} {clause})"
+                clauses.append(clause)
+                params.extend(value)
+            elif value is None and operator in ('=', '!='):
+                clauses.append(f"{column} IS {'NOT ' if operator == '!=' else ''}NULL")
+            else:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        return ' AND '.join(clauses), params
+
+    def _build_order_by(self, table, order_by):
+        """Validate an ORDER BY spec ('col DESC, col2') against the schema."""
+        terms = []
+        for term in order_by.split(','):
+            column, _, direction = term.strip().partition(' ')
+            direction = direction.strip().upper()
+            if not table.has_column(column) or direction not in ('', 'ASC', 'DESC'):
+                raise ValueError(f"find({table.name}): invalid order_by term {term.strip()!r}")
+            terms.append(f"{column} {direction}".strip())
+        return ', '.join(terms)
+
+    def find(self, table_name, where=None, order_by=None, limit=None):
+        """
+        Get records matching simple conditions, always using bound parameters.
+        
+        Because values are never interpolated into the SQL, repeated lookups
+        produce identical statement text and reuse sqlite3's prepared
+        statement cache instead of being re-parsed and re-planned.
+        
+        Args:
+            table_name: Name of the table
+            where: Optional dictionary of conditions, ANDed together, e.g.
+                {'recipe_id': recipe_id}, {'status': ['ready', 'packaged']},
+                {'quantity_remaining >': 0}
+            order_by: Optional ORDER BY spec, e.g. 'brew_date DESC'
+            limit: Optional maximum number of records
+        
+        Returns:
+            List of dictionaries, one per record
+        
+        Raises:
+            ValueError if a column, operator or order_by term is not valid
+            for the table (identifiers cannot be bound, so they are checked
+            against the schema registry instead).
+        """
+        table = self._table_schema(table_name)
+        query = f"SELECT * FROM {table_name}"
+        params = []
+
+        if where:
+            where_sql, params = self._build_where(table, where)
+            query += f" WHERE {where_sql}"
+
+        if order_by:
+            query += f" ORDER BY {self._build_order_by(table, order_by)}"
+
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        try:
+            self.cursor.execute(query, params)
+            return [dict(row) for row in self.cursor.fetchall()]
+            
+        except Exception as e:
+            logger.error(f"Failed to find records in {table_name}: {str(e)}")
+            return []
+
+    def find_one(self, table_name, where=None, order_by=None):
+        """
+        Get the first record matching find() conditions.
+        
+        Returns:
+            Dictionary of the record, or None if nothing matches
+        """
+        records = self.find(table_name, where, order_by=order_by, limit=1)
+        return records[0] if records else None
+
+    def iter_records(self, table_name, where=None, order_by=None, columns=None, batch_size=500):
+        """
+        Stream records matching find() conditions without loading them all.
+        
+        Rows are fetched from SQLite in batches of batch_size and yielded as
+        compact tuple-backed rows (see record_type()), so memory use and the
+        time to the first row do not grow with the size of the table.
+        
+        The generator keeps a connection checked out until it is exhausted
+        or closed, and uses its own cursor, so other cache calls made while
+        looping are safe.
+        
+        Args:
+            table_name: Name of the table
+            where: Optional find() conditions, e.g. {'status': 'reserved'}
+            order_by: Optional ORDER BY spec, e.g. 'delivery_date DESC'
+            columns: Optional list of columns to read (default: all)
+            batch_size: Number of rows fetched from SQLite at a time
+        
+        Yields:
+            Record rows with attribute and key access
+        
+        Raises:
+            ValueError if a column, operator or order_by term is not valid
+            for the table (raised on the first next(), like find()).
+        """
+        table = self._table_schema(table_name)
+        if columns:
+            for column in columns:
+                if not table.has_column(column):
+                    raise ValueError(f"iter_records({table_name}): unknown column {column!r}")
+            query = f"SELECT {', '.join(columns)} FROM {table_name}"
+        else:
+            query = f"SELECT * FROM {table_name}"
+        params = []
+
+        if where:
+            where_sql, params = self._build_where(table, where)
+            query += f" WHERE {where_sql}"
+
+        if order_by:
+            query += f" ORDER BY {self._build_order_by(table, order_by)}"
+
+        with self.reader() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.row_factory = None  # Plain tuples; wrapped below
+                try:
+                    cursor.execute(query, params)
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to iterate records in {table_name}: {str(e)}")
+                    return
+                record = record_type(tuple(d[0] for d in cursor.description))
+                make = record._make
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield make(row)
+            finally:
+                cursor.close()
+
     def get_all_records(self, table_name, where_clause=None, order_by=None):
         """
         Get all records from a table.
         
         Args:
             table_name: Name of the table
-            where_clause: Optional WHERE clause (without "WHERE")
+            where_clause: Optional WHERE clause (without "WHERE").
+                Deprecated: interpolated SQL defeats the statement cache and
+                is open to quoting bugs; use find() instead.
             order_by: Optional ORDER BY clause (without "ORDER BY")
         
         Returns:
             List of dictionaries, one per record
         """
+        if where_clause:
+            warnings.warn(
+                "get_all_records(where_clause=...) is deprecated; use find(table, where={...})",
+                DeprecationWarning,
+                stacklevel=2
+            )
+
         try:
             query = f"SELECT * FROM {table_name}"
             
@@ -1214,16 +840,20 @@ class SQLiteCacheManager:
             id_column: Name of the ID column
         
         Returns:
-            True if successful, False otherwise
+            True if successful, False otherwise. Inside transaction()
+            errors are raised instead so the whole block rolls back.
         """
         try:
             query = f"DELETE FROM {table_name} WHERE {id_column} = ?"
-            self.cursor.execute(query, (record_id,))
-            self.connection.commit()
+            with self._write_lock:
+                self.cursor.execute(query, (record_id,))
+                self._commit()
             return True
             
         except Exception as e:
             logger.error(f"Failed to delete record from {table_name}: {str(e)}")
+            if self.in_transaction:
+                raise
             return False
     
     def mark_for_sync(self, table_name, record_id):
@@ -1238,7 +868,7 @@ class SQLiteCacheManager:
             True if successful, False otherwise
         """
         try:
-            id_column = f"{table_name[:-1]}_id" if table_name.endswith('s') else f"{table_name}_id"
+            id_column = self._table_schema(table_name).primary_key
             self.update_record(table_name, record_id, {'sync_status': 'pending'}, id_column)
             return True
         except Exception as e:
@@ -1256,16 +886,194 @@ class SQLiteCacheManager:
             List of (table_name, record) tuples
         """
         try:
-            if table_name:
-                records = self.get_all_records(table_name, "sync_status = 'pending'")
-                return [(table_name, record) for record in records]
-            else:
-                # Get pending syncs from all tables
-                all_pending = []
-                for table in TABLES.keys():
-                    records = self.get_all_records(table, "sync_status = 'pending'")
-                    all_pending.extend([(table, record) for record in records])
-                return all_pending
+            tables = [table_name] if table_name else list(TABLES.keys())
+            all_pending = []
+            for table in tables:
+                table_schema = self.schema.get(table)
+                if table_schema is None or not table_schema.has_column('sync_status'):
+                    continue
+                # The literal 'pending' (not a bound parameter) lets SQLite
+                # match the partial idx_<table>_pending index
+                self.cursor.execute(f"SELECT * FROM {table} WHERE sync_status = 'pending'")
+                all_pending.extend((table, dict(row)) for row in self.cursor.fetchall())
+            return all_pending
         except Exception as e:
             logger.error(f"Failed to get pending syncs: {str(e)}")
             return []
+
+    @contextmanager
+    def capture_suspended(self):
+        """
+        Run writes without logging them to sync_queue.
+
+        Used for data that came from Sheets (pulls, marking rows synced) so
+        it is not pushed straight back. The switch lives in the sync_capture
+        table and is only ever set inside this transaction, so other
+        connections never see it turned off.
+        """
+        with self.transaction():
+            previous = self.cursor.execute("SELECT suspended FROM sync_capture").fetchone()[0]
+            self.cursor.execute("UPDATE sync_capture SET suspended = 1")
+            try:
+                yield self.connection
+            finally:
+                # Restore rather than clear, so nested blocks stay suspended
+                self.cursor.execute("UPDATE sync_capture SET suspended = ?", (previous,))
+
+    def terminal_id(self):
+        """
+        Stable ID of this installation (12 hex digits).
+
+        Generated on first use and kept in system_settings, outside the
+        sync queue. It tags the change-log rows and invoice numbers this
+        terminal writes.
+
+        Returns:
+            The terminal ID
+        """
+        with self.capture_suspended() as connection:
+            row = connection.execute(
+                "SELECT setting_value FROM system_settings WHERE setting_key = ?", (self.TERMINAL_ID_KEY,)
+            ).fetchone()
+            if row and row[0]:
+                return row[0]
+            terminal_id = uuid.uuid4().hex[:12]
+            connection.execute(
+                "INSERT OR REPLACE INTO system_settings (setting_key, setting_value, last_updated, sync_status) "
+                "VALUES (?, ?, ?, 'synced')",
+                (self.TERMINAL_ID_KEY, terminal_id, datetime.now().strftime(DATETIME_FORMAT))
+            )
+            return terminal_id
+
+    def get_queued_changes(self, limit=None):
+        """
+        Get the changes waiting in sync_queue, one entry per record.
+        
+        Several writes to the same record collapse into the latest one, and
+        entries come back in the order of that latest write.
+        
+        Args:
+            limit: Optional maximum number of records
+        
+        Returns:
+            List of dictionaries with queue_id, table_name, record_id,
+            operation and attempts
+        """
+        query = '''
+            SELECT q.queue_id, q.table_name, q.record_id, q.operation, q.attempts
+            FROM sync_queue q
+            JOIN (SELECT MAX(queue_id) AS queue_id FROM sync_queue
+                  GROUP BY table_name, record_id) latest ON latest.queue_id = q.queue_id
+            ORDER BY q.queue_id
+        '''
+        params = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        try:
+            self.cursor.execute(query, params)
+            return [dict(row) for row in self.cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Failed to read sync queue: {str(e)}")
+            return []
+
+    def pending_change_count(self):
+        """Number of records with changes waiting in sync_queue."""
+        try:
+            self.cursor.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM sync_queue GROUP BY table_name, record_id)"
+            )
+            return self.cursor.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Failed to count sync queue: {str(e)}")
+            return 0
+
+    def acknowledge_change(self, table_name, record_id, queue_id):
+        """
+        Remove queued changes for a record once they reached Sheets.
+        
+        Only entries up to queue_id are removed, so a write made while the
+        push was in flight stays queued for the next sync.
+        """
+        with self._write_lock:
+            self.cursor.execute(
+                "DELETE FROM sync_queue WHERE table_name = ? AND record_id = ? AND queue_id <= ?",
+                (table_name, str(record_id), queue_id)
+            )
+            self._commit()
+
+    def record_failed_change(self, table_name, record_id):
+        """Count a failed push attempt against a record's queued changes."""
+        with self._write_lock:
+            self.cursor.execute(
+                "UPDATE sync_queue SET attempts = attempts + 1, last_attempt = ? "
+                "WHERE table_name = ? AND record_id = ?",
+                (datetime.now().strftime(DATETIME_FORMAT), table_name, str(record_id))
+            )
+            self._commit()
+
+    def quarantine_change(self, source, table_name, record_id, operation, payload, error):
+        """
+        Set aside a change sync could not apply, so it stops blocking the rest.
+        
+        Args:
+            source: Where the change came from ('change_log', 'change_set'),
+                or 'rejected' for a local change Sheets must not receive
+            table_name: Name of the table
+            record_id: Primary key value
+            operation: 'upsert' or 'delete'
+            payload: The change's record, stored as JSON
+            error: Why it could not be applied
+        """
+        with self._write_lock:
+            self.cursor.execute(
+                "INSERT INTO sync_quarantine (source, table_name, record_id, operation, payload, "
+                "error, quarantined_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, table_name, str(record_id), operation, json.dumps(payload, default=str),
+                 str(error), datetime.now().strftime(DATETIME_FORMAT))
+            )
+            self._commit()
+
+    def get_quarantined_changes(self, limit=None):
+        """
+        Changes set aside by quarantine_change(), newest first.
+        
+        Returns:
+            List of dictionaries with the sync_quarantine columns
+        """
+        query = "SELECT * FROM sync_quarantine ORDER BY quarantine_id DESC"
+        params = []
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        try:
+            self.cursor.execute(query, params)
+            return [dict(row) for row in self.cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Failed to read sync quarantine: {str(e)}")
+            return []
+
+    def clear_queued_changes(self, table_name):
+        """Drop every queued change for a table (e.g. after a full upload)."""
+        with self._write_lock:
+            self.cursor.execute("DELETE FROM sync_queue WHERE table_name = ?", (table_name,))
+            self._commit()
+
+    def mark_synced(self, table_name, record_ids):
+        """
+        Set sync_status = 'synced' without queueing the change.
+        
+        Args:
+            table_name: Name of the table
+            record_ids: IDs of the records that now match Sheets
+        """
+        record_ids = list(record_ids)
+        pk = self._table_schema(table_name).primary_key
+        with self.capture_suspended():
+            for start in range(0, len(record_ids), self.MAX_BOUND_PARAMETERS):
+                chunk = record_ids[start:start + self.MAX_BOUND_PARAMETERS]
+                placeholders = ', '.join(['?'] * len(chunk))
+                self.cursor.execute(
+                    f"UPDATE {table_name} SET sync_status = 'synced' WHERE {pk} IN ({placeholders})",
+                    chunk
+                )
@@ -3,9 +3,13 @@ Sync Manager for Brewery Management System
 Handles synchronization between local SQLite cache and Google Sheets
 """
 
+import functools
+import json
 import logging
-import time
 import socket
+import sqlite3
+import threading
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
@@ -16,55 +20,86 @@ from ..config.constants import (
     DATETIME_FORMAT
 )
 
-PRIMARY_KEYS = {
-    "recipes": "recipe_id",
-    "recipe_ingredients": "ingredient_id",
-    "recipe_grains": "grain_id",
-    "recipe_hops": "hop_id",
-    "recipe_yeast": "yeast_id",
-    "recipe_adjuncts": "adjunct_id",
-    "inventory_materials": "material_id",
-    "inventory_transactions": "transaction_id",
-    "casks_empty": "cask_id",
-    "batches": "batch_id",
-    "fermentation_logs": "log_id",
-    "casks_full": "cask_record_id",
-    "bottles_stock": "bottle_record_id",
-    "customers": "customer_id",
-    "sales_calendar": "event_id",
-    "call_log": "call_id",
-    "tasks": "task_id",
-    "sales_pipeline": "opportunity_id",
-    "sales": "sale_id",
-    "invoices": "invoice_id",
-    "invoice_lines": "line_id",
-    "payments": "payment_id",
-    "duty_returns": "return_id",
-    "duty_return_lines": "line_id",
-    "pricing": "price_id",
-    "customer_pricing_overrides": "override_id",
-    "users": "user_id",
-    "system_settings": "setting_key",
-    "container_types": "container_type_id",
-    "products": "product_id",
-    "product_sales": "product_sale_id",
-    "batch_packaging_lines": "line_id",
-    "spoilt_beer": "id",
-    "cans_empty": "can_id",
-    "bottles_empty": "bottle_id",
-    "settings_containers": "container_id",
-    "settings": "id"
-}
+from .change_log import CHANGE_LOG_SHEET, ChangeLog, change_row
+from .change_sets import ChangeSetFolder
+from .sheet_row_index import SheetRowIndex, row_hash
+from .sheet_shards import ShardPolicy
+from .sync_telemetry import SyncTelemetry
 
 logger = logging.getLogger(__name__)
 
 
+def _recorded(kind: str):
+    """
+    Record each call of a sync method as a sync run of the given kind.
+    
+    A call made while a run is already being recorded on the same thread
+    (the push inside an incremental sync, say) is counted as part of it.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if getattr(self._current, 'run', None) is not None:
+                return method(self, *args, **kwargs)
+            run = self.telemetry.begin(kind, self.sheets_client)
+            self._current.run = run
+            result = False
+            try:
+                result = method(self, *args, **kwargs)
+                return result
+            finally:
+                self._current.run = None
+                self.telemetry.finish(run, result, self.sheets_client)
+        return wrapper
+    return decorate
+
+
 class SyncManager:
     """
     Manages synchronization between local SQLite database and Google Sheets.
     Handles online/offline detection, sync strategies, and conflict resolution.
     """
     
+    # system_settings keys for change-log bookkeeping
+    CHANGE_LOG_OFFSET_KEY = 'change_log_offset'
+    TERMINAL_ID_KEY = 'terminal_id'
+    
+    # Bootstrap progress, so an interrupted upload can resume
+    BOOTSTRAP_CHECKPOINT_KEY = 'bootstrap_checkpoint'
+    
+    # Longest wait for the connectivity monitor's first result, in seconds
+    FIRST_CONNECTIVITY_TIMEOUT = 2 * CONNECTION_TIMEOUT_SECONDS
+    
+    # Rows per append request during bootstrap
+    BOOTSTRAP_CHUNK_ROWS = 2000
+    
+    # Tables already applied by an interrupted scan pull
+    SCAN_CHECKPOINT_KEY = 'scan_checkpoint'
+    
+    # Change-log rows read (and checkpointed) per request during a delta pull
+    CHANGE_LOG_PAGE_ROWS = 2000
+    
+    # Queued changes pushed (and acknowledged) per batch of write requests
+    PUSH_CHUNK_ROWS = 500
+    
+    # Shared folder for local-network change sets, and this terminal's
+    # position in that exchange
+    LAN_SYNC_FOLDER_KEY = 'lan_sync_folder'
+    LAN_SYNC_STATE_KEY = 'lan_sync_state'
+    
+    # Settings that describe this installation rather than the brewery:
+    # never uploaded, and kept when system_settings is replaced from Sheets
+    LOCAL_SETTING_KEYS = (
+        'spreadsheet_id',
+        'last_full_sync',
+        CHANGE_LOG_OFFSET_KEY,
+        TERMINAL_ID_KEY,
+        BOOTSTRAP_CHECKPOINT_KEY,
+        SCAN_CHECKPOINT_KEY,
+        LAN_SYNC_FOLDER_KEY,
+        LAN_SYNC_STATE_KEY,
+    )
+    
     def __init__(self, sheets_client, cache_manager):
         """
         Initialize the sync manager.
@@ -75,10 +110,29 @@ class SyncManager:
         """
         self.sheets_client = sheets_client
         self.cache = cache_manager
+        self.row_index = SheetRowIndex(cache_manager)
+        self.change_log = ChangeLog(sheets_client)
+        self.terminal_id = None
         self.is_online = False
         self.last_sync_time = None
         self.sync_in_progress = False
         self.auth_in_progress = False
+        # ConnectivityMonitor whose state gates syncs (None: probe directly)
+        self.connectivity = None
+        # Optional function(stage, **details) told what a sync is doing
+        self.progress_callback = None
+        # Serialises change-set exports, so each queue entry is exported once
+        self._lan_lock = threading.Lock()
+        # Sync run history, and the run being recorded on each thread
+        self.telemetry = SyncTelemetry(cache_manager)
+        self._current = threading.local()
+        # Year shards of the append-only tables, and the spreadsheet's
+        # sheets as last listed (None until listed)
+        self.shards = getattr(sheets_client, 'shards', None) or ShardPolicy()
+        self._sheet_list = None
+        self._sheets_maintained = False
+        # Header row of each sheet (title -> column names), read once per session
+        self._header_rows = {}
         
     def initialize(self):
         """
@@ -98,7 +152,7 @@ class SyncManager:
                         
                         # VALIDATE: Check if this sheet actually exists (Self-Healing)
                         # If user deleted it cloud-side, we need to know so we can recreate it.
-                        if self.check_connection():
+                        if self._network_available():
                             try:
                                 # Start with a lightweight check (e.g., read metadata)
                                 self.sheets_client.spreadsheet_id = stored_id
@@ -132,12 +186,17 @@ class SyncManager:
 
             # 2. If no ID found (or cleared because it was deleted), try to create new spreadsheet
             if not self.sheets_client.spreadsheet_id:
-                if self.check_connection():
+                if self._network_available():
                     logger.info("No valid spreadsheet ID found and Online. Creating new spreadsheet...")
                     # Generate a name based on Winery/User or just generic
-                    new_id = self.sheets_client.create_spreadsheet(title=f"Brewery_Manager_Data_{datetime.now().strftime('%Y%m%d')}")
+                    headers = self.cache.schema.sheet_headers()
+                    new_id = self.sheets_client.create_spreadsheet(
+                        title=f"Brewery_Manager_Data_{datetime.now().strftime('%Y%m%d')}",
+                        headers=headers
+                    )
                     
                     if new_id:
+                        self._header_rows = {title: list(columns) for title, columns in headers.items()}
                         # Save to DB
                         self._update_system_setting('spreadsheet_id', new_id)
                         logger.info(f"Created and saved new spreadsheet ID: {new_id}")
@@ -154,10 +213,28 @@ class SyncManager:
             if self.cache.connection:
                 self.cache.close()
 
+    def _network_available(self) -> bool:
+        """
+        Whether sync can reach Google, without probing the network itself.
+        
+        The connectivity monitor is the only thing that probes; it publishes
+        its state, which every successful Sheets call also keeps fresh.
+        Before its first result this waits (up to
+        FIRST_CONNECTIVITY_TIMEOUT) rather than guessing. With no monitor
+        (scripts, tests) the network is probed here instead.
+        """
+        if self.connectivity is None:
+            return self.check_connection()
+        state = self.connectivity.is_online
+        if state is None:
+            state = self.connectivity.wait_for_state(self.FIRST_CONNECTIVITY_TIMEOUT)
+        return bool(state)
+
     def check_connection(self) -> bool:
         """
         Check if we have internet connectivity.
-        Tries DNS first, then HTTP fallback.
+        Tries DNS first, then HTTP fallback. This is the connectivity
+        monitor's probe; sync paths use _network_available().
         
         Returns:
             True if online, False if offline
@@ -201,72 +278,179 @@ class SyncManager:
                 self.is_online = False
                 return False
 
-    def bootstrap_sync(self):
+    @_recorded('bootstrap')
+    def bootstrap_sync(self) -> bool:
         """
-        Perform initial upload of ALL local data to a fresh spreadsheet.
+        Upload ALL local data to a fresh spreadsheet, resuming if interrupted.
+        
+        Each table is streamed in primary-key order and appended
+        BOOTSTRAP_CHUNK_ROWS rows per request. A checkpoint (spreadsheet,
+        table, last key uploaded) is saved in system_settings after every
+        chunk, so a bootstrap cut short by a crash or a lost connection
+        carries on from there instead of starting over.
+        
+        Returns:
+            True if every table was uploaded, False if the upload stopped early
         """
-        logger.info("Starting BOOTSTRAP SYNC (Initial Upload)...")
+        spreadsheet_id = self.sheets_client.spreadsheet_id
+        checkpoint = self._bootstrap_checkpoint()
+        if checkpoint and checkpoint.get('spreadsheet_id') == spreadsheet_id:
+            logger.info(f"Resuming BOOTSTRAP SYNC at {checkpoint.get('table')} "
+                        f"after {checkpoint.get('after')!r}...")
+        else:
+            logger.info("Starting BOOTSTRAP SYNC (Initial Upload)...")
+            checkpoint = {'spreadsheet_id': spreadsheet_id, 'table': None, 'after': None}
+            # A new spreadsheet has a new change log: start following it afresh
+            self._set_change_log_offset(None)
+            self._save_scan_checkpoint(None)
+        
+        table_keys = list(TABLES)
+        start = table_keys.index(checkpoint['table']) if checkpoint['table'] in TABLES else 0
         try:
             self.cache.connect()
+            for table_key in table_keys[start:]:
+                with self._table_timer(table_key):
+                    if table_key == checkpoint['table']:
+                        ok = self._bootstrap_table(table_key, checkpoint, resuming=True)
+                    else:
+                        checkpoint = {**checkpoint, 'table': table_key, 'after': None}
+                        ok = self._bootstrap_table(table_key, checkpoint, resuming=False)
+                if not ok:
+                    logger.warning(f"Bootstrap stopped at {TABLES[table_key]}; it resumes on the next sync")
+                    return False
             
-            for table_key, table_name in TABLES.items():
-                try:
-                    # Get all records for this table
-                    records = self.cache.get_all_records(table_key)
-                    if not records:
-                        continue
-                        
-                    logger.info(f"Bootstrapping {len(records)} records for {table_name}")
-                    
-                    # Get headers from first record or schema
-                    if records:
-                        # Use keys from first record as basis
-                        # ideally we should use schema definition to be safe
-                        headers = list(records[0].keys()) 
-                        # Note: create_spreadsheet usually initializes headers.
-                        # We just need to ensure values align with those headers.
-                        # For simplicity in Phase 1, we assume dict iteration order matches
-                        # (Python 3.7+ guarantees insertion order)
-                    
-                    # Prepare batch of rows
-                    rows_to_append = []
-                    for record in records:
-                        rows_to_append.append(list(record.values()))
-                        
-                        # Update local sync status
-                        pk = PRIMARY_KEYS.get(table_key, 'id')
-                        record_id = record.get(pk)
-                        
-                        if record_id:
-                             self.cache.update_record(
-                                table_key, 
-                                record_id, 
-                                {'sync_status': 'synced'},
-                                id_column=pk
-                            )
-                    
-                    # We can use append_row in a loop, or implement batch_append in client
-                    # For now, looping append_row is safer/easier implemented even if slower
-                    sheets_table = TABLES.get(table_key)
-                    
-                    # Better: Implement batch append if list is huge, but let's stick to 
-                    # row-by-row or small chunks if we didn't add batch_append yet.
-                    # Actually, let's just loop for now.
-                    for row in rows_to_append:
-                        self.sheets_client.append_row(sheets_table, row)
-                        
-                    logger.info(f"Bootstrapped {table_name} successfully.")
-                    
-                except Exception as e:
-                    logger.error(f"Error bootstrapping {table_name}: {e}")
-            
-            self.cache.close()
+            self._save_bootstrap_checkpoint(None)
+            self._maintain_sheets()
             logger.info("Bootstrap Sync Completed.")
+            return True
             
         except Exception as e:
             logger.error(f"Bootstrap sync failed: {e}")
-            if self.cache: self.cache.close()
+            return False
+        finally:
+            self.cache.close()
     
+    def _bootstrap_table(self, table_key: str, checkpoint: Dict, resuming: bool) -> bool:
+        """
+        Upload one table for bootstrap_sync(), chunk by chunk.
+        
+        On resume the sheet's ID column is read once: rows from a chunk that
+        reached the sheet just before the interruption (so after the last
+        saved checkpoint) are skipped rather than appended twice.
+        
+        Args:
+            table_key: Local table name
+            checkpoint: Current checkpoint, with 'table' set to table_key
+            resuming: True to continue after checkpoint['after']
+        
+        Returns:
+            True if the whole table was uploaded
+        """
+        table_schema = self.cache.schema.get(table_key)
+        sheets_table = TABLES[table_key]
+        pk = table_schema.primary_key
+        after = checkpoint.get('after') if resuming else None
+        
+        sheets = self._table_sheets(table_key, refresh=True)
+        if sheets is None:
+            logger.error(f"Could not list the shards of {sheets_table}")
+            return False
+        
+        on_sheet = set()
+        if resuming:
+            for sheet_title, index_key in sheets:
+                try:
+                    id_column = self._sheet_header(table_key, sheet_title).index(pk)
+                except Exception as e:
+                    logger.error(f"Could not read {sheet_title} to resume bootstrap: {e}")
+                    return False
+                id_values = self._sheets_call(
+                    self.sheets_client.read_column, sheet_title, id_column, raw=True
+                )
+                # None is a failed read, False a raised one; either way
+                # the rows already uploaded are unknown
+                if id_values is None or id_values is False:
+                    logger.error(f"Could not read {sheet_title} to resume bootstrap")
+                    return False
+                self.row_index.rebuild(index_key, id_values)
+                on_sheet.update(str(value) for value in id_values[1:] if value not in (None, ''))
+        else:
+            # The upload covers anything queued; the sheets hold just the header
+            self.cache.clear_queued_changes(table_key)
+            for _, index_key in sheets:
+                self.row_index.rebuild(index_key, [pk])
+        # Saved before the first chunk so a crash inside it resumes here
+        self._save_bootstrap_checkpoint(checkpoint)
+        
+        where = {f'{pk} >': after} if after not in (None, '') else {}
+        if table_key == 'system_settings':
+            where['setting_key NOT IN'] = list(self.LOCAL_SETTING_KEYS)
+        
+        uploaded = 0
+        chunk = []
+        for record in self.cache.iter_records(table_key, where=where or None, order_by=pk,
+                                              batch_size=self.BOOTSTRAP_CHUNK_ROWS):
+            chunk.append(record)
+            if len(chunk) == self.BOOTSTRAP_CHUNK_ROWS:
+                if not self._bootstrap_chunk(table_key, table_schema, chunk, on_sheet, checkpoint):
+                    return False
+                uploaded += len(chunk)
+                chunk = []
+        if chunk:
+            if not self._bootstrap_chunk(table_key, table_schema, chunk, on_sheet, checkpoint):
+                return False
+            uploaded += len(chunk)
+        
+        if uploaded:
+            logger.info(f"Bootstrapped {uploaded} records for {sheets_table}")
+        return True
+    
+    def _bootstrap_chunk(self, table_key: str, table_schema, records: List, on_sheet: set,
+                         checkpoint: Dict) -> bool:
+        """
+        Append one chunk of records in a single request and save the checkpoint.
+        
+        Returns:
+            True if the chunk is on the sheet
+        """
+        pk = table_schema.primary_key
+        pending = [record for record in records if str(record[pk]) not in on_sheet]
+        
+        for sheets_table, index_key, group in self._route_records(table_key, pending):
+            if not sheets_table:
+                return False
+            try:
+                headers = self._sheet_header(table_key, sheets_table)
+            except Exception as e:
+                logger.error(f"Failed to upload rows to {sheets_table}: {e}")
+                return False
+            rows = [table_schema.to_sheet_row(record, headers) for record in group]
+            row_count = self.row_index.row_count(index_key)
+            first_row = self._sheets_call(self.sheets_client.append_rows, sheets_table, rows, raw=True)
+            if not first_row:
+                logger.error(f"Failed to upload {len(rows)} rows to {sheets_table}")
+                return False
+            
+            if (row_count is not None and isinstance(first_row, int)
+                    and not isinstance(first_row, bool) and first_row == row_count + 1):
+                self.row_index.record(
+                    index_key,
+                    {str(record[pk]): (first_row + i, row_hash(row))
+                     for i, (record, row) in enumerate(zip(group, rows))},
+                    row_count=first_row + len(rows) - 1
+                )
+            else:
+                # Someone else is writing to the sheet; the first push re-reads it
+                self.row_index.invalidate(index_key)
+            self.cache.mark_synced(table_key, [record[pk] for record in group])
+            self._count('rows_pushed', len(group))
+        
+        checkpoint['after'] = records[-1][pk]
+        self._save_bootstrap_checkpoint(checkpoint)
+        self._report_progress('bootstrap', table=table_key, uploaded=len(pending))
+        return True
+    
+    @_recorded('full')
     def full_sync_from_sheets(self) -> Dict[str, int]:
         """
         Perform a full sync from Google Sheets to local SQLite.
@@ -275,7 +459,7 @@ class SyncManager:
         Returns:
             Dictionary with sync results per table
         """
-        if not self.check_connection():
+        if not self._network_available():
             logger.error("Cannot sync: No internet connection")
             return {"error": "offline"}
         
@@ -289,34 +473,63 @@ class SyncManager:
         try:
             self.cache.connect()
             
+            # Everything logged from here on is re-applied by the next delta pull
+            log_length = self._change_log_length()
+            self._maintain_sheets(refresh=True)
+            
             # Sync each table
             for table_key, table_name in TABLES.items():
                 try:
                     logger.info(f"Syncing table: {table_name}")
-                    
-                    # Read all data from Google Sheets
-                    data = self.sheets_client.read_sheet(table_name)
-                    
-                    if not data:
-                        sync_results[table_name] = 0
+                    if self.shards.is_sharded(table_key):
+                        with self._table_timer(table_key):
+                            records_synced = self._full_sync_sharded_table(table_key)
+                        self._count('rows_pulled', records_synced)
+                        sync_results[table_name] = records_synced
+                        logger.info(f"Synced {records_synced} records from {table_name} shards")
                         continue
                     
-                    # Clear existing data in table
-                    self.cache.cursor.execute(f"DELETE FROM {table_key}")
-                    
-                    # Insert all records
-                    headers = data[0]
-                    records_synced = 0
-                    
-                    for row in data[1:]:
-                        if row:  # Skip empty rows
-                            record_dict = dict(zip(headers, row))
-                            record_dict['sync_status'] = 'synced'
-                            self.cache.insert_record(table_key, record_dict)
-                            records_synced += 1
-                    
-                    sync_results[table_name] = records_synced
-                    logger.info(f"Synced {records_synced} records from {table_name}")
+                    with self._table_timer(table_key):
+                        # Read all data from Google Sheets
+                        data = self.sheets_client.read_sheet(table_name)
+                        if data is None:
+                            raise RuntimeError(f"could not read {table_name}")
+                        
+                        if not data:
+                            sync_results[table_name] = 0
+                            continue
+                        
+                        headers = data[0]
+                        records = []
+                        self._header_rows[table_name] = list(headers)
+                        self._verify_row_index(table_key, data)
+                        
+                        for row in data[1:]:
+                            if row:  # Skip empty rows
+                                record_dict = dict(zip(headers, row))
+                                record_dict['sync_status'] = 'synced'
+                                records.append(record_dict)
+                        
+                        # Replace the table contents in one transaction, without
+                        # queueing the sheet's own rows to be pushed back
+                        with self.cache.capture_suspended():
+                            if table_key == 'system_settings':
+                                # This terminal's own bookkeeping is not the sheet's to replace
+                                local_keys = list(self.LOCAL_SETTING_KEYS)
+                                placeholders = ', '.join(['?'] * len(local_keys))
+                                self.cache.cursor.execute(
+                                    f"DELETE FROM system_settings WHERE setting_key NOT IN ({placeholders})",
+                                    local_keys
+                                )
+                                records = [r for r in records if r.get('setting_key') not in local_keys]
+                            else:
+                                self.cache.cursor.execute(f"DELETE FROM {table_key}")
+                            self.cache.upsert_many(table_key, records)
+                        records_synced = len(records)
+                        self._count('rows_pulled', records_synced)
+                        
+                        sync_results[table_name] = records_synced
+                        logger.info(f"Synced {records_synced} records from {table_name}")
                     
                 except Exception as e:
                     logger.error(f"Failed to sync {table_name}: {str(e)}")
@@ -325,6 +538,9 @@ class SyncManager:
             # Update last sync time
             self.last_sync_time = datetime.now().strftime(DATETIME_FORMAT)
             self._update_system_setting('last_full_sync', self.last_sync_time)
+            if log_length is not None:
+                self._set_change_log_offset(log_length)
+                self._save_scan_checkpoint(None)
             
             logger.info(f"Full sync completed: {sync_results}")
             return sync_results
@@ -336,196 +552,286 @@ class SyncManager:
             self.sync_in_progress = False
             self.cache.close()
     
+    @_recorded('push')
     def sync_local_changes_to_sheets(self) -> Dict[str, int]:
         """
-        Sync all pending local changes to Google Sheets.
+        Push queued local changes to Google Sheets.
         This is called when coming back online or on manual sync.
         
+        Changes come from sync_queue, which triggers fill on every insert,
+        update and delete, so the cost is proportional to the number of
+        changed records rather than the size of the database. Each record is
+        pushed in its current state (or cleared from the sheet if it no
+        longer exists locally) and its queue entries are removed on success.
+        
+        Each table goes up PUSH_CHUNK_ROWS changes at a time, so the queue
+        doubles as the push checkpoint: a push cut short resumes with the
+        first chunk that did not land. A table stops at its first failed
+        chunk rather than spending retries on the rest.
+        
         Returns:
             Dictionary with sync results
         """
-        if not self.check_connection():
+        # Hand the queue to the local network first: pushing acknowledges it
+        self.lan_sync()
+        
+        if not self._network_available():
             logger.error("Cannot sync: No internet connection")
             return {"error": "offline"}
         
         try:
             self.cache.connect()
             
-            # Get all pending syncs from cache
-            pending_syncs = self.cache.get_pending_syncs()
+            changes = self.cache.get_queued_changes()
             
-            if not pending_syncs:
+            if not changes:
                 logger.info("No pending syncs")
                 return {"pending": 0}
             
+            changes_by_table = {}
+            for change in changes:
+                changes_by_table.setdefault(change['table_name'], []).append(change)
+            
             synced_count = 0
             failed_count = 0
+            rejected_count = 0
             
-            for table_name, record in pending_syncs:
-                try:
-                    # Get the Google Sheets table name
-                    sheets_table = TABLES.get(table_name)
-                    if not sheets_table:
-                        continue
-                    
-                    # Convert record dict to list for Google Sheets
-                    # Note: We need to ensure the order matches headers. 
-                    # Ideally, we should read headers first or store schema order.
-                    # For now, assuming dict values turn into list in correct order is RISKY if python < 3.7 or dict modified
-                    # Robust way: Read header from sheet or config, then map.
-                    # As a safe fallback for this phase, we'll just use values() but TODO: Order by schema
-                    values = list(record.values())
-
-                    # Check if record exists in Google Sheets to decide Update vs Append
-                    pk = PRIMARY_KEYS.get(table_name, 'id')
-                    record_id = record.get(pk) or record.get('id')
-                    
-                    # Try to find row index (using first column as ID usually)
-                    row_index = None
-                    try:
-                        row_index = self.sheets_client.find_row_index(sheets_table, record_id)
-                    except Exception as e:
-                        logger.warning(f"Failed to find row index: {e}")
-                        row_index = None
-                    
-                    if row_index:
-                        # UPDATE existing row
-                        self.sheets_client.update_row(sheets_table, row_index, values)
-                        logger.info(f"Updated record {record_id} in {table_name} at row {row_index}")
-                    else:
-                        # APPEND new row
-                        self.sheets_client.append_row(sheets_table, values)
-                        logger.info(f"Appended new record {record_id} to {table_name}")
-                    
-                    # Mark as synced in local cache
-                    # Mark as synced in local cache
-                    pk = PRIMARY_KEYS.get(table_name, 'id')
-                    self.cache.update_record(
-                        table_name, 
-                        record_id, 
-                        {'sync_status': 'synced'},
-                        id_column=pk
-                    )
-                    
-                    synced_count += 1
-                    
-                except Exception as e:
-                    logger.error(f"Failed to sync record from {table_name}: {str(e)}")
-                    failed_count += 1
+            for table_name, table_changes in changes_by_table.items():
+                with self._table_timer(table_name):
+                    for start in range(0, len(table_changes), self.PUSH_CHUNK_ROWS):
+                        chunk = table_changes[start:start + self.PUSH_CHUNK_ROWS]
+                        if self.shards.is_sharded(table_name):
+                            synced, failed, rejected = self._push_sharded_changes(table_name, chunk)
+                            rejected_count += rejected
+                        else:
+                            synced, failed = self._push_table_changes(table_name, chunk)
+                        self._count('rows_pushed', synced)
+                        synced_count += synced
+                        failed_count += failed
+                        if failed:
+                            break
             
             logger.info(f"Synced {synced_count} records, {failed_count} failed")
-            return {
+            result = {
                 "synced": synced_count,
                 "failed": failed_count
             }
+            if rejected_count:
+                # Set aside in sync_quarantine; see get_quarantined_changes()
+                result["rejected"] = rejected_count
+            return result
             
         except Exception as e:
             logger.error(f"Failed to sync local changes: {str(e)}")
             return {"error": str(e)}
         finally:
             self.cache.close()
-    
-    def incremental_sync(self) -> Dict[str, any]:
+
+    def _push_table_changes(self, table_name: str, changes: List[Dict],
+                            shard: Optional[str] = None) -> Tuple[int, int]:
         """
-        Perform an incremental sync - only sync changed records.
-        This is more efficient than full sync.
+        Push one table's queued changes with a fixed number of API calls.
+        
+        Existing rows are located through the local sheet row index, so no
+        reads are needed once it is built; then all updates go in one
+        values.batchUpdate, all deletions in one batchClear and all new rows
+        in one multi-row append, preceded by one append to the change log.
+        Updates whose content hash matches what the
+        sheet already holds are skipped. If one of the write calls fails,
+        only the changes it carried stay queued.
+        
+        Args:
+            table_name: Local table name
+            changes: Entries from get_queued_changes() for this table
+            shard: Sheet title of the year shard to write to, for sharded
+                tables (see _push_sharded_changes)
         
         Returns:
-            Dictionary with sync results
+            Tuple of (synced count, failed count)
         """
-        if not self.check_connection():
-            return {"error": "offline"}
-        
-        if self.sync_in_progress:
-            logger.warning("Sync already in progress")
-            return {"error": "sync_in_progress"}
-
-        self.sync_in_progress = True
+        # Get the Google Sheets table name; a shard has its own row index
+        sheets_table = shard or TABLES.get(table_name)
+        index_key = shard or table_name
+        if not sheets_table:
+            for change in changes:
+                self.cache.acknowledge_change(table_name, change['record_id'], change['queue_id'])
+            return len(changes), 0
         
         try:
-            # First, push any local changes to sheets
-            push_result = self.sync_local_changes_to_sheets()
+            table_schema = self.cache.schema.get(table_name)
+            pk = table_schema.primary_key
             
-            # Then, pull any changes from sheets
-            pulled_count = 0
+            # Current local state of every changed record in one lookup
+            current = {
+                str(record_id): record
+                for record_id, record in self.cache.get_records_by_ids(
+                    table_name, [c['record_id'] for c in changes], id_column=pk
+                ).items()
+            }
             
-            # If we don't have a last sync time, we can't do incremental (or treat as full sync?)
-            # For now, rely on last_sync_time. If None, arguably should do full sync, 
-            # but let's just default to a very old date or skip.
-            last_sync = self.last_sync_time or "2000-01-01 00:00:00"
-
-            self.cache.connect()
+            # First push for this table (or index discarded): read the ID column once
+            headers = self._sheet_header(table_name, sheets_table)
+            self._load_row_index(table_name, sheets_table, index_key)
+            row_map = self.row_index.lookup(index_key, [c['record_id'] for c in changes])
+            row_count = self.row_index.row_count(index_key)
+        except Exception as e:
+            logger.error(f"Failed to prepare push for {table_name}: {str(e)}")
+            for change in changes:
+                self.cache.record_failed_change(table_name, change['record_id'])
+            return 0, len(changes)
+        
+        updates, update_changes, update_rows = [], [], {}
+        clears, clear_changes = [], []
+        appends, append_changes = [], []
+        current_on_sheet, already_cleared = [], []
+        
+        for change in changes:
+            record_id = str(change['record_id'])
+            record = current.get(record_id)
+            row_index, sheet_hash = row_map.get(record_id, (None, None))
             
-            for table_key, table_name in TABLES.items():
-                try:
-                    # RATE LIMIT: Sleep 0.2 seconds between table reads to avoid 429 errors
-                    time.sleep(0.2)
-                    
-                    try:
-                        sheets_data = self.sheets_client.read_sheet(table_name)
-                    except Exception as e:
-                        logger.error(f"Failed to read sheet {table_name}: {e}")
-                        sheets_data = []
+            if record is None:
+                # DELETE: gone locally, blank its row if the sheet has one
+                if row_index:
+                    clears.append(row_index)
+                    clear_changes.append(change)
+                else:
+                    already_cleared.append(change)
+                continue
+            
+            # Convert record dict to a row in the sheet's column order
+            values = table_schema.to_sheet_row(record, headers)
+            content_hash = row_hash(values)
+            if row_index and content_hash == sheet_hash:
+                # Sheet already holds exactly this row
+                current_on_sheet.append(change)
+            elif row_index:
+                # UPDATE existing row
+                updates.append({'range': f"{sheets_table}!A{row_index}", 'values': [values]})
+                update_changes.append(change)
+                update_rows[record_id] = (row_index, content_hash)
+            else:
+                # APPEND new row
+                appends.append(values)
+                append_changes.append((change, content_hash))
+        
+        synced_count = 0
+        failed_count = 0
+        
+        def settle(ok, group, upserted):
+            nonlocal synced_count, failed_count
+            if not ok:
+                for change in group:
+                    self.cache.record_failed_change(table_name, change['record_id'])
+                failed_count += len(group)
+                return
+            if upserted and group:
+                # Mark as synced in local cache
+                self.cache.mark_synced(table_name, [c['record_id'] for c in group])
+            for change in group:
+                self.cache.acknowledge_change(table_name, change['record_id'], change['queue_id'])
+            synced_count += len(group)
+        
+        settle(True, current_on_sheet, True)
+        settle(True, already_cleared, False)
+        
+        # Log the changes before writing them: other terminals pull from the
+        # log, and a write that fails after being logged is simply retried
+        written = update_changes + clear_changes + [change for change, _ in append_changes]
+        if written:
+            terminal_id = self._terminal_id()
+            logged = self._log_changes([
+                change_row(terminal_id, table_schema, change['record_id'],
+                           current.get(str(change['record_id'])))
+                for change in written
+            ])
+            if not logged:
+                settle(False, written, False)
+                logger.error(f"Could not log changes for {table_name}; {len(written)} left queued")
+                return synced_count, failed_count
+        
+        if updates:
+            ok = self._sheets_call(self.sheets_client.batch_update, updates)
+            if ok:
+                self.row_index.record(index_key, update_rows)
+            settle(ok, update_changes, True)
+        
+        if clears:
+            ok = self._sheets_call(self.sheets_client.clear_rows, sheets_table, clears)
+            if ok:
+                self.row_index.forget(index_key, [c['record_id'] for c in clear_changes])
+            settle(ok, clear_changes, False)
+        
+        # Appends go last: where they land doubles as the integrity check
+        if appends:
+            first_row = self._sheets_call(self.sheets_client.append_rows, sheets_table, appends, raw=True)
+            if first_row:
+                if isinstance(first_row, int) and not isinstance(first_row, bool) and first_row == row_count + 1:
+                    self.row_index.record(
+                        index_key,
+                        {str(change['record_id']): (first_row + i, content_hash)
+                         for i, (change, content_hash) in enumerate(append_changes)},
+                        row_count=first_row + len(appends) - 1
+                    )
+                else:
+                    # Rows were added or removed behind our back; re-read next time
+                    logger.warning(f"Append to {sheets_table} landed at row {first_row}, "
+                                   f"expected {row_count + 1}")
+                    self.row_index.invalidate(index_key)
+            settle(bool(first_row), [change for change, _ in append_changes], True)
+        
+        logger.info(
+            f"Pushed {sheets_table}: {len(updates)} updated, {len(appends)} appended, "
+            f"{len(clears)} cleared, {len(current_on_sheet)} already current, {failed_count} failed"
+        )
+        return synced_count, failed_count
 
-                    if not sheets_data: 
-                        continue
-                        
-                    headers = sheets_data[0]
-                    # Find 'last_modified' index if it exists in headers
-                    try:
-                        lm_index = headers.index('last_modified')
-                    except ValueError:
-                        # Table has no last_modified tracking, skip incremental pull for it
-                        continue
+    def _verify_row_index(self, table_name: str, sheet_rows: List[List], index_key: Optional[str] = None):
+        """Check (and if needed rebuild) the sheet row index from pulled rows."""
+        try:
+            pk = self.cache.schema.primary_key(table_name)
+            headers = sheet_rows[0]
+            if pk not in headers:
+                return
+            id_index = headers.index(pk)
+            id_values = [row[id_index] if len(row) > id_index else '' for row in sheet_rows]
+            self.row_index.verify(index_key or table_name, id_values, sheet_rows)
+        except Exception as e:
+            logger.warning(f"Could not verify sheet row index for {table_name}: {e}")
 
-                    # Check each row
-                    for row in sheets_data[1:]:
-                        if len(row) > lm_index:
-                            row_time = row[lm_index]
-                            
-                            # If row modified after last sync
-                            if row_time > last_sync:
-                                record_dict = dict(zip(headers, row))
-                                pk = PRIMARY_KEYS.get(table_key, 'id')
-                                record_id = record_dict.get(pk) or list(record_dict.values())[0]
-                                
-                                # Check local version for conflict
-                                local_record = self.cache.get_record(table_key, record_id, id_column=pk)
-                                
-                                if local_record:
-                                    # Conflict Resolution
-                                    resolution = self.resolve_conflicts(local_record, record_dict)
-                                    if resolution == record_dict:
-                                        # Remote wins
-                                        pk = PRIMARY_KEYS.get(table_key, 'id')
-                                        self.cache.update_record(table_key, record_id, record_dict, id_column=pk)
-                                        pulled_count += 1
-                                else:
-                                    # New record from remote
-                                    self.cache.insert_record(table_key, record_dict)
-                                    pulled_count += 1
-                                    
-                except Exception as e:
-                    logger.error(f"Error pulling from {table_name}: {e}")
-                    # If rate limit hit (429), pause longer
-                    if "429" in str(e):
-                         time.sleep(10)
+    def _count(self, counter: str, amount: int = 1):
+        """Add to a counter of the sync run being recorded on this thread."""
+        run = getattr(self._current, 'run', None)
+        if run is not None and amount:
+            run.add(counter, amount)
+    
+    def _table_timer(self, table_key: str):
+        """Context manager timing one table's share of the current sync run."""
+        run = getattr(self._current, 'run', None)
+        return run.timing(table_key) if run is not None else nullcontext()
+    
+    def _report_progress(self, stage: str, **details):
+        """Tell progress_callback (if any) which stage a sync has reached."""
+        if self.progress_callback:
+            try:
+                self.progress_callback(stage, **details)
+            except Exception as e:
+                logger.warning(f"Sync progress callback failed: {e}")
 
-            self.last_sync_time = datetime.now().strftime(DATETIME_FORMAT)
-            self._update_system_setting('last_full_sync', self.last_sync_time)
-            
-            return {
-                "pushed": push_result,
-                "pulled": pulled_count,
-                "last_sync": self.last_sync_time
-            }
-            
+    def _sheets_call(self, method, *args, raw=False):
+        """
+        Call a sheets_client write method, treating exceptions as failure.
+        
+        Returns:
+            True/False, or the method's own return value if raw is set
+        """
+        try:
+            result = method(*args)
+            return result if raw else bool(result)
         except Exception as e:
-            logger.error(f"Incremental sync failed: {str(e)}")
-            return {"error": str(e)}
-        finally:
-            self.sync_in_progress = False
-    
+            logger.error(f"{method.__name__} failed: {str(e)}")
+            return False
+
     def auto_sync_if_online(self) -> bool:
         """
         Check if online and perform incremental sync if so.
@@ -534,10 +840,27 @@ class SyncManager:
         Returns:
             True if sync was performed, False otherwise
         """
-        if self.check_connection() and not self.sync_in_progress:
+        if self.should_defer_sync():
+            return False
+        if self._network_available() and not self.sync_in_progress:
             result = self.incremental_sync()
             return "error" not in result
         return False
+
+    def should_defer_sync(self) -> bool:
+        """
+        Whether optional (background) syncs should wait for API quota to refill.
+
+        Manual syncs ignore this; the client's rate limiter still paces them.
+
+        Returns:
+            True if the Sheets request budget is nearly used up
+        """
+        limiter = getattr(self.sheets_client, 'rate_limiter', None)
+        if limiter is not None and limiter.is_budget_low():
+            logger.info("Sheets API quota nearly used; deferring background sync")
+            return True
+        return False
     
     def manual_sync(self) -> Dict[str, any]:
         """
@@ -559,7 +882,7 @@ class SyncManager:
         """
         try:
             self.cache.connect()
-            pending_count = len(self.cache.get_pending_syncs())
+            pending_count = self.cache.pending_change_count()
             self.cache.close()
             
             return {
@@ -589,6 +912,27 @@ class SyncManager:
         """
         return self.last_sync_time
         
+    def _get_system_setting(self, key: str) -> Optional[str]:
+        """
+        Read a system setting from the database.
+        
+        Args:
+            key: Setting key
+        
+        Returns:
+            Setting value, or None if it is not set
+        """
+        try:
+            self.cache.connect()
+            try:
+                setting = self.cache.get_record('system_settings', key, 'setting_key')
+            finally:
+                self.cache.close()
+            return setting.get('setting_value') if setting else None
+        except Exception as e:
+            logger.error(f"Failed to read system setting: {str(e)}")
+            return None
+    
     def _update_system_setting(self, key: str, value: str):
         """
         Update a system setting in the database.
@@ -610,10 +954,12 @@ class SyncManager:
                 'sync_status': 'synced'
             }
             
-            if existing:
-                self.cache.update_record('system_settings', key, setting_data, 'setting_key')
-            else:
-                self.cache.insert_record('system_settings', setting_data)
+            # Local bookkeeping only; keep it out of the push queue
+            with self.cache.capture_suspended():
+                if existing:
+                    self.cache.update_record('system_settings', key, setting_data, 'setting_key')
+                else:
+                    self.cache.insert_record('system_settings', setting_data)
             
             self.cache.close()
             
@@ -687,6 +1033,7 @@ class SyncManager:
         # Default fallback
         return remote_record
 
+    @_recorded('incremental')
     def incremental_sync(self) -> Dict[str, any]:
         """
         Perform an incremental sync - only sync changed records.
@@ -699,7 +1046,7 @@ class SyncManager:
         Returns:
             Dictionary with sync results
         """
-        if not self.check_connection():
+        if not self._network_available():
             return {"error": "offline"}
         
         if self.sync_in_progress:
@@ -710,84 +1057,46 @@ class SyncManager:
         
         try:
             # 1. PULL: Get latest changes from Sheets
-            pulled_count = 0
-            
-            last_sync = self.last_sync_time or "2000-01-01 00:00:00"
-
             self.cache.connect()
             
-            for table_key, table_name in TABLES.items():
-                try:
-                    # RATE LIMIT: Sleep 0.2 seconds between table reads to avoid 429 errors
-                    time.sleep(0.2)
-                    
-                    try:
-                        sheets_data = self.sheets_client.read_sheet(table_name)
-                    except Exception as e:
-                        logger.error(f"Failed to read sheet {table_name}: {e}")
-                        sheets_data = []
-
-                    if not sheets_data: 
-                        continue
-                        
-                    headers = sheets_data[0]
-                    # Find 'last_modified' index if it exists in headers
-                    try:
-                        lm_index = headers.index('last_modified')
-                    except ValueError:
-                        # Table has no last_modified tracking, skip incremental pull for it
-                        continue
-
-                    # Check each row for updates
-                    for row in sheets_data[1:]:
-                        if len(row) > lm_index:
-                            row_time = row[lm_index]
-                            
-                            # If row modified after last sync (Newer than when I last checked)
-                            if row_time > last_sync:
-                                record_dict = dict(zip(headers, row))
-                                pk = PRIMARY_KEYS.get(table_key, 'id')
-                                record_id = record_dict.get(pk) or list(record_dict.values())[0]
-                                
-                                # Check local version for conflict
-                                local_record = self.cache.get_record(table_key, record_id, id_column=pk)
-                                
-                                if local_record:
-                                    # Conflict Resolution (Pass table_key/name for strategy decision)
-                                    resolution = self.resolve_conflicts(local_record, record_dict, table_key)
-                                    
-                                    if resolution == record_dict:
-                                        # Remote wins (Update Local)
-                                        pk = PRIMARY_KEYS.get(table_key, 'id')
-                                        self.cache.update_record(table_key, record_id, record_dict, id_column=pk)
-                                        pulled_count += 1
-                                    else:
-                                        # Local wins (Keep Local)
-                                        # effectively we do nothing, and next Push will send our local version
-                                        pass
-                                else:
-                                    # New record from remote
-                                    self.cache.insert_record(table_key, record_dict)
-                                    pulled_count += 1
-                                    
-                except Exception as e:
-                    logger.error(f"Error pulling from {table_name}: {e}")
-                    # If rate limit hit (429), pause longer
-                    if "429" in str(e):
-                         time.sleep(10)
+            # Finish an interrupted bootstrap before touching the sheet otherwise
+            if self._bootstrap_pending():
+                self._report_progress('bootstrap')
+                if not self.bootstrap_sync():
+                    return {"error": "bootstrap_incomplete"}
+            
+            # Hide the change log, split a pre-sharding sheet, close last year's shards
+            self._maintain_sheets()
+            
+            self._report_progress('pull')
+            
+            # Delta pull from the change log once this terminal has a
+            # position in it; otherwise (first run, new spreadsheet) scan
+            # the tables and start following the log from here
+            offset = self._change_log_offset()
+            quarantined = 0
+            if offset is None:
+                pulled_count = self._pull_by_scan()
+            else:
+                pulled_count, quarantined = self._pull_from_change_log(offset)
 
             # 2. PUSH: Push local changes to sheets
             # Now that we are up to date (and conflicts resolved in favor of server), we push what's left.
+            self._report_progress('push', pulled=pulled_count)
             push_result = self.sync_local_changes_to_sheets()
 
             self.last_sync_time = datetime.now().strftime(DATETIME_FORMAT)
             self._update_system_setting('last_full_sync', self.last_sync_time)
             
-            return {
+            result = {
                 "pushed": push_result,
                 "pulled": pulled_count,
                 "last_sync": self.last_sync_time
             }
+            if quarantined:
+                # Set aside in sync_quarantine; see get_quarantined_changes()
+                result["quarantined"] = quarantined
+            return result
             
         except Exception as e:
             logger.error(f"Incremental sync failed: {str(e)}")
@@ -796,3 +1105,963 @@ class SyncManager:
             self.sync_in_progress = False
             if self.cache.connection:
                 self.cache.close()
+
+    def _pull_by_scan(self) -> int:
+        """
+        Pull by reading whole sheets and keeping the rows that changed.
+        
+        A row has changed if its content hash differs from the one the
+        sheet row index holds for that record (the sheet's version when
+        this terminal last wrote or read it). The comparison is done in
+        bulk, so unchanged rows cost neither a SQLite lookup nor a trip
+        through conflict resolution, and unlike comparing last_modified
+        with the last sync time it does not depend on clocks or date
+        formats agreeing.
+        
+        Used until this terminal has a change-log offset. The log's length
+        is taken first, so changes logged while the sheets are being read
+        are applied again on the next (delta) pull rather than missed.
+        
+        Each table applied is added to a checkpoint in system_settings
+        (with that log length), so a scan cut short resumes with the tables
+        it had not finished instead of reading them all again.
+        
+        Returns:
+            Number of local records inserted or updated
+        """
+        checkpoint = self._scan_checkpoint()
+        if checkpoint:
+            logger.info(f"Resuming scan pull; {len(checkpoint['done'])} tables already applied")
+        else:
+            checkpoint = {
+                'spreadsheet_id': self.sheets_client.spreadsheet_id,
+                'log_length': self._change_log_length(),
+                'done': [],
+            }
+        log_length = checkpoint['log_length']
+        pulled_count = 0
+        failed = False
+        
+        # Only tables with last_modified can be pulled incrementally, so
+        # don't download the others at all; sharded tables only from their
+        # open shards. Sheet title -> (table key, row index key)
+        pull_sheets = {}
+        for table_key in TABLES:
+            if table_key not in self.cache.schema or not self.cache.schema.get(table_key).has_last_modified:
+                continue
+            for sheet_title, index_key in self._table_sheets(table_key, open_only=True) or []:
+                if index_key not in checkpoint['done']:
+                    pull_sheets[sheet_title] = (table_key, index_key)
+        
+        # All sheets in a couple of batchGet round trips
+        try:
+            all_sheets = self.sheets_client.read_sheets(pull_sheets.keys())
+        except Exception as e:
+            logger.error(f"Failed to read sheets: {e}")
+            return 0
+        
+        for sheet_title, (table_key, index_key) in pull_sheets.items():
+            try:
+                with self._table_timer(table_key):
+                    pulled_count += self._pull_scanned_table(table_key, all_sheets.get(sheet_title), index_key)
+                checkpoint['done'].append(index_key)
+                self._save_scan_checkpoint(checkpoint)
+            except Exception as e:
+                failed = True
+                logger.error(f"Error pulling from {sheet_title}: {e}")
+        
+        if not failed:
+            if log_length is not None:
+                self._set_change_log_offset(log_length)
+            self._save_scan_checkpoint(None)
+        return pulled_count
+
+    def _pull_scanned_table(self, table_key: str, sheets_data: List[List],
+                            index_key: Optional[str] = None) -> int:
+        """
+        Apply the changed rows of one sheet read by _pull_by_scan().
+        
+        Args:
+            table_key: Local table name
+            sheets_data: The sheet's rows, header first; None if it could
+                not be read
+            index_key: Row index of the sheet (a shard's title; default table_key)
+        
+        Returns:
+            Number of local records inserted or updated
+        
+        Raises:
+            RuntimeError: If the sheet could not be read or has no header
+                row, so the table is not counted as pulled
+        """
+        if sheets_data is None:
+            raise RuntimeError("the sheet could not be read")
+        if not sheets_data:
+            raise RuntimeError("the sheet has no header row")
+        
+        headers = sheets_data[0]
+        self._header_rows[TABLES[table_key] if index_key in (None, table_key) else index_key] = list(headers)
+        if 'last_modified' not in headers:
+            # Table has no last_modified tracking, skip incremental pull for it
+            return 0
+
+        pk = self.cache.schema.primary_key(table_key)
+        known_hashes = self.row_index.hashes(index_key or table_key)
+
+        # Collect rows whose content differs from what was last seen
+        changed_rows = []
+        for row in sheets_data[1:]:
+            if not any(row):
+                continue
+            record_dict = dict(zip(headers, row))
+            record_id = str(record_dict.get(pk) or row[0])
+            if known_hashes.get(record_id) != row_hash(row):
+                changed_rows.append((record_id, record_dict))
+
+        pulled_count = self._apply_remote_rows(table_key, changed_rows)
+        
+        # Free integrity check of the row index: the rows are in hand.
+        # Only once they are applied, as it records their hashes as seen
+        self._verify_row_index(table_key, sheets_data, index_key)
+        return pulled_count
+
+    def _pull_from_change_log(self, offset: int) -> Tuple[int, int]:
+        """
+        Pull only the change-log rows appended since `offset`.
+        
+        The log is read CHANGE_LOG_PAGE_ROWS rows per request. Events from
+        this terminal are skipped and the rest applied by
+        _apply_change_events(); the saved offset moves past each page once
+        every table in it applied cleanly, so a pull cut short resumes at
+        the first page it had not finished, and a failure is retried.
+        Events that cannot be applied at all are quarantined and passed.
+        
+        Returns:
+            Tuple of (local records inserted, updated or deleted, events quarantined)
+        """
+        start = offset
+        pulled_count = 0
+        quarantined = 0
+        while True:
+            rows = self.change_log.read_since(offset, limit=self.CHANGE_LOG_PAGE_ROWS)
+            if not rows:
+                break
+            applied, failed, set_aside = self._apply_change_events(
+                ChangeLog.parse(rows, skip_terminal=self._terminal_id()), on_sheet=True
+            )
+            pulled_count += applied
+            quarantined += set_aside
+            if failed:
+                break
+            offset += len(rows)
+            self._set_change_log_offset(offset)
+            if len(rows) < self.CHANGE_LOG_PAGE_ROWS:
+                break
+            self._report_progress('pull', pulled=pulled_count)
+        
+        if offset > start:
+            logger.info(f"Change log: read {offset - start} rows from offset {start}, applied {pulled_count}")
+        return pulled_count, quarantined
+
+    def _apply_change_events(self, events: List[Dict], on_sheet: bool = False,
+                             shared_queue_id: int = 0) -> Tuple[int, bool, int]:
+        """
+        Apply change events from another terminal (change log or change set).
+        
+        Of several events for one record only the latest counts. Upserts go
+        through the same conflict resolution as a scanned pull; deletes are
+        applied unless the record has local changes the other terminal has
+        not seen yet.
+        
+        If a table's events fail to apply they are retried one by one, and
+        an event that fails on its own (a UNIQUE constraint, say) is moved
+        to sync_quarantine, so it does not hold back every event after it.
+        A database error (locked, disk full) is not the event's fault and
+        leaves the table to be retried instead.
+        
+        Args:
+            events: Events from ChangeLog.parse(), oldest first
+            on_sheet: True if the events describe rows already on the sheet
+                (change log), so the sheet row index hashes are updated
+            shared_queue_id: Queue entries up to this ID already reached the
+                other terminal (exported change sets), so they do not
+                protect a record from its delete
+        
+        Returns:
+            Tuple of (records inserted, updated or deleted, True if any
+            table failed, events quarantined)
+        """
+        latest = {}
+        for event in events:
+            table_key = event['table_name']
+            if table_key not in TABLES or table_key not in self.cache.schema:
+                continue
+            pk = self.cache.schema.primary_key(table_key)
+            record_id = str(event['record'].get(pk) or event['record_id'])
+            by_id = latest.setdefault(table_key, {})
+            # Re-insert so the dict keeps the order of each record's last event
+            by_id.pop(record_id, None)
+            by_id[record_id] = event
+        
+        pending = {(c['table_name'], str(c['record_id'])) for c in self.cache.get_queued_changes()
+                   if c['queue_id'] > shared_queue_id}
+        source = 'change_log' if on_sheet else 'change_set'
+        applied_count = 0
+        failed = False
+        quarantined = 0
+        
+        for table_key, by_id in latest.items():
+            try:
+                applied_count += self._apply_table_events(table_key, by_id, pending, on_sheet)
+                continue
+            except Exception as e:
+                logger.warning(f"Error applying changes to {table_key} ({e}); applying them one by one")
+            
+            for record_id, event in by_id.items():
+                try:
+                    applied_count += self._apply_table_events(
+                        table_key, {record_id: event}, pending, on_sheet
+                    )
+                except sqlite3.OperationalError as e:
+                    failed = True
+                    logger.error(f"Error applying changes to {table_key}: {e}")
+                    break
+                except Exception as e:
+                    logger.error(f"Quarantined {event['operation']} of {table_key} {record_id}: {e}")
+                    self.cache.quarantine_change(source, table_key, record_id, event['operation'],
+                                                 event['record'], e)
+                    quarantined += 1
+        
+        return applied_count, failed, quarantined
+
+    def _apply_table_events(self, table_key: str, by_id: Dict[str, Dict], pending: set,
+                            on_sheet: bool) -> int:
+        """
+        Apply one table's latest events, for _apply_change_events().
+        
+        Args:
+            table_key: Local table name
+            by_id: Record ID -> its latest event
+            pending: (table, record ID) of records with unshared local changes
+            on_sheet: Update the sheet row index hashes of the upserts
+        
+        Returns:
+            Number of local records inserted, updated or deleted
+        """
+        table_schema = self.cache.schema.get(table_key)
+        upserts = [(record_id, dict(event['record']))
+                   for record_id, event in by_id.items() if event['operation'] == 'upsert']
+        deletes = [record_id for record_id, event in by_id.items()
+                   if event['operation'] == 'delete' and (table_key, record_id) not in pending]
+        
+        applied_count = self._apply_remote_rows(table_key, upserts)
+        applied_count += self._apply_remote_deletes(table_key, deletes)
+        
+        if on_sheet:
+            # The sheet now holds the other terminal's version of these rows
+            by_index = {}
+            for record_id, record in upserts:
+                index_key = (self.shards.sheet(table_key, self.shards.year_of(table_key, record))
+                             if self.shards.is_sharded(table_key) else table_key)
+                by_index.setdefault(index_key, []).append((record_id, record))
+            for index_key, records in by_index.items():
+                try:
+                    headers = self._sheet_header(
+                        table_key, TABLES[table_key] if index_key == table_key else index_key, complete=False
+                    )
+                except Exception as e:
+                    # No hash rather than a wrong one: the next push rewrites the rows
+                    logger.warning(f"Not recording row hashes for {index_key}: {e}")
+                    headers = None
+                self.row_index.update_hashes(index_key, {
+                    record_id: row_hash(table_schema.to_sheet_row(record, headers)) if headers else None
+                    for record_id, record in records
+                })
+        return applied_count
+
+    def lan_sync(self) -> Dict[str, int]:
+        """
+        Exchange change sets with other terminals through the shared folder.
+        
+        Local changes queued since the last export are written as one
+        numbered change-set file, and this terminal's files every peer has
+        applied are deleted; other terminals' new files are applied in
+        their sequence order. Nothing touches Google, so this is cheap
+        enough to run every fraction of a second (see ChangeSetPoller).
+        Changes applied here are not queued, so they are neither exported
+        again nor pushed to Sheets by this terminal: the terminal that made
+        them pushes them itself.
+        
+        Returns:
+            Dictionary with exported and applied counts (empty if no folder
+            is configured), or an error
+        """
+        folder = self.lan_sync_folder()
+        if not folder:
+            return {}
+        
+        with self._lan_lock:
+            try:
+                self.cache.connect()
+                transport = ChangeSetFolder(folder, self._terminal_id())
+                state = self._lan_sync_state()
+                exported = self._export_change_set(transport, state)
+                applied = self._import_change_sets(transport, state)
+                if exported or applied:
+                    logger.info(f"Local network sync: exported {exported}, applied {applied}")
+                return {"exported": exported, "applied": applied}
+            except Exception as e:
+                logger.error(f"Local network sync failed: {e}")
+                return {"error": str(e)}
+            finally:
+                self.cache.close()
+
+    def lan_sync_folder(self) -> Optional[str]:
+        """Shared folder used for local-network sync, or None if it is off."""
+        return self._get_system_setting(self.LAN_SYNC_FOLDER_KEY) or None
+
+    def configure_lan_sync(self, folder: Optional[str]):
+        """
+        Set (or with None, turn off) the shared folder for local-network sync.
+        
+        Only changes queued from now on are exported; existing data is
+        shared through Google Sheets as before.
+        """
+        with self._lan_lock:
+            self.cache.connect()
+            try:
+                state = self._lan_sync_state()
+                if folder:
+                    queued = self.cache.get_queued_changes()
+                    state['exported_queue_id'] = max((c['queue_id'] for c in queued), default=0)
+                    # Join as a peer, so the others keep their change sets for us
+                    ChangeSetFolder(folder, self._terminal_id()).share_progress(state.get('applied', {}))
+                self._save_lan_sync_state(state)
+                self._update_system_setting(self.LAN_SYNC_FOLDER_KEY, folder or '')
+            finally:
+                self.cache.close()
+
+    def _export_change_set(self, transport: ChangeSetFolder, state: Dict) -> int:
+        """Publish queue entries newer than the last export; returns rows written."""
+        mark = state.get('exported_queue_id', 0)
+        changes = [c for c in self.cache.get_queued_changes() if c['queue_id'] > mark]
+        if not changes:
+            return 0
+        
+        changes_by_table = {}
+        for change in changes:
+            changes_by_table.setdefault(change['table_name'], []).append(change)
+        
+        terminal_id = self._terminal_id()
+        rows = []
+        for table_name, table_changes in changes_by_table.items():
+            if table_name not in TABLES or table_name not in self.cache.schema:
+                continue
+            table_schema = self.cache.schema.get(table_name)
+            current = {
+                str(record_id): record
+                for record_id, record in self.cache.get_records_by_ids(
+                    table_name, [c['record_id'] for c in table_changes], id_column=table_schema.primary_key
+                ).items()
+            }
+            rows.extend(
+                change_row(terminal_id, table_schema, change['record_id'], current.get(str(change['record_id'])))
+                for change in table_changes
+            )
+        
+        if rows:
+            # Never reuse a number, even if local state was lost
+            sequence = max(state.get('sequence', 0), transport.last_sequence()) + 1
+            transport.publish(rows, sequence)
+            state['sequence'] = sequence
+            transport.prune()
+        state['exported_queue_id'] = max(c['queue_id'] for c in changes)
+        self._save_lan_sync_state(state)
+        return len(rows)
+
+    def _import_change_sets(self, transport: ChangeSetFolder, state: Dict) -> int:
+        """Apply other terminals' new change sets in order; returns records changed."""
+        applied = state.setdefault('applied', {})
+        change_sets = transport.pending(applied)
+        if not change_sets:
+            return 0
+        
+        applied_count = 0
+        for terminal_id, sequence, rows in change_sets:
+            count, failed, _ = self._apply_change_events(
+                ChangeLog.parse(rows), shared_queue_id=state.get('exported_queue_id', 0)
+            )
+            if failed:
+                # Retried from this change set on the next poll
+                break
+            applied_count += count
+            applied[terminal_id] = sequence
+        self._save_lan_sync_state(state)
+        transport.share_progress(applied)
+        return applied_count
+
+    def _lan_sync_state(self) -> Dict:
+        """Last exported queue entry, last sequence and per-terminal progress."""
+        value = self._get_system_setting(self.LAN_SYNC_STATE_KEY)
+        try:
+            state = json.loads(value) if value else {}
+        except ValueError:
+            state = {}
+        return state if isinstance(state, dict) else {}
+
+    def _save_lan_sync_state(self, state: Dict):
+        self._update_system_setting(self.LAN_SYNC_STATE_KEY, json.dumps(state))
+
+    def _apply_remote_rows(self, table_key: str, changed_rows: List[Tuple[str, Dict]]) -> int:
+        """
+        Apply records changed on Sheets, resolving conflicts with local edits.
+        
+        Records whose local version already has the same content are left
+        alone.
+        
+        Args:
+            table_key: Local table name
+            changed_rows: List of (record ID, record dict) from the remote side
+        
+        Returns:
+            Number of local records inserted or updated
+        """
+        if not changed_rows:
+            return 0
+        
+        table_schema = self.cache.schema.get(table_key)
+        pk = table_schema.primary_key
+        
+        # Check local versions for conflicts with a single lookup
+        local_records = {
+            str(record_id): record
+            for record_id, record in self.cache.get_records_by_ids(
+                table_key, [record_id for record_id, _ in changed_rows], id_column=pk
+            ).items()
+        }
+
+        rows_to_apply = []
+        for record_id, record_dict in changed_rows:
+            local_record = local_records.get(record_id)
+            if local_record:
+                if row_hash(table_schema.to_sheet_row(local_record)) == \
+                        row_hash(table_schema.to_sheet_row(record_dict)):
+                    # Already identical locally
+                    continue
+                # Conflict Resolution (Pass table_key/name for strategy decision)
+                resolution = self.resolve_conflicts(local_record, record_dict, table_key)
+                self._count('conflicts')
+                if resolution != record_dict:
+                    # Local wins (Keep Local)
+                    # effectively we do nothing, and next Push will send our local version
+                    continue
+            # Remote wins, or new record from remote
+            record_dict['sync_status'] = 'synced'
+            rows_to_apply.append(record_dict)
+
+        # Apply all remote winners in one transaction (not queued for push)
+        with self.cache.capture_suspended():
+            result = self.cache.upsert_many(table_key, rows_to_apply, key=pk)
+        applied = result['inserted'] + result['updated']
+        self._count('rows_pulled', applied)
+        return applied
+
+    def _apply_remote_deletes(self, table_key: str, record_ids: List[str]) -> int:
+        """
+        Delete records another terminal deleted (not queued for push).
+        
+        Returns:
+            Number of local records deleted
+        """
+        if not record_ids:
+            return 0
+        
+        pk = self.cache.schema.primary_key(table_key)
+        with self.cache.capture_suspended():
+            self.cache.cursor.executemany(
+                f"DELETE FROM {table_key} WHERE {pk} = ?", [(record_id,) for record_id in record_ids]
+            )
+            deleted = max(self.cache.cursor.rowcount, 0)
+        # Their sheet rows were cleared by the terminal that deleted them
+        self.row_index.forget(table_key, record_ids)
+        self._count('rows_pulled', deleted)
+        return deleted
+
+    def _table_sheets(self, table_key: str, refresh: bool = False,
+                      open_only: bool = False) -> Optional[List[Tuple[str, str]]]:
+        """
+        The sheets holding a table, with the row index key of each.
+        
+        An unsharded table is its one sheet (indexed under the table name);
+        a sharded table is every year shard on the spreadsheet (each indexed
+        under its own title).
+        
+        Args:
+            table_key: Local table name
+            refresh: List the spreadsheet's sheets again
+            open_only: Leave out closed shards
+        
+        Returns:
+            List of (sheet title, row index key), or None if the shards
+            could not be listed
+        """
+        if not self.shards.is_sharded(table_key):
+            return [(TABLES[table_key], table_key)]
+        shards = self._shard_sheets(table_key, refresh)
+        if self._sheet_list is None:
+            return None
+        return [(title, title) for year, title in sorted(shards.items())
+                if not (open_only and self.shards.is_closed(year))]
+
+    def _list_sheets(self, refresh: bool = False) -> Optional[Dict[str, Dict]]:
+        """The spreadsheet's sheets, listed once per session (None if unavailable)."""
+        if self._sheet_list is None or refresh:
+            listed = self._sheets_call(self.sheets_client.list_sheets, raw=True)
+            if isinstance(listed, dict):
+                self._sheet_list = listed
+        return self._sheet_list
+
+    def _shard_sheets(self, table_key: str, refresh: bool = False) -> Dict[int, str]:
+        """Year -> sheet title of a table's shards."""
+        return self.shards.shards_in(table_key, self._list_sheets(refresh) or {})
+
+    def _ensure_shard(self, table_key: str, year: int) -> Optional[str]:
+        """
+        Sheet title of a year shard, creating the sheet (with its header
+        row) on first use.
+        
+        Returns:
+            The title, or None if the sheet does not exist and could not be created
+        """
+        title = self.shards.sheet(table_key, year)
+        if year in self._shard_sheets(table_key):
+            return title
+        if self._sheet_list is None:
+            return None
+        
+        table_schema = self.cache.schema.get(table_key)
+        if not self._sheets_call(self.sheets_client.ensure_sheet, title, table_schema.sheet_columns):
+            # Another terminal may have created it a moment ago
+            if year not in self._shard_sheets(table_key, refresh=True):
+                logger.error(f"Could not create shard {title}")
+                return None
+            return title
+        
+        logger.info(f"Created shard {title}")
+        self._sheet_list[title] = {'sheet_id': None, 'protected': False}
+        self._header_rows[title] = list(table_schema.sheet_columns)
+        self.row_index.rebuild(title, [table_schema.primary_key])
+        return title
+
+    def _route_records(self, table_key: str, records: List[Dict]) -> List[Tuple[Optional[str], str, List[Dict]]]:
+        """
+        Split records between the sheets they are written to.
+        
+        Returns:
+            List of (sheet title, row index key, records); the title is None
+            for a shard that could not be created
+        """
+        if not records:
+            return []
+        if not self.shards.is_sharded(table_key):
+            return [(TABLES[table_key], table_key, records)]
+        by_year = {}
+        for record in records:
+            by_year.setdefault(self.shards.year_of(table_key, record), []).append(record)
+        routed = []
+        for year, group in sorted(by_year.items()):
+            title = self._ensure_shard(table_key, year)
+            routed.append((title, title or self.shards.sheet(table_key, year), group))
+        return routed
+
+    def _load_row_index(self, table_key: str, sheets_table: str, index_key: Optional[str] = None):
+        """Build a sheet's row index from its ID column if it has none yet."""
+        index_key = index_key or table_key
+        if self.row_index.row_count(index_key) is None:
+            pk = self.cache.schema.primary_key(table_key)
+            id_values = self.sheets_client.read_column(
+                sheets_table, self._sheet_header(table_key, sheets_table).index(pk)
+            )
+            if id_values is None:
+                # An empty index would turn every update into an append
+                raise RuntimeError(f"could not read the ID column of {sheets_table}")
+            self.row_index.rebuild(index_key, id_values)
+
+    def _sheet_header(self, table_key: str, sheet_title: str, complete: bool = True) -> List[str]:
+        """
+        A sheet's header row, read once per session.
+        
+        Rows are laid out by the sheet's header rather than by the local
+        column order, which is not the same on every terminal: migration 2
+        appends late columns to an upgraded database, while a fresh one has
+        them in place.
+        
+        Args:
+            table_key: Local table name
+            sheet_title: The table's sheet, or one of its shards
+            complete: Append the table's columns the header lacks (and
+                write it back), as needed before writing rows
+        
+        Returns:
+            Column names in sheet order
+        
+        Raises:
+            RuntimeError: If the header row could not be read or written
+        """
+        headers = self._header_rows.get(sheet_title)
+        if headers is None:
+            rows = self._sheets_call(self.sheets_client.read_sheet, sheet_title, '1:1', raw=True)
+            if rows is None or rows is False:
+                raise RuntimeError(f"could not read the header row of {sheet_title}")
+            headers = [str(cell) for cell in rows[0]] if rows else []
+            self._header_rows[sheet_title] = headers
+        
+        if complete:
+            missing = [c for c in self.cache.schema.get(table_key).sheet_columns if c not in headers]
+            if missing:
+                headers = headers + missing
+                if not self._sheets_call(self.sheets_client.batch_update,
+                                         [{'range': f"{sheet_title}!A1", 'values': [headers]}]):
+                    raise RuntimeError(f"could not add {', '.join(missing)} to the header row of {sheet_title}")
+                logger.info(f"Added {', '.join(missing)} to the header row of {sheet_title}")
+                self._header_rows[sheet_title] = headers
+        return headers
+
+    def _push_sharded_changes(self, table_name: str, changes: List[Dict]) -> Tuple[int, int, int]:
+        """
+        Push one sharded table's queued changes, each to its year's shard.
+        
+        A record whose date moved it to another year has its old row
+        cleared first; that is not logged, as the record still exists.
+        Deletes go to the shard holding the row. A change that would write
+        to a closed shard (an edit or delete of a closed year's record, or
+        a date moved into or out of one) is rejected: it is taken off the
+        queue and kept in sync_quarantine (see _reject_changes()).
+        
+        Returns:
+            Tuple of (synced count, failed count, rejected count)
+        """
+        pk = self.cache.schema.primary_key(table_name)
+        record_ids = [str(change['record_id']) for change in changes]
+        failed_count = 0
+        
+        def fail(group):
+            nonlocal failed_count
+            for change in group:
+                self.cache.record_failed_change(table_name, change['record_id'])
+            failed_count += len(group)
+        
+        try:
+            current = {
+                str(record_id): record
+                for record_id, record in self.cache.get_records_by_ids(
+                    table_name, record_ids, id_column=pk
+                ).items()
+            }
+            shards = self._shard_sheets(table_name)
+            if self._sheet_list is None:
+                raise RuntimeError("could not list the spreadsheet's sheets")
+            
+            # Which shard each record's row is on now: open shards first,
+            # closed ones only for records not found there
+            located = {}
+            closed_years = sorted((year for year in shards if self.shards.is_closed(year)), reverse=True)
+            for year in self.shards.open_years() + closed_years:
+                unlocated = [record_id for record_id in record_ids if record_id not in located]
+                if year not in shards or not unlocated:
+                    continue
+                self._load_row_index(table_name, shards[year], shards[year])
+                for record_id in self.row_index.lookup(shards[year], unlocated):
+                    located[record_id] = year
+        except Exception as e:
+            logger.error(f"Failed to prepare push for {table_name}: {str(e)}")
+            fail(changes)
+            return 0, failed_count, 0
+        
+        by_year, moved, rejected = {}, {}, []
+        for change in changes:
+            record_id = str(change['record_id'])
+            record = current.get(record_id)
+            if record is None:
+                year = located.get(record_id, self.shards.current_year())
+                if self.shards.is_closed(year):
+                    rejected.append((change, None, f"{shards[year]} is closed"))
+                    continue
+            else:
+                year = self.shards.year_of(table_name, record)
+                closed = [y for y in (year, located.get(record_id, year)) if self.shards.is_closed(y)]
+                if closed:
+                    rejected.append((change, record, f"{self.shards.sheet(table_name, closed[0])} is closed"))
+                    continue
+                if located.get(record_id, year) != year:
+                    moved.setdefault(located[record_id], []).append((change, year))
+            by_year.setdefault(year, []).append(change)
+        self._reject_changes(table_name, rejected)
+        
+        for old_year, group in moved.items():
+            title = shards[old_year]
+            ids = [str(change['record_id']) for change, _ in group]
+            rows = [row for row, _ in self.row_index.lookup(title, ids).values()]
+            if self._sheets_call(self.sheets_client.clear_rows, title, rows):
+                self.row_index.forget(title, ids)
+                continue
+            # Stays queued; pushing the new row now would leave two copies
+            for change, year in group:
+                by_year[year].remove(change)
+            fail([change for change, _ in group])
+        
+        synced_count = 0
+        for year, group in sorted(by_year.items()):
+            if not group:
+                continue
+            title = self._ensure_shard(table_name, year)
+            if not title:
+                fail(group)
+                continue
+            synced, failed = self._push_table_changes(table_name, group, shard=title)
+            synced_count += synced
+            failed_count += failed
+        return synced_count, failed_count, len(rejected)
+
+    def _reject_changes(self, table_name: str, rejected: List[Tuple[Dict, Optional[Dict], str]]):
+        """
+        Take queued changes Sheets must not receive off the queue.
+        
+        Each is kept in sync_quarantine (source 'rejected') with the local
+        record, or its key for a delete, so it is neither retried forever
+        nor lost; the sheet keeps its version.
+        
+        Args:
+            table_name: Local table name
+            rejected: (queue entry, current record or None if deleted, reason)
+        """
+        pk = self.cache.schema.primary_key(table_name)
+        for change, record, reason in rejected:
+            record_id = change['record_id']
+            operation = 'delete' if record is None else 'upsert'
+            logger.warning(f"Rejected {operation} of {table_name} {record_id}: {reason}")
+            self.cache.quarantine_change('rejected', table_name, record_id, operation,
+                                         record if record is not None else {pk: record_id}, reason)
+            self.cache.acknowledge_change(table_name, record_id, change['queue_id'])
+
+    def _full_sync_sharded_table(self, table_key: str) -> int:
+        """
+        Replace a sharded table's local rows from its shards.
+        
+        Open shards are always read. A closed shard is read only if this
+        terminal has no row index for it (it never read it, or the index
+        was discarded); otherwise its rows, which cannot have changed, are
+        kept as they are.
+        
+        Returns:
+            Number of records read
+        """
+        shards = self._shard_sheets(table_key)
+        if self._sheet_list is None:
+            raise RuntimeError("could not list the spreadsheet's sheets")
+        
+        records = []
+        kept = []
+        for year, title in sorted(shards.items()):
+            if self.shards.is_closed(year) and self.row_index.row_count(title) is not None:
+                kept.append(title)
+                continue
+            data = self.sheets_client.read_sheet(title)
+            if not data:
+                # A shard has at least its header row; nothing means the read failed
+                raise RuntimeError(f"could not read {title}")
+            self._verify_row_index(table_key, data, title)
+            headers = data[0]
+            self._header_rows[title] = list(headers)
+            for row in data[1:]:
+                if row:
+                    record_dict = dict(zip(headers, row))
+                    record_dict['sync_status'] = 'synced'
+                    records.append(record_dict)
+        
+        pk = self.cache.schema.primary_key(table_key)
+        with self.cache.capture_suspended():
+            if kept:
+                # Rows of closed shards not re-read stay; the index lists them
+                placeholders = ', '.join(['?'] * len(kept))
+                self.cache.cursor.execute(
+                    f"DELETE FROM {table_key} WHERE {pk} NOT IN "
+                    f"(SELECT record_id FROM sheet_row_index WHERE table_name IN ({placeholders}))",
+                    kept
+                )
+            else:
+                self.cache.cursor.execute(f"DELETE FROM {table_key}")
+            self.cache.upsert_many(table_key, records)
+        return len(records)
+
+    def _maintain_sheets(self, refresh: bool = False):
+        """
+        Sheet housekeeping, once per session and on every full sync.
+        
+        The change log is hidden and protected, a table's sheet from before
+        sharding is split into year shards, and closed shards are protected
+        so nobody edits them by hand.
+        """
+        if self._sheets_maintained and not refresh:
+            return
+        if self._list_sheets(refresh=True) is None:
+            return
+        
+        log_sheet = self._sheet_list.get(CHANGE_LOG_SHEET)
+        if log_sheet and not (log_sheet.get('hidden') and log_sheet['protected']):
+            try:
+                self.change_log.conceal(log_sheet)
+            except Exception as e:
+                logger.warning(f"Could not hide {CHANGE_LOG_SHEET}: {e}")
+        
+        for table_key in self.shards.tables:
+            legacy = self._sheet_list.get(TABLES[table_key])
+            if legacy and not self._split_unsharded_sheet(table_key, legacy['sheet_id']):
+                continue
+            for year, title in self._shard_sheets(table_key).items():
+                info = self._sheet_list.get(title)
+                if not self.shards.is_closed(year) or not info or info['protected']:
+                    continue
+                if info['sheet_id'] is None:
+                    # Created this session; picked up by the next listing
+                    continue
+                if self._sheets_call(self.sheets_client.protect_sheet, info['sheet_id'],
+                                     f"{title} is closed: records from {year} are read-only"):
+                    info['protected'] = True
+                    logger.info(f"Closed shard {title}")
+        self._sheets_maintained = True
+
+    def _split_unsharded_sheet(self, table_key: str, sheet_id) -> bool:
+        """
+        Move a table's rows from its pre-sharding sheet into year shards,
+        then delete that sheet.
+        
+        Rows whose ID is already on a shard are not copied again, so a
+        split cut short (or run by two terminals at once) carries on
+        where it stopped. The sheet is deleted only once every row is in
+        a shard.
+        
+        Returns:
+            True if the table is fully sharded
+        """
+        sheet_title = TABLES[table_key]
+        table_schema = self.cache.schema.get(table_key)
+        pk = table_schema.primary_key
+        data = self.sheets_client.read_sheet(sheet_title)
+        if not data:
+            return False
+        logger.info(f"Splitting {sheet_title} into yearly shards...")
+        
+        headers = data[0]
+        records = [dict(zip(headers, row)) for row in data[1:] if any(row)]
+        on_shards = set()
+        for title, index_key in self._table_sheets(table_key) or []:
+            self._load_row_index(table_key, title, index_key)
+            on_shards.update(self.row_index.lookup(index_key, [r.get(pk) for r in records]))
+        pending = [record for record in records if str(record.get(pk)) not in on_shards]
+        
+        for title, index_key, group in self._route_records(table_key, pending):
+            if not title:
+                return False
+            headers = self._sheet_header(table_key, title)
+            rows = [table_schema.to_sheet_row(record, headers) for record in group]
+            if not self._sheets_call(self.sheets_client.append_rows, title, rows):
+                logger.error(f"Could not copy {len(rows)} rows to {title}; split resumes next session")
+                return False
+            # Re-read on the next push
+            self.row_index.invalidate(index_key)
+        
+        if sheet_id is None or not self._sheets_call(self.sheets_client.delete_sheet, sheet_id):
+            return False
+        del self._sheet_list[sheet_title]
+        self.row_index.invalidate(table_key)
+        logger.info(f"Split {len(records)} rows of {sheet_title} into shards")
+        return True
+
+    def _log_changes(self, rows: List[List]) -> bool:
+        """
+        Append change rows to the change log.
+        
+        If they land right after this terminal's offset (nobody else wrote
+        in between), the offset moves past them so the next pull does not
+        read back its own changes.
+        
+        Returns:
+            True if the rows were logged
+        """
+        first_row = self._sheets_call(self.change_log.append, rows, raw=True)
+        if not first_row:
+            return False
+        
+        offset = self._change_log_offset()
+        if (offset is not None and isinstance(first_row, int) and not isinstance(first_row, bool)
+                and first_row == offset + 1):
+            self._set_change_log_offset(first_row + len(rows) - 1)
+        return True
+
+    def _change_log_length(self) -> Optional[int]:
+        """Current number of change-log rows, or None if it cannot be read."""
+        try:
+            return self.change_log.length()
+        except Exception as e:
+            logger.warning(f"Could not read change log: {e}")
+            return None
+
+    def _change_log_offset(self) -> Optional[int]:
+        """Change-log rows already consumed, or None if never recorded."""
+        value = self._get_system_setting(self.CHANGE_LOG_OFFSET_KEY)
+        try:
+            return int(value) if value not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
+
+    def _set_change_log_offset(self, offset: Optional[int]):
+        self._update_system_setting(self.CHANGE_LOG_OFFSET_KEY, '' if offset is None else str(offset))
+
+    def _bootstrap_checkpoint(self) -> Optional[Dict]:
+        """Saved bootstrap progress, or None if no bootstrap is under way."""
+        value = self._get_system_setting(self.BOOTSTRAP_CHECKPOINT_KEY)
+        try:
+            checkpoint = json.loads(value) if value else None
+        except ValueError:
+            return None
+        return checkpoint if isinstance(checkpoint, dict) else None
+
+    def _save_bootstrap_checkpoint(self, checkpoint: Optional[Dict]):
+        self._update_system_setting(
+            self.BOOTSTRAP_CHECKPOINT_KEY, json.dumps(checkpoint) if checkpoint else ''
+        )
+
+    def _scan_checkpoint(self) -> Optional[Dict]:
+        """Progress of an interrupted scan pull of the current spreadsheet, or None."""
+        value = self._get_system_setting(self.SCAN_CHECKPOINT_KEY)
+        try:
+            checkpoint = json.loads(value) if value else None
+        except ValueError:
+            return None
+        if not isinstance(checkpoint, dict) or not isinstance(checkpoint.get('done'), list):
+            return None
+        if checkpoint.get('spreadsheet_id') != self.sheets_client.spreadsheet_id:
+            return None
+        return checkpoint
+
+    def _save_scan_checkpoint(self, checkpoint: Optional[Dict]):
+        self._update_system_setting(
+            self.SCAN_CHECKPOINT_KEY, json.dumps(checkpoint) if checkpoint else ''
+        )
+
+    def _bootstrap_pending(self) -> bool:
+        """True if a bootstrap to the current spreadsheet was interrupted."""
+        checkpoint = self._bootstrap_checkpoint()
+        return bool(checkpoint) and checkpoint.get('spreadsheet_id') == self.sheets_client.spreadsheet_id
+
+    def _terminal_id(self) -> str:
+        """
+        Stable ID of this installation, used to tag its change-log rows.
+        
+        Generated on first use and kept in system_settings (see
+        SQLiteCacheManager.terminal_id).
+        """
+        if not self.terminal_id:
+            self.terminal_id = self.cache.terminal_id()
+        return self.terminal_id
@@ -0,0 +1,191 @@
+"""
+Sync Telemetry for Brewery Management System
+Records every sync run (timings, API calls, bytes, rows, conflicts,
+retries) in the sync_runs table and summarises recent runs.
+"""
+
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from ..config.constants import DATETIME_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Totals stored per run, besides duration and table timings
+COUNTERS = (
+    'api_reads', 'api_writes', 'bytes_sent', 'bytes_received',
+    'rows_pulled', 'rows_pushed', 'conflicts', 'retries', 'throttled',
+)
+
+# Results that mean no sync was attempted; these runs are not recorded
+_NOT_RUN_ERRORS = ('offline', 'sync_in_progress')
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None if there are none)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class SyncRun:
+    """Counters for one sync run, filled in while it runs."""
+
+    def __init__(self, kind: str, clock: Callable[[], float], baseline: Dict[str, int]):
+        self.kind = kind
+        self.clock = clock
+        self.started_at = datetime.now().strftime(DATETIME_FORMAT)
+        self.start = clock()
+        self.baseline = baseline
+        self.counts = Counter()
+        self.table_timings = {}
+
+    def add(self, counter: str, amount: int = 1):
+        self.counts[counter] += amount
+
+    @contextmanager
+    def timing(self, table_name: str):
+        """Add the time spent inside the block to table_name's total."""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - start
+            self.table_timings[table_name] = self.table_timings.get(table_name, 0.0) + elapsed
+
+
+class SyncTelemetry:
+    """
+    Store of sync runs and their rolling statistics.
+
+    API calls, bytes, retries and 429s are read as the difference between
+    the client's and rate limiter's running totals at the start and end
+    of a run; SyncManager adds rows, conflicts and per-table timings as it
+    goes.
+    """
+
+    # Runs kept in sync_runs; older ones are deleted
+    KEEP_RUNS = 1000
+
+    # Runs summarised by percentiles()
+    WINDOW = 50
+
+    def __init__(self, cache_manager, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            cache_manager: SQLiteCacheManager instance
+            clock: Monotonic time source
+        """
+        self.cache = cache_manager
+        self.clock = clock
+
+    def begin(self, kind: str, sheets_client=None) -> SyncRun:
+        """Start timing a run of the given kind ('incremental', 'full', ...)."""
+        return SyncRun(kind, self.clock, self._api_totals(sheets_client))
+
+    def finish(self, run: SyncRun, result, sheets_client=None) -> Optional[int]:
+        """
+        Store a finished run.
+
+        Args:
+            run: The run from begin()
+            result: What the sync method returned; a dict with 'error' or
+                False counts as a failure
+            sheets_client: Client whose counters were read by begin()
+
+        Returns:
+            run_id of the stored row, or None if nothing was stored
+        """
+        error = result.get('error') if isinstance(result, dict) else None
+        if error in _NOT_RUN_ERRORS:
+            return None
+        failed = error is not None or result is False
+        totals = self._api_totals(sheets_client)
+        counts = Counter(run.counts)
+        for counter, value in totals.items():
+            counts[counter] += max(0, value - run.baseline.get(counter, 0))
+
+        try:
+            with self.cache.writer() as connection:
+                cursor = connection.execute(
+                    f"INSERT INTO sync_runs (kind, started_at, duration, status, error, table_timings, "
+                    f"{', '.join(COUNTERS)}) VALUES (?, ?, ?, ?, ?, ?, {', '.join(['?'] * len(COUNTERS))})",
+                    [run.kind, run.started_at, run.clock() - run.start, 'error' if failed else 'ok',
+                     str(error) if error is not None else None,
+                     json.dumps({table: round(seconds, 3) for table, seconds in run.table_timings.items()})]
+                    + [counts[counter] for counter in COUNTERS]
+                )
+                run_id = cursor.lastrowid
+                connection.execute(
+                    "DELETE FROM sync_runs WHERE run_id <= ?", (run_id - self.KEEP_RUNS,)
+                )
+            return run_id
+        except Exception as e:
+            logger.warning(f"Could not record sync run: {e}")
+            return None
+
+    def recent(self, limit: int = 20, kind: Optional[str] = None) -> List[Dict]:
+        """
+        Latest runs, newest first.
+
+        Returns:
+            List of dictionaries with the sync_runs columns; table_timings
+            decoded to a dict
+        """
+        query = "SELECT * FROM sync_runs"
+        params = []
+        if kind:
+            query += " WHERE kind = ?"
+            params.append(kind)
+        query += " ORDER BY run_id DESC LIMIT ?"
+        params.append(int(limit))
+        with self.cache.reader() as connection:
+            cursor = connection.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            runs = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        for run in runs:
+            try:
+                run['table_timings'] = json.loads(run['table_timings'] or '{}')
+            except ValueError:
+                run['table_timings'] = {}
+        return runs
+
+    def percentiles(self, kind: Optional[str] = None, window: Optional[int] = None) -> Dict:
+        """
+        Rolling statistics over the last `window` runs.
+
+        Returns:
+            Dictionary with runs, errors, and for successful runs the p50,
+            p90 and p99 of duration (seconds), api_calls and bytes
+        """
+        runs = self.recent(window or self.WINDOW, kind)
+        ok = [run for run in runs if run['status'] == 'ok']
+        series = {
+            'duration': [run['duration'] for run in ok],
+            'api_calls': [run['api_reads'] + run['api_writes'] for run in ok],
+            'bytes': [run['bytes_sent'] + run['bytes_received'] for run in ok],
+        }
+        summary = {'runs': len(runs), 'errors': len(runs) - len(ok)}
+        for name, values in series.items():
+            summary[name] = {pct: percentile(values, pct) for pct in (50, 90, 99)}
+        return summary
+
+    @staticmethod
+    def _api_totals(sheets_client) -> Dict[str, int]:
+        stats = getattr(sheets_client, 'stats', None) or {}
+        limiter = getattr(sheets_client, 'rate_limiter', None)
+        return {
+            'api_reads': stats.get('read', 0),
+            'api_writes': stats.get('write', 0),
+            'bytes_sent': stats.get('bytes_sent', 0),
+            'bytes_received': stats.get('bytes_received', 0),
+            'retries': getattr(limiter, 'retry_count', 0),
+            'throttled': getattr(limiter, 'throttled_count', 0),
+        }
@@ -0,0 +1,203 @@
+"""
+Sync Worker for Brewery Management System
+A single long-lived thread that runs every sync, so saves, timers,
+reconnects and the Sync Now button queue requests instead of starting
+their own racing threads.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SyncWorker:
+    """
+    Runs SyncManager.incremental_sync() on one background thread.
+
+    Callers only request a sync. Requests that arrive before the pending
+    one has started are merged into it, so a burst of saves becomes a
+    single run: each background request pushes the run back by the
+    debounce interval, up to MAX_DELAY_SECONDS after the first one.
+    User requests run as soon as the worker is free, and take any pending
+    background request along with them. A request made while a sync is
+    running schedules one follow-up run, so changes saved mid-sync are
+    never left behind.
+
+    Listeners receive progress events as dictionaries with an 'event' key:
+        queued    a request was added ('reason', 'priority')
+        deferred  a background run waits for API quota ('retry_in')
+        started   a run began ('reasons')
+        progress  a SyncManager stage ('stage' and stage details)
+        finished  a run ended ('reasons', 'result')
+    They are called on the worker (or requesting) thread; GUI listeners
+    must hand the event to their own thread.
+    """
+
+    # Priorities: lower runs first
+    USER = 0
+    BACKGROUND = 1
+
+    # Quiet period a background request waits for more requests to join it
+    DEBOUNCE_SECONDS = 3.0
+
+    # A stream of saves still syncs at least this often
+    MAX_DELAY_SECONDS = 30.0
+
+    # Wait before retrying a background run deferred for quota
+    DEFER_SECONDS = 30.0
+
+    def __init__(self, sync_manager, debounce: Optional[float] = None,
+                 max_delay: Optional[float] = None, defer: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            sync_manager: SyncManager instance
+            debounce: Seconds a background request waits (default DEBOUNCE_SECONDS)
+            max_delay: Longest a background request is pushed back (default MAX_DELAY_SECONDS)
+            defer: Seconds before retrying a run deferred for quota (default DEFER_SECONDS)
+            clock: Monotonic time source
+        """
+        self.sync_manager = sync_manager
+        self.debounce = self.DEBOUNCE_SECONDS if debounce is None else debounce
+        self.max_delay = self.MAX_DELAY_SECONDS if max_delay is None else max_delay
+        self.defer = self.DEFER_SECONDS if defer is None else defer
+        self.clock = clock
+        self.runs = 0
+        self.running = False
+        self.deferred = False
+        self._pending = None
+        self._listeners = []
+        self._stopping = False
+        self._thread = None
+        self._cond = threading.Condition()
+
+    def start(self):
+        """Start the worker thread (does nothing if it is already running)."""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self.sync_manager.progress_callback = self._report_stage
+            self._thread = threading.Thread(target=self._run, name='sync-worker', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop the worker after the current run; pending requests are dropped.
+
+        Args:
+            timeout: Seconds to wait for the thread to finish (None = wait)
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """Register a function called with every progress event."""
+        self._listeners.append(listener)
+
+    def request(self, reason: str = 'save', priority: int = BACKGROUND,
+                delay: Optional[float] = None, callback: Optional[Callable[[Dict], None]] = None):
+        """
+        Ask for a sync; merges with a pending request if there is one.
+
+        Args:
+            reason: Short label for logs and listeners, e.g. 'save' or 'manual'
+            priority: USER or BACKGROUND
+            delay: Seconds before the run may start (default: debounce for
+                background requests, none for user requests)
+            callback: Called with the sync result once the run that covers
+                this request has finished
+        """
+        if delay is None:
+            delay = 0.0 if priority == self.USER else self.debounce
+        now = self.clock()
+        with self._cond:
+            pending = self._pending
+            if pending is None:
+                pending = self._pending = {
+                    'priority': priority,
+                    'due': now + delay,
+                    'deadline': now + max(delay, self.max_delay),
+                    'reasons': [],
+                    'callbacks': [],
+                }
+            else:
+                pending['priority'] = min(pending['priority'], priority)
+                if pending['priority'] == self.USER:
+                    # Nothing holds a user request back
+                    pending['due'] = min(pending['due'], now + delay)
+                else:
+                    # Trailing debounce, but never past the deadline
+                    pending['due'] = min(max(pending['due'], now + delay), pending['deadline'])
+            pending['reasons'].append(reason)
+            if callback:
+                pending['callbacks'].append(callback)
+            self._cond.notify_all()
+        self._emit({'event': 'queued', 'reason': reason, 'priority': priority})
+
+    def _next_job(self) -> Optional[Dict]:
+        """Wait until the pending request is due; None once stopping."""
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._pending is None:
+                        self._cond.wait()
+                        continue
+                    wait = self._pending['due'] - self.clock()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._stopping:
+                    return None
+
+                job = self._pending
+                if job['priority'] == self.USER or not self.sync_manager.should_defer_sync():
+                    self._pending = None
+                    self.deferred = False
+                    self.running = True
+                    return job
+                # Background run while the quota is nearly spent: try again later
+                job['due'] = job['deadline'] = self.clock() + self.defer
+                self.deferred = True
+            self._emit({'event': 'deferred', 'retry_in': self.defer})
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            logger.info(f"Sync worker: running sync for {', '.join(job['reasons'])}")
+            self._emit({'event': 'started', 'reasons': job['reasons']})
+            try:
+                result = self.sync_manager.incremental_sync()
+            except Exception as e:
+                logger.error(f"Sync worker: sync failed: {e}")
+                result = {"error": str(e)}
+            finally:
+                self.running = False
+                self.runs += 1
+
+            for callback in job['callbacks']:
+                try:
+                    callback(result)
+                except Exception as e:
+                    logger.error(f"Sync worker: callback failed: {e}")
+            self._emit({'event': 'finished', 'reasons': job['reasons'], 'result': result})
+
+    def _report_stage(self, stage: str, **details):
+        self._emit({'event': 'progress', 'stage': stage, **details})
+
+    def _emit(self, event: Dict):
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Sync worker: listener failed: {e}")
@@ -131,25 +131,17 @@ class BatchesModule(ttk.Frame):
             self.tree.delete(item)
 
         status_filter = self.filter_var.get()
-        where = None if status_filter == 'all' else f"status = '{status_filter}'"
+        where = None if status_filter == 'all' else {'status': status_filter}
 
         self.cache.connect()
-        batches = self.cache.get_all_records('batches', where, 'brew_date DESC')
+        # Batches with their recipe's name, ABV and size in one query
+        batches = self.cache.find('v_batch_overview', where=where, order_by='brew_date DESC')
 
         for batch in batches:
-            recipe_name = 'Unknown'
-            expected_abv = None
-            batch_size = batch.get('actual_batch_size', 0)
-
-            if batch.get('recipe_id'):
-                recipes = self.cache.get_all_records('recipes', f"recipe_id = '{batch['recipe_id']}'")
-                if recipes:
-                    recipe = recipes[0]
-                    recipe_name = recipe.get('recipe_name', 'Unknown')
-                    expected_abv = recipe.get('target_abv')
-                    # Use recipe batch size if not overridden
-                    if not batch_size:
-                        batch_size = recipe.get('target_batch_size_litres', 0)
+            recipe_name = batch.get('recipe_name') or 'Unknown'
+            expected_abv = batch.get('expected_abv')
+            # Use recipe batch size if not overridden
+            batch_size = batch.get('actual_batch_size') or batch.get('recipe_batch_size') or 0
 
             # Format values
             og = batch.get('original_gravity')
@@ -194,7 +186,7 @@ class BatchesModule(ttk.Frame):
         batch_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        batches = self.cache.get_all_records('batches', f"batch_id = '{batch_id}'")
+        batches = self.cache.find('batches', where={'batch_id': batch_id})
         self.cache.close()
 
         if batches:
@@ -219,7 +211,7 @@ class BatchesModule(ttk.Frame):
         batch_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        batches = self.cache.get_all_records('batches', f"batch_id = '{batch_id}'")
+        batches = self.cache.find('batches', where={'batch_id': batch_id})
         self.cache.close()
 
         if batches:
@@ -244,7 +236,7 @@ class BatchesModule(ttk.Frame):
         batch_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        batches = self.cache.get_all_records('batches', f"batch_id = '{batch_id}'")
+        batches = self.cache.find('batches', where={'batch_id': batch_id})
         self.cache.close()
 
         if batches:
@@ -303,7 +295,7 @@ class BatchDialog(tk.Toplevel):
         ttk.Label(frame, text="Recipe *", font=('Arial', 10, 'bold')).grid(row=0, column=0, sticky='w', pady=(0,5))
         self.recipe_var = tk.StringVar()
         self.cache.connect()
-        recipes = self.cache.get_all_records('recipes', 'is_active = 1', 'recipe_name')
+        recipes = self.cache.find('recipes', where={'is_active': 1}, order_by='recipe_name')
         self.cache.close()
 
         # History Frame (New)
@@ -387,10 +379,10 @@ class BatchDialog(tk.Toplevel):
 
         # 1. Load Last Brew History
         self.cache.connect()
-        last_batches = self.cache.get_all_records(
-            'batches', 
-            f"recipe_id = '{recipe_id}' AND status IN ('packaged', 'completed')", 
-            'brew_date DESC'
+        last_batches = self.cache.find(
+            'batches',
+            where={'recipe_id': recipe_id, 'status': ['packaged', 'completed']},
+            order_by='brew_date DESC'
         )
         
         last_batch = last_batches[0] if last_batches else None
@@ -411,7 +403,7 @@ class BatchDialog(tk.Toplevel):
         warnings = []
         
         # Get recipe ingredients
-        ingredients = self.cache.get_all_records('recipe_ingredients', f"recipe_id = '{recipe_id}'")
+        ingredients = self.cache.find('recipe_ingredients', where={'recipe_id': recipe_id})
         
         for ing in ingredients:
             inv_id = ing.get('inventory_item_id')
@@ -455,9 +447,9 @@ class BatchDialog(tk.Toplevel):
         allocations = []
         remaining = qty_needed
         
-        batches = self.cache.get_all_records(
-            'inventory_batches', 
-            f"material_id = '{material_id}' AND quantity_remaining > 0",
+        batches = self.cache.find(
+            'inventory_batches',
+            where={'material_id': material_id, 'quantity_remaining >': 0},
             order_by='received_date ASC'
         )
         
@@ -473,7 +465,7 @@ class BatchDialog(tk.Toplevel):
         """Generate next gyle number"""
         year = datetime.now().year
         self.cache.connect()
-        batches = self.cache.get_all_records('batches', f"gyle_number LIKE 'GYLE-{year}-%'")
+        batches = self.cache.find('batches', where={'gyle_number LIKE': f"GYLE-{year}-%"})
         self.cache.close()
         next_num = len(batches) + 1
         return f"GYLE-{year}-{next_num:03d}"
@@ -482,7 +474,7 @@ class BatchDialog(tk.Toplevel):
         """Populate fields with batch data"""
         if self.batch.get('recipe_id'):
             self.cache.connect()
-            recipes = self.cache.get_all_records('recipes', f"recipe_id = '{self.batch['recipe_id']}'")
+            recipes = self.cache.find('recipes', where={'recipe_id': self.batch['recipe_id']})
             self.cache.close()
             if recipes:
                 r = recipes[0]
@@ -558,23 +550,44 @@ class BatchDialog(tk.Toplevel):
             'sync_status': 'pending'
         }
 
+        deducted_items, insufficient_stock_items = [], []
         self.cache.connect()
-        if self.mode == 'add':
-            data['batch_id'] = str(uuid.uuid4())
-            self.cache.insert_record('batches', data)
+        try:
+            # The batch and its stock deductions are committed together
+            with self.cache.transaction():
+                if self.mode == 'add':
+                    data['batch_id'] = str(uuid.uuid4())
+                    self.cache.insert_record('batches', data)
+
+                    # Deduct ingredients from inventory
+                    deducted_items, insufficient_stock_items = \
+                        self.deduct_ingredients_from_inventory(recipe['recipe_id'], gyle)
+                else:
+                    self.cache.update_record('batches', self.batch['batch_id'], data, 'batch_id')
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save batch. No changes were made.\n\n{e}")
+            return
+        finally:
+            self.cache.close()
 
-            # Deduct ingredients from inventory
-            self.deduct_ingredients_from_inventory(recipe['recipe_id'], gyle)
-        else:
-            self.cache.update_record('batches', self.batch['batch_id'], data, 'batch_id')
-        self.cache.close()
+        # Show warning if needed
+        if insufficient_stock_items:
+            messagebox.showwarning("Insufficient Stock", "\n".join(insufficient_stock_items))
+        elif deducted_items:
+            messagebox.showinfo("Inventory Updated", "\n".join(deducted_items))
 
         messagebox.showinfo("Success", "Batch saved!")
         self.destroy()
 
     def deduct_ingredients_from_inventory(self, recipe_id, gyle_number):
-        """Deduct recipe ingredients from brewery inventory using FIFO logic"""
-        ingredients = self.cache.get_all_records('recipe_ingredients', f"recipe_id = '{recipe_id}'")
+        """
+        Deduct recipe ingredients from brewery inventory using FIFO logic.
+        Must be called inside a cache transaction.
+
+        Returns:
+            tuple: (deducted item descriptions, insufficient stock descriptions)
+        """
+        ingredients = self.cache.find('recipe_ingredients', where={'recipe_id': recipe_id})
         deducted_items = []
         insufficient_stock_items = []
         total_ingredients_found = len(ingredients)
@@ -590,7 +603,7 @@ class BatchDialog(tk.Toplevel):
             if not inventory_item_id or quantity_needed <= 0:
                 continue
 
-            materials = self.cache.get_all_records('inventory_materials', f"material_id = '{inventory_item_id}'")
+            materials = self.cache.find('inventory_materials', where={'material_id': inventory_item_id})
 
             if not materials:
                 continue
@@ -615,9 +628,9 @@ class BatchDialog(tk.Toplevel):
             used_batches = []
             
             # Get batches sorted by date
-            batches = self.cache.get_all_records(
-                'inventory_batches', 
-                f"material_id = '{inventory_item_id}' AND quantity_remaining > 0",
+            batches = self.cache.find(
+                'inventory_batches',
+                where={'material_id': inventory_item_id, 'quantity_remaining >': 0},
                 order_by='received_date ASC'
             )
             
@@ -679,15 +692,11 @@ class BatchDialog(tk.Toplevel):
             # and let 'save' update it, OR just update it here.
             # We don't have batch_id here easily without passing it.
             # Let's update by Gyle.
-            batches = self.cache.get_all_records('batches', f"gyle_number = '{gyle_number}'")
+            batches = self.cache.find('batches', where={'gyle_number': gyle_number})
             if batches:
                 self.cache.update_record('batches', batches[0]['batch_id'], {'ingredient_source_batches': source_str, 'sync_status': 'pending'}, 'batch_id')
 
-        # Show warning if needed
-        if insufficient_stock_items:
-            messagebox.showwarning("Insufficient Stock", "\n".join(insufficient_stock_items))
-        elif deducted_items:
-            messagebox.showinfo("Inventory Updated", "\n".join(deducted_items))
+        return deducted_items, insufficient_stock_items
 
     def convert_units(self, quantity, from_unit, to_unit):
         """Convert quantity from one unit to another. Returns None if conversion not possible."""
@@ -787,7 +796,7 @@ class PackageDialog(tk.Toplevel):
         recipe_name = "Unknown"
         if self.batch.get('recipe_id'):
             self.cache.connect()
-            recipes = self.cache.get_all_records('recipes', f"recipe_id = '{self.batch['recipe_id']}'")
+            recipes = self.cache.find('recipes', where={'recipe_id': self.batch['recipe_id']})
             self.cache.close()
             if recipes:
                 recipe_name = recipes[0]['recipe_name']
@@ -1110,7 +1119,7 @@ O.G.: {og_text}"""
         expected_abv = 0
         if self.batch.get('recipe_id'):
             self.cache.connect()
-            recipes = self.cache.get_all_records('recipes', f"recipe_id = '{self.batch['recipe_id']}'")
+            recipes = self.cache.find('recipes', where={'recipe_id': self.batch['recipe_id']})
             self.cache.close()
             if recipes:
                 expected_abv = recipes[0].get('target_abv', 0)
@@ -1167,125 +1176,130 @@ O.G.: {og_text}"""
             'sync_status': 'pending'
         }
 
-        self.cache.update_record('batches', self.batch['batch_id'], batch_data, 'batch_id')
-
-        # Get recipe details for product info
-        recipe_name = "Unknown Product"
-        recipe_style = ""
-        if self.batch.get('recipe_id'):
-            recipes = self.cache.get_all_records('recipes', f"recipe_id = '{self.batch['recipe_id']}'")
-            if recipes:
-                recipe_name = recipes[0].get('recipe_name', 'Unknown Product')
-                recipe_style = recipes[0].get('style', '')
-
-        # Process each container line with duty calculations
-        for container in self.selected_containers:
-            qty = container['qty']
-            duty_volume_per_unit = container['duty_volume']
-            is_draught = container['is_draught']
-
-            # Calculate volumes
-            total_duty_volume = duty_volume_per_unit * qty
-            pure_alcohol_litres = total_duty_volume * (duty_abv / 100)
-
-            # Determine SPR category and effective rate
-            if duty_abv >= 8.5:
-                spr_category = "no_spr"
-                effective_rate = rate_full
-            elif duty_abv < 3.5 and is_draught:
-                spr_category = "draught_low"
-                effective_rate = spr_draught_low
-            elif 3.5 <= duty_abv < 8.5 and is_draught:
-                spr_category = "draught_standard"
-                effective_rate = spr_draught_std
-            elif 3.5 <= duty_abv < 8.5 and not is_draught:
-                spr_category = "non_draught_standard"
-                effective_rate = spr_non_draught
-            else:
-                # Fallback - should not happen
-                spr_category = "unknown"
-                effective_rate = rate_full
-
-            # Calculate duty payable for this line
-            duty_payable = pure_alcohol_litres * effective_rate
-            total_duty += duty_payable
-
-            # Insert into batch_packaging_lines table
-            cursor.execute('''
-                INSERT INTO batch_packaging_lines (
-                    batch_id,
-                    packaging_date,
-                    container_type,
-                    quantity,
-                    container_actual_size,
-                    container_duty_volume,
-                    total_duty_volume,
-                    batch_abv,
-                    pure_alcohol_litres,
-                    spr_category,
-                    spr_rate_applied,
-                    full_duty_rate,
-                    effective_duty_rate,
-                    duty_payable,
-                    is_draught_eligible
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                self.batch['batch_id'],
-                package_date_db,
-                container['name'],
-                qty,
-                container['actual_capacity'],
-                duty_volume_per_unit,
-                total_duty_volume,
-                duty_abv,
-                pure_alcohol_litres,
-                spr_category,
-                effective_rate,
-                rate_full,
-                effective_rate,
-                duty_payable,
-                1 if is_draught else 0
-            ))
-
-            # Create product record (for finished goods tracking)
-            product_id = str(uuid.uuid4())
-            product_data = {
-                'product_id': product_id,
-                'gyle_number': self.batch.get('gyle_number'),
-                'batch_id': self.batch.get('batch_id'),
-                'recipe_id': self.batch.get('recipe_id'),
-                'product_name': recipe_name,
-                'style': recipe_style,
-                'container_type': container['name'],
-                'container_size_l': duty_volume_per_unit,
-                'quantity_total': qty,
-                'quantity_in_stock': qty,
-                'quantity_sold': 0,
-                'abv': actual_abv,
-                'date_packaged': package_date_db,
-                'date_in_stock': package_date_db,
-                'status': 'In Stock',
-                'is_name_locked': 0,
-                'created_date': get_now_db(),
-                'created_by': self.current_user.username,
-                'last_modified': get_now_db(),
-                'sync_status': 'pending'
-            }
-            self.cache.insert_record('products', product_data)
-
-            # Deduct from container_types inventory
-            container_types = self.cache.get_all_records('container_types',
-                f"name = '{container['name']}'")
-            if container_types:
-                container_type = container_types[0]
-                new_qty = max(0, container_type.get('quantity_available', 0) - qty)
-                self.cache.update_record('container_types', container_type['container_type_id'], {
-                    'quantity_available': new_qty,
-                    'last_modified': get_now_db()
-                }, 'container_type_id')
-
-        self.cache.connection.commit()
-        self.cache.close()
+        try:
+            # One unit of work: batch update, duty lines, products and
+            # container stock are committed together with a single fsync
+            with self.cache.transaction():
+                self.cache.update_record('batches', self.batch['batch_id'], batch_data, 'batch_id')
+
+                # Get recipe details for product info
+                recipe_name = "Unknown Product"
+                recipe_style = ""
+                if self.batch.get('recipe_id'):
+                    recipes = self.cache.find('recipes', where={'recipe_id': self.batch['recipe_id']})
+                    if recipes:
+                        recipe_name = recipes[0].get('recipe_name', 'Unknown Product')
+                        recipe_style = recipes[0].get('style', '')
+
+                # Process each container line with duty calculations
+                for container in self.selected_containers:
+                    qty = container['qty']
+                    duty_volume_per_unit = container['duty_volume']
+                    is_draught = container['is_draught']
+
+                    # Calculate volumes
+                    total_duty_volume = duty_volume_per_unit * qty
+                    pure_alcohol_litres = total_duty_volume * (duty_abv / 100)
+
+                    # Determine SPR category and effective rate
+                    if duty_abv >= 8.5:
+                        spr_category = "no_spr"
+                        effective_rate = rate_full
+                    elif duty_abv < 3.5 and is_draught:
+                        spr_category = "draught_low"
+                        effective_rate = spr_draught_low
+                    elif 3.5 <= duty_abv < 8.5 and is_draught:
+                        spr_category = "draught_standard"
+                        effective_rate = spr_draught_std
+                    elif 3.5 <= duty_abv < 8.5 and not is_draught:
+                        spr_category = "non_draught_standard"
+                        effective_rate = spr_non_draught
+                    else:
+                        # Fallback - should not happen
+                        spr_category = "unknown"
+                        effective_rate = rate_full
+
+                    # Calculate duty payable for this line
+                    duty_payable = pure_alcohol_litres * effective_rate
+                    total_duty += duty_payable
+
+                    # Insert into batch_packaging_lines table
+                    cursor.execute('''
+                        INSERT INTO batch_packaging_lines (
+                            batch_id,
+                            packaging_date,
+                            container_type,
+                            quantity,
+                            container_actual_size,
+                            container_duty_volume,
+                            total_duty_volume,
+                            batch_abv,
+                            pure_alcohol_litres,
+                            spr_category,
+                            spr_rate_applied,
+                            full_duty_rate,
+                            effective_duty_rate,
+                            duty_payable,
+                            is_draught_eligible
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        self.batch['batch_id'],
+                        package_date_db,
+                        container['name'],
+                        qty,
+                        container['actual_capacity'],
+                        duty_volume_per_unit,
+                        total_duty_volume,
+                        duty_abv,
+                        pure_alcohol_litres,
+                        spr_category,
+                        effective_rate,
+                        rate_full,
+                        effective_rate,
+                        duty_payable,
+                        1 if is_draught else 0
+                    ))
+
+                    # Create product record (for finished goods tracking)
+                    product_id = str(uuid.uuid4())
+                    product_data = {
+                        'product_id': product_id,
+                        'gyle_number': self.batch.get('gyle_number'),
+                        'batch_id': self.batch.get('batch_id'),
+                        'recipe_id': self.batch.get('recipe_id'),
+                        'product_name': recipe_name,
+                        'style': recipe_style,
+                        'container_type': container['name'],
+                        'container_size_l': duty_volume_per_unit,
+                        'quantity_total': qty,
+                        'quantity_in_stock': qty,
+                        'quantity_sold': 0,
+                        'abv': actual_abv,
+                        'date_packaged': package_date_db,
+                        'date_in_stock': package_date_db,
+                        'status': 'In Stock',
+                        'is_name_locked': 0,
+                        'created_date': get_now_db(),
+                        'created_by': self.current_user.username,
+                        'last_modified': get_now_db(),
+                        'sync_status': 'pending'
+                    }
+                    self.cache.insert_record('products', product_data)
+
+                    # Deduct from container_types inventory
+                    container_types = self.cache.find('container_types', where={'name': container['name']})
+                    if container_types:
+                        container_type = container_types[0]
+                        new_qty = max(0, container_type.get('quantity_available', 0) - qty)
+                        self.cache.update_record('container_types', container_type['container_type_id'], {
+                            'quantity_available': new_qty,
+                            'last_modified': get_now_db()
+                        }, 'container_type_id')
+        except Exception as e:
+            messagebox.showerror("Error", f"Packaging failed. No changes were made.\n\n{e}")
+            return
+        finally:
+            self.cache.close()
 
         messagebox.showinfo("Success",
             f"Batch packaged successfully!\n\n"
@@ -1347,7 +1361,7 @@ class EditPackagedBatchDialog(tk.Toplevel):
         recipe_name = "Unknown"
         if self.batch.get('recipe_id'):
             self.cache.connect()
-            recipes = self.cache.get_all_records('recipes', f"recipe_id = '{self.batch['recipe_id']}'")
+            recipes = self.cache.find('recipes', where={'recipe_id': self.batch['recipe_id']})
             self.cache.close()
             if recipes:
                 recipe_name = recipes[0]['recipe_name']
@@ -1583,7 +1597,7 @@ Current Duty ABV: {duty_abv_text}"""
         expected_abv = 0
         if self.batch.get('recipe_id'):
             self.cache.connect()
-            recipes = self.cache.get_all_records('recipes', f"recipe_id = '{self.batch['recipe_id']}'")
+            recipes = self.cache.find('recipes', where={'recipe_id': self.batch['recipe_id']})
             self.cache.close()
             if recipes:
                 expected_abv = recipes[0].get('target_abv', 0)
@@ -137,7 +137,7 @@ class CustomersModule(ttk.Frame):
         customer_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        customers = self.cache.get_all_records('customers', f"customer_id = '{customer_id}'")
+        customers = self.cache.find('customers', where={'customer_id': customer_id})
         self.cache.close()
 
         if customers:
@@ -157,7 +157,7 @@ class CustomersModule(ttk.Frame):
         customer_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        customers = self.cache.get_all_records('customers', f"customer_id = '{customer_id}'")
+        customers = self.cache.find('customers', where={'customer_id': customer_id})
         self.cache.close()
 
         if customers:
@@ -633,14 +633,14 @@ class CustomerDashboard(tk.Toplevel):
         try:
             # --- Overview & Stats ---
             # Fetch ALL invoices to optimize matching
-            all_invoices = self.cache.get_all_records('invoices', f"customer_id = '{customer_id}'")
+            all_invoices = self.cache.find('invoices', where={'customer_id': customer_id})
             invoices_map = {inv['invoice_id']: inv for inv in all_invoices}
             
             # Filter for outstanding
             outstanding_invoices = [inv for inv in all_invoices if inv.get('payment_status') != 'paid']
             total_outstanding = sum(inv.get('amount_outstanding', 0) for inv in outstanding_invoices)
             
-            sales_history = self.cache.get_all_records('sales', f"customer_id = '{customer_id}' AND status = 'delivered'", "delivery_date DESC")
+            sales_history = self.cache.find('sales', where={'customer_id': customer_id, 'status': 'delivered'}, order_by="delivery_date DESC")
             last_order = "Never"
             if sales_history:
                 last_order = format_date_for_display(sales_history[0].get('delivery_date'))
@@ -667,7 +667,7 @@ class CustomerDashboard(tk.Toplevel):
                 self.tree_status.delete(*self.tree_status.get_children())
                 
                 # Fetch ALL sales (removed LIMIT 50) to ensure we find all active orders
-                all_sales = self.cache.get_all_records('sales', f"customer_id = '{customer_id}'", "delivery_date DESC")
+                all_sales = self.cache.find('sales', where={'customer_id': customer_id}, order_by="delivery_date DESC")
                 
                 # Group Sales into "Orders"
                 grouped_orders = {}
@@ -778,7 +778,7 @@ class CustomerDashboard(tk.Toplevel):
 
             # --- Deliveries Tab ---
             # Pending
-            pending_sales = self.cache.get_all_records('sales', f"customer_id = '{customer_id}' AND status = 'reserved'", "delivery_date ASC")
+            pending_sales = self.cache.find('sales', where={'customer_id': customer_id, 'status': 'reserved'}, order_by="delivery_date ASC")
             
             if hasattr(self, 'tree_pending'):
                 self.tree_pending.delete(*self.tree_pending.get_children())
@@ -876,8 +876,8 @@ class CustomerDashboard(tk.Toplevel):
     def open_invoice(self, invoice_id):
         from .invoicing import InvoiceViewDialog
         self.cache.connect()
-        invoices = self.cache.get_all_records('invoices', f"invoice_id = '{invoice_id}'")
-        lines = self.cache.get_all_records('invoice_lines', f"invoice_id = '{invoice_id}'")
+        invoices = self.cache.find('invoices', where={'invoice_id': invoice_id})
+        lines = self.cache.find('invoice_lines', where={'invoice_id': invoice_id})
         self.cache.close()
         
         if invoices:
@@ -95,12 +95,12 @@ class DashboardModule(ttk.Frame):
         active_count = len(active_batches)
 
         # Total customers
-        customers = self.cache.get_all_records('customers', 'is_active = 1')
+        customers = self.cache.find('customers', where={'is_active': 1})
         total_customers = len(customers)
 
         # Sales this month
         current_month = datetime.now().strftime('%Y-%m')
-        sales = self.cache.get_all_records('sales', f"sale_date LIKE '{current_month}%'")
+        sales = self.cache.find('sales', where={'sale_date LIKE': f"{current_month}%"})
         monthly_sales = len(sales)
 
         self.cache.close()
@@ -221,24 +221,14 @@ class DashboardModule(ttk.Frame):
         for item in self.batches_tree.get_children():
             self.batches_tree.delete(item)
 
-        # Get recent batches
+        # Last 10 batches, with their recipe names
         self.cache.connect()
-        batches = self.cache.get_all_records('batches', order_by='brew_date DESC')
+        batches = self.cache.find('v_batch_overview', order_by='brew_date DESC', limit=10)
         self.cache.close()
 
-        # Show last 10
-        for batch in batches[:10]:
+        for batch in batches:
             gyle = batch.get('gyle_number', 'N/A')
-            recipe_id = batch.get('recipe_id', '')
-
-            # Get recipe name
-            beer_name = 'Unknown'
-            if recipe_id:
-                self.cache.connect()
-                recipes = self.cache.get_all_records('recipes', f"recipe_id = '{recipe_id}'")
-                self.cache.close()
-                if recipes:
-                    beer_name = recipes[0].get('recipe_name', 'Unknown')
+            beer_name = batch.get('recipe_name') or 'Unknown'
 
             brew_date_raw = batch.get('brew_date', 'N/A')
             # Convert date format from YYYY-MM-DD to DD/MM/YYYY
@@ -299,7 +289,7 @@ class DashboardModule(ttk.Frame):
                 })
 
         # Batches ready for packaging
-        ready_batches = self.cache.get_all_records('batches', "status = 'ready'")
+        ready_batches = self.cache.find('batches', where={'status': 'ready'})
         if ready_batches:
             count = len(ready_batches)
             alerts.append({
@@ -309,7 +299,7 @@ class DashboardModule(ttk.Frame):
             })
 
         # Overdue invoices
-        invoices = self.cache.get_all_records('invoices', "payment_status != 'paid'")
+        invoices = self.cache.find('invoices', where={'payment_status !=': 'paid'})
         overdue = []
         for inv in invoices:
             due_date = inv.get('due_date')
@@ -391,9 +381,9 @@ class DashboardModule(ttk.Frame):
         today = datetime.now().strftime('%Y-%m-%d')
         next_week = (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
 
-        deliveries = self.cache.get_all_records(
+        deliveries = self.cache.find(
             'sales',
-            f"status = 'reserved' AND delivery_date >= '{today}' AND delivery_date <= '{next_week}'",
+            where={'status': 'reserved', 'delivery_date >=': today, 'delivery_date <=': next_week},
             order_by='delivery_date'
         )
 
@@ -442,7 +432,7 @@ class DashboardModule(ttk.Frame):
 
         # Customer and details
         self.cache.connect()
-        customers = self.cache.get_all_records('customers', f"customer_id = '{delivery.get('customer_id')}'")
+        customers = self.cache.find('customers', where={'customer_id': delivery.get('customer_id')})
         self.cache.close()
 
         customer_name = customers[0].get('customer_name', 'Unknown') if customers else 'Unknown'
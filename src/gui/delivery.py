@@ -147,8 +147,20 @@ class DeliveryModule(ttk.Frame):
                 self.draw_zones_on_map(zones)
 
             # 3. Fetch Data
-            sales = self.cache.get_all_records('sales', "status = 'reserved'", "delivery_date ASC")
-            all_customers = {c['customer_id']: c for c in self.cache.get_all_records('customers')}
+            sales = self.cache.iter_records(
+                'sales',
+                where={'status': 'reserved'},
+                order_by='delivery_date ASC',
+                columns=['customer_id', 'delivery_date', 'quantity', 'beer_name',
+                         'container_type', 'line_total']
+            )
+            all_customers = {
+                c.customer_id: c
+                for c in self.cache.iter_records(
+                    'customers',
+                    columns=['customer_id', 'customer_name', 'delivery_area', 'delivery_address']
+                )
+            }
 
             # 4. Group by (Date, Area, Customer)
             grouped_deliveries = {} 
@@ -204,7 +216,7 @@ class DeliveryModule(ttk.Frame):
                 
                 item_desc = f"{sale.get('quantity')} x {sale.get('beer_name')} ({sale.get('container_type')})"
                 grouped_deliveries[key]['items'].append(item_desc)
-                grouped_deliveries[key]['total'] += sale.get('line_total', 0)
+                grouped_deliveries[key]['total'] += sale.line_total or 0
 
             # 5. Display Data
             for key, data in grouped_deliveries.items():
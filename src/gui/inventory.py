@@ -208,7 +208,7 @@ class InventoryModule(ttk.Frame):
         self.cache.connect()
 
         # Load from unified container_types table
-        containers = self.cache.get_all_records('container_types', 'active = 1', order_by='category, name')
+        containers = self.cache.find('container_types', where={'active': 1}, order_by='category, name')
 
         for container in containers:
             values = (
@@ -251,7 +251,7 @@ class InventoryModule(ttk.Frame):
         material_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        materials = self.cache.get_all_records('inventory_materials', f"material_id = '{material_id}'")
+        materials = self.cache.find('inventory_materials', where={'material_id': material_id})
         self.cache.close()
 
         if materials:
@@ -274,8 +274,7 @@ class InventoryModule(ttk.Frame):
             container_type_id = tags[1] if len(tags) > 1 else None
 
             self.cache.connect()
-            containers = self.cache.get_all_records('container_types',
-                f"container_type_id = '{container_type_id}'")
+            containers = self.cache.find('container_types', where={'container_type_id': container_type_id})
             self.cache.close()
 
             if containers:
@@ -288,7 +287,7 @@ class InventoryModule(ttk.Frame):
             material_id = tags[1] if len(tags) > 1 else None
 
             self.cache.connect()
-            materials = self.cache.get_all_records('inventory_materials', f"material_id = '{material_id}'")
+            materials = self.cache.find('inventory_materials', where={'material_id': material_id})
             self.cache.close()
 
             if materials:
@@ -848,9 +847,9 @@ class StockAdjustDialog(tk.Toplevel):
         """Load active batches for treeview"""
         self.batch_tree.delete(*self.batch_tree.get_children())
         self.cache.connect()
-        batches = self.cache.get_all_records(
+        batches = self.cache.find(
             'inventory_batches',
-            f"material_id = '{self.material['material_id']}' AND quantity_remaining > 0",
+            where={'material_id': self.material['material_id'], 'quantity_remaining >': 0},
             order_by='received_date ASC'
         )
         self.cache.close()
@@ -867,11 +866,7 @@ class StockAdjustDialog(tk.Toplevel):
         self.hist_tree.delete(*self.hist_tree.get_children())
         self.cache.connect()
         # Join logic needed? No, just get transactions
-        trans = self.cache.get_all_records(
-            'inventory_transactions',
-            f"material_id = '{self.material['material_id']}'",
-            order_by='transaction_date DESC'
-        )
+        trans = self.cache.find('inventory_transactions', where={'material_id': self.material['material_id']}, order_by='transaction_date DESC')
         self.cache.close()
         
         for t in trans:
@@ -961,9 +956,9 @@ class StockAdjustDialog(tk.Toplevel):
             remaining_qty_to_remove = qty
             
             # Get available batches sorted by date (FIFO)
-            batches = self.cache.get_all_records(
-                'inventory_batches', 
-                f"material_id = '{self.material['material_id']}' AND quantity_remaining > 0",
+            batches = self.cache.find(
+                'inventory_batches',
+                where={'material_id': self.material['material_id'], 'quantity_remaining >': 0},
                 order_by='received_date ASC'
             )
             
@@ -1118,7 +1113,7 @@ class ContainerDialog(tk.Toplevel):
                 return
 
             # Check if this cask size already exists
-            existing = self.cache.get_all_records('casks_empty', f"cask_size = '{cask_size}'")
+            existing = self.cache.find('casks_empty', where={'cask_size': cask_size})
             if existing:
                 messagebox.showwarning("Already Exists", f"{cask_size} casks already exist. Use 'Adjust Stock' to change quantity.")
                 self.cache.close()
@@ -1140,7 +1135,7 @@ class ContainerDialog(tk.Toplevel):
             bottle_size_ml = int(size_str.replace('ml', ''))
 
             # Check if this bottle size already exists
-            existing = self.cache.get_all_records('bottles_empty', f"bottle_size_ml = {bottle_size_ml}")
+            existing = self.cache.find('bottles_empty', where={'bottle_size_ml': bottle_size_ml})
             if existing:
                 messagebox.showwarning("Already Exists", f"{bottle_size_ml}ml bottles already exist. Use 'Adjust Stock' to change quantity.")
                 self.cache.close()
@@ -1165,7 +1160,7 @@ class ContainerDialog(tk.Toplevel):
                 can_size_ml = int(size_str.replace('ml', ''))
 
             # Check if this can size already exists
-            existing = self.cache.get_all_records('cans_empty', f"can_size_ml = {can_size_ml}")
+            existing = self.cache.find('cans_empty', where={'can_size_ml': can_size_ml})
             if existing:
                 size_display = f"{can_size_ml/1000:.1f}L" if can_size_ml >= 1000 else f"{can_size_ml}ml"
                 messagebox.showwarning("Already Exists", f"{size_display} cans already exist. Use 'Adjust Stock' to change quantity.")
@@ -1389,8 +1384,7 @@ class ContainerTypeDialog(tk.Toplevel):
         self.cache.connect()
 
         # Check if this container type already exists
-        existing = self.cache.get_all_records('container_types',
-            f"name = '{name}' AND active = 1")
+        existing = self.cache.find('container_types', where={'name': name, 'active': 1})
         if existing:
             messagebox.showwarning("Already Exists",
                 f"Container type '{name}' already exists. Use 'Adjust Stock' to change quantity.")
@@ -1683,9 +1677,7 @@ class InventoryLogbookDialog(tk.Toplevel):
             materials = self.cache.get_all_records('inventory_materials', order_by='material_name')
         else:
             # Get materials for this category
-            materials = self.cache.get_all_records('inventory_materials',
-                                                   f"material_type = '{self.current_category}'",
-                                                   order_by='material_name')
+            materials = self.cache.find('inventory_materials', where={'material_type': self.current_category}, order_by='material_name')
 
         self.cache.close()
 
@@ -1701,22 +1693,19 @@ class InventoryLogbookDialog(tk.Toplevel):
         for item in self.tree.get_children():
             self.tree.delete(item)
 
-        # Build where clauses
-        where_clauses = []
+        where = {}
 
         # Filter by transaction type (added/removed)
         trans_type = self.trans_type_var.get()
         if trans_type != 'all':
             # Map 'added' to 'add' and 'removed' to 'remove' for database
-            db_type = 'add' if trans_type == 'added' else 'remove'
-            where_clauses.append(f"transaction_type = '{db_type}'")
+            where['transaction_type'] = 'add' if trans_type == 'added' else 'remove'
 
         self.cache.connect()
 
         # Get all transactions
-        where = ' AND '.join(where_clauses) if where_clauses else None
-        transactions = self.cache.get_all_records('inventory_transactions', where,
-                                                  order_by='transaction_date DESC, transaction_id DESC')
+        transactions = self.cache.find('inventory_transactions', where=where,
+                                       order_by='transaction_date DESC, transaction_id DESC')
 
         # Now filter by category and material
         for trans in transactions:
@@ -1725,8 +1714,7 @@ class InventoryLogbookDialog(tk.Toplevel):
             material_type = None
             material_id = trans.get('material_id')
             if material_id:
-                materials = self.cache.get_all_records('inventory_materials',
-                    f"material_id = '{material_id}'")
+                materials = self.cache.find('inventory_materials', where={'material_id': material_id})
                 if materials:
                     material_name = materials[0].get('material_name', 'Unknown')
                     material_type = materials[0].get('material_type', '')
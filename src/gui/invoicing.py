@@ -8,6 +8,7 @@ import ttkbootstrap as ttk
 from tkinter import messagebox
 import uuid
 from datetime import datetime, timedelta
+from ..config.constants import UNINVOICED_IDS
 from ..utilities.date_utils import format_date_for_display, parse_display_date, get_today_display, get_today_db
 from ..utilities.window_manager import get_window_manager, enable_mousewheel_scrolling, enable_treeview_keyboard_navigation
 from reportlab.pdfgen import canvas
@@ -40,63 +41,74 @@ def create_invoice_for_sales(cache, user, customer_id, sale_ids, vat_rate=0.20):
     try:
         cache.connect()
         
-        # Calculate totals
-        subtotal = 0
-        sales_data = []
-        for sale_id in sale_ids:
-            sales = cache.get_all_records('sales', f"sale_id = '{sale_id}'")
-            if sales:
-                subtotal += sales[0].get('line_total', 0)
-                sales_data.append(sales[0])
-
-        vat_amount = subtotal * vat_rate
-        total = subtotal + vat_amount
-
-        # Generate invoice number
-        year = datetime.now().year
-        # Note: this might be slow if many invoices, but acceptable for now
-        invoices = cache.get_all_records('invoices', f"invoice_number LIKE 'INV-{year}-%'")
-        next_num = len(invoices) + 1
-        invoice_number = f"INV-{year}-{next_num:04d}"
-
-        # Create invoice
-        invoice_id = str(uuid.uuid4())
-        invoice_data = {
-            'invoice_id': invoice_id,
-            'invoice_number': invoice_number,
-            'invoice_date': get_today_db(),
-            'customer_id': customer_id,
-            'subtotal': subtotal,
-            'vat_rate': vat_rate,
-            'vat_amount': vat_amount,
-            'total': total,
-            'payment_status': 'unpaid',
-            'amount_paid': 0,
-            'amount_outstanding': total,
-            'due_date': parse_display_date((datetime.now() + timedelta(days=30)).strftime('%d/%m/%Y')),
-            'created_by': user.username,
-            'created_date': get_today_db(),
-            'sync_status': 'pending'
-        }
-        cache.insert_record('invoices', invoice_data)
-
-        # Create invoice lines
-        for sale in sales_data:
-             line_data = {
-                'line_id': str(uuid.uuid4()),
+        # One unit of work: the invoice, its lines and the sale links are
+        # committed together or not at all
+        with cache.transaction():
+            # Calculate totals
+            subtotal = 0
+            sales_data = []
+            for sale_id in sale_ids:
+                sales = cache.find('sales', where={'sale_id': sale_id})
+                if sales:
+                    subtotal += sales[0].get('line_total', 0)
+                    sales_data.append(sales[0])
+
+            vat_amount = subtotal * vat_rate
+            total = subtotal + vat_amount
+
+            # Generate invoice number. Other terminals cannot see this
+            # transaction, so numbers are per terminal and carry its code.
+            # MAX() rather than a count, which after a deletion hands out
+            # a number that is still in use
+            year = datetime.now().year
+            terminal = cache.terminal_id()[:4].upper()
+            prefix = f"INV-{year}-{terminal}-"
+            cache.cursor.execute(
+                "SELECT MAX(CAST(SUBSTR(invoice_number, ?) AS INTEGER)) FROM invoices "
+                "WHERE invoice_number LIKE ?",
+                (len(prefix) + 1, f"{prefix}%")
+            )
+            next_num = (cache.cursor.fetchone()[0] or 0) + 1
+            invoice_number = f"{prefix}{next_num:04d}"
+
+            # Create invoice
+            invoice_id = str(uuid.uuid4())
+            invoice_data = {
                 'invoice_id': invoice_id,
-                'sale_id': sale['sale_id'],
-                'description': f"{sale.get('beer_name', '')} - {sale.get('container_type', '')}",
-                'quantity': sale.get('quantity', 0),
-                'unit_price': sale.get('unit_price', 0),
-                'line_total': sale.get('line_total', 0),
-                'gyle_number': sale.get('gyle_number', ''),
+                'invoice_number': invoice_number,
+                'invoice_date': get_today_db(),
+                'customer_id': customer_id,
+                'subtotal': subtotal,
+                'vat_rate': vat_rate,
+                'vat_amount': vat_amount,
+                'total': total,
+                'payment_status': 'unpaid',
+                'amount_paid': 0,
+                'amount_outstanding': total,
+                'due_date': parse_display_date((datetime.now() + timedelta(days=30)).strftime('%d/%m/%Y')),
+                'created_by': user.username,
+                'created_date': get_today_db(),
                 'sync_status': 'pending'
             }
-             cache.insert_record('invoice_lines', line_data)
-
-             # Update sale with invoice_id
-             cache.update_record('sales', sale['sale_id'], {'invoice_id': invoice_id}, 'sale_id')
+            cache.insert_record('invoices', invoice_data)
+
+            # Create invoice lines
+            for sale in sales_data:
+                 line_data = {
+                    'line_id': str(uuid.uuid4()),
+                    'invoice_id': invoice_id,
+                    'sale_id': sale['sale_id'],
+                    'description': f"{sale.get('beer_name', '')} - {sale.get('container_type', '')}",
+                    'quantity': sale.get('quantity', 0),
+                    'unit_price': sale.get('unit_price', 0),
+                    'line_total': sale.get('line_total', 0),
+                    'gyle_number': sale.get('gyle_number', ''),
+                    'sync_status': 'pending'
+                }
+                 cache.insert_record('invoice_lines', line_data)
+
+                 # Update sale with invoice_id
+                 cache.update_record('sales', sale['sale_id'], {'invoice_id': invoice_id}, 'sale_id')
 
         cache.close()
         return True, f"Invoice {invoice_number} created!\n\nTotal: £{total:.2f}", invoice_id
@@ -185,21 +197,17 @@ class InvoicingModule(ttk.Frame):
             self.tree.delete(item)
 
         status_filter = self.filter_var.get()
-        where = None if status_filter == 'all' else f"payment_status = '{status_filter}'"
+        where = None if status_filter == 'all' else {'payment_status': status_filter}
 
         self.cache.connect()
         try:
-            invoices = self.cache.get_all_records('invoices', where, 'invoice_date DESC')
+            # Invoices with their customer names in one query
+            invoices = self.cache.find('v_invoice_overview', where=where, order_by='invoice_date DESC')
             logger.info(f"Loaded {len(invoices)} invoices from DB")
             
             for inv in invoices:
                 try:
-                    # Get customer name
-                    customer_name = 'Unknown'
-                    if inv.get('customer_id'):
-                        customers = self.cache.get_all_records('customers', f"customer_id = '{inv['customer_id']}'")
-                        if customers:
-                            customer_name = customers[0]['customer_name']
+                    customer_name = inv.get('customer_name') or 'Unknown'
 
                     values = (
                         inv.get('invoice_number') or '',
@@ -244,7 +252,7 @@ class InvoicingModule(ttk.Frame):
         invoice_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        invoices = self.cache.get_all_records('invoices', f"invoice_id = '{invoice_id}'")
+        invoices = self.cache.find('invoices', where={'invoice_id': invoice_id})
         self.cache.close()
 
         if invoices:
@@ -264,8 +272,8 @@ class InvoicingModule(ttk.Frame):
         invoice_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        invoices = self.cache.get_all_records('invoices', f"invoice_id = '{invoice_id}'")
-        lines = self.cache.get_all_records('invoice_lines', f"invoice_id = '{invoice_id}'")
+        invoices = self.cache.find('invoices', where={'invoice_id': invoice_id})
+        lines = self.cache.find('invoice_lines', where={'invoice_id': invoice_id})
         self.cache.close()
 
         if invoices:
@@ -323,7 +331,7 @@ class InvoiceCreateDialog(tk.Toplevel):
         ttk.Label(frame, text="Customer *", font=('Arial', 10, 'bold')).pack(anchor='w', pady=(0,5))
         self.customer_var = tk.StringVar()
         self.cache.connect()
-        customers = self.cache.get_all_records('customers', 'is_active = 1', 'customer_name')
+        customers = self.cache.find('customers', where={'is_active': 1}, order_by='customer_name')
         self.cache.close()
         self.customer_list = {c['customer_name']: c['customer_id'] for c in customers}
         customer_combo = ttk.Combobox(frame, textvariable=self.customer_var,
@@ -410,12 +418,9 @@ class InvoiceCreateDialog(tk.Toplevel):
         logger.info(f"Resolved customer_id: {customer_id}")
 
         # Fetch all uninvoiced sales for this customer, regardless of status
-        # Using 3-arg get_all_records signature
-        where_clause = f"customer_id = '{customer_id}' AND (invoice_id IS NULL OR invoice_id = '' OR invoice_id = 'None' OR invoice_id = 'NULL')"
-        logger.info(f"Querying sales with where_clause: {where_clause}")
-        
         try:
-            sales = self.cache.get_all_records('sales', where_clause, 'delivery_date DESC')
+            sales = self.cache.find('sales', where={'customer_id': customer_id, 'invoice_id': UNINVOICED_IDS},
+                                    order_by='delivery_date DESC')
             logger.info(f"Found {len(sales)} sales")
         except Exception as e:
             logger.error(f"Error querying sales: {e}")
@@ -675,7 +680,7 @@ class InvoiceViewDialog(tk.Toplevel):
         customer_name = 'Unknown'
         if self.invoice.get('customer_id'):
             self.cache.connect()
-            customers = self.cache.get_all_records('customers', f"customer_id = '{self.invoice['customer_id']}'")
+            customers = self.cache.find('customers', where={'customer_id': self.invoice['customer_id']})
             self.cache.close()
             if customers:
                 customer_name = customers[0]['customer_name']
@@ -759,7 +764,7 @@ Outstanding: £{self.invoice.get('amount_outstanding', 0):.2f}
             customer_name = "Unknown"
             if self.invoice.get('customer_id'):
                 self.cache.connect()
-                customers = self.cache.get_all_records('customers', f"customer_id = '{self.invoice.get('customer_id')}'")
+                customers = self.cache.find('customers', where={'customer_id': self.invoice.get('customer_id')})
                 self.cache.close()
                 if customers:
                     customer_name = customers[0]['customer_name']
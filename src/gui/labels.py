@@ -52,7 +52,7 @@ class LabelsModule(ttk.Frame):
 
         self.batch_var = tk.StringVar()
         self.cache.connect()
-        batches = self.cache.get_all_records('batches', "status IN ('ready', 'packaged')", 'gyle_number DESC')
+        batches = self.cache.find('batches', where={'status IN': ['ready', 'packaged']}, order_by='gyle_number DESC')
         self.cache.close()
         self.batch_list = {b['gyle_number']: b for b in batches}
 
@@ -123,7 +123,7 @@ class LabelsModule(ttk.Frame):
             recipe_id = batch.get('recipe_id')
             if recipe_id:
                 self.cache.connect()
-                recipes = self.cache.get_all_records('recipes', f"recipe_id = '{recipe_id}'")
+                recipes = self.cache.find('recipes', where={'recipe_id': recipe_id})
                 self.cache.close()
                 if recipes:
                     self.beer_label.config(text=recipes[0]['recipe_name'])
@@ -146,7 +146,7 @@ class LabelsModule(ttk.Frame):
         recipe_id = batch.get('recipe_id')
         if recipe_id:
             self.cache.connect()
-            recipes = self.cache.get_all_records('recipes', f"recipe_id = '{recipe_id}'")
+            recipes = self.cache.find('recipes', where={'recipe_id': recipe_id})
             self.cache.close()
             if recipes:
                 beer_name = recipes[0]['recipe_name']
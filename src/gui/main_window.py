@@ -11,6 +11,7 @@ import sys
 import os
 import logging
 import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +22,12 @@ from src.utilities.auth import AuthManager
 from src.utilities.theme_manager import get_theme_manager
 from src.utilities.window_manager import WindowManager, set_window_manager
 from src.data_access.sync_manager import SyncManager
+from src.data_access.sync_worker import SyncWorker
+from src.data_access.connectivity_monitor import ConnectivityMonitor
+from src.data_access.change_sets import ChangeSetPoller
 from src.data_access.sqlite_cache import SQLiteCacheManager
 from src.data_access.google_sheets_client import GoogleSheetsClient
+from src.data_access.db_maintenance import DatabaseMaintenance
 from src.utilities.ai_client import AIClient
 from src.gui.assistant import AIAssistantWidget
 from datetime import datetime
@@ -42,6 +47,9 @@ from src.gui.reports import ReportsModule
 from src.gui.settings import SettingsModule
 from src.gui.delivery import DeliveryModule
 
+# Seconds without keyboard/mouse input before database maintenance may run
+MAINTENANCE_IDLE_SECONDS = 120
+
 
 class BreweryMainWindow:
     """Main application window with login and navigation."""
@@ -68,6 +76,8 @@ class BreweryMainWindow:
         self.cache_manager.connect()
         self.cache_manager.initialize_database()
         self.cache_manager.close()
+        self.db_maintenance = DatabaseMaintenance(self.cache_manager)
+        self.last_user_activity = time.monotonic()
 
         self.sheets_client = GoogleSheetsClient()
         
@@ -79,9 +89,28 @@ class BreweryMainWindow:
         # Initialize sync manager
         self.sync_manager = SyncManager(self.sheets_client, self.cache_manager)
         
+        # Every sync runs on this one worker thread; callers just request one
+        self.sync_stage = None
+        self.sync_worker = SyncWorker(self.sync_manager)
+        self.sync_worker.add_listener(self._on_sync_event)
+        self.sync_worker.start()
+
+        # One thread watches connectivity; successful Sheets calls count as
+        # proof. It is the only thing that probes: syncs read its state
+        self.connectivity = ConnectivityMonitor(self.sync_manager.check_connection)
+        self.connectivity.add_listener(self._on_connectivity_change)
+        self.sheets_client.liveness_callback = self.connectivity.report_success
+        self.sync_manager.connectivity = self.connectivity
+        self.connectivity.start()
+
         # Initialize sync state (load settings, etc)
         self.sync_manager.initialize()
 
+        # Exchange change sets with other terminals on the network, if a
+        # shared folder is set in Settings (no Google quota involved)
+        self.change_set_poller = ChangeSetPoller(self.sync_manager.lan_sync)
+        self.change_set_poller.start()
+
         # Initialize authentication
         self.auth = AuthManager(self.cache_manager)
         
@@ -304,6 +333,11 @@ class BreweryMainWindow:
         
         # Start background polling (every 5 mins)
         self.monitor_background_sync()
+
+        # Track user input so maintenance only runs while the app is idle
+        for sequence in ('<Any-KeyPress>', '<Any-ButtonPress>', '<Motion>', '<MouseWheel>'):
+            self.root.bind_all(sequence, self._note_user_activity, add='+')
+        self.monitor_database_maintenance()
         
     def create_top_bar(self):
         """Create the top header bar with Page Title and AI Assistant."""
@@ -530,7 +564,9 @@ class BreweryMainWindow:
                     cache_manager=self.cache_manager,
                     current_user=self.current_user,
                     sheets_client=self.sheets_client,
-                    sync_callback=self.trigger_auto_save_sync
+                    sync_callback=self.trigger_auto_save_sync,
+                    db_maintenance=self.db_maintenance,
+                    sync_manager=self.sync_manager
                 )
             elif module_name == 'Brewery Inventory':
                 module = module_class(
@@ -584,41 +620,53 @@ class BreweryMainWindow:
             self.status_connection.config(text="🔴 Offline", bootstyle="danger")
         
         if self.sync_manager.sync_in_progress:
-            self.status_sync.config(text="🔄 Syncing...", bootstyle="info")
+            stage = f" ({self.sync_stage})" if self.sync_stage else ""
+            self.status_sync.config(text=f"🔄 Syncing{stage}...", bootstyle="info")
+        elif self.sync_worker.deferred:
+            self.status_sync.config(text="⏸ Sync waiting for API quota...", bootstyle="warning")
         else:
             # Update last sync time
             last_sync = self.sync_manager.get_last_sync_time()
             if last_sync:
                 # Format from DB format (YYYY-MM-DD HH:MM:SS) to Display (DD/MM/YYYY HH:MM)
                 display_sync = format_datetime_for_display(last_sync)
-                self.status_sync.config(text=f"Last sync: {display_sync}", bootstyle="default")
+                self.status_sync.config(text=f"Last sync: {display_sync}{self._sync_timing_text()}",
+                                        bootstyle="default")
             else:
                 self.status_sync.config(text="Last sync: Never", bootstyle="default")
     
-    def manual_sync(self):
-        """Manually trigger a sync operation."""
+    def _sync_timing_text(self):
+        """Rolling incremental sync durations for the status bar, e.g. ' (p50 1.2s · p90 3.4s)'."""
         try:
-            # Check if online
-            if not self.sync_manager.check_connection():
-                messagebox.showwarning(
-                    "Offline",
-                    "Cannot sync while offline. Please check your internet connection."
-                )
-                return
-            
-            # Perform sync
-            logger.info("Starting manual sync...")
-            result = self.sync_manager.incremental_sync()
-            
-            if result and "error" not in result:
-                messagebox.showinfo("Sync Complete", "Data synchronized successfully!")
-                self.update_status_bar()
-            else:
-                error_msg = result.get("error", "Unknown error") if result else "Unknown error"
-                messagebox.showerror("Sync Failed", f"Failed to synchronize data.\nError: {error_msg}")
-        
+            duration = self.sync_manager.telemetry.percentiles('incremental')['duration']
         except Exception as e:
-            messagebox.showerror("Sync Error", f"An error occurred during sync:\n{str(e)}")
+            logger.debug(f"Sync timings unavailable: {e}")
+            return ""
+        if duration[50] is None:
+            return ""
+        return f" (p50 {duration[50]:.1f}s · p90 {duration[90]:.1f}s)"
+    
+    def manual_sync(self):
+        """Manually trigger a sync operation (runs ahead of background syncs)."""
+        def done(result):
+            self.root.after(0, lambda: self._manual_sync_done(result))
+
+        logger.info("Requesting manual sync...")
+        self.sync_worker.request('manual', priority=SyncWorker.USER, callback=done)
+
+    def _manual_sync_done(self, result):
+        """Report the outcome of a manual sync (UI thread)."""
+        if result and "error" not in result:
+            messagebox.showinfo("Sync Complete", "Data synchronized successfully!")
+            self.update_status_bar()
+        elif result and result.get("error") == "offline":
+            messagebox.showwarning(
+                "Offline",
+                "Cannot sync while offline. Please check your internet connection."
+            )
+        else:
+            error_msg = result.get("error", "Unknown error") if result else "Unknown error"
+            messagebox.showerror("Sync Failed", f"Failed to synchronize data.\nError: {error_msg}")
     
     def logout(self):
         """Log out current user and return to login screen."""
@@ -636,19 +684,8 @@ class BreweryMainWindow:
 
     def perform_startup_sync(self):
         """Perform an automatic sync on startup."""
-        def sync_task():
-            # Wait a few seconds for connection check to settle
-            import time
-            time.sleep(2) 
-            
-            if self.sync_manager.check_connection():
-                logger.info("Performing startup sync...")
-                # UI update handled by monitor_connection -> update_status_bar
-                
-                result = self.sync_manager.incremental_sync()
-                
-                # Final UI update handled by monitor_connection
-            else:
+        def done(result):
+            if result.get("error") == "offline":
                 logger.info("Skipping startup sync (offline)")
                 # Notify user about offline mode
                 self.root.after(0, lambda: messagebox.showwarning(
@@ -657,68 +694,78 @@ class BreweryMainWindow:
                     "Changes will be saved locally but will not sync to the cloud until connection is restored."
                 ))
 
-        threading.Thread(target=sync_task, daemon=True).start()
+        # Wait a few seconds for connection check to settle
+        self.sync_worker.request('startup', delay=2, callback=done)
 
     def trigger_auto_save_sync(self):
-        """Trigger a background sync after a save operation."""
-        def sync_task():
-            if self.sync_manager.is_online: # Use cached status for speed check
-                logger.info("Auto-syncing after save...")
-                 # UI update handled by monitor_connection -> update_status_bar
-                
-                self.sync_manager.incremental_sync()
-                
-                # Final UI update handled by monitor_connection
-
-        threading.Thread(target=sync_task, daemon=True).start()
+        """Request a background sync after a save; bursts of saves share one run."""
+        self.sync_worker.request('save')
 
     def monitor_connection(self):
-        """Periodically check connection status in background."""
-        if self.main_frame and self.main_frame.winfo_exists():
-            # Run blocking check in a thread
-            thread = threading.Thread(target=self._check_connection_thread, daemon=True)
-            thread.start()
-            
-            # Schedule next check in 3 seconds
-            self.root.after(3000, self.monitor_connection)
+        """Start watching connection status in the background."""
+        self.connectivity.start()
+        self.update_status_bar()
+
+    def _on_connectivity_change(self, is_online, was_online):
+        """Connectivity listener (monitor thread): sync on reconnection, refresh the UI."""
+        self.sync_manager.is_online = is_online
+        if is_online and was_online is False:
+            logger.info("Connection restored! Triggering auto-sync...")
+            self.sync_worker.request('reconnect')
+        try:
+            self.root.after(0, self._refresh_status_bar)
+        except (RuntimeError, tk.TclError):
+            # Window already closed
+            pass
+
+    def _refresh_status_bar(self):
+        if self.status_bar and self.status_bar.winfo_exists():
+            self.update_status_bar()
 
     def monitor_background_sync(self):
         """Periodically run background sync (every 5 minutes)."""
         if self.main_frame and self.main_frame.winfo_exists():
-            # Run blocking check in a thread
-            def bg_sync_task():
-                if self.sync_manager.is_online and not self.sync_manager.sync_in_progress:
-                   # UI update handled by monitor_connection -> update_status_bar 
-                   logger.info("Starting background auto-sync...")
-                   self.sync_manager.incremental_sync()
-                   
-            threading.Thread(target=bg_sync_task, daemon=True).start()
+            if self.sync_manager.is_online:
+                self.sync_worker.request('timer')
             
             # Schedule next check in 5 minutes (300,000 ms)
             self.root.after(300000, self.monitor_background_sync)
 
-    def _check_connection_thread(self):
-        """Worker thread checking connection."""
+    def _note_user_activity(self, event=None):
+        """Record the time of the latest keyboard/mouse input."""
+        self.last_user_activity = time.monotonic()
+
+    def monitor_database_maintenance(self):
+        """Periodically run due database maintenance while the app is idle."""
+        if self.main_frame and self.main_frame.winfo_exists():
+            idle_for = time.monotonic() - self.last_user_activity
+
+            # Skip while the user is working or a sync holds the database
+            if idle_for >= MAINTENANCE_IDLE_SECONDS and not self.sync_manager.sync_in_progress:
+                threading.Thread(target=self.db_maintenance.run_due_tasks, daemon=True).start()
+
+            # Check again in 1 minute
+            self.root.after(60000, self.monitor_database_maintenance)
+
+    def _on_sync_event(self, event):
+        """Sync worker listener; hands events to the UI thread."""
         try:
-            # Store previous state
-            was_online = self.sync_manager.is_online
-            
-            # check_connection updates self.sync_manager.is_online
-            is_now_online = self.sync_manager.check_connection()
-            
-            # Detect reconnection (False -> True)
-            if not was_online and is_now_online:
-                logger.info("Connection restored! Triggering auto-sync...")
-                # We can reuse the auto-save trigger which runs in background
-                # Use after to ensure thread safety if triggering from here, 
-                # though trigger_auto_save_sync spawns its own thread anyway.
-                self.root.after(0, self.trigger_auto_save_sync)
-            
-            # Update UI on main thread
-            self.root.after(0, self.update_status_bar)
-        except Exception as e:
-            logger.error(f"Error in connection thread: {e}")
-    
+            self.root.after(0, lambda: self._show_sync_event(event))
+        except (RuntimeError, tk.TclError):
+            # Window already closed
+            pass
+
+    def _show_sync_event(self, event):
+        """Reflect sync worker progress in the status bar."""
+        if event['event'] in ('started', 'progress'):
+            self.sync_stage = event.get('stage')
+        elif event['event'] == 'finished':
+            self.sync_stage = None
+            if 'error' in event['result']:
+                # Maybe the connection dropped; find out without waiting
+                self.connectivity.check_now()
+        self._refresh_status_bar()
+
     def show_settings(self):
         """Show settings dialog (placeholder)."""
         messagebox.showinfo(
@@ -775,6 +822,16 @@ class BreweryMainWindow:
     def exit_application(self):
         """Exit the application."""
         if messagebox.askyesno("Exit", "Are you sure you want to exit?"):
+            try:
+                # Leave a compact database file behind for the next launch
+                self.db_maintenance.checkpoint()
+            except Exception as e:
+                logger.warning(f"Final WAL checkpoint failed: {e}")
+            # Let a running sync finish writing before the connections go
+            self.connectivity.stop(timeout=1)
+            self.change_set_poller.stop(timeout=5)
+            self.sync_worker.stop(timeout=10)
+            self.cache_manager.close_all()
             self.root.quit()
             self.root.destroy()
     
@@ -1,6 +1,7 @@
 import tkinter as tk
 import ttkbootstrap as ttk
 from tkinter import messagebox
+from ..config.constants import UNINVOICED_IDS
 from ..utilities.date_utils import format_date_for_display, get_today_display
 from ..utilities.window_manager import get_window_manager, enable_mousewheel_scrolling
 from .invoicing import create_invoice_for_sales, PaymentDialog
@@ -37,7 +38,7 @@ class OrderDetailsDialog(tk.Toplevel):
         try:
             self.cache.connect()
             # 1. Fetch Target Sale
-            sales = self.cache.get_all_records('sales', f"sale_id = '{self.sale_id}'")
+            sales = self.cache.find('sales', where={'sale_id': self.sale_id})
             
             if not sales:
                 self.cache.close()
@@ -52,16 +53,17 @@ class OrderDetailsDialog(tk.Toplevel):
             related_sales = []
             if invoice_id and invoice_id not in ['None', 'NULL', '']:
                 # If invoiced, get complete invoice
-                related_sales = self.cache.get_all_records('sales', f"invoice_id = '{invoice_id}'")
+                related_sales = self.cache.find('sales', where={'invoice_id': invoice_id})
             else:
                 # If not invoiced, get by Customer + Date + Uninvoiced
-                related_sales = self.cache.get_all_records('sales', 
-                    f"customer_id = '{customer_id}' AND sale_date = '{sale_date}' AND (invoice_id IS NULL OR invoice_id = '' OR invoice_id = 'None' OR invoice_id = 'NULL')")
+                related_sales = self.cache.find('sales', where={
+                    'customer_id': customer_id, 'sale_date': sale_date, 'invoice_id': UNINVOICED_IDS
+                })
             
             # 3. Fetch Customer Details
             customer = {}
             if customer_id:
-                customers = self.cache.get_all_records('customers', f"customer_id = '{customer_id}'")
+                customers = self.cache.find('customers', where={'customer_id': customer_id})
                 if customers:
                     customer = customers[0]
             
@@ -179,7 +181,7 @@ class OrderDetailsDialog(tk.Toplevel):
 
         # Fetch invoice
         self.cache.connect()
-        invoices = self.cache.get_all_records('invoices', f"invoice_id = '{invoice_id}'")
+        invoices = self.cache.find('invoices', where={'invoice_id': invoice_id})
         self.cache.close()
 
         if invoices:
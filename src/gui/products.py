@@ -479,7 +479,7 @@ class ProductsModule(ttk.Frame):
         product_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        products = self.cache.get_all_records('products', f"product_id = '{product_id}'")
+        products = self.cache.find('products', where={'product_id': product_id})
         self.cache.close()
 
         if not products:
@@ -511,7 +511,7 @@ class ProductsModule(ttk.Frame):
         product_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        products = self.cache.get_all_records('products', f"product_id = '{product_id}'")
+        products = self.cache.find('products', where={'product_id': product_id})
         self.cache.close()
 
         if not products:
@@ -534,7 +534,7 @@ class ProductsModule(ttk.Frame):
         product_id = tags[1] if len(tags) > 1 else None
 
         self.cache.connect()
-        products = self.cache.get_all_records('products', f"product_id = '{product_id}'")
+        products = self.cache.find('products', where={'product_id': product_id})
         self.cache.close()
 
         if not products:
@@ -867,8 +867,7 @@ Total Sold: {self.product.get('quantity_sold', 0)} units"""
         self.cache.connect()
 
         # Find matching container type
-        containers = self.cache.get_all_records('container_types',
-            f"name = '{container_type}'")
+        containers = self.cache.find('container_types', where={'name': container_type})
 
         if containers:
             container = containers[0]
@@ -965,9 +964,8 @@ Packaged: {self.format_date(self.product.get('date_packaged', ''))}"""
             self.tree.delete(item)
 
         self.cache.connect()
-        sales = self.cache.get_all_records('product_sales',
-            f"gyle_number = '{self.gyle_number}'",
-            order_by='date_sold DESC')
+        sales = self.cache.find('v_product_sales_overview', where={'gyle_number': self.gyle_number},
+                                order_by='date_sold DESC')
 
         if not sales:
             # Show message in tree
@@ -976,13 +974,7 @@ Packaged: {self.format_date(self.product.get('date_packaged', ''))}"""
             return
 
         for sale in sales:
-            # Get customer name
-            customer_name = 'Unknown'
-            if sale.get('customer_id'):
-                customers = self.cache.get_all_records('customers',
-                    f"customer_id = '{sale['customer_id']}'")
-                if customers:
-                    customer_name = customers[0].get('customer_name', 'Unknown')
+            customer_name = sale.get('customer_name') or 'Unknown'
 
             values = (
                 sale.get('container_type', ''),
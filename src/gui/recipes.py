@@ -286,8 +286,8 @@ class RecipesModule(ttk.Frame):
 
         # Get recipe data
         self.cache.connect()
-        recipes = self.cache.get_all_records('recipes', f"recipe_id = '{recipe_id}'")
-        ingredients = self.cache.get_all_records('recipe_ingredients', f"recipe_id = '{recipe_id}'", order_by='timing, ingredient_type')
+        recipes = self.cache.find('recipes', where={'recipe_id': recipe_id})
+        ingredients = self.cache.find('recipe_ingredients', where={'recipe_id': recipe_id}, order_by='timing, ingredient_type')
         self.cache.close()
 
         if not recipes:
@@ -440,7 +440,7 @@ class RecipesModule(ttk.Frame):
 
         # Get recipe data
         self.cache.connect()
-        recipes = self.cache.get_all_records('recipes', f"recipe_id = '{recipe_id}'")
+        recipes = self.cache.find('recipes', where={'recipe_id': recipe_id})
         self.cache.close()
 
         if not recipes:
@@ -478,8 +478,8 @@ class RecipesModule(ttk.Frame):
 
         # Get recipe data
         self.cache.connect()
-        recipes = self.cache.get_all_records('recipes', f"recipe_id = '{recipe_id}'")
-        ingredients = self.cache.get_all_records('recipe_ingredients', f"recipe_id = '{recipe_id}'", order_by='timing, ingredient_type')
+        recipes = self.cache.find('recipes', where={'recipe_id': recipe_id})
+        ingredients = self.cache.find('recipe_ingredients', where={'recipe_id': recipe_id}, order_by='timing, ingredient_type')
         self.cache.close()
 
         if not recipes:
@@ -774,7 +774,7 @@ class RecipeDialog(tk.Toplevel):
         for ing in self.ingredients:
             # Check if linked to inventory
             if ing.get('inventory_item_id'):
-                materials = self.cache.get_all_records('inventory_materials', f"material_id = '{ing['inventory_item_id']}'")
+                materials = self.cache.find('inventory_materials', where={'material_id': ing['inventory_item_id']})
                 if materials:
                     mat = materials[0]
                     cost_per_unit = float(mat.get('cost_per_unit', 0) or 0)
@@ -827,11 +827,7 @@ class RecipeDialog(tk.Toplevel):
             return
 
         self.cache.connect()
-        ingredients = self.cache.get_all_records(
-            'recipe_ingredients',
-            f"recipe_id = '{self.recipe['recipe_id']}'",
-            order_by='timing, ingredient_type'
-        )
+        ingredients = self.cache.find('recipe_ingredients', where={'recipe_id': self.recipe['recipe_id']}, order_by='timing, ingredient_type')
         self.cache.close()
 
         self.ingredients = []
@@ -957,7 +953,7 @@ class RecipeDialog(tk.Toplevel):
         if self.active_var.get() == 1:
             self.cache.connect()
             # Find all recipes with the same name
-            all_same_name = self.cache.get_all_records('recipes', f"recipe_name = '{name.replace("'", "''")}'")
+            all_same_name = self.cache.find('recipes', where={'recipe_name': name})
             # Deactivate all of them
             for other_recipe in all_same_name:
                 # Skip the current recipe being edited ONLY if version is NOT changing
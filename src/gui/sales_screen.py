@@ -8,6 +8,7 @@ from tkinter import messagebox
 import ttkbootstrap as ttk
 import uuid
 from datetime import datetime
+from ..config.constants import UNINVOICED_IDS
 from ..utilities.date_utils import format_date_for_display, parse_display_date, get_today_display, get_today_db, get_now_db
 from ..utilities.window_manager import get_window_manager, enable_mousewheel_scrolling, enable_treeview_keyboard_navigation
 from .components import ScrollableFrame, DateEntry
@@ -101,26 +102,34 @@ class SalesModule(ttk.Frame):
 
         self.cache.connect()
         
-        # 1. Fetch Reference Data
-        all_customers = self.cache.get_all_records('customers')
-        customer_map = {c['customer_id']: c['customer_name'] for c in all_customers}
-        
-        all_invoices = self.cache.get_all_records('invoices')
-        invoices_map = {inv['invoice_id']: inv for inv in all_invoices}
-
-        # 2. Fetch All Sales
-        sales = self.cache.get_all_records('sales', None, 'delivery_date DESC')
+        # 1. Fetch Reference Data (only the columns this screen shows)
+        customer_map = {
+            c.customer_id: c.customer_name
+            for c in self.cache.iter_records('customers', columns=['customer_id', 'customer_name'])
+        }
         
-        self.cache.close()
+        invoices_map = {
+            inv.invoice_id: inv
+            for inv in self.cache.iter_records(
+                'invoices', columns=['invoice_id', 'invoice_number', 'payment_status']
+            )
+        }
 
-        # 3. Group Sales into "Orders"
+        # 2. Stream Sales and 3. Group them into "Orders" as they arrive,
+        # so the full sales history is never held in memory at once
         # Key: (customer_id, sale_date_str, invoice_id_or_none)
         grouped_orders = {}
         
+        sales = self.cache.iter_records(
+            'sales',
+            order_by='delivery_date DESC',
+            columns=['sale_id', 'customer_id', 'sale_date', 'delivery_date',
+                     'invoice_id', 'status', 'line_total']
+        )
         for sale in sales:
-            invoice_id = sale.get('invoice_id')
-            cust_id = sale.get('customer_id')
-            sale_date = sale.get('sale_date')
+            invoice_id = sale.invoice_id
+            cust_id = sale.customer_id
+            sale_date = sale.sale_date
             
             # Normalize Invoice ID
             if not invoice_id or invoice_id in ['None', 'NULL', '']:
@@ -136,21 +145,22 @@ class SalesModule(ttk.Frame):
                 
             if key not in grouped_orders:
                 grouped_orders[key] = {
-                    'sales': [],
                     'total': 0.0,
                     'items_count': 0,
-                    'representative': sale # Keep one sale for dates/status
+                    'representative': sale, # Keep one sale for dates/status
+                    'status': sale.status or ''
                 }
             
-            grouped_orders[key]['sales'].append(sale)
-            grouped_orders[key]['total'] += sale.get('line_total', 0)
+            grouped_orders[key]['total'] += sale.line_total or 0
             grouped_orders[key]['items_count'] += 1
             
             # If any item in the group is 'delivered', we might want to show that? 
             # Or if ALL are delivered?
             # Let's verify status consistency in loop or just take representative
-            if sale.get('status') == 'delivered':
-                grouped_orders[key]['representative']['status'] = 'delivered' # Promote delivered status
+            if sale.status == 'delivered':
+                grouped_orders[key]['status'] = 'delivered' # Promote delivered status
+
+        self.cache.close()
 
         # 4. Display Groups
         for key, group in grouped_orders.items():
@@ -160,7 +170,7 @@ class SalesModule(ttk.Frame):
             cust_name = customer_map.get(sale.get('customer_id'), 'Unknown')
             
             # Delivery Status
-            del_status = sale.get('status', '').lower()
+            del_status = group['status'].lower()
             
             # Invoice Status
             invoice_id = sale.get('invoice_id')
@@ -253,10 +263,10 @@ class SalesModule(ttk.Frame):
         related_sales = []
         if invoice_id and invoice_id != 'None' and invoice_id != 'NULL':
             # If invoiced, get all sales on this invoice
-            related_sales = self.cache.get_all_records('sales', f"invoice_id = '{invoice_id}'")
+            related_sales = self.cache.find('sales', where={'invoice_id': invoice_id})
         else:
             # If not invoiced, get the specific sale first to find context
-            target_sale = self.cache.get_all_records('sales', f"sale_id = '{sale_id}'")
+            target_sale = self.cache.find('sales', where={'sale_id': sale_id})
             if target_sale:
                 s = target_sale[0]
                 # Logic: An "Order" is same Customer + Same Date + Uninvoiced
@@ -265,8 +275,9 @@ class SalesModule(ttk.Frame):
                 sale_date = s['sale_date']
                 
                 # Safety: Ensure we only pick up uninvoiced ones here to match logic
-                related_sales = self.cache.get_all_records('sales', 
-                    f"customer_id = '{customer_id}' AND sale_date = '{sale_date}' AND (invoice_id IS NULL OR invoice_id = '' OR invoice_id = 'None' OR invoice_id = 'NULL')")
+                related_sales = self.cache.find('sales', where={
+                    'customer_id': customer_id, 'sale_date': sale_date, 'invoice_id': UNINVOICED_IDS
+                })
 
         self.cache.close()
 
@@ -297,7 +308,7 @@ class SalesModule(ttk.Frame):
         if not sale_id: return
 
         self.cache.connect()
-        sales = self.cache.get_all_records('sales', f"sale_id = '{sale_id}'")
+        sales = self.cache.find('sales', where={'sale_id': sale_id})
         self.cache.close()
 
         if sales and sales[0]['status'] == 'reserved':
@@ -338,7 +349,7 @@ class SalesModule(ttk.Frame):
 
         # Fetch invoice
         self.cache.connect()
-        invoices = self.cache.get_all_records('invoices', f"invoice_id = '{invoice_id}'")
+        invoices = self.cache.find('invoices', where={'invoice_id': invoice_id})
         self.cache.close()
 
         if invoices:
@@ -381,8 +392,8 @@ class SalesModule(ttk.Frame):
     def open_invoice(self, invoice_id):
         from .invoicing import InvoiceViewDialog
         self.cache.connect()
-        invoices = self.cache.get_all_records('invoices', f"invoice_id = '{invoice_id}'")
-        lines = self.cache.get_all_records('invoice_lines', f"invoice_id = '{invoice_id}'")
+        invoices = self.cache.find('invoices', where={'invoice_id': invoice_id})
+        lines = self.cache.find('invoice_lines', where={'invoice_id': invoice_id})
         self.cache.close()
         
         if invoices:
@@ -445,7 +456,7 @@ class SaleDialog(tk.Toplevel):
         ttk.Label(frame, text="Customer *", font=('Arial', 10, 'bold')).grid(row=0, column=0, sticky='w', pady=5)
         self.customer_var = tk.StringVar()
         self.cache.connect()
-        customers = self.cache.get_all_records('customers', 'is_active = 1', 'customer_name')
+        customers = self.cache.find('customers', where={'is_active': 1}, order_by='customer_name')
         self.cache.close()
         self.customer_list = {c['customer_name']: c['customer_id'] for c in customers}
         self.customer_combo = ttk.Combobox(frame, textvariable=self.customer_var,
@@ -524,7 +535,7 @@ class SaleDialog(tk.Toplevel):
         ttk.Label(frame, text="Product *", font=('Arial', 10, 'bold')).grid(row=0, column=0, sticky='w', pady=5)
         self.product_var = tk.StringVar()
         self.cache.connect()
-        products = self.cache.get_all_records('products', "quantity_in_stock > 0", 'gyle_number DESC')
+        products = self.cache.find('products', where={'quantity_in_stock >': 0}, order_by='gyle_number DESC')
         self.cache.close()
         
         self.product_list = {}
@@ -638,7 +649,7 @@ class SaleDialog(tk.Toplevel):
         # Header
         if first_sale.get('customer_id'):
             self.cache.connect()
-            customers = self.cache.get_all_records('customers', f"customer_id = '{first_sale['customer_id']}'")
+            customers = self.cache.find('customers', where={'customer_id': first_sale['customer_id']})
             self.cache.close()
             if customers:
                 self.customer_var.set(customers[0]['customer_name'])
@@ -767,7 +778,7 @@ class SaleDialog(tk.Toplevel):
 
         # Common Data
         self.cache.connect()
-        customers = self.cache.get_all_records('customers', f"customer_id = '{self.customer_list[customer_name]}'")
+        customers = self.cache.find('customers', where={'customer_id': self.customer_list[customer_name]})
         customer_address = customers[0].get('address', '') if customers else ''
         customer_id = self.customer_list[customer_name]
         
@@ -778,16 +789,16 @@ class SaleDialog(tk.Toplevel):
         # 1. PROCESS DELETIONS
         for sale_id in self.deleted_ids:
             # Check if invoiced
-            sale = self.cache.get_all_records('sales', f"sale_id = '{sale_id}'")
+            sale = self.cache.find('sales', where={'sale_id': sale_id})
             if sale:
                 invoice_id = sale[0].get('invoice_id')
                 if invoice_id:
-                     self.cache.delete_record('invoice_lines', f"sale_id = '{sale_id}'")
+                     self.cache.delete_record('invoice_lines', sale_id, 'sale_id')
                 
                 # Restore stock? (Optional, skipping for safety unless explicitly requested)
                 
-                self.cache.delete_record('sales', f"sale_id = '{sale_id}'")
-                self.cache.delete_record('product_sales', f"sale_id = '{sale_id}'")
+                self.cache.delete_record('sales', sale_id, 'sale_id')
+                self.cache.delete_record('product_sales', sale_id, 'sale_id')
 
         # 1.5 UPDATE EXISTING ITEMS (To keep them grouped with new items)
         # This fixes the bug where adding items (or changing date) splits the order
@@ -822,7 +833,7 @@ class SaleDialog(tk.Toplevel):
                 # Note: update_record usually takes a primary key. 
                 # We can use execute_query or get the ID first.
                 # Let's get the product_sale_id first to be safe/clean.
-                ps_records = self.cache.get_all_records('product_sales', f"sale_id = '{sale_id}'")
+                ps_records = self.cache.find('product_sales', where={'sale_id': sale_id})
                 for ps in ps_records:
                     self.cache.update_record('product_sales', ps['product_sale_id'], ps_update, 'product_sale_id')
 
@@ -922,10 +933,10 @@ class SaleDialog(tk.Toplevel):
         
         if affected_invoice_id:
              # Recalculate
-             all_lines = self.cache.get_all_records('invoice_lines', f"invoice_id = '{affected_invoice_id}'")
+             all_lines = self.cache.find('invoice_lines', where={'invoice_id': affected_invoice_id})
              subtotal = sum(l['line_total'] for l in all_lines)
              
-             invoices = self.cache.get_all_records('invoices', f"invoice_id = '{affected_invoice_id}'")
+             invoices = self.cache.find('invoices', where={'invoice_id': affected_invoice_id})
              if invoices:
                  inv = invoices[0]
                  vat_rate = inv.get('vat_rate', 0.2)
@@ -3,25 +3,41 @@ Settings Module for Brewery Management System
 Configuration for duty rates, containers, and system settings
 """
 
+import os
+import threading
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 import ttkbootstrap as ttk
 from datetime import datetime
 from ..utilities.window_manager import get_window_manager, enable_mousewheel_scrolling, enable_treeview_keyboard_navigation, enable_canvas_scrolling
 # Import Google Sheets Client for real authentication
 from ..data_access.google_sheets_client import GoogleSheetsClient
+from ..data_access.db_maintenance import DatabaseMaintenance
+
+
+def format_bytes(size):
+    """Human readable file size, e.g. 1.5 MB"""
+    for unit in ('bytes', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'bytes' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
 
 
 class SettingsModule(ttk.Frame):
     """Settings module for system configuration"""
 
-    def __init__(self, parent, cache_manager, current_user, sheets_client=None, sync_callback=None):
+    def __init__(self, parent, cache_manager, current_user, sheets_client=None, sync_callback=None,
+                 db_maintenance=None, sync_manager=None):
         super().__init__(parent)
         self.cache = cache_manager
         self.current_user = current_user
         self.sync_callback = sync_callback
+        self.sync_manager = sync_manager
         # Use provided client or create new one if needed (though ideally passed from main)
         self.sheets_client = sheets_client if sheets_client else GoogleSheetsClient()
+        # Shared with the main window so the "last run" times match its scheduler
+        self.db_maintenance = db_maintenance if db_maintenance else DatabaseMaintenance(cache_manager)
 
         self.create_widgets()
 
@@ -35,6 +51,7 @@ class SettingsModule(ttk.Frame):
         self.create_duty_rates_tab()
         self.create_containers_tab()
         self.create_integrations_tab()
+        self.create_database_tab()
 
     def create_integrations_tab(self):
         """Integrations Configuration Tab"""
@@ -60,6 +77,47 @@ class SettingsModule(ttk.Frame):
         
         ttk.Button(google_frame, text="🔗 Connect Account", bootstyle="primary", command=self.connect_google).pack(side=tk.RIGHT)
         
+        # Local network sync (shared folder)
+        if self.sync_manager:
+            lan_frame = ttk.LabelFrame(tab, text="Local Network Sync", padding=20)
+            lan_frame.pack(fill=tk.X, pady=(0, 20))
+            
+            ttk.Label(
+                lan_frame,
+                text="Shared folder (all terminals on the network use the same one, leave blank to turn off):",
+                font=('Arial', 10)
+            ).pack(anchor='w', pady=(0, 5))
+            self.lan_folder_var = tk.StringVar(value=self.sync_manager.lan_sync_folder() or '')
+            ttk.Entry(lan_frame, textvariable=self.lan_folder_var, width=50).pack(fill=tk.X, pady=(0, 10))
+            
+            lan_buttons = ttk.Frame(lan_frame)
+            lan_buttons.pack(fill=tk.X)
+            ttk.Button(lan_buttons, text="💾 Save", bootstyle="success", command=self.save_lan_folder).pack(side=tk.RIGHT)
+            ttk.Button(lan_buttons, text="📁 Browse...", bootstyle="secondary", command=self.browse_lan_folder).pack(side=tk.RIGHT, padx=10)
+            
+            # Rolling figures from the sync_runs history
+            perf_frame = ttk.LabelFrame(tab, text="Sync Performance", padding=20)
+            perf_frame.pack(fill=tk.X, pady=(0, 20))
+            
+            self.sync_stat_labels = {}
+            rows = [
+                ('runs', "Recent syncs:"),
+                ('duration', "Duration (p50 / p90 / p99):"),
+                ('api_calls', "API calls (p50 / p90 / p99):"),
+                ('bytes', "Data transferred (p50 / p90 / p99):"),
+                ('slowest', "Slowest tables (last sync):"),
+            ]
+            for row, (key, caption) in enumerate(rows):
+                ttk.Label(perf_frame, text=caption, font=('Arial', 10, 'bold')).grid(
+                    row=row, column=0, sticky='w', padx=(0, 20), pady=3)
+                label = ttk.Label(perf_frame, text="-", font=('Arial', 10))
+                label.grid(row=row, column=1, sticky='w', pady=3)
+                self.sync_stat_labels[key] = label
+            ttk.Button(perf_frame, text="🔄 Refresh", bootstyle="info",
+                       command=self.refresh_sync_stats).grid(row=len(rows), column=1, sticky='e', pady=(10, 0))
+            
+            self.refresh_sync_stats()
+        
         # AI Integrations
         ai_frame = ttk.LabelFrame(tab, text="AI Assistant", padding=20)
         ai_frame.pack(fill=tk.X, pady=(0, 20))
@@ -88,6 +146,48 @@ class SettingsModule(ttk.Frame):
             self.google_status_label.config(text="🔴 Error", bootstyle="danger")
             messagebox.showerror("Error", f"Authentication error:\n{str(e)}")
 
+    def browse_lan_folder(self):
+        folder = filedialog.askdirectory(title="Shared sync folder")
+        if folder:
+            self.lan_folder_var.set(folder)
+
+    def save_lan_folder(self):
+        """Point local network sync at the chosen folder (or turn it off)"""
+        folder = self.lan_folder_var.get().strip()
+        if folder and not os.path.isdir(folder):
+            messagebox.showerror("Error", "That folder does not exist or cannot be reached.")
+            return
+        self.sync_manager.configure_lan_sync(folder or None)
+        if folder:
+            messagebox.showinfo("Success", "Local network sync is on.\n\nChanges made from now on are shared through this folder.")
+        else:
+            messagebox.showinfo("Success", "Local network sync is off.")
+
+    def refresh_sync_stats(self):
+        """Reload the rolling sync percentiles for the Integrations tab"""
+        try:
+            summary = self.sync_manager.telemetry.percentiles('incremental')
+            recent = self.sync_manager.telemetry.recent(1, 'incremental')
+        except Exception as e:
+            self.sync_stat_labels['runs'].config(text=f"Unavailable ({e})")
+            return
+
+        def spread(values, fmt):
+            if values[50] is None:
+                return "-"
+            return " / ".join(fmt(values[pct]) for pct in (50, 90, 99))
+
+        self.sync_stat_labels['runs'].config(
+            text=f"{summary['runs']} (last {self.sync_manager.telemetry.WINDOW}), {summary['errors']} failed")
+        self.sync_stat_labels['duration'].config(text=spread(summary['duration'], lambda v: f"{v:.1f}s"))
+        self.sync_stat_labels['api_calls'].config(text=spread(summary['api_calls'], lambda v: f"{v:.0f}"))
+        self.sync_stat_labels['bytes'].config(text=spread(summary['bytes'], format_bytes))
+
+        timings = recent[0]['table_timings'] if recent else {}
+        slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:3]
+        self.sync_stat_labels['slowest'].config(
+            text=", ".join(f"{table} {seconds:.1f}s" for table, seconds in slowest) or "-")
+
     def save_ai_key(self):
         key = self.ai_key_entry.get().strip()
         if not key:
@@ -99,6 +199,92 @@ class SettingsModule(ttk.Frame):
     def test_ai_connection(self):
         messagebox.showinfo("Test", "AI Connection Test: Success (Mock)")
 
+    def create_database_tab(self):
+        """Local Database Health Tab"""
+        tab = ttk.Frame(self.notebook, padding=10)
+        self.notebook.add(tab, text="  Database  ")
+
+        stats_frame = ttk.LabelFrame(tab, text="Local Cache", padding=20)
+        stats_frame.pack(fill=tk.X, pady=(0, 20))
+
+        self.db_stat_labels = {}
+        rows = [
+            ('db_size', "Database file:"),
+            ('wal_size', "Write-ahead log:"),
+            ('fragmentation', "Free space:"),
+            ('auto_vacuum', "Auto-vacuum:"),
+            ('last_run', "Last maintenance:"),
+        ]
+        for row, (key, caption) in enumerate(rows):
+            ttk.Label(stats_frame, text=caption, font=('Arial', 10, 'bold')).grid(
+                row=row, column=0, sticky='w', padx=(0, 20), pady=3)
+            label = ttk.Label(stats_frame, text="-", font=('Arial', 10))
+            label.grid(row=row, column=1, sticky='w', pady=3)
+            self.db_stat_labels[key] = label
+
+        ttk.Label(
+            tab,
+            text="Maintenance runs automatically after two minutes without keyboard or mouse input.",
+            font=('Arial', 9),
+            bootstyle="secondary"
+        ).pack(anchor='w', pady=(0, 10))
+
+        btn_frame = ttk.Frame(tab)
+        btn_frame.pack(fill=tk.X)
+
+        self.db_maintenance_button = ttk.Button(btn_frame, text="🧹 Run Maintenance Now", bootstyle="primary",
+                                                command=self.run_database_maintenance)
+        self.db_maintenance_button.pack(side=tk.RIGHT)
+        ttk.Button(btn_frame, text="🔄 Refresh", bootstyle="info",
+                   command=self.refresh_database_stats).pack(side=tk.RIGHT, padx=10)
+
+        self.refresh_database_stats()
+
+    def refresh_database_stats(self):
+        """Reload size and fragmentation figures for the Database tab"""
+        try:
+            stats = self.db_maintenance.database_stats()
+        except Exception as e:
+            self.db_stat_labels['db_size'].config(text=f"Unavailable ({e})")
+            return
+
+        self.db_stat_labels['db_size'].config(
+            text=f"{format_bytes(stats['db_bytes'])} ({stats['page_count']:,} pages)")
+        self.db_stat_labels['wal_size'].config(text=format_bytes(stats['wal_bytes']))
+        self.db_stat_labels['fragmentation'].config(
+            text=f"{stats['fragmentation']:.1%} ({stats['free_pages']:,} free pages)")
+        self.db_stat_labels['auto_vacuum'].config(text=stats['auto_vacuum'].capitalize())
+
+        if self.db_maintenance.last_run:
+            ran = ", ".join(task.replace('_', ' ') for task in self.db_maintenance.last_results)
+            self.db_stat_labels['last_run'].config(text=f"This session ({ran})")
+        else:
+            self.db_stat_labels['last_run'].config(text="Not yet this session")
+
+    def run_database_maintenance(self):
+        """Run every maintenance task in the background, then refresh the figures"""
+        self.db_maintenance_button.config(state='disabled')
+
+        def task():
+            results = self.db_maintenance.run_due_tasks(force=True)
+            self.after(0, lambda: self._database_maintenance_done(results))
+
+        threading.Thread(target=task, daemon=True).start()
+
+    def _database_maintenance_done(self, results):
+        if not self.winfo_exists():
+            return
+        self.db_maintenance_button.config(state='normal')
+        self.refresh_database_stats()
+
+        errors = [f"{task}: {result['error']}" for task, result in results.items() if 'error' in result]
+        if not results:
+            messagebox.showinfo("Database", "Maintenance is already running.")
+        elif errors:
+            messagebox.showerror("Database", "Some maintenance tasks failed:\n" + "\n".join(errors))
+        else:
+            messagebox.showinfo("Database", "Database maintenance complete.")
+
     def create_duty_rates_tab(self):
         """Duty Rates & SPR Configuration Tab"""
         tab = ttk.Frame(self.notebook, padding=10)
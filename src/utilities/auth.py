@@ -89,10 +89,7 @@ class AuthManager:
             self.cache.connect()
             
             # Check if username already exists
-            existing = self.cache.get_all_records(
-                'users', 
-                f"username = '{username}'"
-            )
+            existing = self.cache.find('users', where={'username': username})
             
             if existing:
                 logger.error(f"Username '{username}' already exists")
@@ -138,10 +135,7 @@ class AuthManager:
             self.cache.connect()
             
             # Get user from database
-            users = self.cache.get_all_records(
-                'users',
-                f"username = '{username}' AND is_active = 1"
-            )
+            users = self.cache.find('users', where={'username': username, 'is_active': 1})
             
             if not users:
                 logger.warning(f"Login failed: User '{username}' not found")
@@ -222,10 +216,7 @@ class AuthManager:
             self.cache.connect()
             new_password_hash = self.hash_password(new_password)
             
-            users = self.cache.get_all_records(
-                'users',
-                f"username = '{username}'"
-            )
+            users = self.cache.find('users', where={'username': username})
             
             if users:
                 user_id = users[0]['user_id']
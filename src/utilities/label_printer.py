@@ -54,7 +54,7 @@ def generate_labels_pdf(batch_data, containers, cache_manager):
     expected_abv = 0.0
 
     if batch_data.get('recipe_id'):
-        recipes = cache_manager.get_all_records('recipes', f"recipe_id = '{batch_data['recipe_id']}'")
+        recipes = cache_manager.find('recipes', where={'recipe_id': batch_data['recipe_id']})
         if recipes:
             recipe = recipes[0]
             beer_name = recipe.get('recipe_name', 'Unknown')
@@ -85,9 +85,9 @@ def verify():
     allocations = []
     remaining = qty_needed
     
-    batches = cache.get_all_records(
-        'inventory_batches', 
-        f"material_id = '{mat_id}' AND quantity_remaining > 0",
+    batches = cache.find(
+        'inventory_batches',
+        where={'material_id': mat_id, 'quantity_remaining >': 0},
         order_by='received_date ASC'
     )
     
@@ -38,4 +38,17 @@ def mock_database_path(tmp_path):
     return str(db_path)
 
 
+@pytest.fixture
+def cache_manager(mock_database_path):
+    """Provide an initialised SQLiteCacheManager backed by a temporary file."""
+    from src.data_access.sqlite_cache import SQLiteCacheManager
+
+    cache = SQLiteCacheManager(mock_database_path)
+    cache.connect()
+    cache.initialize_database()
+    cache.close()
+    yield cache
+    cache.close_all()
+
+
 # Add more fixtures as needed for different test scenarios
@@ -0,0 +1,166 @@
+"""
+End-to-end tests for local-network sync: two terminals with their own
+cache exchanging change-set files through a shared folder.
+"""
+
+import os
+import time
+
+import pytest
+
+from src.data_access.change_sets import ChangeSetFolder, ChangeSetPoller
+from src.data_access.sqlite_cache import SQLiteCacheManager
+from src.data_access.sync_manager import SyncManager
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def terminals(tmp_path):
+    """Two terminals sharing one folder; Sheets is never used."""
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    managers = []
+    for name in ('a', 'b'):
+        cache = SQLiteCacheManager(str(tmp_path / f'{name}.db'))
+        cache.connect()
+        cache.initialize_database()
+        cache.close()
+        manager = SyncManager(None, cache)
+        manager.configure_lan_sync(str(shared))
+        managers.append(manager)
+    yield managers[0], managers[1], shared
+    for manager in managers:
+        manager.cache.close_all()
+
+
+def get_record(cache, table, record_id, pk):
+    cache.connect()
+    try:
+        return cache.get_record(table, record_id, pk)
+    finally:
+        cache.close()
+
+
+def pending(cache):
+    cache.connect()
+    try:
+        return cache.pending_change_count()
+    finally:
+        cache.close()
+
+
+class TestLanSync:
+    """Test suite for SyncManager.lan_sync()."""
+
+    def test_changes_travel_both_ways(self, terminals):
+        """Test insert, update and delete reaching the other terminal, unqueued."""
+        first, second, _ = terminals
+        first.cache.upsert_many('customers', [{'customer_id': 'C1', 'customer_name': 'Pub'}])
+
+        assert first.lan_sync() == {'exported': 1, 'applied': 0}
+        assert second.lan_sync() == {'exported': 0, 'applied': 1}
+        assert get_record(second.cache, 'customers', 'C1', 'customer_id')['customer_name'] == 'Pub'
+        # The receiver does not push it to Sheets; the sender still will
+        assert pending(second.cache) == 0
+        assert pending(first.cache) == 1
+
+        second.cache.connect()
+        second.cache.update_record('customers', 'C1', {'customer_name': 'Renamed'}, 'customer_id')
+        second.cache.close()
+        second.lan_sync()
+        first.lan_sync()
+        assert get_record(first.cache, 'customers', 'C1', 'customer_id')['customer_name'] == 'Renamed'
+
+        first.cache.connect()
+        first.cache.delete_record('customers', 'C1', 'customer_id')
+        first.cache.close()
+        first.lan_sync()
+        assert second.lan_sync()['applied'] == 1
+        assert get_record(second.cache, 'customers', 'C1', 'customer_id') is None
+
+        # Nothing new either way
+        assert first.lan_sync() == {'exported': 0, 'applied': 0}
+
+    def test_conflicts_use_resolve_conflicts(self, terminals):
+        """Test that a stale remote edit does not overwrite a newer local one."""
+        first, second, _ = terminals
+        first.cache.upsert_many('recipes', [
+            {'recipe_id': 'R1', 'recipe_name': 'Old', 'last_modified': '2026-01-01 00:00:00'}
+        ])
+        second.cache.upsert_many('recipes', [
+            {'recipe_id': 'R1', 'recipe_name': 'Newer', 'last_modified': '2026-03-01 00:00:00'}
+        ])
+
+        first.lan_sync()
+        second.lan_sync()
+        first.lan_sync()
+        assert get_record(second.cache, 'recipes', 'R1', 'recipe_id')['recipe_name'] == 'Newer'
+        assert get_record(first.cache, 'recipes', 'R1', 'recipe_id')['recipe_name'] == 'Newer'
+
+    def test_change_sets_apply_in_sequence_order(self, terminals):
+        """Test that a gap in a terminal's numbering holds back later change sets."""
+        first, second, shared = terminals
+        for name in ('One', 'Two'):
+            first.cache.upsert_many('customers', [{'customer_id': 'C1', 'customer_name': name}])
+            first.lan_sync()
+
+        own = ChangeSetFolder(shared, first._terminal_id()).own_folder
+        held = own / '0000000001.json'
+        held.rename(own / 'held')
+        assert second.lan_sync()['applied'] == 0
+        assert get_record(second.cache, 'customers', 'C1', 'customer_id') is None
+
+        (own / 'held').rename(held)
+        second.lan_sync()
+        assert get_record(second.cache, 'customers', 'C1', 'customer_id')['customer_name'] == 'Two'
+
+    def test_applied_change_sets_are_pruned(self, terminals):
+        """Test that a terminal deletes its files once every peer has applied them."""
+        first, second, shared = terminals
+        own = ChangeSetFolder(shared, first._terminal_id()).own_folder
+        for i in range(3):
+            first.cache.upsert_many('customers', [{'customer_id': f'C{i}', 'customer_name': 'Pub'}])
+            first.lan_sync()
+        assert len(list(own.glob('0*.json'))) == 3
+
+        assert second.lan_sync()['applied'] == 3
+        first.cache.upsert_many('customers', [{'customer_id': 'C3', 'customer_name': 'Pub'}])
+        first.lan_sync()
+        assert sorted(path.name for path in own.glob('0*.json')) == ['0000000004.json']
+
+        second.lan_sync()
+        assert get_record(second.cache, 'customers', 'C3', 'customer_id') is not None
+
+    def test_expired_change_sets_are_skipped(self, terminals):
+        """Test that old files go even if unapplied, and the reader skips the gap."""
+        first, second, shared = terminals
+        own = ChangeSetFolder(shared, first._terminal_id()).own_folder
+        first.cache.upsert_many('customers', [{'customer_id': 'C1', 'customer_name': 'Old'}])
+        first.lan_sync()
+        expired = time.time() - ChangeSetFolder.RETENTION_SECONDS - 60
+        os.utime(own / '0000000001.json', (expired, expired))
+
+        first.cache.upsert_many('customers', [{'customer_id': 'C2', 'customer_name': 'New'}])
+        first.lan_sync()
+        assert not (own / '0000000001.json').exists()
+
+        assert second.lan_sync()['applied'] == 1
+        assert get_record(second.cache, 'customers', 'C2', 'customer_id') is not None
+        assert get_record(second.cache, 'customers', 'C1', 'customer_id') is None
+
+    def test_pollers_converge_within_a_second(self, terminals):
+        """Test that with both pollers running a change arrives in under a second."""
+        first, second, _ = terminals
+        pollers = [ChangeSetPoller(manager.lan_sync, interval=0.1) for manager in (first, second)]
+        for poller in pollers:
+            poller.start()
+        try:
+            started = time.monotonic()
+            first.cache.upsert_many('customers', [{'customer_id': 'C9', 'customer_name': 'Quick'}])
+            while get_record(second.cache, 'customers', 'C9', 'customer_id') is None:
+                assert time.monotonic() - started < 1.0, "change did not arrive within a second"
+                time.sleep(0.02)
+        finally:
+            for poller in pollers:
+                poller.stop(timeout=2)
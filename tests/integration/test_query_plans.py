@@ -0,0 +1,117 @@
+"""
+Query plan checks for the SQLite cache schema
+
+Runs EXPLAIN QUERY PLAN over the filters the GUI modules use and fails if
+any of them falls back to a full scan of a table that grows without bound.
+"""
+
+import pytest
+
+from src.config.constants import TABLES
+from src.data_access.sqlite_cache import INDEXES, PENDING_INDEX_TEMPLATE
+
+pytestmark = pytest.mark.database
+
+# Tables whose row count grows with trading history
+LARGE_TABLES = {
+    'sales', 'inventory_batches', 'inventory_transactions', 'product_sales',
+    'products', 'invoices', 'invoice_lines', 'payments', 'batches',
+    'recipe_ingredients', 'fermentation_logs', 'batch_packaging_lines',
+}
+
+# (where it comes from, query)
+GUI_QUERIES = [
+    ("delivery.load_deliveries",
+     "SELECT * FROM sales WHERE status = 'reserved' ORDER BY delivery_date ASC"),
+    ("dashboard.load_upcoming_deliveries",
+     "SELECT * FROM sales WHERE status = 'reserved' AND delivery_date >= '2026-01-01' "
+     "AND delivery_date <= '2026-01-08' ORDER BY delivery_date"),
+    ("sales_screen.view_order",
+     "SELECT * FROM sales WHERE invoice_id = 'INV-1'"),
+    ("customers.load_sales_history",
+     "SELECT * FROM sales WHERE customer_id = 'C1' AND status = 'delivered' "
+     "ORDER BY delivery_date DESC"),
+    ("invoicing.load_uninvoiced_sales",
+     "SELECT * FROM sales WHERE customer_id = 'C1' AND (invoice_id IS NULL OR invoice_id = '') "
+     "ORDER BY delivery_date DESC"),
+    ("sales_screen.delete_sale",
+     "SELECT * FROM product_sales WHERE sale_id = 'S1'"),
+    ("products.load_sales_history",
+     "SELECT * FROM v_product_sales_overview WHERE gyle_number = 'GYLE-2026-001' ORDER BY date_sold DESC"),
+    ("inventory.load_batches",
+     "SELECT * FROM inventory_batches WHERE material_id = 'M1' AND quantity_remaining > 0 "
+     "ORDER BY received_date ASC"),
+    ("inventory.load_history",
+     "SELECT * FROM inventory_transactions WHERE material_id = 'M1' "
+     "ORDER BY transaction_date DESC"),
+    ("customers.load_invoices",
+     "SELECT * FROM invoices WHERE customer_id = 'C1'"),
+    ("invoicing.load_invoices",
+     "SELECT * FROM v_invoice_overview WHERE payment_status = 'unpaid' ORDER BY invoice_date DESC"),
+    ("invoicing.view_invoice",
+     "SELECT * FROM invoice_lines WHERE invoice_id = 'INV-1'"),
+    ("dashboard.load_ready_batches",
+     "SELECT * FROM batches WHERE status = 'ready'"),
+    ("labels.load_batches",
+     "SELECT * FROM batches WHERE status IN ('ready', 'packaged') ORDER BY gyle_number DESC"),
+    ("batches.on_recipe_selected",
+     "SELECT * FROM batches WHERE recipe_id = 'R1' AND status IN ('packaged', 'completed') "
+     "ORDER BY brew_date DESC"),
+    ("batches.load_ingredients",
+     "SELECT * FROM recipe_ingredients WHERE recipe_id = 'R1'"),
+    ("products.get_product",
+     "SELECT * FROM products WHERE gyle_number = 'GYLE-2026-001'"),
+]
+
+
+def query_plan(cursor, sql):
+    """Return the detail column of EXPLAIN QUERY PLAN for a query."""
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+    return [row[3] for row in cursor.fetchall()]
+
+
+@pytest.mark.parametrize("source, sql", GUI_QUERIES, ids=[q[0] for q in GUI_QUERIES])
+def test_gui_query_does_not_scan_large_table(cache_manager, source, sql):
+    """Test that each GUI filter is answered from an index."""
+    with cache_manager.reader() as conn:
+        plan = query_plan(conn.cursor(), sql)
+
+    scans = [
+        step for step in plan
+        if step.startswith('SCAN ') and step.split()[1] in LARGE_TABLES
+    ]
+    assert not scans, f"{source} scans a large table: {plan}"
+
+
+def test_pending_sync_lookup_uses_partial_index(cache_manager):
+    """Test that every synced table answers sync_status = 'pending' from an index."""
+    with cache_manager.reader() as conn:
+        cursor = conn.cursor()
+        for table in TABLES:
+            cursor.execute(f"PRAGMA table_info({table})")
+            if 'sync_status' not in [info[1] for info in cursor.fetchall()]:
+                continue
+            plan = query_plan(cursor, f"SELECT * FROM {table} WHERE sync_status = 'pending'")
+            expected = PENDING_INDEX_TEMPLATE.format(table=table)
+            assert any(expected in step for step in plan), f"{table}: {plan}"
+
+
+def test_index_catalogue_is_reconciled(cache_manager):
+    """Test that migrations recreate changed indexes and keep undeclared ones."""
+    with cache_manager.writer() as conn:
+        conn.execute("CREATE INDEX idx_sales_legacy ON sales (notes)")
+        conn.execute("DROP INDEX idx_product_sales_gyle")
+        conn.execute("CREATE INDEX idx_product_sales_gyle ON product_sales (gyle_number)")
+        conn.execute("CREATE INDEX idx_packaging_lines_batch ON batch_packaging_lines (batch_id)")
+        conn.execute("PRAGMA user_version = 0")
+
+    cache_manager.connect()
+    cache_manager.initialize_database()
+    cache_manager.cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index'")
+    indexes = {row[0]: row[1] for row in cache_manager.cursor.fetchall()}
+    cache_manager.close()
+
+    assert 'idx_sales_legacy' in indexes
+    assert 'idx_packaging_lines_batch' not in indexes
+    assert 'date_sold' in indexes['idx_product_sales_gyle']
+    assert {name for name, _, _ in INDEXES} <= set(indexes)
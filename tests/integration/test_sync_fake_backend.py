@@ -0,0 +1,152 @@
+"""
+End-to-end sync tests: the real GoogleSheetsClient and SyncManager against
+the in-process fake Sheets backend, with two terminals sharing a spreadsheet.
+"""
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip('googleapiclient')
+
+from src.config.constants import TABLES  # noqa: E402
+from src.data_access.fake_sheets import FakeSheetsBackend, VirtualClock, make_client  # noqa: E402
+from src.data_access.rate_limiter import RateLimiter  # noqa: E402
+from src.data_access.sheet_row_index import row_hash  # noqa: E402
+from src.data_access.sheet_shards import ShardPolicy  # noqa: E402
+from src.data_access.sqlite_cache import SQLiteCacheManager  # noqa: E402
+from src.data_access.sync_manager import SyncManager  # noqa: E402
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def terminals(tmp_path):
+    """Two terminals with their own cache, sharing one fake spreadsheet."""
+    clock = VirtualClock()
+    backend = FakeSheetsBackend(quota_per_minute=60, clock=clock, sleep=clock.sleep)
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    managers = []
+    for name in ('a', 'b'):
+        cache = SQLiteCacheManager(str(tmp_path / f'{name}.db'))
+        cache.connect()
+        cache.initialize_database()
+        cache.close()
+        manager = SyncManager(make_client(backend, limiter), cache)
+        manager.check_connection = lambda: True
+        managers.append(manager)
+
+    first, second = managers
+    spreadsheet_id = first.sheets_client.create_spreadsheet(headers=first.cache.schema.sheet_headers())
+    second.sheets_client.spreadsheet_id = spreadsheet_id
+    yield backend, first, second
+    for manager in managers:
+        manager.cache.close_all()
+
+
+def recipe(cache, recipe_id):
+    cache.connect()
+    try:
+        return cache.get_record('recipes', recipe_id, 'recipe_id')
+    finally:
+        cache.close()
+
+
+class TestSyncAgainstFakeBackend:
+    """Test suite for SyncManager over the fake backend."""
+
+    def test_changes_travel_between_terminals(self, terminals):
+        """Test insert, update and delete reaching the other terminal via the log."""
+        backend, first, second = terminals
+        first.cache.upsert_many('recipes', [
+            {'recipe_id': f'R{i}', 'recipe_name': f'Beer {i}', 'last_modified': '2026-05-01 12:00:00'}
+            for i in range(20)
+        ])
+        first.incremental_sync()
+        second.incremental_sync()
+        assert recipe(second.cache, 'R7')['recipe_name'] == 'Beer 7'
+
+        first.cache.connect()
+        first.cache.update_record('recipes', 'R3', {'recipe_name': 'Renamed',
+                                                    'last_modified': '2026-05-02 09:00:00'}, 'recipe_id')
+        first.cache.delete_record('recipes', 'R4', 'recipe_id')
+        first.cache.close()
+        first.incremental_sync()
+
+        backend.reset_stats()
+        second.incremental_sync()
+        assert recipe(second.cache, 'R3')['recipe_name'] == 'Renamed'
+        assert recipe(second.cache, 'R4') is None
+        # The delta pull read the log only, not the tables
+        assert backend.stats['calls']['values.batchGet'] == 0
+
+        sheet = backend.sheet(first.sheets_client.spreadsheet_id, TABLES['recipes'])
+        ids = {row[0] for row in sheet[1:] if any(row)}
+        assert 'R4' not in ids and len(ids) == 19
+
+    def test_formatted_rows_read_back_as_pushed(self, terminals):
+        """Test that a currency-formatted price and a date hash alike after a round trip."""
+        backend, first, second = terminals
+        spreadsheet_id = first.sheets_client.spreadsheet_id
+        headers = first.cache.schema.get('products').sheet_columns
+        backend.format_column(spreadsheet_id, TABLES['products'], headers.index('retail_price'), '£{:,.2f}')
+        first.cache.upsert_many('products', [{
+            'product_id': 'P1', 'gyle_number': 'G1', 'retail_price': 1234.5, 'date_packaged': '2026-03-01',
+            'last_modified': '2026-03-01 10:15:00',
+        }])
+        first.incremental_sync()
+
+        shown = backend.get_values(spreadsheet_id, TABLES['products'])['values'][1]
+        assert shown[headers.index('retail_price')] == '£1,234.50'
+
+        row = first.sheets_client.read_sheets([TABLES['products']])[TABLES['products']][1]
+        assert row[headers.index('retail_price')] == 1234.5
+        assert row[headers.index('date_packaged')] == '2026-03-01'
+        assert first.row_index.hashes('products') == {'P1': row_hash(row)}
+
+    def test_throttling_is_absorbed(self, terminals):
+        """Test that injected 429s are retried by the client without losing data."""
+        backend, first, second = terminals
+        first.cache.upsert_many('customers', [{'customer_id': 'C1', 'customer_name': 'Pub'}])
+        backend.fail_next(429, count=2, retry_after=3)
+
+        result = first.incremental_sync()
+        assert result['pushed'] == {'synced': 1, 'failed': 0}
+        assert backend.stats['errors'][429] == 2
+
+    def test_successful_calls_report_liveness(self, terminals):
+        """Test that every successful API request calls the client's liveness hook."""
+        backend, first, second = terminals
+        calls = []
+        first.sheets_client.liveness_callback = lambda: calls.append(1)
+
+        first.sheets_client.read_column(TABLES['recipes'])
+        backend.fail_next(400)
+        with pytest.raises(Exception):
+            first.sheets_client._execute(
+                first.sheets_client.service.spreadsheets().values().get(
+                    spreadsheetId=first.sheets_client.spreadsheet_id, range='Recipes'
+                )
+            )
+        assert calls == [1]
+
+    def test_sales_are_sharded_by_year(self, terminals):
+        """Test that sales land in year shards and a closed shard is protected."""
+        backend, first, second = terminals
+        spreadsheet_id = first.sheets_client.spreadsheet_id
+        headers = first.cache.schema.get('sales').sheet_columns
+        assert first.sheets_client.ensure_sheet('Sales_2023', headers)
+        first.sheets_client.append_rows('Sales_2023', [['S0', '2023-04-01'] + [''] * (len(headers) - 2)])
+        for manager in (first, second):
+            manager.shards = ShardPolicy(today=lambda: date(2026, 6, 1))
+
+        first.cache.upsert_many('sales', [
+            {'sale_id': 'S1', 'sale_date': '2025-11-02'},
+            {'sale_id': 'S2', 'sale_date': '2026-02-03'},
+        ])
+        first.incremental_sync()
+        assert backend.sheet(spreadsheet_id, 'Sales_2025')[1][0] == 'S1'
+        assert backend.sheet(spreadsheet_id, 'Sales_2026')[1][0] == 'S2'
+
+        assert second.full_sync_from_sheets()['Sales'] == 3
+        assert second.sheets_client.list_sheets()['Sales_2023']['protected']
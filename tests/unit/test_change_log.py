@@ -0,0 +1,40 @@
+"""
+Unit tests for the _Changes change-log helpers.
+"""
+
+import json
+
+from src.data_access.change_log import CHANGE_LOG_HEADERS, ChangeLog, change_row
+
+
+class TestChangeLog:
+    """Test suite for change_row() and ChangeLog.parse()."""
+
+    def test_change_row_round_trip(self, cache_manager):
+        """Test that an upsert row carries the record's sheet columns."""
+        customers = cache_manager.schema.get('customers')
+        row = change_row('T1', customers, 'C1', {'customer_id': 'C1', 'customer_name': 'Pub'})
+
+        assert len(row) == len(CHANGE_LOG_HEADERS)
+        [event] = ChangeLog.parse([CHANGE_LOG_HEADERS, row])
+        assert event['operation'] == 'upsert'
+        assert event['record']['customer_name'] == 'Pub'
+        assert 'sync_status' not in event['record']
+
+    def test_delete_row_carries_only_the_key(self, cache_manager):
+        """Test that a deleted record is logged by primary key."""
+        customers = cache_manager.schema.get('customers')
+        row = change_row('T1', customers, 'C1')
+        assert row[4] == 'delete'
+        assert json.loads(row[6]) == {'customer_id': 'C1'}
+
+    def test_parse_skips_own_and_malformed_rows(self, cache_manager):
+        """Test that headers, own changes and broken rows are ignored."""
+        customers = cache_manager.schema.get('customers')
+        own = change_row('T1', customers, 'C1')
+        other = change_row('T2', customers, 'C2')
+        broken = ['x1', 'T2', 'customers', 'C3', 'upsert', '2026-01-01 00:00:00', '{not json']
+        unknown = ['x2', 'T2', 'customers', 'C4', 'rename', '2026-01-01 00:00:00', '{}']
+
+        events = ChangeLog.parse([CHANGE_LOG_HEADERS, own, other, broken, unknown, []], skip_terminal='T1')
+        assert [event['record_id'] for event in events] == ['C2']
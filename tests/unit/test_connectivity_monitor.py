@@ -0,0 +1,126 @@
+"""
+Unit tests for the connectivity monitor.
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.data_access.connectivity_monitor import ConnectivityMonitor
+
+pytestmark = pytest.mark.sync
+
+
+class FakeProbe:
+    """Probe returning a settable result, recording overlapping calls."""
+
+    def __init__(self, online=True):
+        self.online = online
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.005)
+        with self.lock:
+            self.active -= 1
+        return self.online
+
+
+@pytest.fixture
+def make_monitor():
+    """Build monitors with short intervals and stop them after the test."""
+    monitors = []
+
+    def factory(probe):
+        monitor = ConnectivityMonitor(probe, online_interval=0.2, offline_initial=0.01, offline_max=0.04)
+        changes = []
+        monitor.add_listener(lambda online, was_online: changes.append((online, was_online)))
+        monitors.append(monitor)
+        return monitor, changes
+
+    yield factory
+    for monitor in monitors:
+        monitor.stop(timeout=2)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class TestConnectivityMonitor:
+    """Test suite for ConnectivityMonitor."""
+
+    def test_first_result_is_not_a_reconnection(self, make_monitor):
+        """Test that the initial state is published with was_online None."""
+        monitor, changes = make_monitor(FakeProbe(online=True))
+        monitor.start()
+
+        wait_for(lambda: changes)
+        assert changes == [(True, None)]
+        assert monitor.is_online is True
+
+    def test_offline_probes_back_off(self, make_monitor):
+        """Test that offline retries double up to the cap, one probe at a time."""
+        probe = FakeProbe(online=False)
+        monitor, changes = make_monitor(probe)
+        monitor.start()
+
+        wait_for(lambda: probe.calls >= 6)
+        assert monitor.next_delay() == 0.04
+        assert probe.max_active == 1
+        assert changes == [(False, None)]
+
+        probe.online = True
+        wait_for(lambda: monitor.is_online)
+        assert changes == [(False, None), (True, False)]
+        assert monitor.next_delay() == 0.2
+
+    def test_sheets_success_counts_as_online(self, make_monitor):
+        """Test that reported successes publish reconnection and replace probes."""
+        probe = FakeProbe(online=False)
+        monitor, changes = make_monitor(probe)
+        monitor.start()
+        wait_for(lambda: monitor.is_online is False)
+
+        monitor.report_success()
+        assert changes == [(False, None), (True, False)]
+
+        calls = probe.calls
+        for _ in range(10):
+            monitor.report_success()
+            time.sleep(0.05)
+        # Still reported offline by the probe, but it was never asked
+        assert probe.calls == calls
+        assert monitor.is_online is True
+
+    def test_check_now_probes_immediately(self, make_monitor):
+        """Test that check_now() wakes the monitor during the online interval."""
+        probe = FakeProbe(online=True)
+        monitor, changes = make_monitor(probe)
+        monitor.online_interval = 30
+        monitor.start()
+        wait_for(lambda: changes)
+
+        probe.online = False
+        monitor.check_now()
+        wait_for(lambda: monitor.is_online is False)
+        assert changes == [(True, None), (False, True)]
+
+    def test_wait_for_state_returns_first_result(self, make_monitor):
+        """Test that a caller can wait for the first probe instead of probing itself."""
+        probe = FakeProbe(online=False)
+        monitor, _ = make_monitor(probe)
+        assert monitor.wait_for_state(timeout=0.01) is None
+
+        monitor.start()
+        assert monitor.wait_for_state(timeout=5) is False
@@ -0,0 +1,122 @@
+"""
+Unit tests for the background database maintenance service.
+"""
+
+import sqlite3
+
+from src.data_access.db_maintenance import DatabaseMaintenance
+
+
+class FakeClock:
+    """Monotonic clock the tests can move forward by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def fill_and_delete(cache, rows=2000):
+    cache.upsert_many('recipes', [
+        {'recipe_id': f'R{i:05d}', 'recipe_name': f'Recipe {i}', 'brewing_notes': 'x' * 2000}
+        for i in range(rows)
+    ])
+    with cache.writer() as conn:
+        conn.execute("DELETE FROM recipes")
+
+
+class TestDatabaseMaintenance:
+    """Test suite for DatabaseMaintenance."""
+
+    def test_new_database_uses_incremental_auto_vacuum(self, cache_manager):
+        """Test that fresh cache files can reclaim space without a full VACUUM."""
+        stats = DatabaseMaintenance(cache_manager).database_stats()
+        assert stats['auto_vacuum'] == 'incremental'
+        assert stats['db_bytes'] > 0
+        assert stats['page_count'] > 0
+
+    def test_checkpoint_truncates_wal(self, cache_manager):
+        """Test that a TRUNCATE checkpoint empties the -wal file."""
+        maintenance = DatabaseMaintenance(cache_manager)
+        fill_and_delete(cache_manager, rows=200)
+        assert maintenance.database_stats()['wal_bytes'] > 0
+
+        result = maintenance.checkpoint()
+        assert not result['busy']
+        assert maintenance.database_stats()['wal_bytes'] == 0
+
+    def test_optimize_runs_full_analyze_once(self, cache_manager):
+        """Test that planner statistics are created on the first run only."""
+        maintenance = DatabaseMaintenance(cache_manager)
+        assert maintenance.optimize() == {'full_analyze': True}
+        with cache_manager.reader() as conn:
+            stat_rows = conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0]
+        assert stat_rows > 0
+        assert maintenance.optimize() == {'full_analyze': False}
+
+    def test_reclaim_space_frees_pages(self, cache_manager):
+        """Test that deleted rows are handed back to the file system."""
+        maintenance = DatabaseMaintenance(cache_manager)
+        fill_and_delete(cache_manager)
+        before = maintenance.database_stats()
+        assert before['fragmentation'] > maintenance.VACUUM_FREE_FRACTION
+
+        result = maintenance.reclaim_space(max_pages=10 ** 6)
+        assert result['method'] == 'incremental'
+        assert result['freed_pages'] > 0
+        assert maintenance.database_stats()['free_pages'] == 0
+
+    def test_reclaim_space_converts_legacy_database(self, mock_database_path):
+        """Test that a database created without auto_vacuum is only converted on request."""
+        from src.data_access.sqlite_cache import SQLiteCacheManager
+
+        conn = sqlite3.connect(mock_database_path)
+        conn.execute("CREATE TABLE legacy (id INTEGER)")
+        conn.close()
+        cache = SQLiteCacheManager(mock_database_path)
+        cache.connect()
+        cache.initialize_database()
+        cache.close()
+        maintenance = DatabaseMaintenance(cache)
+        assert maintenance.database_stats()['auto_vacuum'] == 'none'
+
+        # The idle scheduler never rewrites the whole file
+        assert maintenance.reclaim_space()['method'] == 'skipped'
+        assert maintenance.database_stats()['auto_vacuum'] == 'none'
+
+        assert maintenance.run_due_tasks(force=True)['reclaim_space']['method'] == 'vacuum'
+        assert maintenance.database_stats()['auto_vacuum'] == 'incremental'
+        cache.close_all()
+
+    def test_tasks_follow_their_intervals(self, cache_manager):
+        """Test that each task is only repeated once its interval has passed."""
+        clock = FakeClock()
+        maintenance = DatabaseMaintenance(cache_manager, clock=clock)
+
+        assert set(maintenance.run_due_tasks()) == {'checkpoint', 'optimize'}
+        assert maintenance.run_due_tasks() == {}
+
+        clock.now += maintenance.CHECKPOINT_INTERVAL
+        assert list(maintenance.run_due_tasks()) == ['checkpoint']
+
+        clock.now += maintenance.OPTIMIZE_INTERVAL
+        assert set(maintenance.run_due_tasks()) == {'checkpoint', 'optimize'}
+
+    def test_vacuum_only_when_fragmented(self, cache_manager):
+        """Test that space is only reclaimed past the free-page threshold."""
+        maintenance = DatabaseMaintenance(cache_manager, clock=FakeClock())
+        assert 'reclaim_space' not in maintenance.due_tasks()
+
+        fill_and_delete(cache_manager)
+        assert 'reclaim_space' in maintenance.due_tasks()
+
+    def test_large_wal_forces_checkpoint(self, cache_manager):
+        """Test that a WAL past the size limit is checkpointed early."""
+        clock = FakeClock()
+        maintenance = DatabaseMaintenance(cache_manager, clock=clock)
+        maintenance.run_due_tasks()
+
+        stats = maintenance.database_stats()
+        stats['wal_bytes'] = maintenance.WAL_CHECKPOINT_BYTES + 1
+        assert maintenance.due_tasks(stats) == ['checkpoint']
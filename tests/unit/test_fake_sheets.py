@@ -0,0 +1,124 @@
+"""
+Unit tests for the in-process fake Google Sheets backend.
+"""
+
+import pytest
+
+from src.data_access.fake_sheets import FakeSheetsBackend, VirtualClock, parse_range
+
+
+def new_spreadsheet(backend, *titles):
+    service = backend.service()
+    body = {'sheets': [{'properties': {'title': title}} for title in titles]}
+    return service, service.spreadsheets().create(body=body).execute()['spreadsheetId']
+
+
+class TestFakeSheetsBackend:
+    """Test suite for FakeSheetsBackend."""
+
+    def test_parse_range(self):
+        """Test the A1 forms GoogleSheetsClient sends."""
+        assert parse_range('Sales') == ('Sales', 1, 1, None, None)
+        assert parse_range('Sales!A5:G') == ('Sales', 5, 1, None, 7)
+        assert parse_range('Sales!7:7') == ('Sales', 7, 1, 7, None)
+        assert parse_range('Sales!B:B') == ('Sales', 1, 2, None, 2)
+        assert parse_range("'Sales'!AA3") == ('Sales', 3, 27, 3, 27)
+
+    def test_values_round_trip(self):
+        """Test append, update, clear and get behave like the API."""
+        backend = FakeSheetsBackend()
+        service, spreadsheet_id = new_spreadsheet(backend, 'Sales')
+        values = service.spreadsheets().values()
+
+        values.update(spreadsheetId=spreadsheet_id, range='Sales!A1',
+                      body={'values': [['sale_id', 'quantity']]}).execute()
+        appended = values.append(spreadsheetId=spreadsheet_id, range='Sales',
+                                 body={'values': [['S1', 2.0], ['S2', None], ['S3', 1.5]]}).execute()
+        assert appended['updates']['updatedRange'] == 'Sales!A2:B4'
+
+        values.batchClear(spreadsheetId=spreadsheet_id, body={'ranges': ['Sales!3:3']}).execute()
+        result = values.get(spreadsheetId=spreadsheet_id, range='Sales').execute()
+        assert result['values'] == [['sale_id', 'quantity'], ['S1', '2'], [], ['S3', '1.5']]
+
+        column = values.get(spreadsheetId=spreadsheet_id, range='Sales!A3:B').execute()
+        assert column['values'] == [[], ['S3', '1.5']]
+
+    def test_user_entered_values_and_render_options(self):
+        """Test that USER_ENTERED parses numbers and dates and reads render them as asked."""
+        backend = FakeSheetsBackend()
+        service, spreadsheet_id = new_spreadsheet(backend, 'Sales')
+        values = service.spreadsheets().values()
+        values.append(spreadsheetId=spreadsheet_id, range='Sales', valueInputOption='USER_ENTERED',
+                      body={'values': [['S1', '2026-03-01', '1234.5', '2']]}).execute()
+        backend.format_column(spreadsheet_id, 'Sales', 2, '£{:,.2f}')
+
+        shown = values.get(spreadsheetId=spreadsheet_id, range='Sales').execute()
+        assert shown['values'] == [['S1', '2026-03-01', '£1,234.50', '2']]
+        raw = values.get(spreadsheetId=spreadsheet_id, range='Sales',
+                         valueRenderOption='UNFORMATTED_VALUE').execute()
+        assert raw['values'] == [['S1', 46082.0, 1234.5, 2]]
+        read = values.batchGet(spreadsheetId=spreadsheet_id, ranges=['Sales'],
+                               valueRenderOption='UNFORMATTED_VALUE',
+                               dateTimeRenderOption='FORMATTED_STRING').execute()
+        assert read['valueRanges'][0]['values'] == [['S1', '2026-03-01', 1234.5, 2]]
+
+    def test_append_reuses_trailing_blank_rows(self):
+        """Test that appends land after the last row holding data."""
+        backend = FakeSheetsBackend()
+        service, spreadsheet_id = new_spreadsheet(backend, 'Sales')
+        values = service.spreadsheets().values()
+        values.append(spreadsheetId=spreadsheet_id, range='Sales',
+                      body={'values': [['h'], ['S1'], ['S2']]}).execute()
+        values.clear(spreadsheetId=spreadsheet_id, range='Sales!3:3').execute()
+
+        appended = values.append(spreadsheetId=spreadsheet_id, range='Sales',
+                                 body={'values': [['S3']]}).execute()
+        assert appended['updates']['updatedRange'] == 'Sales!A3:A3'
+
+    def test_missing_sheet_is_a_400(self):
+        """Test that unknown sheets fail the way the client expects."""
+        backend = FakeSheetsBackend()
+        service, spreadsheet_id = new_spreadsheet(backend, 'Sales')
+
+        with pytest.raises(Exception) as raised:
+            service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range='Nope!A:A').execute()
+        assert 'HttpError 400' in str(raised.value)
+        assert 'Unable to parse range' in str(raised.value)
+
+    def test_quota_and_fault_injection(self):
+        """Test that excess requests get a 429 until the minute rolls over."""
+        clock = VirtualClock()
+        backend = FakeSheetsBackend(quota_per_minute=3, retry_after=5, clock=clock, sleep=clock.sleep)
+        service, spreadsheet_id = new_spreadsheet(backend, 'Sales')
+        get = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range='Sales')
+
+        for _ in range(3):
+            get.execute()
+        with pytest.raises(Exception) as raised:
+            get.execute()
+        assert raised.value.resp.status == 429
+        assert raised.value.resp['retry-after'] == '5'
+
+        clock.sleep(60)
+        get.execute()
+        backend.fail_next(503)
+        with pytest.raises(Exception):
+            get.execute()
+        assert backend.stats['errors'] == {429: 1, 503: 1}
+
+    def test_stats_count_calls_and_bytes(self):
+        """Test that reads, writes and payload sizes are recorded."""
+        clock = VirtualClock()
+        backend = FakeSheetsBackend(latency=0.25, clock=clock, sleep=clock.sleep)
+        service, spreadsheet_id = new_spreadsheet(backend, 'Sales')
+        backend.reset_stats()
+
+        service.spreadsheets().values().append(
+            spreadsheetId=spreadsheet_id, range='Sales', body={'values': [['x' * 100]]}
+        ).execute()
+        service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range='Sales').execute()
+
+        assert backend.stats['reads'] == 1 and backend.stats['writes'] == 1
+        assert backend.stats['calls'] == {'values.append': 1, 'values.get': 1}
+        assert backend.stats['bytes_sent'] > 100 and backend.stats['bytes_received'] > 100
+        assert clock.now == pytest.approx(0.75)
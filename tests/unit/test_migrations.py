@@ -0,0 +1,149 @@
+"""
+Unit tests for the versioned schema migrations.
+"""
+
+import sqlite3
+
+import pytest
+
+from src.data_access import migrations
+from src.data_access import sqlite_cache as cache_module
+from src.data_access.migrations import SCHEMA_VERSION, get_schema_version
+from src.data_access.sqlite_cache import SQLiteCacheManager
+
+
+def initialize(db_path):
+    cache = SQLiteCacheManager(db_path)
+    cache.connect()
+    result = cache.initialize_database()
+    cache.close()
+    return cache, result
+
+
+class TestMigrations:
+    """Test suite for the PRAGMA user_version migration runner."""
+
+    def test_fresh_database_reaches_current_version(self, cache_manager):
+        """Test that a new database gets every migration and late column."""
+        with cache_manager.reader() as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(customers)")}
+            packaging = {row[1] for row in conn.execute("PRAGMA table_info(batch_packaging_lines)")}
+            seeded = conn.execute("SELECT COUNT(*) FROM settings_containers").fetchone()[0]
+        assert 'delivery_area' in columns
+        assert 'fill_number' in packaging
+        assert seeded > 0
+
+    def test_list_views_join_display_names(self, cache_manager):
+        """Test that the list views return each row with its joined names in one query."""
+        cache_manager.upsert_many('recipes', [
+            {'recipe_id': 'R1', 'recipe_name': 'Pale', 'target_abv': 4.2, 'target_batch_size_litres': 800},
+        ])
+        cache_manager.upsert_many('batches', [
+            {'batch_id': 'B1', 'gyle_number': 'G1', 'recipe_id': 'R1', 'brew_date': '2026-02-01',
+             'status': 'fermenting'},
+            {'batch_id': 'B2', 'gyle_number': 'G2', 'recipe_id': 'GONE', 'brew_date': '2026-03-01',
+             'status': 'fermenting'},
+        ])
+        cache_manager.upsert_many('customers', [{'customer_id': 'C1', 'customer_name': 'The Crown'}])
+        cache_manager.upsert_many('invoices', [
+            {'invoice_id': 'I1', 'invoice_number': 'INV-1', 'customer_id': 'C1', 'payment_status': 'unpaid'},
+        ])
+
+        cache_manager.connect()
+        try:
+            batches = cache_manager.find('v_batch_overview', where={'status': 'fermenting'},
+                                         order_by='brew_date DESC')
+            invoices = cache_manager.find('v_invoice_overview', where={'payment_status': 'unpaid'})
+        finally:
+            cache_manager.close()
+        assert [(b['batch_id'], b['recipe_name']) for b in batches] == [('B2', None), ('B1', 'Pale')]
+        assert (batches[1]['expected_abv'], batches[1]['recipe_batch_size']) == (4.2, 800)
+        assert invoices[0]['customer_name'] == 'The Crown'
+
+    def test_warm_start_only_reads_user_version(self, cache_manager):
+        """Test that a current database does no schema work at all."""
+        statements = []
+        cache_manager.connect()
+        cache_manager.connection.set_trace_callback(statements.append)
+        try:
+            assert cache_manager.initialize_database()
+        finally:
+            cache_manager.connection.set_trace_callback(None)
+            cache_manager.close()
+        assert statements == ["PRAGMA user_version"]
+
+    def test_unversioned_database_is_upgraded(self, mock_database_path):
+        """Test that a pre-versioning database gains late columns and legacy batches."""
+        conn = sqlite3.connect(mock_database_path)
+        conn.executescript('''
+            CREATE TABLE customers (customer_id TEXT PRIMARY KEY, customer_name TEXT NOT NULL,
+                                    sync_status TEXT DEFAULT 'synced');
+            CREATE TABLE inventory_materials (material_id TEXT PRIMARY KEY, material_type TEXT,
+                                              material_name TEXT UNIQUE NOT NULL,
+                                              current_stock REAL DEFAULT 0, unit TEXT,
+                                              last_updated TEXT, sync_status TEXT DEFAULT 'synced');
+            INSERT INTO customers VALUES ('C1', 'The Crown', 'synced');
+            INSERT INTO inventory_materials VALUES ('M1', 'grain', 'Maris Otter', 25, 'kg',
+                                                    '2024-01-01', 'synced');
+        ''')
+        conn.close()
+
+        cache, result = initialize(mock_database_path)
+        assert result
+        with cache.reader() as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(customers)")}
+            legacy = conn.execute(
+                "SELECT batch_number, quantity_remaining FROM inventory_batches WHERE material_id = 'M1'"
+            ).fetchall()
+        cache.close_all()
+
+        assert 'delivery_area' in columns
+        assert [tuple(row) for row in legacy] == [('LEGACY-STOCK', 25)]
+
+    def test_old_script_data_rewrites_are_applied(self, cache_manager):
+        """Test that batch statuses are folded and empties copied into container_types."""
+        with cache_manager.writer() as conn:
+            conn.execute("INSERT INTO batches (batch_id, gyle_number, status) "
+                         "VALUES ('B1', 'G1', 'conditioning')")
+            conn.execute("INSERT INTO casks_empty (cask_id, cask_size, cask_size_litres, quantity_in_stock) "
+                         "VALUES ('K1', 'Firkin', 40.9, 12)")
+            conn.execute("INSERT INTO bottles_empty (bottle_id, bottle_size_ml, quantity_in_stock) "
+                         "VALUES ('BT1', 330, 200)")
+            migrations._fold_batch_statuses(conn.cursor())
+            migrations._copy_empties_to_container_types(conn.cursor())
+            status = conn.execute("SELECT status, sync_status FROM batches").fetchone()
+            containers = conn.execute(
+                "SELECT container_type_id, name, size_litres, category, quantity_available "
+                "FROM container_types ORDER BY container_type_id"
+            ).fetchall()
+
+        assert tuple(status) == ('fermenting', 'pending')
+        assert [tuple(row) for row in containers] == [
+            ('BT1', '330ml Bottle', 0.33, 'Bottle', 200),
+            ('K1', 'Firkin', 40.9, 'Cask', 12),
+        ]
+
+    def test_failed_migration_keeps_last_good_version(self, mock_database_path, monkeypatch):
+        """Test that a failing step rolls back and is retried next launch."""
+        def broken(cursor):
+            cursor.execute("CREATE TABLE half_done (id INTEGER)")
+            raise sqlite3.OperationalError("boom")
+
+        failing = migrations.MIGRATIONS + [(SCHEMA_VERSION + 1, "Broken", broken)]
+        monkeypatch.setattr(migrations, 'MIGRATIONS', failing)
+        monkeypatch.setattr(cache_module, 'SCHEMA_VERSION', SCHEMA_VERSION + 1)
+
+        cache, result = initialize(mock_database_path)
+        assert not result
+        with cache.reader() as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        cache.close_all()
+        assert 'half_done' not in tables
+
+    def test_versions_are_strictly_increasing(self):
+        """Test that the migration list has no gaps or reordering."""
+        versions = [version for version, _, _ in migrations.MIGRATIONS]
+        assert versions == list(range(1, len(versions) + 1))
@@ -0,0 +1,163 @@
+"""
+Unit tests for the Sheets API rate limiter, driven by a fake clock.
+"""
+
+import pytest
+
+from src.data_access.rate_limiter import RateLimiter, classify_error
+
+
+class FakeClock:
+    """Clock whose sleep() just moves time forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+class FakeResponse(dict):
+    """Stands in for httplib2.Response: a dict of headers with a status."""
+
+    def __init__(self, status, headers=None):
+        super().__init__(headers or {})
+        self.status = status
+
+
+class FakeHttpError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HttpError {status}")
+        self.resp = FakeResponse(status, headers)
+
+
+def make_limiter(clock, per_minute=60, rand=lambda: 1.0, **kwargs):
+    return RateLimiter({'read': per_minute, 'write': per_minute},
+                       clock=clock, sleep=clock.sleep, rand=rand, **kwargs)
+
+
+def flaky(errors, result='ok'):
+    """Callable that raises the given errors in turn, then returns result."""
+    errors = list(errors)
+
+    def call():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return call
+
+
+class TestRateLimiter:
+    """Test suite for RateLimiter."""
+
+    def test_burst_then_paced_at_quota(self):
+        """Test that a short burst goes straight out, then requests are paced."""
+        clock = FakeClock()
+        limiter = make_limiter(clock, per_minute=60)
+
+        for _ in range(10):
+            limiter.acquire('read')
+        assert clock.sleeps == []
+
+        limiter.acquire('read')
+        limiter.acquire('read')
+        assert clock.sleeps == [1.2, 1.2]
+
+    def test_no_minute_exceeds_quota(self):
+        """Test that any rolling 60 seconds holds at most the quota."""
+        clock = FakeClock()
+        limiter = make_limiter(clock, per_minute=60)
+        sent = []
+        for _ in range(300):
+            limiter.acquire('write')
+            sent.append(clock.now)
+
+        busiest = max(sum(1 for t in sent if start <= t < start + 60) for start in sent)
+        assert busiest <= 60
+
+    def test_read_and_write_budgets_are_separate(self):
+        """Test that exhausting reads does not delay writes."""
+        clock = FakeClock()
+        limiter = make_limiter(clock, per_minute=60)
+        for _ in range(10):
+            limiter.acquire('read')
+        limiter.acquire('write')
+        assert clock.sleeps == []
+        assert limiter.remaining('read') == pytest.approx(0)
+
+    def test_exponential_backoff_with_jitter(self):
+        """Test that delays double per attempt, scaled by the jitter source."""
+        clock = FakeClock()
+        limiter = make_limiter(clock, rand=lambda: 0.5, base_delay=1.0)
+
+        result = limiter.call(flaky([FakeHttpError(503)] * 3))
+        assert result == 'ok'
+        assert clock.sleeps == [0.5, 1.0, 2.0]
+
+    def test_backoff_is_capped(self):
+        """Test that no single delay exceeds max_delay."""
+        limiter = make_limiter(FakeClock(), max_delay=10.0)
+        assert limiter.backoff_delay(10) == 10.0
+
+    def test_retry_after_is_honoured(self):
+        """Test that a 429's Retry-After sets the wait and blocks other callers."""
+        clock = FakeClock()
+        limiter = make_limiter(clock)
+
+        assert limiter.call(flaky([FakeHttpError(429, {'retry-after': '7'})])) == 'ok'
+        assert clock.sleeps == [7.0]
+        assert limiter.throttled_count == 1
+
+    def test_throttle_drains_budget(self):
+        """Test that after a 429 the limiter reports no budget until the wait passes."""
+        clock = FakeClock()
+        limiter = make_limiter(clock, max_retries=0)
+
+        with pytest.raises(FakeHttpError):
+            limiter.call(flaky([FakeHttpError(429, {'retry-after': '30'})]))
+        assert limiter.is_budget_low()
+        clock.now += 60
+        assert not limiter.is_budget_low()
+
+    def test_gives_up_after_max_retries(self):
+        """Test that the last error is raised once retries run out."""
+        clock = FakeClock()
+        limiter = make_limiter(clock, max_retries=2)
+
+        with pytest.raises(FakeHttpError):
+            limiter.call(flaky([FakeHttpError(500)] * 5))
+        assert len(clock.sleeps) == 2
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 400 fails immediately without waiting."""
+        clock = FakeClock()
+        limiter = make_limiter(clock)
+
+        with pytest.raises(FakeHttpError):
+            limiter.call(flaky([FakeHttpError(400)]))
+        assert clock.sleeps == []
+
+    def test_budget_fraction_tracks_usage(self):
+        """Test that the remaining budget falls with use and refills over time."""
+        clock = FakeClock()
+        limiter = make_limiter(clock, per_minute=60)
+        assert limiter.budget_fraction() == 1.0
+
+        for _ in range(9):
+            limiter.acquire('write')
+        assert limiter.is_budget_low()
+        clock.now += 6
+        assert limiter.budget_fraction() == pytest.approx(0.6)
+
+    def test_classify_error(self):
+        """Test which failures count as transient."""
+        assert classify_error(FakeHttpError(429, {'retry-after': '2.5'})) == (True, 2.5)
+        assert classify_error(FakeHttpError(502)) == (True, None)
+        assert classify_error(FakeHttpError(404)) == (False, None)
+        assert classify_error(ConnectionResetError()) == (True, None)
+        assert classify_error(ValueError()) == (False, None)
@@ -0,0 +1,51 @@
+"""
+Unit tests for SchemaRegistry
+
+Tests the schema facts loaded from the local cache.
+"""
+
+from src.config.constants import TABLES
+
+
+class TestSchemaRegistry:
+    """Test suite for SchemaRegistry."""
+
+    def test_primary_keys_read_from_schema(self, cache_manager):
+        """Test PKs that the old strip-an-'s' guess got wrong."""
+        schema = cache_manager.schema
+        assert schema.primary_key('casks_empty') == 'cask_id'
+        assert schema.primary_key('sales_calendar') == 'event_id'
+        assert schema.primary_key('batch_packaging_lines') == 'line_id'
+        assert schema.primary_key('system_settings') == 'setting_key'
+        assert schema.primary_key('no_such_table') == 'id'
+
+    def test_every_sheet_table_is_registered(self, cache_manager):
+        """Test that every table mirrored to Sheets has a registry entry."""
+        schema = cache_manager.schema
+        for table in TABLES:
+            assert table in schema
+            assert schema.get(table).sheet_name == TABLES[table]
+        assert len(schema.synced_tables()) == len(TABLES)
+
+    def test_sheet_row_follows_schema_order(self, cache_manager):
+        """Test rows are built in header order regardless of dict order."""
+        table = cache_manager.schema.get('customers')
+        record = {'customer_name': 'The Crown', 'sync_status': 'pending', 'customer_id': 'C1'}
+        row = table.to_sheet_row(record)
+
+        assert 'sync_status' not in table.sheet_columns
+        assert len(row) == len(table.sheet_columns)
+        assert row[table.sheet_columns.index('customer_id')] == 'C1'
+        assert row[table.sheet_columns.index('customer_name')] == 'The Crown'
+        assert cache_manager.schema.sheet_headers()['Customers'] == table.sheet_columns
+
+    def test_mark_for_sync_uses_registered_key(self, cache_manager):
+        """Test mark_for_sync on a table whose PK is not <table>_id."""
+        cache_manager.upsert_many('casks_empty', [
+            {'cask_id': 'K1', 'cask_size': 'firkin', 'sync_status': 'synced'}
+        ])
+        cache_manager.connect()
+        cache_manager.mark_for_sync('casks_empty', 'K1')
+        record = cache_manager.get_record('casks_empty', 'K1', 'cask_id')
+        cache_manager.close()
+        assert record['sync_status'] == 'pending'
@@ -0,0 +1,55 @@
+"""
+Unit tests for the local sheet row index.
+"""
+
+from src.data_access.sheet_row_index import SheetRowIndex, row_hash
+
+
+def ids(*values):
+    return ['customer_id'] + list(values)
+
+
+class TestSheetRowIndex:
+    """Test suite for SheetRowIndex."""
+
+    def test_row_hash_matches_values_read_back(self):
+        """Test that a pushed row hashes the same as the text Sheets returns."""
+        assert row_hash(['C1', 95.0, 40.9, None, '']) == row_hash(['C1', '95', '40.9'])
+        assert row_hash(['C1', 95.5]) != row_hash(['C1', '95'])
+
+    def test_rebuild_and_lookup(self, cache_manager):
+        """Test that blank rows are skipped and the first duplicate wins."""
+        index = SheetRowIndex(cache_manager)
+        index.rebuild('customers', ids('C1', '', 'C2', 'C1'))
+
+        assert index.row_count('customers') == 5
+        assert index.lookup('customers', ['C1', 'C2', 'C3']) == {'C1': (2, None), 'C2': (4, None)}
+
+    def test_verify_indexes_rows_appended_by_others(self, cache_manager):
+        """Test that a sheet that only grew keeps its entries and gains the new rows."""
+        index = SheetRowIndex(cache_manager)
+        index.rebuild('customers', ids('C1', 'C2'))
+        index.record('customers', {'C1': (2, 'hash-1')})
+
+        assert index.verify('customers', ids('C1', 'C2', 'C3'))
+        assert index.lookup('customers', ['C1', 'C3']) == {'C1': (2, 'hash-1'), 'C3': (4, None)}
+        assert index.hashes('customers') == {'C1': 'hash-1'}
+
+    def test_verify_rebuilds_after_hand_edits(self, cache_manager):
+        """Test that moved rows are detected and re-indexed."""
+        index = SheetRowIndex(cache_manager)
+        index.rebuild('customers', ids('C1', 'C2', 'C3'))
+
+        assert not index.verify('customers', ids('C3', 'C1', 'C2'))
+        assert index.lookup('customers', ['C1', 'C2', 'C3']) == {
+            'C3': (2, None), 'C1': (3, None), 'C2': (4, None)
+        }
+
+    def test_invalidate(self, cache_manager):
+        """Test that an invalidated table has no index at all."""
+        index = SheetRowIndex(cache_manager)
+        index.rebuild('customers', ids('C1'))
+        index.invalidate('customers')
+
+        assert index.row_count('customers') is None
+        assert index.lookup('customers', ['C1']) == {}
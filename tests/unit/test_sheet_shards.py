@@ -0,0 +1,42 @@
+"""
+Unit tests for per-year sheet sharding.
+"""
+
+from datetime import date
+
+import pytest
+
+from src.data_access.sheet_shards import ShardPolicy
+
+pytestmark = pytest.mark.sync
+
+
+@pytest.fixture
+def policy():
+    return ShardPolicy(today=lambda: date(2026, 10, 17))
+
+
+class TestShardPolicy:
+    """Test suite for ShardPolicy."""
+
+    def test_only_recent_years_are_open(self, policy):
+        """Test that the current and previous year are open and older ones closed."""
+        assert policy.open_years() == [2025, 2026]
+        assert policy.is_closed(2024)
+        assert not policy.is_closed(2025)
+        assert ShardPolicy(open_years=1, today=policy.today).open_years() == [2026]
+
+    def test_record_year_comes_from_its_date_column(self, policy):
+        """Test ISO and day-first dates, and the fallback to the current year."""
+        assert policy.year_of('sales', {'sale_date': '2023-02-01'}) == 2023
+        assert policy.year_of('product_sales', {'date_sold': '01/02/2024'}) == 2024
+        assert policy.year_of('inventory_transactions', {'transaction_date': '2025-12-31 23:59:00'}) == 2025
+        assert policy.year_of('sales', {'sale_date': ''}) == 2026
+        assert policy.year_of('sales', {}) == 2026
+
+    def test_shards_are_found_by_title(self, policy):
+        """Test that only exact year shards of the table are picked up."""
+        titles = ['Sales', 'Sales_2025', 'Sales_2026', 'Sales_Backup', 'Product_Sales_2026']
+        assert policy.sheet('sales', 2026) == 'Sales_2026'
+        assert policy.shards_in('sales', titles) == {2025: 'Sales_2025', 2026: 'Sales_2026'}
+        assert not policy.is_sharded('recipes')
@@ -0,0 +1,403 @@
+"""
+Unit tests for SQLiteCacheManager
+
+Tests connection pooling and thread isolation of the local cache.
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from src.data_access.sqlite_cache import SQLiteCacheManager
+
+
+class TestConnectionPool:
+    """Test suite for per-thread pooled connections."""
+
+    def test_close_is_nested(self, cache_manager):
+        """Test that an inner close() does not release the outer checkout."""
+        cache_manager.connect()
+        conn = cache_manager.connection
+        cache_manager.connect()
+        cache_manager.close()
+        assert cache_manager.connection is conn
+        cache_manager.cursor.execute("SELECT 1")
+        cache_manager.close()
+        assert cache_manager.connection is None
+
+    def test_connection_is_reused(self, cache_manager):
+        """Test that a released connection is handed out again."""
+        cache_manager.connect()
+        first = cache_manager.connection
+        cache_manager.close()
+        cache_manager.connect()
+        assert cache_manager.connection is first
+        cache_manager.close()
+
+    def test_other_thread_close_does_not_affect_caller(self, cache_manager):
+        """Test that a sync thread closing its connection leaves the UI's open."""
+        cache_manager.connect()
+        ui_conn = cache_manager.connection
+
+        def background():
+            cache_manager.connect()
+            assert cache_manager.connection is not ui_conn
+            cache_manager.get_all_records('batches')
+            cache_manager.close()
+
+        worker = threading.Thread(target=background)
+        worker.start()
+        worker.join()
+
+        assert cache_manager.connection is ui_conn
+        cache_manager.cursor.execute("SELECT COUNT(*) FROM batches")
+        assert cache_manager.cursor.fetchone()[0] == 0
+        cache_manager.close()
+
+    def test_writer_commits_and_reader_sees_it(self, cache_manager):
+        """Test scoped writer commit is visible to a reader on another thread."""
+        with cache_manager.writer() as conn:
+            conn.execute(
+                "INSERT INTO customers (customer_id, customer_name) VALUES (?, ?)",
+                ('C1', 'The Crown'),
+            )
+
+        seen = []
+
+        def read():
+            with cache_manager.reader() as conn:
+                seen.append(conn.execute("SELECT customer_name FROM customers").fetchone()[0])
+
+        worker = threading.Thread(target=read)
+        worker.start()
+        worker.join()
+        assert seen == ['The Crown']
+
+    def test_writer_rolls_back_on_error(self, cache_manager):
+        """Test that an exception inside writer() leaves no partial write."""
+        with pytest.raises(RuntimeError):
+            with cache_manager.writer() as conn:
+                conn.execute(
+                    "INSERT INTO customers (customer_id, customer_name) VALUES (?, ?)",
+                    ('C2', 'The Plough'),
+                )
+                raise RuntimeError("boom")
+
+        with cache_manager.reader() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0] == 0
+
+    def test_close_all_empties_pool(self, mock_database_path):
+        """Test that close_all() closes idle pooled connections."""
+        cache = SQLiteCacheManager(mock_database_path)
+        cache.connect()
+        cache.close()
+        assert cache._pool.idle_count == 1
+        cache.close_all()
+        assert cache._pool.idle_count == 0
+
+
+class TestTransactions:
+    """Test suite for the transaction() unit-of-work API."""
+
+    def count(self, cache, table):
+        with cache.reader() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_commit_deferred_to_end_of_block(self, cache_manager):
+        """Test that rows written in a block are invisible to others until exit."""
+        seen = []
+
+        def other_thread():
+            seen.append(self.count(cache_manager, 'customers'))
+
+        with cache_manager.transaction():
+            for i in range(3):
+                cache_manager.insert_record(
+                    'customers', {'customer_id': f'C{i}', 'customer_name': f'Pub {i}'}
+                )
+            worker = threading.Thread(target=other_thread)
+            worker.start()
+            worker.join()
+
+        assert seen == [0]
+        assert self.count(cache_manager, 'customers') == 3
+
+    def test_failure_rolls_back_whole_block(self, cache_manager):
+        """Test that a failing write inside the block undoes earlier writes."""
+        with pytest.raises(Exception):
+            with cache_manager.transaction():
+                cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+                cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'B'})
+
+        assert self.count(cache_manager, 'customers') == 0
+        assert cache_manager.connection is None
+
+    def test_nested_savepoint_rolls_back_independently(self, cache_manager):
+        """Test that an inner block can fail without losing the outer work."""
+        with cache_manager.transaction():
+            cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+            with pytest.raises(RuntimeError):
+                with cache_manager.transaction():
+                    cache_manager.insert_record('customers', {'customer_id': 'C2', 'customer_name': 'B'})
+                    raise RuntimeError("inner failure")
+
+        with cache_manager.reader() as conn:
+            ids = [row[0] for row in conn.execute("SELECT customer_id FROM customers")]
+        assert ids == ['C1']
+
+    def test_exclusive_holds_off_writers_outside_a_transaction(self, cache_manager):
+        """Test that exclusive() keeps other writers waiting and allows VACUUM."""
+        def other_thread():
+            with cache_manager.writer() as conn:
+                conn.execute("INSERT INTO customers (customer_id, customer_name) VALUES ('C1', 'A')")
+
+        with cache_manager.exclusive() as conn:
+            worker = threading.Thread(target=other_thread)
+            worker.start()
+            worker.join(0.2)
+            assert worker.is_alive()
+            conn.execute("VACUUM")
+        worker.join()
+        assert self.count(cache_manager, 'customers') == 1
+
+        with pytest.raises(sqlite3.OperationalError):
+            with cache_manager.transaction():
+                with cache_manager.exclusive():
+                    pass
+
+    def test_record_helpers_still_autocommit_outside_block(self, cache_manager):
+        """Test that insert_record keeps its commit-per-call behaviour outside a block."""
+        cache_manager.connect()
+        assert cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+        assert not cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+        cache_manager.close()
+        assert self.count(cache_manager, 'customers') == 1
+
+
+class TestUpsertMany:
+    """Test suite for the bulk upsert API."""
+
+    def test_counts_inserted_updated_unchanged(self, cache_manager):
+        """Test that upsert_many reports what it did to each row."""
+        rows = [{'customer_id': f'C{i}', 'customer_name': f'Pub {i}'} for i in range(5)]
+        assert cache_manager.upsert_many('customers', rows) == {
+            'inserted': 5, 'updated': 0, 'unchanged': 0
+        }
+
+        rows[0]['customer_name'] = 'Renamed'
+        rows.append({'customer_id': 'C9', 'customer_name': 'New'})
+        assert cache_manager.upsert_many('customers', rows, key='customer_id') == {
+            'inserted': 1, 'updated': 1, 'unchanged': 4
+        }
+
+        cache_manager.connect()
+        assert cache_manager.get_record('customers', 'C0', 'customer_id')['customer_name'] == 'Renamed'
+        cache_manager.close()
+
+    def test_ignores_columns_missing_from_table(self, cache_manager):
+        """Test that extra sheet columns do not break the upsert."""
+        result = cache_manager.upsert_many(
+            'customers', [{'customer_id': 'C1', 'customer_name': 'A', 'not_a_column': 'x'}]
+        )
+        assert result['inserted'] == 1
+
+    def test_missing_key_rolls_back(self, cache_manager):
+        """Test that a row without the key column aborts the whole batch."""
+        rows = [
+            {'customer_id': 'C1', 'customer_name': 'A'},
+            {'customer_name': 'no id', 'phone': '1'},
+        ]
+        with pytest.raises(ValueError):
+            cache_manager.upsert_many('customers', rows, key='customer_id')
+
+        with cache_manager.reader() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0] == 0
+
+    def test_get_records_by_ids(self, cache_manager):
+        """Test bulk lookup across more IDs than one statement can bind."""
+        rows = [{'customer_id': f'C{i}', 'customer_name': 'x'} for i in range(1500)]
+        cache_manager.upsert_many('customers', rows)
+
+        cache_manager.connect()
+        found = cache_manager.get_records_by_ids(
+            'customers', [f'C{i}' for i in range(0, 1500, 2)] + ['missing'], 'customer_id'
+        )
+        cache_manager.close()
+        assert len(found) == 750
+        assert 'missing' not in found
+
+
+class TestFind:
+    """Test suite for parameterised find()/find_one()."""
+
+    @pytest.fixture
+    def customers(self, cache_manager):
+        rows = [
+            {'customer_id': 'C1', 'customer_name': "O'Neill's", 'credit_limit': 100, 'notes': None},
+            {'customer_id': 'C2', 'customer_name': 'The Crown', 'credit_limit': 500, 'notes': 'cask only'},
+            {'customer_id': 'C3', 'customer_name': 'The Swan', 'credit_limit': 250, 'notes': None},
+        ]
+        cache_manager.upsert_many('customers', rows)
+        cache_manager.connect()
+        yield cache_manager
+        cache_manager.close()
+
+    def test_values_are_bound_not_interpolated(self, customers):
+        """Test that quotes in values need no escaping."""
+        found = customers.find('customers', where={'customer_name': "O'Neill's"})
+        assert [r['customer_id'] for r in found] == ['C1']
+
+    def test_operators_and_order(self, customers):
+        """Test comparison operators, LIKE and ORDER BY."""
+        found = customers.find(
+            'customers',
+            where={'credit_limit >=': 250, 'customer_name LIKE': 'The %'},
+            order_by='credit_limit DESC'
+        )
+        assert [r['customer_id'] for r in found] == ['C2', 'C3']
+
+    def test_list_becomes_in(self, customers):
+        """Test that list values become IN / NOT IN."""
+        assert len(customers.find('customers', where={'customer_id': ['C1', 'C3']})) == 2
+        assert len(customers.find('customers', where={'customer_id !=': ['C1', 'C3']})) == 1
+        assert customers.find('customers', where={'customer_id': []}) == []
+
+    def test_none_becomes_is_null(self, customers):
+        """Test that None matches NULL rather than nothing."""
+        assert len(customers.find('customers', where={'notes': None})) == 2
+        assert len(customers.find('customers', where={'notes !=': None})) == 1
+
+    def test_none_in_list_matches_null(self, customers):
+        """Test that None among list values adds an IS NULL alternative."""
+        found = customers.find('customers', where={'notes': [None, 'cask only']}, order_by='customer_id')
+        assert [r['customer_id'] for r in found] == ['C1', 'C2', 'C3']
+        found = customers.find('customers', where={'notes !=': [None, 'bottles']})
+        assert [r['customer_id'] for r in found] == ['C2']
+        assert len(customers.find('customers', where={'notes': [None]})) == 2
+
+    def test_find_one_and_limit(self, customers):
+        """Test single-row and limited lookups."""
+        assert customers.find_one('customers', where={'customer_id': 'C2'})['customer_name'] == 'The Crown'
+        assert customers.find_one('customers', where={'customer_id': 'missing'}) is None
+        assert len(customers.find('customers', order_by='customer_id', limit=2)) == 2
+
+    def test_unknown_column_is_rejected(self, customers):
+        """Test that identifiers are checked against the schema."""
+        with pytest.raises(ValueError):
+            customers.find('customers', where={'customer_id = 1 OR 1': 1})
+        with pytest.raises(ValueError):
+            customers.find('customers', order_by='customer_id; DROP TABLE customers')
+
+    def test_where_clause_is_deprecated(self, customers):
+        """Test that raw where_clause strings still work but warn."""
+        with pytest.warns(DeprecationWarning):
+            found = customers.get_all_records('customers', "customer_id = 'C1'")
+        assert len(found) == 1
+
+
+class TestIterRecords:
+    """Test suite for the streaming iter_records()."""
+
+    @pytest.fixture
+    def sales(self, cache_manager):
+        cache_manager.upsert_many('sales', [
+            {'sale_id': f'S{i:04d}', 'customer_id': f'C{i % 3}', 'status': 'reserved' if i % 2 else 'delivered',
+             'line_total': float(i)}
+            for i in range(1200)
+        ])
+        return cache_manager
+
+    def test_rows_have_attribute_and_key_access(self, sales):
+        """Test that compact rows read like the dicts find() returns."""
+        row = next(sales.iter_records('sales', where={'sale_id': 'S0007'}))
+        assert row.customer_id == 'C1'
+        assert row['line_total'] == 7.0
+        assert row.get('notes', 'none') is None
+        assert row.get('no_such_column', 'x') == 'x'
+        sales.connect()
+        assert dict(row) == sales.find_one('sales', where={'sale_id': 'S0007'})
+        sales.close()
+        assert not hasattr(row, '__dict__')
+
+    def test_streams_in_batches_with_filter_and_order(self, sales):
+        """Test that all matching rows arrive, in order, across fetchmany batches."""
+        ids = [r.sale_id for r in sales.iter_records(
+            'sales', where={'status': 'reserved'}, order_by='sale_id DESC', batch_size=100
+        )]
+        assert len(ids) == 600
+        assert ids == sorted(ids, reverse=True)
+
+    def test_columns_limit_what_is_read(self, sales):
+        """Test that only the requested columns are selected."""
+        row = next(sales.iter_records('sales', columns=['sale_id', 'status']))
+        assert row.keys() == ('sale_id', 'status')
+        with pytest.raises(ValueError):
+            next(sales.iter_records('sales', columns=['sale_id', 'bogus']))
+
+    def test_other_queries_while_iterating(self, sales):
+        """Test that cache calls inside the loop do not disturb the stream."""
+        count = 0
+        sales.connect()
+        for row in sales.iter_records('sales', batch_size=50):
+            assert sales.get_record('sales', row.sale_id, 'sale_id')['sale_id'] == row.sale_id
+            count += 1
+        sales.close()
+        assert count == 1200
+        assert sales.connection is None
+
+
+class TestChangeCapture:
+    """Test suite for the sync_queue change capture triggers."""
+
+    def test_writes_are_queued_and_coalesced(self, cache_manager):
+        """Test that every write is logged and collapses to one entry per record."""
+        cache_manager.connect()
+        cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+        cache_manager.update_record('customers', 'C1', {'customer_name': 'B'}, 'customer_id')
+        cache_manager.insert_record('customers', {'customer_id': 'C2', 'customer_name': 'C'})
+        cache_manager.delete_record('customers', 'C1', 'customer_id')
+
+        changes = cache_manager.get_queued_changes()
+        cache_manager.close()
+        assert [(c['record_id'], c['operation']) for c in changes] == [('C2', 'insert'), ('C1', 'delete')]
+
+    def test_suspended_writes_are_not_queued(self, cache_manager):
+        """Test that capture_suspended() keeps remote data out of the queue."""
+        with cache_manager.capture_suspended():
+            with cache_manager.capture_suspended():
+                cache_manager.cursor.execute(
+                    "INSERT INTO customers (customer_id, customer_name) VALUES ('C1', 'A')"
+                )
+            cache_manager.cursor.execute(
+                "INSERT INTO customers (customer_id, customer_name) VALUES ('C2', 'B')"
+            )
+        cache_manager.mark_synced('customers', ['C1', 'C2'])
+
+        cache_manager.connect()
+        assert cache_manager.pending_change_count() == 0
+        cache_manager.insert_record('customers', {'customer_id': 'C3', 'customer_name': 'C'})
+        assert cache_manager.pending_change_count() == 1
+        cache_manager.close()
+
+    def test_acknowledge_keeps_later_writes(self, cache_manager):
+        """Test that a write made during a push survives the acknowledgement."""
+        cache_manager.connect()
+        cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+        [change] = cache_manager.get_queued_changes()
+        cache_manager.update_record('customers', 'C1', {'customer_name': 'B'}, 'customer_id')
+        cache_manager.acknowledge_change('customers', 'C1', change['queue_id'])
+
+        remaining = cache_manager.get_queued_changes()
+        cache_manager.close()
+        assert [c['operation'] for c in remaining] == ['update']
+
+    def test_terminal_id_is_stable_and_not_queued(self, cache_manager):
+        """Test that the terminal ID is generated once and kept out of the queue."""
+        terminal_id = cache_manager.terminal_id()
+        assert len(terminal_id) == 12
+        assert cache_manager.terminal_id() == terminal_id
+
+        cache_manager.connect()
+        assert cache_manager.pending_change_count() == 0
+        cache_manager.close()
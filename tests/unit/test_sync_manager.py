@@ -0,0 +1,957 @@
+"""
+Unit tests for SyncManager
+
+Runs the pull paths against an in-memory stand-in for GoogleSheetsClient.
+"""
+
+import re
+from datetime import date
+
+import pytest
+
+from src.config.constants import TABLES
+from src.data_access.change_log import CHANGE_LOG_HEADERS, CHANGE_LOG_SHEET, ChangeLog, change_row
+from src.data_access.connectivity_monitor import ConnectivityMonitor
+from src.data_access.rate_limiter import RateLimiter
+from src.data_access.sheet_shards import ShardPolicy
+from src.data_access.sync_manager import SyncManager
+
+pytestmark = pytest.mark.sync
+
+
+class FakeSheetsClient:
+    """Minimal GoogleSheetsClient replacement holding sheets as lists of rows."""
+
+    def __init__(self, sheets=None):
+        self.is_authenticated = True
+        self.spreadsheet_id = 'fake'
+        self.sheets = sheets or {}
+        self.appended = []
+        self.updated = []
+        self.cleared = []
+        self.calls = []
+        self.column_reads = []
+        self.protected = set()
+        self.hidden = set()
+        self.unreadable = set()
+
+    def read_sheet(self, sheet_name, range_notation=None):
+        self.calls.append('read_sheet')
+        rows = self.sheets.get(sheet_name, [])
+        if range_notation:
+            # Only the rows matter here ("A5:G" -> from row 5, "A5:G9" -> rows 5 to 9)
+            bounds = re.match(r'[A-Z]*(\d+)(?::[A-Z]*(\d*))?', range_notation)
+            if bounds:
+                end = int(bounds.group(2)) if bounds.group(2) else None
+                rows = rows[int(bounds.group(1)) - 1:end]
+        return [list(row) for row in rows]
+
+    def read_sheets(self, sheet_names, chunk_size=None):
+        self.calls.append('read_sheets')
+        self.requested = list(sheet_names)
+        # Sheets a test did not fill read as bootstrapped but empty
+        return {name: None if name in self.unreadable else
+                [list(row) for row in self.sheets.get(name, [['id', 'last_modified']])]
+                for name in self.requested}
+
+    def read_column(self, sheet_name, column_index=0):
+        self.calls.append('read_column')
+        self.column_reads.append(sheet_name)
+        if sheet_name in self.unreadable:
+            return None
+        return [row[column_index] if len(row) > column_index else ''
+                for row in self.sheets.get(sheet_name, [])]
+
+    def append_rows(self, sheet_name, rows):
+        self.calls.append('append_rows')
+        if sheet_name != CHANGE_LOG_SHEET:
+            self.appended.extend((sheet_name, row) for row in rows)
+        sheet = self.sheets.setdefault(sheet_name, [])
+        first_row = len(sheet) + 1
+        sheet.extend(list(row) for row in rows)
+        return first_row
+
+    def batch_update(self, updates):
+        self.calls.append('batch_update')
+        for update in updates:
+            sheet_name, cell = update['range'].split('!')
+            row_index = int(cell[1:])
+            self.updated.append((sheet_name, row_index, update['values'][0]))
+            sheet = self.sheets.setdefault(sheet_name, [])
+            sheet.extend([] for _ in range(row_index - len(sheet)))
+            sheet[row_index - 1] = list(update['values'][0])
+        return True
+
+    def clear_rows(self, sheet_name, row_indexes):
+        self.calls.append('clear_rows')
+        self.cleared.extend((sheet_name, row_index) for row_index in row_indexes)
+        for row_index in row_indexes:
+            self.sheets[sheet_name][row_index - 1] = []
+        return True
+
+    def list_sheets(self):
+        self.calls.append('list_sheets')
+        return {name: {'sheet_id': name, 'protected': name in self.protected, 'hidden': name in self.hidden}
+                for name in self.sheets}
+
+    def ensure_sheet(self, sheet_name, headers):
+        self.calls.append('ensure_sheet')
+        self.sheets.setdefault(sheet_name, [list(headers)])
+        return True
+
+    def protect_sheet(self, sheet_id, description, warning_only=False):
+        self.calls.append('protect_sheet')
+        self.protected.add(sheet_id)
+        return True
+
+    def hide_sheet(self, sheet_id):
+        self.calls.append('hide_sheet')
+        self.hidden.add(sheet_id)
+        return True
+
+    def delete_sheet(self, sheet_id):
+        self.calls.append('delete_sheet')
+        del self.sheets[sheet_id]
+        return True
+
+
+@pytest.fixture
+def make_sync_manager(cache_manager, monkeypatch):
+    """Build a SyncManager over the temp cache that never touches the network."""
+    def factory(sheets=None):
+        manager = SyncManager(FakeSheetsClient(sheets), cache_manager)
+        monkeypatch.setattr(manager, 'check_connection', lambda: True)
+        return manager
+
+    return factory
+
+
+RECIPE_HEADERS = ['recipe_id', 'recipe_name', 'style', 'last_modified']
+
+
+class TestPull:
+    """Test suite for pulling sheet data into the cache."""
+
+    def test_full_sync_replaces_table(self, make_sync_manager, cache_manager):
+        """Test that a full sync writes every sheet row as synced."""
+        sheets = {TABLES['recipes']: [RECIPE_HEADERS] + [
+            [f'R{i}', f'Beer {i}', 'IPA', '2026-01-01 00:00:00'] for i in range(50)
+        ]}
+        manager = make_sync_manager(sheets)
+
+        results = manager.full_sync_from_sheets()
+        assert results[TABLES['recipes']] == 50
+
+        cache_manager.connect()
+        recipes = cache_manager.get_all_records('recipes')
+        cache_manager.close()
+        assert len(recipes) == 50
+        assert {r['sync_status'] for r in recipes} == {'synced'}
+
+    def test_incremental_sync_applies_new_and_changed_rows(self, make_sync_manager, cache_manager):
+        """Test that incremental pull inserts new rows and applies remote edits."""
+        cache_manager.upsert_many('recipes', [
+            {'recipe_id': 'R1', 'recipe_name': 'Old Name', 'last_modified': '2026-01-01 00:00:00',
+             'sync_status': 'synced'},
+        ])
+        sheets = {TABLES['recipes']: [
+            RECIPE_HEADERS,
+            ['R1', 'New Name', 'Bitter', '2026-02-01 00:00:00'],
+            ['R2', 'Second', 'Stout', '2026-02-01 00:00:00'],
+            ['R3', 'Skewed', 'Mild', '2019-01-01 00:00:00'],
+        ]}
+        manager = make_sync_manager(sheets)
+        manager.last_sync_time = '2026-01-15 00:00:00'
+
+        result = manager.incremental_sync()
+        # R3's clock was behind, but this terminal has never seen the row
+        assert result['pulled'] == 3
+
+        cache_manager.connect()
+        r1 = cache_manager.get_record('recipes', 'R1', 'recipe_id')
+        r3 = cache_manager.get_record('recipes', 'R3', 'recipe_id')
+        cache_manager.close()
+        assert r1['recipe_name'] == 'New Name'
+        assert r3['recipe_name'] == 'Skewed'
+
+    def test_unchanged_rows_are_skipped_without_lookups(self, make_sync_manager, cache_manager,
+                                                        monkeypatch):
+        """Test that a scan compares row hashes and only looks up rows that differ."""
+        sheets = {TABLES['recipes']: [RECIPE_HEADERS] + [
+            [f'R{i}', f'Beer {i}', 'IPA', '2026-01-01 00:00:00'] for i in range(20)
+        ]}
+        manager = make_sync_manager(sheets)
+        assert manager.incremental_sync()['pulled'] == 20
+
+        lookups = []
+        get_records_by_ids = cache_manager.get_records_by_ids
+        monkeypatch.setattr(cache_manager, 'get_records_by_ids',
+                            lambda table, ids, **kw: lookups.append(list(ids)) or
+                            get_records_by_ids(table, ids, **kw))
+
+        # Scan again, with an edit stamped earlier than the last sync
+        sheets[TABLES['recipes']][5] = ['R4', 'Edited', 'IPA', '2026-02-01 00:00:00']
+        manager._set_change_log_offset(None)
+        assert manager.incremental_sync()['pulled'] == 1
+        assert lookups == [['R4']]
+
+        cache_manager.connect()
+        assert cache_manager.get_record('recipes', 'R4', 'recipe_id')['recipe_name'] == 'Edited'
+        cache_manager.close()
+
+    def test_pull_is_one_batch_read_of_tracked_tables(self, make_sync_manager, cache_manager):
+        """Test that the pull batches its reads and skips tables without last_modified."""
+        manager = make_sync_manager()
+
+        manager.incremental_sync()
+        client = manager.sheets_client
+        assert client.calls.count('read_sheets') == 1
+        assert 'read_sheet' not in client.calls
+        assert TABLES['recipes'] in client.requested
+        assert TABLES['customers'] not in client.requested  # no last_modified column
+
+    def test_sync_run_is_recorded(self, make_sync_manager, cache_manager):
+        """Test that an incremental sync stores one run with its rows and table timings."""
+        cache_manager.upsert_many('customers', [{'customer_id': 'C1', 'customer_name': 'Pub'}])
+        sheets = {TABLES['recipes']: [RECIPE_HEADERS, ['R1', 'Beer', 'IPA', '2026-01-01 00:00:00']]}
+        manager = make_sync_manager(sheets)
+
+        manager.incremental_sync()
+
+        runs = manager.telemetry.recent()
+        # The push inside the incremental sync belongs to the same run
+        assert [run['kind'] for run in runs] == ['incremental']
+        assert (runs[0]['rows_pulled'], runs[0]['rows_pushed']) == (1, 1)
+        assert {'recipes', 'customers'} <= set(runs[0]['table_timings'])
+
+
+class TestPush:
+    """Test suite for pushing local changes to the sheet."""
+
+    def test_pending_rows_are_pushed_in_header_order(self, make_sync_manager, cache_manager):
+        """Test pushed rows line up with the schema headers, not dict order."""
+        cache_manager.upsert_many('customers', [
+            {'customer_name': 'The Crown', 'customer_id': 'C1', 'sync_status': 'pending'}
+        ])
+        manager = make_sync_manager()
+
+        result = manager.sync_local_changes_to_sheets()
+        assert result == {'synced': 1, 'failed': 0}
+
+        headers = cache_manager.schema.sheet_headers()['Customers']
+        sheet, row = manager.sheets_client.appended[0]
+        assert sheet == 'Customers'
+        assert dict(zip(headers, row))['customer_name'] == 'The Crown'
+
+        cache_manager.connect()
+        assert cache_manager.get_record('customers', 'C1', 'customer_id')['sync_status'] == 'synced'
+        cache_manager.close()
+
+    def test_rows_follow_the_sheet_header(self, make_sync_manager, cache_manager):
+        """Test that rows line up with the sheet's header order, which may not be the local one."""
+        local = cache_manager.schema.get('customers').sheet_columns
+        # Another terminal's order: the ID not first, and no delivery_area yet
+        headers = ['customer_name', 'customer_id'] + [
+            c for c in local if c not in ('customer_id', 'customer_name', 'delivery_area')
+        ]
+        manager = make_sync_manager({'Customers': [headers, ['Old Swan', 'C1']]})
+        cache_manager.upsert_many('customers', [
+            {'customer_id': 'C1', 'customer_name': 'Swan', 'sync_status': 'pending'},
+            {'customer_id': 'C2', 'customer_name': 'Crown', 'delivery_area': 'North', 'sync_status': 'pending'},
+        ])
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 2, 'failed': 0}
+        sheet = manager.sheets_client.sheets['Customers']
+        assert sheet[0] == headers + ['delivery_area']
+        assert len(sheet) == 3
+        rows = {row[1]: dict(zip(sheet[0], row)) for row in sheet[1:]}
+        assert rows['C1']['customer_name'] == 'Swan'
+        assert rows['C2']['delivery_area'] == 'North'
+
+    def test_queue_is_drained_and_deletes_propagate(self, make_sync_manager, cache_manager):
+        """Test that queued inserts, edits and deletes reach the sheet once each."""
+        sheets = {'Customers': [['customer_id', 'customer_name'], ['C2', 'Old Swan']]}
+        manager = make_sync_manager(sheets)
+
+        cache_manager.connect()
+        cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+        cache_manager.update_record('customers', 'C1', {'customer_name': 'B'}, 'customer_id')
+        cache_manager.insert_record('customers', {'customer_id': 'C2', 'customer_name': 'Swan'})
+        cache_manager.delete_record('customers', 'C2', 'customer_id')
+        cache_manager.close()
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 2, 'failed': 0}
+        assert len(manager.sheets_client.appended) == 1
+        assert manager.sheets_client.appended[0][1][1] == 'B'
+        assert manager.sheets_client.cleared == [('Customers', 2)]
+
+        cache_manager.connect()
+        assert cache_manager.pending_change_count() == 0
+        cache_manager.close()
+        assert manager.sync_local_changes_to_sheets() == {'pending': 0}
+
+    def test_failed_push_stays_queued(self, make_sync_manager, cache_manager):
+        """Test that a rejected write is retried on the next sync."""
+        manager = make_sync_manager()
+        manager.sheets_client.append_rows = lambda sheet_name, rows: False
+
+        cache_manager.connect()
+        cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+        cache_manager.close()
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 0, 'failed': 1}
+        cache_manager.connect()
+        changes = cache_manager.get_queued_changes()
+        cache_manager.close()
+        assert [(c['record_id'], c['attempts']) for c in changes] == [('C1', 1)]
+
+    def test_unreadable_id_column_keeps_changes_queued(self, make_sync_manager, cache_manager):
+        """Test that a failed ID-column read does not turn updates into appends."""
+        sheets = {'Customers': [['customer_id', 'customer_name'], ['C1', 'A']]}
+        manager = make_sync_manager(sheets)
+        manager.sheets_client.read_column = lambda sheet_name, column_index=0: None
+
+        cache_manager.connect()
+        cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'B'})
+        cache_manager.close()
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 0, 'failed': 1}
+        assert manager.sheets_client.appended == []
+        assert manager.row_index.row_count('customers') is None
+        cache_manager.connect()
+        assert cache_manager.pending_change_count() == 1
+        cache_manager.close()
+
+    def test_push_is_batched_per_table(self, make_sync_manager, cache_manager):
+        """Test that a busy table costs two reads, one log append and one call per kind of write."""
+        headers = cache_manager.schema.get('customers').sheet_columns
+        sheets = {'Customers': [headers] + [
+            [f'C{i}', f'Pub {i}'] for i in range(10)
+        ]}
+        manager = make_sync_manager(sheets)
+
+        cache_manager.upsert_many('customers', [
+            {'customer_id': f'C{i}', 'customer_name': 'Renamed'} for i in range(5)
+        ])
+        cache_manager.connect()
+        for i in range(10, 30):
+            cache_manager.insert_record('customers', {'customer_id': f'C{i}', 'customer_name': 'New'})
+        cache_manager.close()
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 25, 'failed': 0}
+        client = manager.sheets_client
+        # The header row and the ID column are read once per session
+        assert sorted(client.calls) == ['append_rows', 'append_rows', 'batch_update', 'read_column', 'read_sheet']
+        assert [row_index for _, row_index, _ in client.updated] == [2, 3, 4, 5, 6]
+        assert len(client.appended) == 20
+
+    def test_failed_batch_only_requeues_its_changes(self, make_sync_manager, cache_manager):
+        """Test that a failed append leaves updates acknowledged."""
+        sheets = {'Customers': [['customer_id', 'customer_name'], ['C1', 'Old']]}
+        manager = make_sync_manager(sheets)
+        append_rows = manager.sheets_client.append_rows
+        manager.sheets_client.append_rows = (
+            lambda sheet_name, rows: sheet_name != 'Customers' and append_rows(sheet_name, rows)
+        )
+
+        cache_manager.upsert_many('customers', [
+            {'customer_id': 'C1', 'customer_name': 'A', 'sync_status': 'pending'},
+            {'customer_id': 'C2', 'customer_name': 'B', 'sync_status': 'pending'},
+        ])
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 1, 'failed': 1}
+        cache_manager.connect()
+        queued = [c['record_id'] for c in cache_manager.get_queued_changes()]
+        cache_manager.close()
+        assert queued == ['C2']
+
+    def test_repeat_push_reads_nothing(self, make_sync_manager, cache_manager):
+        """Test that once the row index exists, pushing a few edits costs no reads."""
+        manager = make_sync_manager({'Customers': [['customer_id', 'customer_name']]})
+        cache_manager.connect()
+        for i in range(5):
+            cache_manager.insert_record('customers', {'customer_id': f'C{i}', 'customer_name': 'New'})
+        cache_manager.close()
+        manager.sync_local_changes_to_sheets()
+
+        client = manager.sheets_client
+        client.calls.clear()
+        cache_manager.connect()
+        cache_manager.update_record('customers', 'C3', {'customer_name': 'Edited'}, 'customer_id')
+        cache_manager.insert_record('customers', {'customer_id': 'C9', 'customer_name': 'Newer'})
+        cache_manager.close()
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 2, 'failed': 0}
+        assert sorted(client.calls) == ['append_rows', 'append_rows', 'batch_update']
+        assert client.updated[-1][1] == 5  # header + C0..C2, so C3 is row 5
+
+    def test_unchanged_rows_are_not_rewritten(self, make_sync_manager, cache_manager):
+        """Test that a queued record whose content is already on the sheet is skipped."""
+        manager = make_sync_manager()
+        cache_manager.connect()
+        cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+        cache_manager.close()
+        manager.sync_local_changes_to_sheets()
+
+        cache_manager.connect()
+        cache_manager.update_record('customers', 'C1', {'customer_name': 'B'}, 'customer_id')
+        cache_manager.update_record('customers', 'C1', {'customer_name': 'A'}, 'customer_id')
+        cache_manager.close()
+
+        manager.sheets_client.calls.clear()
+        assert manager.sync_local_changes_to_sheets() == {'synced': 1, 'failed': 0}
+        assert manager.sheets_client.calls == []
+
+    def test_hand_edited_sheet_is_reindexed_on_pull(self, make_sync_manager, cache_manager):
+        """Test that rows shifted by hand are found again before the next push."""
+        sheets = {TABLES['recipes']: [RECIPE_HEADERS] + [
+            [f'R{i}', f'Beer {i}', 'IPA', '2026-01-01 00:00:00'] for i in range(5)
+        ]}
+        manager = make_sync_manager(sheets)
+        manager.full_sync_from_sheets()
+
+        # Someone inserts a row near the top and sorts the rest
+        sheet = manager.sheets_client.sheets[TABLES['recipes']]
+        sheet[1:] = [['R99', 'Guest', 'Stout', '2026-01-01 00:00:00']] + sorted(sheet[1:], reverse=True)
+        manager.last_sync_time = '2026-06-01 00:00:00'
+
+        cache_manager.connect()
+        cache_manager.update_record('recipes', 'R2', {'style': 'Pale'}, 'recipe_id')
+        cache_manager.close()
+
+        manager.incremental_sync()
+        sheet_name, row_index, values = manager.sheets_client.updated[-1]
+        assert sheet[row_index - 1][0] == 'R2'
+        assert TABLES['recipes'] not in manager.sheets_client.column_reads
+
+    def test_unexpected_append_position_invalidates_index(self, make_sync_manager, cache_manager):
+        """Test that rows appended by someone else force a re-read next push."""
+        manager = make_sync_manager({'Customers': [['customer_id', 'customer_name']]})
+        cache_manager.connect()
+        cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+        cache_manager.close()
+        manager.sync_local_changes_to_sheets()
+
+        manager.sheets_client.sheets['Customers'].append(['C50', 'Other terminal'])
+        cache_manager.connect()
+        cache_manager.insert_record('customers', {'customer_id': 'C2', 'customer_name': 'B'})
+        cache_manager.close()
+        manager.sync_local_changes_to_sheets()
+        assert manager.row_index.row_count('customers') is None
+
+        manager.sheets_client.calls.clear()
+        cache_manager.connect()
+        cache_manager.update_record('customers', 'C2', {'customer_name': 'C'}, 'customer_id')
+        cache_manager.close()
+        manager.sync_local_changes_to_sheets()
+        assert manager.sheets_client.calls == ['read_column', 'append_rows', 'batch_update']
+        assert manager.sheets_client.updated[-1][1] == 4
+
+    def test_pulled_rows_are_not_queued(self, make_sync_manager, cache_manager):
+        """Test that data arriving from Sheets is not pushed straight back."""
+        sheets = {TABLES['recipes']: [RECIPE_HEADERS, ['R1', 'Beer', 'IPA', '2026-02-01 00:00:00']]}
+        manager = make_sync_manager(sheets)
+        manager.last_sync_time = '2026-01-01 00:00:00'
+
+        result = manager.incremental_sync()
+        assert result['pulled'] == 1
+        assert result['pushed'] == {'pending': 0}
+
+
+class TestConnectivity:
+    """Test suite for gating syncs on the connectivity monitor."""
+
+    def test_syncs_read_the_monitor_instead_of_probing(self, make_sync_manager):
+        """Test that with a monitor attached, an offline sync returns at once without a probe."""
+        manager = make_sync_manager()
+        probes = []
+        manager.check_connection = lambda: probes.append(1) or True
+        manager.connectivity = ConnectivityMonitor(manager.check_connection)
+        manager.connectivity.is_online = False
+
+        assert manager.incremental_sync() == {'error': 'offline'}
+        assert manager.sync_local_changes_to_sheets() == {'error': 'offline'}
+        assert not manager.auto_sync_if_online()
+        assert probes == []
+
+        manager.connectivity.report_success()
+        assert 'error' not in manager.incremental_sync()
+        assert probes == []
+
+
+class TestQuota:
+    """Test suite for API quota handling."""
+
+    def test_background_sync_waits_for_quota(self, make_sync_manager):
+        """Test that auto-sync is skipped while the API budget is nearly spent."""
+        clock = [0.0]
+        manager = make_sync_manager()
+        limiter = RateLimiter({'read': 60, 'write': 60}, clock=lambda: clock[0])
+        manager.sheets_client.rate_limiter = limiter
+        for _ in range(9):
+            limiter.acquire('read')
+
+        assert manager.should_defer_sync()
+        assert manager.auto_sync_if_online() is False
+        assert manager.sheets_client.calls == []
+
+        clock[0] += 60
+        assert not manager.should_defer_sync()
+
+
+class TestChangeLog:
+    """Test suite for delta pulls through the _Changes sheet."""
+
+    @staticmethod
+    def log_change(manager, cache_manager, table_name, record_id, record=None, terminal='other'):
+        row = change_row(terminal, cache_manager.schema.get(table_name), record_id, record)
+        manager.sheets_client.sheets[CHANGE_LOG_SHEET].append(row)
+
+    @staticmethod
+    def get_recipe(cache_manager, recipe_id):
+        cache_manager.connect()
+        try:
+            return cache_manager.get_record('recipes', recipe_id, 'recipe_id')
+        finally:
+            cache_manager.close()
+
+    def test_pull_reads_only_new_log_rows(self, make_sync_manager, cache_manager):
+        """Test that once following the log, a pull reads just the rows after its offset."""
+        manager = make_sync_manager({TABLES['recipes']: [RECIPE_HEADERS]})
+        manager.incremental_sync()
+        assert manager._change_log_offset() == 1
+
+        self.log_change(manager, cache_manager, 'recipes', 'R1', {
+            'recipe_id': 'R1', 'recipe_name': 'Guest', 'style': 'Stout',
+            'last_modified': '2026-03-01 00:00:00'
+        })
+        manager.sheets_client.calls.clear()
+
+        assert manager.incremental_sync()['pulled'] == 1
+        assert manager.sheets_client.calls == ['read_sheet']
+        assert self.get_recipe(cache_manager, 'R1')['recipe_name'] == 'Guest'
+        assert manager._change_log_offset() == 2
+
+        # Nothing new: the log range is empty and nothing is applied
+        assert manager.incremental_sync()['pulled'] == 0
+
+    def test_logged_deletes_are_applied(self, make_sync_manager, cache_manager):
+        """Test that another terminal's delete removes the local record, unqueued."""
+        manager = make_sync_manager({TABLES['recipes']: [
+            RECIPE_HEADERS, ['R1', 'Beer', 'IPA', '2026-02-01 00:00:00']
+        ]})
+        manager.incremental_sync()
+        assert self.get_recipe(cache_manager, 'R1') is not None
+
+        self.log_change(manager, cache_manager, 'recipes', 'R1')
+        assert manager.incremental_sync()['pulled'] == 1
+        assert self.get_recipe(cache_manager, 'R1') is None
+
+        cache_manager.connect()
+        assert cache_manager.pending_change_count() == 0
+        cache_manager.close()
+
+    def test_pushes_are_logged_and_not_read_back(self, make_sync_manager, cache_manager):
+        """Test that own changes go to the log first and are skipped by the offset."""
+        manager = make_sync_manager({'Customers': [['customer_id', 'customer_name']]})
+        manager.incremental_sync()
+
+        cache_manager.connect()
+        cache_manager.insert_record('customers', {'customer_id': 'C1', 'customer_name': 'A'})
+        cache_manager.close()
+        manager.incremental_sync()
+
+        log = manager.sheets_client.sheets[CHANGE_LOG_SHEET]
+        events = ChangeLog.parse(log)
+        assert [(e['table_name'], e['record_id'], e['operation']) for e in events] == [
+            ('customers', 'C1', 'upsert')
+        ]
+        assert events[0]['record']['customer_name'] == 'A'
+        assert manager._change_log_offset() == len(log)
+
+    def test_unappliable_event_is_quarantined(self, make_sync_manager, cache_manager):
+        """Test that an event breaking a UNIQUE constraint is set aside and the log moves on."""
+        manager = make_sync_manager({TABLES['recipes']: [RECIPE_HEADERS]})
+        manager.incremental_sync()
+        for batch_id in ('B1', 'B2'):
+            self.log_change(manager, cache_manager, 'batches', batch_id, {
+                'batch_id': batch_id, 'gyle_number': 'G1', 'last_modified': '2026-03-01 00:00:00'
+            })
+        self.log_change(manager, cache_manager, 'recipes', 'R1', {
+            'recipe_id': 'R1', 'recipe_name': 'Guest', 'last_modified': '2026-03-01 00:00:00'
+        })
+
+        result = manager.incremental_sync()
+        assert result['pulled'] == 2 and result['quarantined'] == 1
+        assert manager._change_log_offset() == 4
+        assert self.get_recipe(cache_manager, 'R1')['recipe_name'] == 'Guest'
+
+        cache_manager.connect()
+        [entry] = cache_manager.get_quarantined_changes()
+        cache_manager.close()
+        assert (entry['source'], entry['table_name'], entry['record_id']) == ('change_log', 'batches', 'B2')
+        assert 'UNIQUE' in entry['error']
+
+        # Passed for good: the next sync neither retries nor reports it
+        assert 'quarantined' not in manager.incremental_sync()
+
+    def test_unreadable_log_is_not_reinitialised(self, make_sync_manager):
+        """Test that a failed read of the log neither appends a header nor counts as empty."""
+        manager = make_sync_manager({CHANGE_LOG_SHEET: [list(CHANGE_LOG_HEADERS)]})
+        manager.sheets_client.unreadable.add(CHANGE_LOG_SHEET)
+
+        assert manager._change_log_length() is None
+        assert manager.sheets_client.sheets[CHANGE_LOG_SHEET] == [list(CHANGE_LOG_HEADERS)]
+
+    def test_log_sheet_is_hidden_and_protected(self, make_sync_manager):
+        """Test that session housekeeping hides the log and protects it once."""
+        manager = make_sync_manager({CHANGE_LOG_SHEET: [list(CHANGE_LOG_HEADERS)]})
+        manager.incremental_sync()
+        manager._maintain_sheets(refresh=True)
+
+        client = manager.sheets_client
+        assert client.hidden == {CHANGE_LOG_SHEET} and client.protected == {CHANGE_LOG_SHEET}
+        assert client.calls.count('hide_sheet') == client.calls.count('protect_sheet') == 1
+
+    def test_unlogged_changes_are_not_written(self, make_sync_manager, cache_manager):
+        """Test that if the log append fails, no table is written and changes stay queued."""
+        headers = cache_manager.schema.get('customers').sheet_columns
+        manager = make_sync_manager({'Customers': [headers, ['C1', 'Old']]})
+        client = manager.sheets_client
+        append_rows = client.append_rows
+        client.append_rows = (
+            lambda sheet_name, rows: sheet_name != CHANGE_LOG_SHEET and append_rows(sheet_name, rows)
+        )
+
+        cache_manager.upsert_many('customers', [
+            {'customer_id': 'C1', 'customer_name': 'A', 'sync_status': 'pending'},
+            {'customer_id': 'C2', 'customer_name': 'B', 'sync_status': 'pending'},
+        ])
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 0, 'failed': 2}
+        assert client.updated == [] and client.appended == []
+        cache_manager.connect()
+        assert cache_manager.pending_change_count() == 2
+        cache_manager.close()
+
+
+class TestBootstrap:
+    """Test suite for the chunked, resumable initial upload."""
+
+    @staticmethod
+    def setup_customers(manager, cache_manager, count):
+        headers = cache_manager.schema.get('customers').sheet_columns
+        manager.sheets_client.sheets['Customers'] = [list(headers)]
+        manager.BOOTSTRAP_CHUNK_ROWS = 10
+        cache_manager.upsert_many('customers', [
+            {'customer_id': f'C{i:03d}', 'customer_name': f'Pub {i}'} for i in range(count)
+        ])
+
+    @staticmethod
+    def count_appends(client):
+        """Wrap append_rows to record the sheet of every request."""
+        requests = []
+        append_rows = client.append_rows
+
+        def counting(sheet_name, rows):
+            requests.append(sheet_name)
+            return append_rows(sheet_name, rows)
+        client.append_rows = counting
+        return requests
+
+    def test_tables_are_uploaded_in_chunks(self, make_sync_manager, cache_manager):
+        """Test one append per chunk, synced rows and no checkpoint left behind."""
+        manager = make_sync_manager()
+        self.setup_customers(manager, cache_manager, 25)
+        requests = self.count_appends(manager.sheets_client)
+
+        assert manager.bootstrap_sync() is True
+        assert requests.count('Customers') == 3
+        ids = [row[0] for row in manager.sheets_client.sheets['Customers'][1:]]
+        assert ids == [f'C{i:03d}' for i in range(25)]
+        assert manager._bootstrap_checkpoint() is None
+        # Rows were indexed as they were appended, so the first push reads nothing
+        assert manager.row_index.lookup('customers', ['C024'])['C024'][0] == 26
+
+        cache_manager.connect()
+        assert cache_manager.pending_change_count() == 0
+        cache_manager.close()
+
+    def test_interrupted_bootstrap_resumes_without_duplicates(self, make_sync_manager, cache_manager):
+        """Test that a restart continues after the last chunk that reached the sheet."""
+        manager = make_sync_manager()
+        self.setup_customers(manager, cache_manager, 25)
+        client = manager.sheets_client
+        append_rows = client.append_rows
+        uploads = []
+
+        def flaky(sheet_name, rows):
+            if sheet_name == 'Customers':
+                uploads.append(len(rows))
+                if len(uploads) == 2:
+                    # The rows land but the response is lost
+                    append_rows(sheet_name, rows)
+                    raise ConnectionError("connection reset")
+            return append_rows(sheet_name, rows)
+        client.append_rows = flaky
+
+        assert manager.bootstrap_sync() is False
+        checkpoint = manager._bootstrap_checkpoint()
+        assert checkpoint['table'] == 'customers' and checkpoint['after'] == 'C009'
+
+        client.append_rows = append_rows
+        # Without the sheet's IDs the restart cannot tell what landed
+        read_column = client.read_column
+        client.read_column = lambda sheet_name, column_index=0: None
+        assert manager.incremental_sync() == {'error': 'bootstrap_incomplete'}
+        assert len(client.sheets['Customers']) == 21
+
+        client.read_column = read_column
+        result = manager.incremental_sync()
+        assert 'error' not in result
+        ids = [row[0] for row in client.sheets['Customers'][1:]]
+        assert ids == [f'C{i:03d}' for i in range(25)]
+        assert manager._bootstrap_checkpoint() is None
+
+    def test_local_settings_stay_local(self, make_sync_manager, cache_manager):
+        """Test that terminal bookkeeping is neither uploaded nor replaced by a pull."""
+        manager = make_sync_manager()
+        manager.sheets_client.sheets['System_Settings'] = [
+            list(cache_manager.schema.get('system_settings').sheet_columns)
+        ]
+        cache_manager.upsert_many('system_settings', [
+            {'setting_key': 'brewery_name', 'setting_value': 'Hop House'}
+        ])
+        own_id = manager._terminal_id()
+        assert manager.bootstrap_sync() is True
+        uploaded = {row[0] for row in manager.sheets_client.sheets['System_Settings'][1:]}
+        assert uploaded == {'brewery_name'}
+
+        manager.sheets_client.sheets['System_Settings'].append(['terminal_id', 'someone-else'])
+        manager.full_sync_from_sheets()
+        manager.terminal_id = None
+        assert manager._terminal_id() == own_id
+
+
+class TestResume:
+    """Test suite for incremental syncs picking up where an interrupted one stopped."""
+
+    def test_delta_pull_checkpoints_each_page(self, make_sync_manager, cache_manager, monkeypatch):
+        """Test that the log offset moves page by page, so a failure keeps earlier pages."""
+        manager = make_sync_manager({TABLES['recipes']: [RECIPE_HEADERS]})
+        manager.incremental_sync()
+        manager.CHANGE_LOG_PAGE_ROWS = 2
+        for i in range(5):
+            TestChangeLog.log_change(manager, cache_manager, 'recipes', f'R{i}', {
+                'recipe_id': f'R{i}', 'recipe_name': f'Beer {i}', 'last_modified': '2026-03-01 00:00:00'
+            })
+
+        apply_events = manager._apply_change_events
+        pages = []
+
+        def drop_on_second_page(events, **kwargs):
+            pages.append(len(events))
+            if len(pages) == 2:
+                raise ConnectionError("connection reset")
+            return apply_events(events, **kwargs)
+        monkeypatch.setattr(manager, '_apply_change_events', drop_on_second_page)
+
+        assert 'error' in manager.incremental_sync()
+        assert manager._change_log_offset() == 3
+        assert TestChangeLog.get_recipe(cache_manager, 'R1') is not None
+
+        monkeypatch.setattr(manager, '_apply_change_events', apply_events)
+        manager.sheets_client.calls.clear()
+        assert manager.incremental_sync()['pulled'] == 3
+        assert manager.sheets_client.calls.count('read_sheet') == 2
+        assert manager._change_log_offset() == 6
+
+    def test_scan_pull_resumes_with_unfinished_tables(self, make_sync_manager, cache_manager,
+                                                      monkeypatch):
+        """Test that a scan cut short only reads the tables it had not applied."""
+        sheets = {TABLES['recipes']: [RECIPE_HEADERS, ['R1', 'Beer', 'IPA', '2026-01-01 00:00:00']]}
+        manager = make_sync_manager(sheets)
+        pull_table = manager._pull_scanned_table
+
+        def fail_recipes(table_key, sheets_data, index_key=None):
+            if table_key == 'recipes':
+                raise ConnectionError("connection reset")
+            return pull_table(table_key, sheets_data, index_key)
+        monkeypatch.setattr(manager, '_pull_scanned_table', fail_recipes)
+
+        manager.incremental_sync()
+        assert manager._change_log_offset() is None
+        done = manager._scan_checkpoint()['done']
+        assert done and 'recipes' not in done
+
+        monkeypatch.setattr(manager, '_pull_scanned_table', pull_table)
+        assert manager.incremental_sync()['pulled'] == 1
+        assert manager.sheets_client.requested == [TABLES['recipes']]
+        assert manager._scan_checkpoint() is None
+        assert manager._change_log_offset() == 1
+
+    def test_unreadable_or_headerless_sheet_is_not_marked_pulled(self, make_sync_manager, cache_manager):
+        """Test that a sheet that reads as None or empty keeps the scan's offset and checkpoint."""
+        sheets = {
+            TABLES['recipes']: [RECIPE_HEADERS, ['R1', 'Beer', 'IPA', '2026-01-01 00:00:00']],
+            TABLES['customers']: [],
+        }
+        manager = make_sync_manager(sheets)
+        manager.sheets_client.unreadable.add(TABLES['recipes'])
+
+        manager.incremental_sync()
+        assert manager._change_log_offset() is None
+        done = manager._scan_checkpoint()['done']
+        assert 'recipes' not in done and 'customers' not in done
+
+        manager.sheets_client.unreadable.clear()
+        sheets[TABLES['customers']].append(['customer_id', 'customer_name', 'last_modified'])
+        assert manager.incremental_sync()['pulled'] == 1
+        assert manager._scan_checkpoint() is None
+        assert manager._change_log_offset() == 1
+
+    def test_push_resumes_after_last_chunk_that_landed(self, make_sync_manager, cache_manager):
+        """Test that chunks pushed before a failure stay done and the rest stay queued."""
+        manager = make_sync_manager({'Customers': [['customer_id', 'customer_name']]})
+        manager.PUSH_CHUNK_ROWS = 2
+        client = manager.sheets_client
+        append_rows = client.append_rows
+        chunks = []
+
+        def drop_second_chunk(sheet_name, rows):
+            if sheet_name == 'Customers':
+                chunks.append(len(rows))
+                if len(chunks) == 2:
+                    return False
+            return append_rows(sheet_name, rows)
+        client.append_rows = drop_second_chunk
+
+        cache_manager.upsert_many('customers', [
+            {'customer_id': f'C{i}', 'customer_name': f'Pub {i}'} for i in range(5)
+        ])
+        assert manager.sync_local_changes_to_sheets() == {'synced': 2, 'failed': 2}
+        # The table stopped at the failed chunk
+        assert chunks == [2, 2]
+
+        client.append_rows = append_rows
+        assert manager.sync_local_changes_to_sheets() == {'synced': 3, 'failed': 0}
+        ids = [row[0] for row in client.sheets['Customers'][1:]]
+        assert sorted(ids) == [f'C{i}' for i in range(5)]
+
+
+def sale_row(headers, sale_id, sale_date):
+    return [{'sale_id': sale_id, 'sale_date': sale_date, 'quantity': '1'}.get(h, '') for h in headers]
+
+
+class TestShards:
+    """Test suite for the per-year sheets of append-only tables."""
+
+    @pytest.fixture
+    def sharded(self, make_sync_manager, cache_manager):
+        """SyncManager with 2025 and 2026 open, and the sales sheet headers."""
+        def factory(sheets=None):
+            manager = make_sync_manager(sheets)
+            manager.shards = ShardPolicy(today=lambda: date(2026, 6, 1))
+            return manager
+
+        return factory, cache_manager.schema.get('sales').sheet_columns
+
+    def test_push_goes_to_the_year_shard(self, sharded, cache_manager):
+        """Test that a new sale is appended to its year's shard, created on first use."""
+        factory, headers = sharded
+        manager = factory()
+        cache_manager.connect()
+        cache_manager.insert_record('sales', {'sale_id': 'S1', 'sale_date': '2026-03-01'})
+        cache_manager.close()
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 1, 'failed': 0}
+        assert manager.sheets_client.sheets['Sales_2026'][0] == headers
+        assert manager.sheets_client.appended[0][0] == 'Sales_2026'
+        assert 'Sales' not in manager.sheets_client.sheets
+
+    def test_closed_year_edit_is_rejected(self, sharded, cache_manager):
+        """Test that an edit to a closed year's record is set aside instead of written or retried."""
+        factory, headers = sharded
+        manager = factory({'Sales_2023': [headers, sale_row(headers, 'S1', '2023-05-01')]})
+        cache_manager.connect()
+        cache_manager.insert_record('sales', {'sale_id': 'S1', 'sale_date': '2023-05-01', 'quantity': 2})
+        cache_manager.close()
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 0, 'failed': 0, 'rejected': 1}
+        assert manager.sheets_client.appended == []
+        cache_manager.connect()
+        assert cache_manager.pending_change_count() == 0
+        [entry] = cache_manager.get_quarantined_changes()
+        cache_manager.close()
+        assert (entry['source'], entry['record_id'], entry['operation']) == ('rejected', 'S1', 'upsert')
+
+    def test_closed_year_delete_is_rejected(self, sharded, cache_manager):
+        """Test that deleting a closed year's record is found in its shard and rejected."""
+        factory, headers = sharded
+        manager = factory({
+            'Sales_2023': [headers, sale_row(headers, 'S1', '2023-05-01')],
+            'Sales_2026': [headers],
+        })
+        cache_manager.upsert_many('sales', [{'sale_id': 'S1', 'sale_date': '2023-05-01',
+                                             'sync_status': 'synced'}])
+        cache_manager.connect()
+        cache_manager.clear_queued_changes('sales')
+        cache_manager.delete_record('sales', 'S1', 'sale_id')
+        cache_manager.close()
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 0, 'failed': 0, 'rejected': 1}
+        assert manager.sheets_client.cleared == []
+        assert manager.sheets_client.sheets['Sales_2023'][1][0] == 'S1'
+        cache_manager.connect()
+        assert cache_manager.pending_change_count() == 0
+        assert cache_manager.get_quarantined_changes()[0]['operation'] == 'delete'
+        cache_manager.close()
+
+    def test_moved_record_leaves_its_old_shard(self, sharded, cache_manager):
+        """Test that changing a sale's year clears its row from the old shard."""
+        factory, headers = sharded
+        manager = factory({'Sales_2025': [headers, sale_row(headers, 'S1', '2025-12-31')]})
+        cache_manager.connect()
+        cache_manager.insert_record('sales', {'sale_id': 'S1', 'sale_date': '2026-01-01'})
+        cache_manager.close()
+
+        assert manager.sync_local_changes_to_sheets() == {'synced': 1, 'failed': 0}
+        assert manager.sheets_client.cleared == [('Sales_2025', 2)]
+        assert manager.sheets_client.sheets['Sales_2026'][1][:2] == ['S1', '2026-01-01']
+
+    def test_full_sync_reads_closed_shards_once(self, sharded, cache_manager, monkeypatch):
+        """Test that a closed shard is protected and not downloaded again."""
+        factory, headers = sharded
+        manager = factory({
+            'Sales_2023': [headers, sale_row(headers, 'S1', '2023-05-01')],
+            'Sales_2026': [headers, sale_row(headers, 'S2', '2026-05-01')],
+        })
+        reads = []
+        read_sheet = manager.sheets_client.read_sheet
+        monkeypatch.setattr(manager.sheets_client, 'read_sheet',
+                            lambda name, *args: reads.append(name) or read_sheet(name, *args))
+
+        assert manager.full_sync_from_sheets()['Sales'] == 2
+        assert manager.sheets_client.protected - {CHANGE_LOG_SHEET} == {'Sales_2023'}
+        assert {'Sales_2023', 'Sales_2026'} <= set(reads)
+
+        reads.clear()
+        assert manager.full_sync_from_sheets()['Sales'] == 1
+        assert 'Sales_2023' not in reads
+        cache_manager.connect()
+        assert {r['sale_id'] for r in cache_manager.get_all_records('sales')} == {'S1', 'S2'}
+        cache_manager.close()
+
+    def test_unsharded_sheet_is_split(self, sharded):
+        """Test that a sheet from before sharding is moved into year shards and deleted."""
+        factory, headers = sharded
+        manager = factory({
+            'Sales': [headers, sale_row(headers, 'S1', '2025-05-01'), sale_row(headers, 'S2', '2026-05-01')],
+            'Sales_2026': [headers, sale_row(headers, 'S2', '2026-05-01')],
+        })
+
+        manager.incremental_sync()
+        sheets = manager.sheets_client.sheets
+        assert 'Sales' not in sheets
+        assert [row[0] for row in sheets['Sales_2025'][1:]] == ['S1']
+        assert [row[0] for row in sheets['Sales_2026'][1:]] == ['S2']
@@ -0,0 +1,102 @@
+"""
+Unit tests for sync run telemetry.
+"""
+
+from collections import Counter
+
+import pytest
+
+from src.data_access.sync_telemetry import SyncTelemetry, percentile
+
+pytestmark = pytest.mark.sync
+
+
+class FakeClock:
+    """Clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeClient:
+    """Just the counters telemetry reads from GoogleSheetsClient."""
+
+    def __init__(self):
+        self.stats = Counter()
+        self.rate_limiter = type('Limiter', (), {'retry_count': 0, 'throttled_count': 0})()
+
+
+@pytest.fixture
+def telemetry(cache_manager):
+    return SyncTelemetry(cache_manager, clock=FakeClock())
+
+
+def record(telemetry, seconds, result=None, client=None):
+    run = telemetry.begin('incremental', client)
+    telemetry.clock.now += seconds
+    return telemetry.finish(run, {'pulled': 0} if result is None else result, client)
+
+
+class TestSyncTelemetry:
+    """Test suite for SyncTelemetry."""
+
+    def test_percentile_is_nearest_rank(self):
+        """Test nearest-rank percentiles on small samples."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 90) == 90
+        assert percentile(values, 99) == 99
+        assert percentile([3.0], 99) == 3.0
+        assert percentile([], 50) is None
+
+    def test_run_records_api_deltas_and_counters(self, telemetry):
+        """Test that a run stores only the API activity that happened during it."""
+        client = FakeClient()
+        client.stats.update({'read': 5, 'bytes_received': 100})
+
+        run = telemetry.begin('incremental', client)
+        client.stats.update({'read': 2, 'write': 1, 'bytes_sent': 40, 'bytes_received': 900})
+        client.rate_limiter.retry_count = 1
+        run.add('rows_pulled', 3)
+        with run.timing('recipes'):
+            telemetry.clock.now += 1.5
+        telemetry.finish(run, {'pulled': 3}, client)
+
+        stored = telemetry.recent(1)[0]
+        assert stored['status'] == 'ok'
+        assert (stored['api_reads'], stored['api_writes']) == (2, 1)
+        assert (stored['bytes_sent'], stored['bytes_received']) == (40, 900)
+        assert (stored['rows_pulled'], stored['retries']) == (3, 1)
+        assert stored['duration'] == 1.5
+        assert stored['table_timings'] == {'recipes': 1.5}
+
+    def test_percentiles_over_recent_successful_runs(self, telemetry):
+        """Test the rolling summary, with failures counted but not timed."""
+        for seconds in range(1, 11):
+            record(telemetry, seconds)
+        record(telemetry, 500, result={'error': 'boom'})
+
+        summary = telemetry.percentiles('incremental')
+        assert (summary['runs'], summary['errors']) == (11, 1)
+        assert summary['duration'] == {50: 5, 90: 9, 99: 10}
+
+        assert telemetry.percentiles('incremental', window=3)['duration'][50] == 9
+
+    def test_runs_that_never_started_are_not_recorded(self, telemetry):
+        """Test that offline and already-running results leave no row."""
+        assert record(telemetry, 1, result={'error': 'offline'}) is None
+        assert record(telemetry, 1, result={'error': 'sync_in_progress'}) is None
+        assert telemetry.recent() == []
+
+    def test_old_runs_are_pruned(self, telemetry):
+        """Test that only the newest KEEP_RUNS runs are kept."""
+        telemetry.KEEP_RUNS = 5
+        for seconds in range(8):
+            record(telemetry, seconds)
+
+        runs = telemetry.recent(100)
+        assert len(runs) == 5
+        assert runs[0]['duration'] == 7
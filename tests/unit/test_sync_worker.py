@@ -0,0 +1,113 @@
+"""
+Unit tests for the coalescing sync worker.
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.data_access.sync_worker import SyncWorker
+
+pytestmark = pytest.mark.sync
+
+
+class FakeSyncManager:
+    """Stands in for SyncManager, counting runs and optionally blocking in one."""
+
+    def __init__(self):
+        self.progress_callback = None
+        self.calls = 0
+        self.defer = False
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def should_defer_sync(self):
+        return self.defer
+
+    def incremental_sync(self):
+        self.calls += 1
+        self.entered.set()
+        if self.progress_callback:
+            self.progress_callback('push', pulled=0)
+        self.release.wait(5)
+        return {'pulled': 0, 'run': self.calls}
+
+
+@pytest.fixture
+def worker():
+    """A started worker with short intervals, stopped after the test."""
+    manager = FakeSyncManager()
+    sync_worker = SyncWorker(manager, debounce=0.1, max_delay=1.0, defer=0.1)
+    sync_worker.start()
+    yield sync_worker
+    manager.release.set()
+    sync_worker.stop(timeout=5)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class TestSyncWorker:
+    """Test suite for SyncWorker."""
+
+    def test_burst_of_saves_is_one_sync(self, worker):
+        """Test that ten quick requests are debounced into a single run."""
+        results = []
+        for _ in range(10):
+            worker.request('save', callback=results.append)
+            time.sleep(0.01)
+
+        wait_for(lambda: len(results) == 10)
+        assert worker.sync_manager.calls == 1
+        assert results == [{'pulled': 0, 'run': 1}] * 10
+
+    def test_user_request_skips_debounce(self, worker):
+        """Test that a user request runs at once and takes pending saves with it."""
+        worker.debounce = 30
+        worker.request('save')
+        done = threading.Event()
+        worker.request('manual', priority=SyncWorker.USER, callback=lambda result: done.set())
+
+        assert done.wait(2)
+        assert worker.sync_manager.calls == 1
+
+    def test_request_during_sync_runs_once_more(self, worker):
+        """Test that saves made while syncing are coalesced into one follow-up run."""
+        manager = worker.sync_manager
+        manager.release.clear()
+        worker.request('manual', priority=SyncWorker.USER)
+        assert manager.entered.wait(2)
+
+        for _ in range(5):
+            worker.request('save')
+        manager.release.set()
+
+        wait_for(lambda: worker.runs == 2)
+        time.sleep(0.2)
+        assert manager.calls == 2
+
+    def test_background_sync_waits_for_quota(self, worker):
+        """Test that background runs are deferred while user runs are not."""
+        manager = worker.sync_manager
+        manager.defer = True
+        events = []
+        worker.add_listener(events.append)
+
+        worker.request('timer')
+        wait_for(lambda: worker.deferred)
+        assert manager.calls == 0
+
+        worker.request('manual', priority=SyncWorker.USER)
+        wait_for(lambda: any(event['event'] == 'finished' for event in events))
+        assert manager.calls == 1
+
+        run = [event for event in events if event['event'] in ('started', 'progress', 'finished')]
+        assert [event['event'] for event in run] == ['started', 'progress', 'finished']
+        assert run[0]['reasons'] == ['timer', 'manual']
+        assert run[1]['stage'] == 'push'